@@ -179,6 +179,99 @@ class Cache(object):
         fun = '{0}.fetch'.format(self.driver)
         return self.modules[fun](bank, key, **self._kwargs)
 
+    def store_many(self, bank, data):
+        '''
+        Store several keys of a bank at once. Drivers which can batch writes
+        do so, for the others the keys are stored one by one.
+
+        .. versionadded:: Oxygen
+
+        :param bank:
+            The name of the location inside the cache which will hold the keys
+            and their associated data.
+
+        :param data:
+            A dict mapping key names to the data which will be stored under
+            them.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        fun = '{0}.store_many'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](bank, data, **self._kwargs)
+        for key, value in six.iteritems(data):
+            self.store(bank, key, value)
+
+    def fetch_many(self, bank, keys):
+        '''
+        Fetch several keys of a bank at once. Drivers which can batch reads
+        do so, for the others the keys are fetched one by one.
+
+        .. versionadded:: Oxygen
+
+        :param bank:
+            The name of the location inside the cache which will hold the keys
+            and their associated data.
+
+        :param keys:
+            An iterable of key names to fetch.
+
+        :return:
+            A dict mapping each of the keys to the python object fetched from
+            the cache, or to an empty dict if the key was not found.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        fun = '{0}.fetch_many'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](bank, keys, **self._kwargs)
+        return dict((key, self.fetch(bank, key)) for key in keys)
+
+    def list_with_data(self, bank, key=None, entries=None):
+        '''
+        List the entries of a bank together with their data.
+
+        .. versionadded:: Oxygen
+
+        :param bank:
+            The name of the location inside the cache which will hold the key
+            and its associated data.
+
+        :param key:
+            If not given the keys stored in ``bank`` are returned with their
+            data. If given, ``bank`` is treated as a bank of sub-banks and the
+            data stored under ``key`` in each of them is returned, e.g.
+            ``list_with_data('minions', 'data')`` returns the cached grains
+            and pillar of all the minions.
+
+        :param entries:
+            Limit the result to these keys (or sub-banks if ``key`` is given)
+            instead of all those listed in the bank.
+
+        :return:
+            A dict mapping the key or sub-bank names to the python object
+            fetched from the cache, or to an empty dict if nothing was found.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        fun = '{0}.list_with_data'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](bank, key=key, entries=entries, **self._kwargs)
+        if entries is None:
+            entries = self.ls(bank)
+        if key is None:
+            return self.fetch_many(bank, entries)
+        return dict(
+            (entry, self.fetch('{0}/{1}'.format(bank, entry), key))
+            for entry in entries
+        )
+
     def updated(self, bank, key):
         '''
         Get the last updated epoch for the specified key
@@ -354,6 +447,11 @@ class MemCache(Cache):
                 self.storage.popitem(last=False)
         self.storage[(bank, key)] = [time.time(), data]
 
+    def store_many(self, bank, data):
+        for key in data:
+            self.storage.pop((bank, key), None)
+        super(MemCache, self).store_many(bank, data)
+
     def flush(self, bank, key=None):
         self.storage.pop((bank, key), None)
         super(MemCache, self).flush(bank, key)
@@ -45,6 +45,7 @@ value to ``consul``:
 
 '''
 from __future__ import absolute_import
+import base64
 import logging
 try:
     import consul
@@ -53,10 +54,15 @@ except ImportError:
     HAS_CONSUL = False
 
 from salt.exceptions import SaltCacheError
+from salt.ext import six
+from salt.ext.six.moves import range
 
 log = logging.getLogger(__name__)
 api = None
 
+# The maximum number of operations Consul accepts in a single transaction
+_TXN_MAX_OPS = 64
+
 
 # Define the module's virtual name
 __virtualname__ = 'consul'
@@ -121,6 +127,86 @@ def fetch(bank, key):
         )
 
 
+def store_many(bank, data):
+    '''
+    Store several key values of a bank using Consul transactions, which hold
+    up to 64 operations each.
+    '''
+    if not hasattr(api, 'txn'):
+        # python-consul is too old to know about transactions
+        for key, value in six.iteritems(data):
+            store(bank, key, value)
+        return
+    operations = []
+    for key, value in six.iteritems(data):
+        c_data = __context__['serial'].dumps(value)
+        operations.append({'KV': {
+            'Verb': 'set',
+            'Key': '{0}/{1}'.format(bank, key),
+            'Value': base64.b64encode(c_data).decode('ascii'),
+        }})
+    for idx in range(0, len(operations), _TXN_MAX_OPS):
+        try:
+            api.txn.put(operations[idx:idx + _TXN_MAX_OPS])
+        except Exception as exc:
+            raise SaltCacheError(
+                'There was an error writing the keys of {0}: {1}'.format(
+                    bank, exc
+                )
+            )
+
+
+def _get_tree(bank):
+    '''
+    Fetch all the key values below a bank with a single recursive request.
+    Returns a dict mapping the path relative to the bank to the value.
+    '''
+    try:
+        _, values = api.kv.get(bank + '/', recurse=True)
+    except Exception as exc:
+        raise SaltCacheError(
+            'There was an error getting the keys of "{0}": {1}'.format(
+                bank, exc
+            )
+        )
+    return dict(
+        (value['Key'][len(bank) + 1:], value['Value'])
+        for value in values or []
+        if value['Value'] is not None
+    )
+
+
+def fetch_many(bank, keys):
+    '''
+    Fetch several key values of a bank with a single recursive request.
+    '''
+    tree = _get_tree(bank)
+    return dict(
+        (key, __context__['serial'].loads(tree[key]) if key in tree else {})
+        for key in keys
+    )
+
+
+def list_with_data(bank, key=None, entries=None):
+    '''
+    Return the keys of a bank, or the value of ``key`` in each of the
+    sub-banks of a bank, with their data using a single recursive request.
+    '''
+    tree = _get_tree(bank)
+    ret = {} if entries is None else dict((entry, {}) for entry in entries)
+    for path, value in six.iteritems(tree):
+        if key is None:
+            name = path
+        else:
+            name, _, c_key = path.partition('/')
+            if c_key != key:
+                continue
+        if '/' in name or (entries is not None and name not in ret):
+            continue
+        ret[name] = __context__['serial'].loads(value)
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
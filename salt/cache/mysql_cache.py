@@ -53,6 +53,7 @@ except ImportError:
     HAS_MYSQL = False
 
 from salt.exceptions import SaltCacheError
+from salt.ext import six
 
 _DEFAULT_DATABASE_NAME = "salt_cache"
 _DEFAULT_CACHE_TABLE_NAME = "cache"
@@ -197,6 +198,84 @@ def fetch(bank, key):
     return __context__['serial'].loads(r[0])
 
 
+def store_many(bank, data):
+    '''
+    Store several key values of a bank with a single multi-row query.
+    '''
+    if not data:
+        return
+    _init_client()
+    values = ', '.join(
+        "('{0}', '{1}', '{2}')".format(bank, key, __context__['serial'].dumps(value))
+        for key, value in six.iteritems(data)
+    )
+    query = "REPLACE INTO {0} (bank, etcd_key, data) values {1}".format(
+        _table_name, values)
+    cur, cnt = run_query(client, query)
+    cur.close()
+    if cnt < len(data):
+        raise SaltCacheError(
+            'Error storing {0} keys in {1} returned {2}'.format(len(data), bank, cnt)
+        )
+
+
+def _in_list(values):
+    '''
+    Format a list of values for an SQL ``IN`` clause
+    '''
+    return ', '.join("'{0}'".format(value) for value in values)
+
+
+def fetch_many(bank, keys):
+    '''
+    Fetch several key values of a bank with a single ``IN`` query.
+    '''
+    keys = list(keys)
+    ret = dict((key, {}) for key in keys)
+    if not keys:
+        return ret
+    _init_client()
+    query = "SELECT etcd_key, data FROM {0} WHERE bank='{1}' AND etcd_key IN ({2})".format(
+        _table_name, bank, _in_list(keys))
+    cur, _ = run_query(client, query)
+    for key, data in cur.fetchall():
+        ret[key] = __context__['serial'].loads(data)
+    cur.close()
+    return ret
+
+
+def list_with_data(bank, key=None, entries=None):
+    '''
+    Return the keys of a bank, or the value of ``key`` in each of the
+    sub-banks of a bank, with their data using a single query.
+    '''
+    if key is None:
+        if entries is not None:
+            return fetch_many(bank, entries)
+        query = "SELECT etcd_key, data FROM {0} WHERE bank='{1}'".format(
+            _table_name, bank)
+    elif entries is not None:
+        query = "SELECT bank, data FROM {0} WHERE etcd_key='{1}' AND bank IN ({2})".format(
+            _table_name, key, _in_list('{0}/{1}'.format(bank, entry) for entry in entries))
+    else:
+        query = "SELECT bank, data FROM {0} WHERE etcd_key='{1}' AND bank LIKE '{2}/%'".format(
+            _table_name, key, bank)
+    ret = {} if entries is None else dict((entry, {}) for entry in entries)
+    if entries is not None and not ret:
+        return ret
+    _init_client()
+    cur, _ = run_query(client, query)
+    for name, data in cur.fetchall():
+        if key is not None:
+            # Only keep the direct sub-banks of the bank
+            name = name[len(bank) + 1:]
+            if '/' in name:
+                continue
+        ret[name] = __context__['serial'].loads(data)
+    cur.close()
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
@@ -153,6 +153,7 @@ except ImportError:
     HAS_REDIS_CLUSTER = False
 
 # Import salt
+from salt.ext import six
 from salt.ext.six.moves import range
 from salt.exceptions import SaltCacheError
 
@@ -377,6 +378,87 @@ def fetch(bank, key):
     return __context__['serial'].loads(redis_value)
 
 
+def store_many(bank, data):
+    '''
+    Store several keys under the same bank using a single pipelined request.
+    '''
+    redis_server = _get_redis_server()
+    redis_pipe = redis_server.pipeline()
+    redis_bank_keys = _get_bank_keys_redis_key(bank)
+    try:
+        _build_bank_hier(bank, redis_pipe)
+        for key, value in six.iteritems(data):
+            redis_pipe.set(_get_key_redis_key(bank, key),
+                           __context__['serial'].dumps(value))
+        if data:
+            redis_pipe.sadd(redis_bank_keys, *data)
+        log.debug('Setting {count} keys under {bank}'.format(
+            count=len(data),
+            bank=bank
+        ))
+        redis_pipe.execute()
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = 'Cannot set the Redis cache keys under {rbank}: {rerr}'.format(rbank=bank,
+                                                                              rerr=rerr)
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+
+
+def _mget(redis_keys):
+    '''
+    Fetch and deserialize the values of several Redis keys in one request.
+    '''
+    if not redis_keys:
+        return []
+    redis_server = _get_redis_server()
+    try:
+        redis_values = redis_server.mget(redis_keys)
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = 'Cannot fetch the Redis cache keys {rkeys}: {rerr}'.format(rkeys=', '.join(redis_keys),
+                                                                          rerr=rerr)
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+    return [{} if value is None else __context__['serial'].loads(value)
+            for value in redis_values]
+
+
+def fetch_many(bank, keys):
+    '''
+    Fetch several keys under the same bank using a single ``MGET`` request.
+    '''
+    keys = list(keys)
+    redis_keys = [_get_key_redis_key(bank, key) for key in keys]
+    return dict(zip(keys, _mget(redis_keys)))
+
+
+def list_with_data(bank, key=None, entries=None):
+    '''
+    Return the keys of a bank, or the value of ``key`` in each of the
+    sub-banks of a bank, with their data. This needs one request to list the
+    bank and one ``MGET`` request for the data.
+    '''
+    redis_server = _get_redis_server()
+    if entries is None:
+        if key is None:
+            set_redis_key = _get_bank_keys_redis_key(bank)
+        else:
+            set_redis_key = _get_bank_redis_key(bank)
+        try:
+            entries = redis_server.smembers(set_redis_key)
+        except (RedisConnectionError, RedisResponseError) as rerr:
+            mesg = 'Cannot list the Redis cache key {rkey}: {rerr}'.format(rkey=set_redis_key,
+                                                                           rerr=rerr)
+            log.error(mesg)
+            raise SaltCacheError(mesg)
+    entries = list(entries or [])
+    if key is None:
+        redis_keys = [_get_key_redis_key(bank, entry) for entry in entries]
+    else:
+        redis_keys = [_get_key_redis_key('{0}/{1}'.format(bank, entry), key)
+                      for entry in entries]
+    return dict(zip(entries, _mget(redis_keys)))
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content. If no key is specified, remove
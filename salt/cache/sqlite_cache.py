@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+'''
+Minion data cache plugin for a single SQLite database file.
+
+.. versionadded:: Oxygen
+
+The ``localfs`` cache module stores every key in a file of its own, which on
+masters with many minions means hundreds of thousands of small files. This
+module keeps the whole cache in one SQLite database instead. The database is
+opened in WAL mode, so any number of master processes can read from it while
+one of them writes.
+
+SQLite support is part of the Python standard library, no extra package is
+needed. The following values can be set in the master config, these are the
+defaults:
+
+.. code-block:: yaml
+
+    cache.sqlite.database: <cachedir>/cache.db
+    cache.sqlite.timeout: 30
+
+``cache.sqlite.timeout`` is the number of seconds a process waits for another
+one to finish writing before giving up.
+
+To use SQLite as the minion data cache backend, set the master ``cache`` config
+value to ``sqlite``:
+
+.. code-block:: yaml
+
+    cache: sqlite
+
+The content of an existing ``localfs`` cache can be copied to the database
+with the :py:func:`cache.migrate <salt.runners.cache.migrate>` runner:
+
+.. code-block:: bash
+
+    salt-run cache.migrate localfs sqlite
+'''
+from __future__ import absolute_import
+import logging
+import os
+import time
+
+try:
+    import sqlite3
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
+
+import salt.syspaths
+from salt.exceptions import SaltCacheError
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+# Connections opened by this process, keyed by database path
+_CONNECTIONS = {}
+
+__virtualname__ = 'sqlite'
+__func_alias__ = {'ls': 'list'}
+
+
+def __virtual__():
+    '''
+    Confirm that the sqlite3 module is available
+    '''
+    if not HAS_SQLITE3:
+        return (False, 'The sqlite3 python module is not available')
+    return __virtualname__
+
+
+def __cachedir(kwargs=None):
+    if kwargs and 'cachedir' in kwargs:
+        return kwargs['cachedir']
+    return __opts__.get('cachedir', salt.syspaths.CACHE_DIR)
+
+
+def init_kwargs(kwargs):
+    return {'cachedir': __cachedir(kwargs)}
+
+
+def get_storage_id(kwargs):
+    return ('sqlite', _database(__cachedir(kwargs)))
+
+
+def _database(cachedir):
+    '''
+    Return the path to the database file
+    '''
+    return __opts__.get('cache.sqlite.database',
+                        os.path.join(cachedir, 'cache.db'))
+
+
+def _connect(cachedir):
+    '''
+    Return the connection to the database of this process, creating the
+    database if needed. Connections are not shared with forked processes.
+    '''
+    database = _database(cachedir)
+    pid = os.getpid()
+    conn_pid, conn = _CONNECTIONS.get(database, (None, None))
+    if conn is not None and conn_pid == pid:
+        return conn
+    try:
+        dirname = os.path.dirname(database)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        conn = sqlite3.connect(database,
+                               timeout=__opts__.get('cache.sqlite.timeout', 30),
+                               isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'bank TEXT NOT NULL, '
+            'key TEXT NOT NULL, '
+            'data BLOB, '
+            'updated INTEGER NOT NULL, '
+            'PRIMARY KEY (bank, key))'
+        )
+    except (OSError, sqlite3.Error) as exc:
+        raise SaltCacheError(
+            'Unable to open the cache database {0}: {1}'.format(database, exc)
+        )
+    _CONNECTIONS[database] = (pid, conn)
+    return conn
+
+
+def _query(cachedir, query, args=(), many=False):
+    '''
+    Run a query and return all the resulting rows
+    '''
+    conn = _connect(cachedir)
+    try:
+        if many:
+            with conn:
+                conn.execute('BEGIN')
+                return conn.executemany(query, args).fetchall()
+        return conn.execute(query, args).fetchall()
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            'Error running {0} on the cache database: {1}'.format(query, exc)
+        )
+
+
+def _sub_banks(bank):
+    '''
+    Return the query bounds matching all the sub-banks of a bank. The '0'
+    character sorts right after '/', so this is an index friendly prefix
+    match.
+    '''
+    return bank + '/', bank + '0'
+
+
+def store(bank, key, data, cachedir):
+    '''
+    Store a key value.
+    '''
+    store_many(bank, {key: data}, cachedir)
+
+
+def store_many(bank, data, cachedir):
+    '''
+    Store several key values of a bank in a single transaction.
+    '''
+    now = int(time.time())
+    rows = [
+        (bank, key, sqlite3.Binary(__context__['serial'].dumps(value)), now)
+        for key, value in six.iteritems(data)
+    ]
+    _query(cachedir,
+           'INSERT OR REPLACE INTO cache (bank, key, data, updated) '
+           'VALUES (?, ?, ?, ?)',
+           rows,
+           many=True)
+
+
+def fetch(bank, key, cachedir):
+    '''
+    Fetch a key value.
+    '''
+    rows = _query(cachedir,
+                  'SELECT data FROM cache WHERE bank = ? AND key = ?',
+                  (bank, key))
+    if not rows:
+        return {}
+    return __context__['serial'].loads(bytes(rows[0][0]))
+
+
+def fetch_many(bank, keys, cachedir):
+    '''
+    Fetch several key values of a bank.
+    '''
+    return list_with_data(bank, entries=keys, cachedir=cachedir)
+
+
+def list_with_data(bank, key=None, entries=None, cachedir=None):
+    '''
+    Return the keys of a bank, or the value of ``key`` in each of the
+    sub-banks of a bank, with their data using a single query.
+    '''
+    if cachedir is None:
+        cachedir = __cachedir()
+    if key is None:
+        rows = _query(cachedir,
+                      'SELECT key, data FROM cache WHERE bank = ?',
+                      (bank,))
+    else:
+        rows = []
+        for sub_bank, data in _query(
+                cachedir,
+                'SELECT bank, data FROM cache '
+                'WHERE bank >= ? AND bank < ? AND key = ?',
+                _sub_banks(bank) + (key,)):
+            # Only keep the direct sub-banks of the bank
+            name = sub_bank[len(bank) + 1:]
+            if '/' not in name:
+                rows.append((name, data))
+    if entries is None:
+        ret = {}
+    else:
+        ret = dict((entry, {}) for entry in entries)
+    for name, data in rows:
+        if entries is None or name in ret:
+            ret[name] = __context__['serial'].loads(bytes(data))
+    return ret
+
+
+def updated(bank, key, cachedir):
+    '''
+    Return the epoch of the last update of a key.
+    '''
+    rows = _query(cachedir,
+                  'SELECT updated FROM cache WHERE bank = ? AND key = ?',
+                  (bank, key))
+    if not rows:
+        return None
+    return rows[0][0]
+
+
+def flush(bank, key=None, cachedir=None):
+    '''
+    Remove the key from the cache bank with all the key content. If no key is
+    specified remove the entire bank with all keys and sub-banks inside.
+    '''
+    if cachedir is None:
+        cachedir = __cachedir()
+    conn = _connect(cachedir)
+    try:
+        with conn:
+            conn.execute('BEGIN')
+            if key is None:
+                count = conn.execute(
+                    'DELETE FROM cache WHERE bank = ?', (bank,)).rowcount
+                count += conn.execute(
+                    'DELETE FROM cache WHERE bank >= ? AND bank < ?',
+                    _sub_banks(bank)).rowcount
+            else:
+                count = conn.execute(
+                    'DELETE FROM cache WHERE bank = ? AND key = ?',
+                    (bank, key)).rowcount
+    except sqlite3.Error as exc:
+        raise SaltCacheError(
+            'There was an error removing "{0}": {1}'.format(bank, exc)
+        )
+    return count > 0
+
+
+def ls(bank, cachedir):
+    '''
+    Return an iterable object containing all keys and sub-banks stored in the
+    specified bank.
+    '''
+    ret = set(
+        row[0] for row in _query(cachedir,
+                                 'SELECT key FROM cache WHERE bank = ?',
+                                 (bank,))
+    )
+    for row in _query(cachedir,
+                      'SELECT DISTINCT bank FROM cache '
+                      'WHERE bank >= ? AND bank < ?',
+                      _sub_banks(bank)):
+        ret.add(row[0][len(bank) + 1:].split('/')[0])
+    return list(ret)
+
+
+def contains(bank, key, cachedir):
+    '''
+    Checks if the specified bank contains the specified key. If no key is
+    given, checks if the bank exists.
+    '''
+    if key is None:
+        rows = _query(cachedir,
+                      'SELECT 1 FROM cache WHERE bank = ? OR '
+                      '(bank >= ? AND bank < ?) LIMIT 1',
+                      (bank,) + _sub_banks(bank))
+    else:
+        rows = _query(cachedir,
+                      'SELECT 1 FROM cache WHERE bank = ? AND key = ?',
+                      (bank, key))
+    return bool(rows)
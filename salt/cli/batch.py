@@ -5,14 +5,25 @@ Execute batch runs
 
 # Import python libs
 from __future__ import absolute_import, print_function
+import collections
+import heapq
 import math
+import signal
 import time
 import copy
 from datetime import datetime, timedelta
 
 # Import salt libs
 import salt.utils  # Can be removed once print_cli is moved
+import salt.utils.event
+import salt.utils.jid
+import salt.utils.job
+import salt.utils.platform
+import salt.utils.process
+import salt.cache
 import salt.client
+import salt.log.setup
+import salt.minion
 import salt.output
 import salt.exceptions
 
@@ -26,6 +37,15 @@ import logging
 log = logging.getLogger(__name__)
 
 
+def get_batch(opts, eauth=None, quiet=False, parser=None):
+    '''
+    Return the batch run selected by the ``event_batch`` option
+    '''
+    if opts.get('event_batch', False):
+        return EventBatch(opts, eauth=eauth, quiet=quiet, parser=parser)
+    return Batch(opts, eauth=eauth, quiet=quiet, parser=parser)
+
+
 class Batch(object):
     '''
     Manage the execution of batch runs
@@ -286,3 +306,559 @@ class Batch(object):
                             active.remove(minion)
                             if bwait:
                                 wait.append(datetime.now() + timedelta(seconds=bwait))
+
+
+class EventBatch(Batch):
+    '''
+    Manage the execution of batch runs with a sliding window driven by the
+    return events, used when the ``event_batch`` option is set
+
+    The returns of all the jobs of the run are read from the event listener of
+    the LocalClient. Each return frees a slot of the window, which is filled
+    again at once by publishing the job to the next minions. The target is
+    pinged first and the minions are run as they answer, without waiting for
+    the ping to end. With ``batch_failure_threshold``, no more minions are run
+    once this number, or percentage, of minions failed or did not return.
+    '''
+    def __init__(self, opts, eauth=None, quiet=False, parser=None):
+        self.opts = opts
+        self.eauth = eauth if eauth else {}
+        self.quiet = quiet
+        self.options = parser
+        # The extra keyword arguments of the publications of the job
+        self.pub_kwargs = {}
+        self.local = self._get_local_client()
+        self.event = self.local.event
+        # The minions expected to answer the ping, known once it is published
+        self.minions = []
+        self.down_minions = set()
+        # The jids of the jobs being returned, and the minions running them
+        self.jobs = {}
+        self.jids = set()
+        self.was_listening = self.event.cpub
+        # Only get the returns of the jobs of the run from the event publisher
+        self.event.set_tag_filter([], 'startswith')
+        selected_target_option = self.opts.get('selected_target_option', None)
+        try:
+            self.ping = self._publish(self.opts['tgt'],
+                                      'test.ping',
+                                      [],
+                                      selected_target_option or self.opts.get('tgt_type', 'glob'))
+        except Exception:
+            self._close()
+            raise
+        if self.ping:
+            self.minions = list(self.ping['minions'])
+
+    def get_failure_limit(self):
+        '''
+        Return the number of failed minions stopping the run, or None
+        '''
+        threshold = self.opts.get('batch_failure_threshold')
+        if threshold is None or threshold == '':
+            return None
+        try:
+            if '%' in str(threshold):
+                limit = float(str(threshold).strip('%')) / 100.0 * len(self.minions)
+                return max(int(math.ceil(limit)), 1)
+            return max(int(threshold), 1)
+        except ValueError:
+            if not self.quiet:
+                salt.utils.print_cli('Invalid batch failure threshold sent: {0}\nData must '
+                                     'be in the form of %10, 10% or 3'.format(threshold))
+            return None
+
+    def _get_local_client(self):
+        return salt.client.get_local_client(self.opts['conf_file'])
+
+    def _subscribe(self, jid):
+        self.event.subscribe('salt/job/{0}'.format(jid))
+
+    def _unsubscribe(self, jid):
+        try:
+            self.event.unsubscribe('salt/job/{0}'.format(jid))
+        except ValueError:
+            pass
+
+    def _publish(self, tgt, fun, arg, tgt_type, ret='', **kwargs):
+        '''
+        Publish a job and return its pub_data. The returns are subscribed
+        before the job is published, so that none is missed.
+        '''
+        jid = salt.utils.jid.gen_jid()
+        while jid in self.jids:
+            jid = salt.utils.jid.gen_jid()
+        self.jids.add(jid)
+        self._subscribe(jid)
+        kwargs.update(self.eauth)
+        try:
+            pub_data = self.local.run_job(tgt,
+                                          fun,
+                                          arg,
+                                          tgt_type=tgt_type,
+                                          ret=ret,
+                                          timeout=self.opts['timeout'],
+                                          jid=jid,
+                                          listen=True,
+                                          **kwargs)
+        except Exception:
+            self._unsubscribe(jid)
+            raise
+        if pub_data:
+            # run_job subscribed to the returns too
+            self.local._clean_up_subscriptions(pub_data['jid'])
+            if pub_data['jid'] != jid:
+                self._unsubscribe(jid)
+                self._subscribe(pub_data['jid'])
+            self.jobs[pub_data['jid']] = set(pub_data['minions'])
+        else:
+            self._unsubscribe(jid)
+        return pub_data
+
+    def _job_done(self, jid, minion):
+        minions = self.jobs.get(jid)
+        if minions is None:
+            return
+        minions.discard(minion)
+        if not minions:
+            del self.jobs[jid]
+            self._unsubscribe(jid)
+
+    def run(self):
+        '''
+        Execute the batch run
+        '''
+        try:
+            for ret in self._run():
+                yield ret
+        finally:
+            self._close()
+
+    def _close(self):
+        for jid in list(self.jobs):
+            self._unsubscribe(jid)
+        self.jobs = {}
+        self.event.set_tag_filter(None)
+        if not self.was_listening:
+            self.event.close_pub()
+
+    def _run(self):
+        ping = self.ping
+        if not ping:
+            if not self.quiet:
+                salt.utils.print_cli('No minions matched the target.')
+            return
+        ping_jid = ping['jid']
+        bnum = self.get_bnum()
+        if not bnum:
+            return
+        failure_limit = self.get_failure_limit()
+        failures = 0
+        stopping = False
+        timeout = self.opts['timeout']
+        gather_job_timeout = self.opts['gather_job_timeout']
+        bwait = self.opts.get('batch_wait', 0)
+        ping_timeout_at = time.time() + timeout
+        answered = set()
+        # The minions which answered the ping and are waiting for a slot
+        ready = collections.deque()
+        # minion -> [jid, time it times out at, jid of its find_job]
+        running = {}
+        # (time, minion) at which running minions time out, the stale entries
+        # are skipped
+        timeouts = []
+        # jid of find_job -> jid it looks for
+        find_jobs = {}
+        # The times at which the slots kept by batch_wait are freed
+        wait = []
+
+        while True:
+            now = time.time()
+            if failure_limit is not None and failures >= failure_limit and not stopping:
+                stopping = True
+                log.error('Batch run stopped, %s minions failed or did not return', failures)
+                if ready and not self.quiet:
+                    salt.utils.print_cli('Batch run stopped after {0} failures, no job will be '
+                                         'sent to {1}'.format(failures, sorted(ready)))
+            if wait:
+                wait = [free_at for free_at in wait if free_at > now]
+            if not stopping and ready:
+                next_ = []
+                while ready and len(next_) < bnum - len(running) - len(wait):
+                    next_.append(ready.popleft())
+                if next_:
+                    if not self.quiet:
+                        salt.utils.print_cli('\nExecuting run on {0}\n'.format(sorted(next_)))
+                    pub_data = self._publish(next_,
+                                             self.opts['fun'],
+                                             self.opts['arg'],
+                                             'list',
+                                             ret=self.opts.get('return', ''),
+                                             **self.pub_kwargs)
+                    started = set(pub_data['minions']) if pub_data else set()
+                    for minion in next_:
+                        if minion in started:
+                            running[minion] = [pub_data['jid'], now + timeout, None]
+                            heapq.heappush(timeouts, (now + timeout, minion))
+                        else:
+                            # The job was not sent to this minion
+                            running[minion] = [None, now, None]
+                            heapq.heappush(timeouts, (now, minion))
+
+            if ping_jid is None and not running and (stopping or not ready):
+                break
+
+            # Minions which did not answer the ping in time
+            if ping_jid is not None and (
+                    now >= ping_timeout_at or
+                    (not self.opts.get('order_masters') and len(answered) >= len(ping['minions']))):
+                for minion in self.minions:
+                    if minion not in answered:
+                        self.down_minions.add(minion)
+                        salt.utils.print_cli('Minion {0} did not respond. No job will be sent.'.format(minion))
+                self.jobs.pop(ping_jid, None)
+                self._unsubscribe(ping_jid)
+                ping_jid = None
+                continue
+
+            # Minions which did not return in time, check if they still run
+            # the job, and end the ones which don't
+            overdue = collections.defaultdict(list)
+            while timeouts and timeouts[0][0] <= now:
+                timeout_at, minion = heapq.heappop(timeouts)
+                if minion not in running or running[minion][1] != timeout_at:
+                    continue
+                jid, _, find_jid = running[minion]
+                if jid is None or find_jid is not None:
+                    del running[minion]
+                    self._job_done(jid, minion)
+                    if bwait:
+                        wait.append(now + bwait)
+                    failures += 1
+                    for ret in self._output(minion, {'ret': {}}):
+                        yield ret
+                else:
+                    overdue[jid].append(minion)
+            for jid, minions in six.iteritems(overdue):
+                # Bound the size of the saltutil.find_job publishes
+                find_job_batch = self.opts.get('find_job_batch') or len(minions)
+                for idx in range(0, len(minions), find_job_batch):
+                    checked = minions[idx:idx + find_job_batch]
+                    pub_data = self._publish(checked,
+                                             'saltutil.find_job',
+                                             [jid],
+                                             'list')
+                    find_jid = pub_data.get('jid') if pub_data else None
+                    if find_jid is not None:
+                        find_jobs[find_jid] = jid
+                    for minion in checked:
+                        running[minion][1] = now + gather_job_timeout
+                        running[minion][2] = find_jid or ''
+                        heapq.heappush(timeouts, (now + gather_job_timeout, minion))
+
+            # Wait for the returns until the next timeout
+            next_at = [ping_timeout_at] if ping_jid is not None else []
+            if timeouts:
+                next_at.append(timeouts[0][0])
+            if wait:
+                next_at.append(min(wait))
+            wait_for = min(next_at) - time.time() if next_at else timeout
+            event = self.event.get_event(wait=min(max(wait_for, 0.01), timeout),
+                                         tag='salt/job/',
+                                         full=True,
+                                         auto_reconnect=self.local.auto_reconnect)
+            while event is not None:
+                parts = event['tag'].split('/')
+                data = event['data']
+                if len(parts) >= 5 and parts[3] == 'ret' and isinstance(data, dict) \
+                        and 'id' in data and 'return' in data:
+                    jid = parts[2]
+                    minion = data['id']
+                    if jid == ping_jid:
+                        if minion not in answered:
+                            answered.add(minion)
+                            if minion not in self.minions:
+                                self.minions.append(minion)
+                            ready.append(minion)
+                    elif jid in find_jobs:
+                        self._job_done(jid, minion)
+                        state = running.get(minion)
+                        if state is not None and state[2] == jid and \
+                                isinstance(data['return'], dict) and \
+                                data['return'].get('jid') == find_jobs[jid]:
+                            # Still running, wait for it again
+                            state[1] = time.time() + timeout
+                            state[2] = None
+                            heapq.heappush(timeouts, (state[1], minion))
+                    elif minion in running and running[minion][0] == jid:
+                        del running[minion]
+                        self._job_done(jid, minion)
+                        if bwait:
+                            wait.append(time.time() + bwait)
+                        if self.opts.get('raw'):
+                            ret = event
+                        else:
+                            ret = {'ret': data['return']}
+                            for key in ('out', 'retcode', 'jid'):
+                                if key in data:
+                                    ret[key] = data[key]
+                        retcode = data.get('retcode', 0)
+                        if isinstance(retcode, int) and retcode > 0:
+                            failures += 1
+                            if self.opts.get('failhard'):
+                                stopping = True
+                        for out in self._output(minion, ret):
+                            yield out
+                        if stopping and self.opts.get('failhard'):
+                            log.error('ERROR: Minion {} returned with non-zero exit code. Batch run stopped due to failhard'.format(minion))
+                            return
+                event = self.event.get_event(wait=0,
+                                             tag='salt/job/',
+                                             full=True,
+                                             no_block=True)
+
+    def _output(self, minion, data):
+        '''
+        Yield and display the return of a minion
+        '''
+        if self.opts.get('raw'):
+            yield data
+            return
+        # Munge retcode into return data
+        if 'retcode' in data and isinstance(data['ret'], dict) and 'retcode' not in data['ret']:
+            data['ret']['retcode'] = data['retcode']
+        yield {minion: data['ret']}
+        if not self.quiet:
+            data[minion] = data.pop('ret')
+            if 'out' in data:
+                out = data.pop('out')
+            else:
+                out = None
+            salt.output.display_output(
+                    data,
+                    out,
+                    self.opts)
+
+
+# The bank of the cache holding the status of the master batch runs
+BATCH_STATUS_BANK = 'batch'
+
+
+def save_batch_status(opts, jid, status, cache=None):
+    '''
+    Save the status of the master batch run ``jid``
+    '''
+    if cache is None:
+        cache = salt.cache.factory(opts)
+    try:
+        cache.store(BATCH_STATUS_BANK, jid, status)
+    except Exception:
+        log.error('Unable to save the status of the batch run %s', jid, exc_info=True)
+
+
+def get_batch_status(opts, jid):
+    '''
+    Return the status of the master batch run ``jid``, or None
+    '''
+    try:
+        return salt.cache.factory(opts).fetch(BATCH_STATUS_BANK, jid) or None
+    except Exception:
+        log.error('Unable to read the status of the batch run %s', jid, exc_info=True)
+        return None
+
+
+def clean_batch_status(opts, cache=None):
+    '''
+    Remove the status of the master batch runs older than ``keep_jobs`` hours
+    '''
+    if not opts.get('keep_jobs'):
+        return
+    if cache is None:
+        cache = salt.cache.factory(opts)
+    oldest = salt.utils.jid.time_to_jid(
+        datetime.now() - timedelta(hours=opts['keep_jobs']))
+    try:
+        for jid in cache.list(BATCH_STATUS_BANK):
+            if jid < oldest:
+                cache.flush(BATCH_STATUS_BANK, jid)
+    except Exception:
+        log.error('Unable to clean the status of the batch runs', exc_info=True)
+
+
+def start_master_batch(opts, load, minions):
+    '''
+    Start the batch run of a job published with the ``master_batch`` and
+    ``batch`` keyword arguments, in a daemonized process of the master. The
+    client only waits for the jid of the run.
+    '''
+    proc = salt.utils.process.SignalHandlingMultiprocessingProcess(
+            target=_master_batch_process,
+            args=(opts, load, minions))
+    with salt.utils.process.default_signals(signal.SIGINT, signal.SIGTERM):
+        # Reset current signals before starting the process in
+        # order not to inherit the current signal handlers
+        proc.start()
+    proc.join()  # MUST join, otherwise we leave zombies all over
+
+
+def _master_batch_process(opts, load, minions):
+    '''
+    Run a MasterBatch, outside of the process tree of the master worker
+    '''
+    if not salt.utils.platform.is_windows():
+        # Shutdown the multiprocessing before daemonizing
+        salt.log.setup.shutdown_multiprocessing_logging()
+
+        salt.utils.daemonize()
+
+        # Reconfigure multiprocessing logging after daemonizing
+        salt.log.setup.setup_multiprocessing_logging()
+    try:
+        batch = MasterBatch(opts, load, minions)
+    except Exception:
+        log.error('Unable to start the batch run %s', load['jid'], exc_info=True)
+        return
+    batch.run_master()
+
+
+class MasterBatch(EventBatch):
+    '''
+    Manage the execution of a batch run on the master, which goes on when the
+    client which published it is gone
+
+    The run is known by the jid of its publication, whose load is saved in
+    the master job cache. The return of each minion is stored under this jid
+    and fired as a ``salt/job/<jid>/ret/<minion>`` event, so the usual job
+    runners and the ``get_iter_returns`` of the LocalClient work with it. The
+    sub-jobs are published as the user who published the run, with its
+    returners and metadata. The status of the run is kept in the
+    ``batch`` bank of the cache as the run goes, and its progress is fired as
+    ``salt/batch/<jid>/...`` events.
+    '''
+    # The minimal number of seconds between two saves of the batch status
+    SAVE_INTERVAL = 1
+
+    def __init__(self, opts, load, minions):
+        self.load = copy.deepcopy(load)
+        self.batch_jid = load['jid']
+        self.target_minions = list(minions)
+        self.mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
+        self.cache = salt.cache.factory(opts)
+        self.status = {'status': 'running',
+                       'returned': 0,
+                       'failed': [],
+                       'down': [],
+                       'jids': []}
+        self.saved_at = 0
+        # The first publication is the ping of the target
+        self.pinged = False
+        batch_opts = copy.deepcopy(opts)
+        batch_opts.update({'tgt': load['tgt'],
+                           'fun': load['fun'],
+                           'arg': load['arg'],
+                           'tgt_type': load.get('tgt_type', 'glob'),
+                           'selected_target_option': None,
+                           'return': load.get('ret', ''),
+                           'batch': load['batch'],
+                           'batch_wait': load.get('batch_wait') or 0,
+                           'batch_failure_threshold': load.get('batch_failure_threshold'),
+                           'raw': False,
+                           'failhard': False})
+        super(MasterBatch, self).__init__(batch_opts, quiet=True)
+        self.pinged = True
+        for key in ('metadata', 'ret_config', 'ret_kwargs'):
+            if load.get(key):
+                self.pub_kwargs[key] = load[key]
+        self._fire({'minions': self.minions, 'batch': load['batch']}, 'start')
+
+    def _fire(self, data, suffix):
+        data = dict(data, jid=self.batch_jid)
+        self.event.fire_event(
+            data, salt.utils.event.tagify([self.batch_jid, suffix], 'batch'))
+
+    def _get_local_client(self):
+        local = super(MasterBatch, self)._get_local_client()
+        # Publish the jobs of the run as the user who published it. The key
+        # of a master running as root is accepted for any user, the other
+        # masters only accept it for the users delegated with sudo.
+        user = self.load.get('user')
+        if user:
+            master_user = self.opts.get('user', 'root')
+            if master_user != 'root' and user not in ('root', master_user) \
+                    and not user.startswith('sudo_'):
+                user = 'sudo_{0}'.format(user)
+            local.salt_user = user
+        return local
+
+    def _save_status(self, force=False):
+        '''
+        Save the status of the run, at most once per SAVE_INTERVAL unless
+        forced
+        '''
+        now = time.time()
+        if not force and now - self.saved_at < self.SAVE_INTERVAL:
+            return
+        self.saved_at = now
+        self.status['down'] = sorted(self.down_minions)
+        save_batch_status(self.opts, self.batch_jid, self.status, cache=self.cache)
+
+    def _publish(self, tgt, fun, arg, tgt_type, ret='', **kwargs):
+        pub_data = super(MasterBatch, self)._publish(tgt, fun, arg, tgt_type, ret=ret, **kwargs)
+        if pub_data and self.pinged and fun == self.opts['fun']:
+            self.status['jids'].append(pub_data['jid'])
+            self._fire({'sub_jid': pub_data['jid'],
+                        'minions': pub_data['minions']}, 'sub')
+            self._save_status()
+        return pub_data
+
+    def _output(self, minion, data):
+        '''
+        Store and fire the return of a minion under the jid of the run
+        '''
+        retcode = data.get('retcode', 0)
+        if 'jid' not in data:
+            # The minion did not return
+            self.status['failed'].append(minion)
+        else:
+            self.status['returned'] += 1
+            if isinstance(retcode, int) and retcode > 0:
+                self.status['failed'].append(minion)
+            load = {'jid': self.batch_jid,
+                    'id': minion,
+                    'return': data['ret'],
+                    'retcode': retcode,
+                    'success': not (isinstance(retcode, int) and retcode > 0),
+                    'fun': self.opts['fun'],
+                    'fun_args': self.opts['arg'],
+                    'sub_jid': data['jid']}
+            if 'out' in data:
+                load['out'] = data['out']
+            try:
+                salt.utils.job.store_job(self.opts, load, event=self.event, mminion=self.mminion)
+            except Exception:
+                log.error('Unable to store the return of %s for the batch run %s',
+                          minion, self.batch_jid, exc_info=True)
+        self._fire({'id': minion,
+                    'returned': self.status['returned'],
+                    'failed': len(self.status['failed'])}, 'progress')
+        self._save_status()
+        yield {minion: data['ret']}
+
+    def run_master(self):
+        '''
+        Execute the batch run to its end, and save its final status
+        '''
+        clean_batch_status(self.opts, cache=self.cache)
+        status = 'done'
+        try:
+            for _ in self.run():
+                pass
+        except Exception:
+            log.error('The batch run %s failed', self.batch_jid, exc_info=True)
+            status = 'failed'
+        limit = self.get_failure_limit()
+        if status == 'done' and limit is not None and len(self.status['failed']) >= limit:
+            status = 'stopped'
+        self.status['status'] = status
+        self._save_status(force=True)
+        self._fire(self.status, 'done')
@@ -5,7 +5,6 @@ import os
 import salt.utils.parsers
 from salt.utils.verify import verify_log
 from salt.config import _expand_glob_path
-import salt.cli.caller
 import salt.defaults.exitcodes
 
 
@@ -19,6 +18,9 @@ class SaltCall(salt.utils.parsers.SaltCallOptionParser):
         Execute the salt call!
         '''
         self.parse_args()
+        # Only import the minion once the arguments are known to be valid and
+        # do not just ask for the help or the version
+        import salt.cli.caller
 
         if self.options.file_root:
             # check if the argument is pointing to a file on disk
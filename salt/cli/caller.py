@@ -27,23 +27,10 @@ import salt.utils.jid
 import salt.utils.kinds as kinds
 import salt.utils.minion
 import salt.defaults.exitcodes
-from salt.cli import daemons
 from salt.log import LOG_LEVELS
 from salt.utils.platform import is_windows
 from salt.utils.process import MultiprocessingProcess
 
-try:
-    from raet import raeting, nacling
-    from raet.lane.stacking import LaneStack
-    from raet.lane.yarding import RemoteYard, Yard
-
-    if is_windows():
-        import win32file
-
-except ImportError:
-    # Don't die on missing transport libs since only one transport is required
-    pass
-
 # Import 3rd-party libs
 from salt.ext import six
 
@@ -304,6 +291,7 @@ def raet_minion_run(cleanup_protecteds):
     This function is intentionally left out of RAETCaller. This will avoid
     needing to pickle the RAETCaller object on Windows.
     '''
+    from salt.cli import daemons
     minion = daemons.Minion()  # daemonizes here
     minion.call(cleanup_protecteds=cleanup_protecteds)  # caller minion.call_in uses caller.flo
 
@@ -385,6 +373,11 @@ class RAETCaller(BaseCaller):
         not already setup such as in salt-call to communicate to-from the minion
 
         '''
+        # The RAET libs are only imported when used, they are slow to import
+        from raet import raeting, nacling
+        from raet.lane.stacking import LaneStack
+        from raet.lane.yarding import RemoteYard
+
         role = opts.get('id')
         if not role:
             emsg = ("Missing role required to setup RAETChannel.")
@@ -423,6 +416,10 @@ class RAETCaller(BaseCaller):
         '''
         Returns when RAET Minion Yard is available
         '''
+        from raet.lane.yarding import Yard
+        if is_windows():
+            import win32file
+
         yardname = 'manor'
         dirpath = opts['sock_dir']
 
@@ -243,13 +243,30 @@ class SaltCMD(salt.utils.parsers.SaltCMDOptionParser):
             eauth.update(res)
             eauth['eauth'] = self.options.eauth
 
+        if self.config['async'] and not self.options.static:
+            # The master runs the batch, the client only gets its jid
+            kwargs = {'tgt': self.config['tgt'],
+                      'fun': self.config['fun'],
+                      'arg': self.config['arg'],
+                      'tgt_type': self.selected_target_option or 'glob',
+                      'batch': self.options.batch,
+                      'master_batch': True,
+                      'batch_wait': self.options.batch_wait,
+                      'batch_failure_threshold': self.config.get('batch_failure_threshold')}
+            if getattr(self.options, 'return'):
+                kwargs['ret'] = getattr(self.options, 'return')
+            kwargs.update(eauth)
+            jid = self.local_client.cmd_async(**kwargs)
+            salt.utils.print_cli('Executed command with job ID: {0}'.format(jid))
+            return
+
         if self.options.static:
 
             if not self.options.batch:
                 self.config['batch'] = '100%'
 
             try:
-                batch = salt.cli.batch.Batch(self.config, eauth=eauth, quiet=True)
+                batch = salt.cli.batch.get_batch(self.config, eauth=eauth, quiet=True)
             except salt.exceptions.SaltClientError as exc:
                 sys.exit(2)
 
@@ -263,7 +280,7 @@ class SaltCMD(salt.utils.parsers.SaltCMDOptionParser):
         else:
             try:
                 self.config['batch'] = self.options.batch
-                batch = salt.cli.batch.Batch(self.config, eauth=eauth, parser=self.options)
+                batch = salt.cli.batch.get_batch(self.config, eauth=eauth, parser=self.options)
             except salt.exceptions.SaltClientError as exc:
                 # We will print errors to the console further down the stack
                 sys.exit(1)
@@ -41,6 +41,7 @@ import salt.utils.platform
 import salt.utils.verify
 import salt.utils.versions
 import salt.utils.jid
+import salt.utils.jobtracker
 import salt.syspaths as syspaths
 from salt.exceptions import (
     EauthAuthenticationError, SaltInvocationError, SaltReqTimeoutError,
@@ -235,16 +236,23 @@ class LocalClient(object):
         log.debug(u'Checking whether jid %s is still running', jid)
         timeout = int(kwargs.get(u'gather_job_timeout', self.opts[u'gather_job_timeout']))
 
-        pub_data = self.run_job(tgt,
-                                u'saltutil.find_job',
-                                arg=[jid],
-                                tgt_type=tgt_type,
-                                timeout=timeout,
-                                **kwargs
-                               )
-
-        if u'jid' in pub_data:
-            self.event.subscribe(pub_data[u'jid'])
+        # Subscribe to the returns before publishing, get_iter_returns only
+        # gets the events of the subscribed jobs from the event publisher.
+        # The subscription of run_job is kept, the caller removes it with
+        # _clean_up_subscriptions.
+        find_jid = salt.utils.jid.gen_jid()
+        self.event.subscribe(u'salt/job/{0}'.format(find_jid))
+        try:
+            pub_data = self.run_job(tgt,
+                                    u'saltutil.find_job',
+                                    arg=[jid],
+                                    tgt_type=tgt_type,
+                                    timeout=timeout,
+                                    jid=find_jid,
+                                    **kwargs
+                                   )
+        finally:
+            self.event.unsubscribe(u'salt/job/{0}'.format(find_jid))
 
         return pub_data
 
@@ -428,12 +436,22 @@ class LocalClient(object):
         The function signature is the same as :py:meth:`cmd` with the
         following exceptions.
 
+        :param master_batch: With ``batch``, run the job on the master in
+            batches of this number, or percentage, of minions. The run goes on
+            if the client goes away, its returns are stored under the returned
+            job ID. The ``batch_wait`` and ``batch_failure_threshold`` keyword
+            arguments are used as in :py:meth:`cmd_batch`.
+
+            .. versionadded:: Oxygen
+
         :returns: A job ID or 0 on failure.
 
         .. code-block:: python
 
             >>> local.cmd_async('*', 'test.sleep', [300])
             '20131219215921857715'
+            >>> local.cmd_async('*', 'state.highstate', batch='10%', master_batch=True)
+            '20131219215921857716'
         '''
         if u'expr_form' in kwargs:
             salt.utils.versions.warn_until(
@@ -534,6 +552,13 @@ class LocalClient(object):
 
         :param batch: The batch identifier of systems to execute on
 
+        :param batch_failure_threshold: With ``event_batch``, the number or
+            percentage of minions failing or not returning which stops the
+            run
+
+        :param event_batch: Run the batch with the sliding window driven by
+            the return events, defaults to the ``event_batch`` option
+
         :returns: A generator of minion returns
 
         .. code-block:: python
@@ -571,6 +596,10 @@ class LocalClient(object):
             opts[u'gather_job_timeout'] = kwargs[u'gather_job_timeout']
         if u'batch_wait' in kwargs:
             opts[u'batch_wait'] = int(kwargs[u'batch_wait'])
+        if u'batch_failure_threshold' in kwargs:
+            opts[u'batch_failure_threshold'] = kwargs[u'batch_failure_threshold']
+        if u'event_batch' in kwargs:
+            opts[u'event_batch'] = kwargs[u'event_batch']
 
         eauth = {}
         if u'eauth' in kwargs:
@@ -585,7 +614,7 @@ class LocalClient(object):
         for key, val in six.iteritems(self.opts):
             if key not in opts:
                 opts[key] = val
-        batch = salt.cli.batch.Batch(opts, eauth=eauth, quiet=True)
+        batch = salt.cli.batch.get_batch(opts, eauth=eauth, quiet=True)
         for ret in batch.run():
             yield ret
 
@@ -1118,6 +1147,45 @@ class LocalClient(object):
 
         :returns: all of the information for the JID
         '''
+        # Only get the events of this job, and of the subscribed jobs, from
+        # the event publisher while waiting. The filter of the caller is
+        # kept, and restored while the caller has the control.
+        prev_filter = self.event.tag_filter
+        job_filter = prev_filter
+        if not self.opts[u'order_masters'] and prev_filter is None:
+            job_filter = [[u'salt/job/{0}'.format(jid), u'startswith']]
+        try:
+            if job_filter is not prev_filter:
+                self.event.set_tag_filter(job_filter)
+            for ret in self._get_iter_returns(
+                    jid,
+                    minions,
+                    timeout=timeout,
+                    tgt=tgt,
+                    tgt_type=tgt_type,
+                    expect_minions=expect_minions,
+                    block=block,
+                    **kwargs):
+                if job_filter is prev_filter:
+                    yield ret
+                    continue
+                self.event.set_tag_filter(prev_filter)
+                yield ret
+                self.event.set_tag_filter(job_filter)
+        finally:
+            if job_filter is not prev_filter:
+                self.event.set_tag_filter(prev_filter)
+
+    def _get_iter_returns(
+            self,
+            jid,
+            minions,
+            timeout=None,
+            tgt=u'*',
+            tgt_type=u'glob',
+            expect_minions=False,
+            block=True,
+            **kwargs):
         if u'expr_form' in kwargs:
             salt.utils.versions.warn_until(
                 u'Fluorine',
@@ -1151,6 +1219,16 @@ class LocalClient(object):
                 raise StopIteration()
         except Exception as exc:
             log.warning(u'Returner unavailable: %s', exc)
+        if self.opts.get(u'job_completion_tracker', False):
+            for ret in self._track_returns(
+                    jid,
+                    minions,
+                    timeout,
+                    expect_minions=expect_minions,
+                    block=block,
+                    **kwargs):
+                yield ret
+            return
         # Wait for the hosts to check in
         last_time = False
         # iterator for this job's return
@@ -1183,22 +1261,8 @@ class LocalClient(object):
                     continue
                 if u'return' not in raw[u'data']:
                     continue
-                if kwargs.get(u'raw', False):
-                    found.add(raw[u'data'][u'id'])
-                    yield raw
-                else:
-                    found.add(raw[u'data'][u'id'])
-                    ret = {raw[u'data'][u'id']: {u'ret': raw[u'data'][u'return']}}
-                    if u'out' in raw[u'data']:
-                        ret[raw[u'data'][u'id']][u'out'] = raw[u'data'][u'out']
-                    if u'retcode' in raw[u'data']:
-                        ret[raw[u'data'][u'id']][u'retcode'] = raw[u'data'][u'retcode']
-                    if u'jid' in raw[u'data']:
-                        ret[raw[u'data'][u'id']][u'jid'] = raw[u'data'][u'jid']
-                    if kwargs.get(u'_cmd_meta', False):
-                        ret[raw[u'data'][u'id']].update(raw[u'data'])
-                    log.debug(u'jid %s return from %s', jid, raw[u'data'][u'id'])
-                    yield ret
+                found.add(raw[u'data'][u'id'])
+                yield self._format_return(jid, raw, **kwargs)
 
             # if we have all of the returns (and we aren't a syndic), no need for anything fancy
             if len(found.intersection(minions)) >= len(minions) and not self.opts[u'order_masters']:
@@ -1234,6 +1298,8 @@ class LocalClient(object):
                 if u'jid' not in jinfo:
                     jinfo_iter = []
                 else:
+                    # Keep track of the jid events to unsubscribe from later
+                    open_jids.add(jinfo[u'jid'])
                     jinfo_iter = self.get_returns_no_block(u'salt/job/{0}'.format(jinfo[u'jid']))
                 timeout_at = time.time() + gather_job_timeout
                 # if you are a syndic, wait a little longer
@@ -1262,9 +1328,6 @@ class LocalClient(object):
                             u'from client return. This may be an error in '
                             u'the client.', missing_key
                         )
-                # Keep track of the jid events to unsubscribe from later
-                open_jids.add(jinfo[u'jid'])
-
                 # TODO: move to a library??
                 if u'minions' in raw.get(u'data', {}):
                     minions.update(raw[u'data'][u'minions'])
@@ -1314,13 +1377,103 @@ class LocalClient(object):
 
         # If there are any remaining open events, clean them up.
         if open_jids:
-            for jid in open_jids:
-                self.event.unsubscribe(jid)
+            for find_jid in open_jids:
+                self._clean_up_subscriptions(find_jid)
 
         if expect_minions:
             for minion in list((minions - found)):
                 yield {minion: {u'failed': True}}
 
+    def _format_return(self, jid, raw, **kwargs):
+        '''
+        Format the return event of a minion as yielded by get_iter_returns
+        '''
+        if kwargs.get(u'raw', False):
+            return raw
+        ret = {raw[u'data'][u'id']: {u'ret': raw[u'data'][u'return']}}
+        if u'out' in raw[u'data']:
+            ret[raw[u'data'][u'id']][u'out'] = raw[u'data'][u'out']
+        if u'retcode' in raw[u'data']:
+            ret[raw[u'data'][u'id']][u'retcode'] = raw[u'data'][u'retcode']
+        if u'jid' in raw[u'data']:
+            ret[raw[u'data'][u'id']][u'jid'] = raw[u'data'][u'jid']
+        if kwargs.get(u'_cmd_meta', False):
+            ret[raw[u'data'][u'id']].update(raw[u'data'])
+        log.debug(u'jid %s return from %s', jid, raw[u'data'][u'id'])
+        return ret
+
+    def _track_returns(
+            self,
+            jid,
+            minions,
+            timeout,
+            expect_minions=False,
+            block=True,
+            **kwargs):
+        '''
+        Yield the returns of the job as _get_iter_returns does, but only send
+        a saltutil.find_job to the minions which did not return in time, in
+        batches of find_job_batch minions, when job_completion_tracker is set
+        '''
+        gather_job_timeout = int(kwargs.get(u'gather_job_timeout', self.opts[u'gather_job_timeout']))
+        syndic_wait = self.opts[u'syndic_wait'] if self.opts[u'order_masters'] else 0
+        tracker = salt.utils.jobtracker.JobTracker(
+            jid,
+            minions,
+            timeout,
+            gather_job_timeout,
+            batch_size=self.opts.get(u'find_job_batch', 0),
+            syndic_wait=syndic_wait)
+        if self.opts[u'order_masters']:
+            # If we are a MoM, we need to gather expected minions from downstreams masters.
+            tag_fmt = u'(salt/job|syndic/.*)/({0})'
+        else:
+            tag_fmt = u'^salt/job/({0})/'
+        # The events of the job and of its saltutil.find_job, the events of
+        # the other subscribed jobs are left pending
+        tag = tag_fmt.format(jid)
+        log.debug(
+            u'get_iter_returns for jid %s sent to %s tracks the minions which '
+            u'do not return in %s seconds', jid, minions, timeout
+        )
+        try:
+            while True:
+                now = time.time()
+                due = tracker.due(now)
+                if due:
+                    jinfo = self.gather_job_info(jid, due, u'list', **kwargs)
+                    tracker.watch(jinfo.get(u'jid'), due)
+                    tag = tag_fmt.format(u'|'.join([jid] + list(tracker.find_jobs)))
+                    continue
+                if tracker.done(now):
+                    log.debug(u'jid %s found all minions %s', jid, tracker.found)
+                    break
+                if block:
+                    deadline = tracker.next_deadline()
+                    wait = max(deadline - now, 0.01) if deadline is not None else timeout
+                else:
+                    wait = 0.01
+                raw = self.event.get_event(wait=wait,
+                                           tag=tag,
+                                           match_type=u'regex',
+                                           full=True,
+                                           no_block=not block,
+                                           auto_reconnect=self.auto_reconnect)
+                if raw is None:
+                    if not block:
+                        yield
+                    continue
+                if tracker.handle_event(raw[u'tag'], raw[u'data']) is not None:
+                    yield self._format_return(jid, raw, **kwargs)
+        finally:
+            # gather_job_info subscribed to the saltutil.find_job returns
+            for find_jid in tracker.find_jobs:
+                self._clean_up_subscriptions(find_jid)
+
+        if expect_minions:
+            for minion in tracker.missing:
+                yield {minion: {u'failed': True}}
+
     def get_returns(
             self,
             jid,
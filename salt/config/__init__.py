@@ -259,6 +259,10 @@ VALID_OPTS = {
     # a master for remote execution.
     'use_master_when_local': bool,
 
+    # When using a local file_client, reuse the pillar and the highstate rendered by the previous
+    # run when none of the files and of the config changed
+    'local_snapshot': bool,
+
     # A map of saltenvs and fileserver backend locations
     'file_roots': dict,
 
@@ -326,6 +330,12 @@ VALID_OPTS = {
     # Whether or not processes should be forked when needed. The alternative is to use threading.
     'multiprocessing': bool,
 
+    # The number of pre-forked processes running the jobs of the minion, 0 forks a process per job
+    'job_pool_size': int,
+
+    # The number of jobs a job pool process runs before it is replaced, 0 never replaces it
+    'job_pool_max_jobs': int,
+
     # Whether or not the salt minion should run scheduled mine updates
     'mine_enabled': bool,
 
@@ -411,6 +421,19 @@ VALID_OPTS = {
     # Tell the loader to attempt to import *.zip archives
     'enable_zip_modules': bool,
 
+    # Keep an index of the modules which load, their virtual names and their functions in the
+    # cachedir, so that the loader doesn't need to import every module to find a function
+    'loader_index': bool,
+
+    # Record the time taken to load the modules, to run the jobs and to handle the master requests
+    'profiling': bool,
+
+    # The number of seconds between the saves of the profiling timings to the cachedir
+    'profiling_interval': int,
+
+    # Fire the profiling timings on the event bus every profiling_interval seconds
+    'profiling_events': bool,
+
     # Tell the client to show minions that have timed out
     'show_timeout': bool,
 
@@ -546,6 +569,12 @@ VALID_OPTS = {
     # http://api.zeromq.org/3-2:zmq-setsockopt
     'pub_hwm': int,
 
+    # The maximum number of publishes a master worker coalesces into a single
+    # message to the zeromq publisher, and the maximum number of seconds a
+    # publish is held back while waiting for the batch to fill up.
+    'zmq_pub_batch_size': int,
+    'zmq_pub_batch_latency': float,
+
     # IPC buffer size
     # Refs https://github.com/saltstack/salt/issues/34215
     'ipc_write_buffer': int,
@@ -554,6 +583,10 @@ VALID_OPTS = {
     # the number of connected minions increases.
     'worker_threads': int,
 
+    # Load the modules used by the MWorker processes before forking them, so they share the
+    # memory of the imported modules
+    'worker_preload': bool,
+
     # The port for the master to listen to returns on. The minion needs to connect to this port
     # to send returns.
     'ret_port': int,
@@ -561,6 +594,28 @@ VALID_OPTS = {
     # The number of hours to keep jobs around in the job cache on the master
     'keep_jobs': int,
 
+    # Keep a time bucketed index of the jids in the local job cache so that old jobs can be
+    # cleaned out and recent jobs listed without walking the whole job cache
+    'job_cache_index': bool,
+
+    # Store the job returns from a dedicated process which writes them to the job cache in
+    # batches, instead of from the MWorkers receiving them
+    'job_return_writer': bool,
+
+    # The maximum number of returns written to the job cache at once by the return writer
+    'job_return_writer_batch_size': int,
+
+    # The maximum number of seconds a return waits in the return writer before being written
+    'job_return_writer_interval': float,
+
+    # The number of returns which can wait for the return writer, further returns are
+    # written by the MWorkers
+    'job_return_writer_queue': int,
+
+    # Either "memory" or "journal". In journal mode the returns received by the return writer
+    # are appended to a journal on disk until they are written to the job cache.
+    'job_return_writer_durability': str,
+
     # If the returner supports `clean_old_jobs`, then at cleanup time,
     # archive the job data before deleting it.
     'archive_jobs': bool,
@@ -592,6 +647,7 @@ VALID_OPTS = {
     'git_pillar_root': str,
     'git_pillar_ssl_verify': bool,
     'git_pillar_global_lock': bool,
+    'git_pillar_fetch_workers': int,
     'git_pillar_user': str,
     'git_pillar_password': str,
     'git_pillar_insecure_auth': bool,
@@ -617,6 +673,7 @@ VALID_OPTS = {
     'gitfs_saltenv_blacklist': list,
     'gitfs_ssl_verify': bool,
     'gitfs_global_lock': bool,
+    'gitfs_fetch_workers': int,
     'gitfs_saltenv': list,
     'gitfs_ref_types': list,
     'gitfs_refspecs': list,
@@ -759,6 +816,14 @@ VALID_OPTS = {
     # reply from executions.
     'minion_data_cache': bool,
 
+    # Keep an in-memory inverted index of the grains and pillar data in the minion data cache to
+    # answer grain and pillar targets without reading the cached data of every minion.
+    'minion_data_index': bool,
+
+    # The number of seconds after which the minion data index of a process checks whether the
+    # cached data of the minions was changed by the other processes of the master
+    'minion_data_index_ttl': int,
+
     # The number of seconds between AES key rotations on the master
     'publish_session': int,
 
@@ -774,6 +839,9 @@ VALID_OPTS = {
     # The queue size for workers in the reactor
     'reactor_worker_hwm': int,
 
+    # Render the reactions to the events in the workers of the reactor
+    'reactor_concurrent_render': bool,
+
     # Defines engines. See https://docs.saltstack.com/en/latest/topics/engines/
     'engines': list,
 
@@ -833,6 +901,20 @@ VALID_OPTS = {
     # The number of minutes between the minion refreshing its cache of grains
     'grains_refresh_every': int,
 
+    # The number of threads running the grains functions concurrently, 0 runs them in sequence
+    'grains_concurrency': int,
+
+    # The number of seconds a grains function can run for when grains_concurrency is set,
+    # 0 waits for all of them
+    'grains_timeout': (int, float),
+
+    # Send the time taken by each grains function to the master when the grains are collected
+    'grains_timings_event': bool,
+
+    # The number of seconds the return of each grains module, or module.function, is cached for
+    # when grains_cache is set
+    'grains_cache_ttl': dict,
+
     # Use lspci to gather system data for grains on a minion
     'enable_lspci': bool,
 
@@ -847,6 +929,16 @@ VALID_OPTS = {
     # If this is set to True the first newline after a Jinja block is removed
     'jinja_trim_blocks': bool,
 
+    # Reuse the Jinja environment of a state run or pillar compilation for all
+    # of its templates
+    'jinja_env_cache': bool,
+
+    # Store the compiled Jinja templates in the cachedir
+    'jinja_bytecode_cache': bool,
+
+    # The number of compiled templates kept by each Jinja environment
+    'jinja_template_cache_size': int,
+
     # Cache minion ID to file
     'minion_id_caching': bool,
 
@@ -865,6 +957,13 @@ VALID_OPTS = {
     # The number of seconds to wait when the client is requesting information about running jobs
     'gather_job_timeout': int,
 
+    # Track the completion of the jobs from their return events, and only ask the minions which
+    # did not return in time if they still run the job
+    'job_completion_tracker': bool,
+
+    # The maximum number of minions asked at once if they still run a job
+    'find_job_batch': int,
+
     # The number of seconds to wait before timing out an authentication request
     'auth_timeout': int,
 
@@ -939,6 +1038,24 @@ VALID_OPTS = {
     # Instructs the salt CLI to print a summary of a minion responses before returning
     'cli_summary': bool,
 
+    # Run the batch jobs with a sliding window driven by the return events
+    'event_batch': bool,
+
+    # The number or percentage of failed minions stopping an event batch run
+    'batch_failure_threshold': (six.string_types, int, type(None)),
+
+    # Keep the time at which the master last heard from each minion, used by manage.status
+    'presence_tracking': bool,
+
+    # The number of seconds between the saves of the presence of the minions to the cachedir
+    'presence_interval': int,
+
+    # The number of seconds after which a minion not heard from is not known to be up
+    'presence_timeout': int,
+
+    # Ping the minions not heard from for presence_timeout seconds in manage.status
+    'presence_ping': bool,
+
     # The maximum number of minion connections allowed by the master. Can have performance
     # implications in large setups.
     'max_minions': int,
@@ -1103,12 +1220,19 @@ DEFAULT_MINION_OPTS = {
     'cache_jobs': False,
     'grains_cache': False,
     'grains_cache_expiration': 300,
+    'grains_cache_ttl': {},
     'grains_deep_merge': False,
+    'grains_concurrency': 0,
+    'grains_timeout': 0,
+    'grains_timings_event': False,
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'minion'),
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'minion'),
     'sock_pool_size': 1,
     'backup_mode': '',
     'renderer': 'yaml_jinja',
+    'jinja_env_cache': False,
+    'jinja_bytecode_cache': False,
+    'jinja_template_cache_size': 400,
     'renderer_whitelist': [],
     'renderer_blacklist': [],
     'random_startup_delay': 0,
@@ -1135,6 +1259,7 @@ DEFAULT_MINION_OPTS = {
         },
     'file_client': 'remote',
     'use_master_when_local': False,
+    'local_snapshot': False,
     'file_roots': {
         'base': [salt.syspaths.BASE_FILE_ROOTS_DIR,
                  salt.syspaths.SPM_FORMULA_PATH]
@@ -1165,6 +1290,7 @@ DEFAULT_MINION_OPTS = {
     'git_pillar_root': '',
     'git_pillar_ssl_verify': True,
     'git_pillar_global_lock': True,
+    'git_pillar_fetch_workers': 1,
     'git_pillar_user': '',
     'git_pillar_password': '',
     'git_pillar_insecure_auth': False,
@@ -1188,6 +1314,7 @@ DEFAULT_MINION_OPTS = {
     'gitfs_saltenv_whitelist': [],
     'gitfs_saltenv_blacklist': [],
     'gitfs_global_lock': True,
+    'gitfs_fetch_workers': 1,
     'gitfs_ssl_verify': True,
     'gitfs_saltenv': [],
     'gitfs_ref_types': ['branch', 'tag', 'sha'],
@@ -1212,6 +1339,8 @@ DEFAULT_MINION_OPTS = {
     'auto_accept': True,
     'autosign_timeout': 120,
     'multiprocessing': True,
+    'job_pool_size': 0,
+    'job_pool_max_jobs': 100,
     'mine_enabled': True,
     'mine_return_job': False,
     'mine_interval': 60,
@@ -1237,6 +1366,10 @@ DEFAULT_MINION_OPTS = {
     'ext_job_cache': '',
     'cython_enable': False,
     'enable_zip_modules': False,
+    'loader_index': False,
+    'profiling': False,
+    'profiling_interval': 60,
+    'profiling_events': False,
     'state_verbose': True,
     'state_output': 'full',
     'state_output_diff': False,
@@ -1285,6 +1418,7 @@ DEFAULT_MINION_OPTS = {
     'reactor_refresh_interval': 60,
     'reactor_worker_threads': 10,
     'reactor_worker_hwm': 10000,
+    'reactor_concurrent_render': False,
     'engines': [],
     'tcp_keepalive': True,
     'tcp_keepalive_idle': 300,
@@ -1353,14 +1487,23 @@ DEFAULT_MASTER_OPTS = {
     'publish_port': 4505,
     'zmq_backlog': 1000,
     'pub_hwm': 1000,
+    'zmq_pub_batch_size': 1,
+    'zmq_pub_batch_latency': 0.01,
     'auth_mode': 1,
     'user': _MASTER_USER,
     'worker_threads': 5,
+    'worker_preload': False,
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'master'),
     'sock_pool_size': 1,
     'ret_port': 4506,
     'timeout': 5,
     'keep_jobs': 24,
+    'job_cache_index': False,
+    'job_return_writer': False,
+    'job_return_writer_batch_size': 100,
+    'job_return_writer_interval': 0.5,
+    'job_return_writer_queue': 10000,
+    'job_return_writer_durability': 'memory',
     'archive_jobs': False,
     'root_dir': salt.syspaths.ROOT_DIR,
     'pki_dir': os.path.join(salt.syspaths.CONFIG_DIR, 'pki', 'master'),
@@ -1397,6 +1540,7 @@ DEFAULT_MASTER_OPTS = {
     'git_pillar_root': '',
     'git_pillar_ssl_verify': True,
     'git_pillar_global_lock': True,
+    'git_pillar_fetch_workers': 1,
     'git_pillar_user': '',
     'git_pillar_password': '',
     'git_pillar_insecure_auth': False,
@@ -1421,6 +1565,7 @@ DEFAULT_MASTER_OPTS = {
     'gitfs_saltenv_whitelist': [],
     'gitfs_saltenv_blacklist': [],
     'gitfs_global_lock': True,
+    'gitfs_fetch_workers': 1,
     'gitfs_ssl_verify': True,
     'gitfs_saltenv': [],
     'gitfs_ref_types': ['branch', 'tag', 'sha'],
@@ -1509,6 +1654,8 @@ DEFAULT_MASTER_OPTS = {
     'master_job_cache': 'local_cache',
     'job_cache_store_endtime': False,
     'minion_data_cache': True,
+    'minion_data_index': False,
+    'minion_data_index_ttl': 0,
     'enforce_mine_cache': False,
     'ipc_mode': _DFLT_IPC_MODE,
     'ipc_write_buffer': _DFLT_IPC_WBUFFER,
@@ -1534,6 +1681,7 @@ DEFAULT_MASTER_OPTS = {
     'reactor_refresh_interval': 60,
     'reactor_worker_threads': 10,
     'reactor_worker_hwm': 10000,
+    'reactor_concurrent_render': False,
     'engines': [],
     'event_return': '',
     'event_return_queue': 0,
@@ -1555,6 +1703,10 @@ DEFAULT_MASTER_OPTS = {
     'ssh_list_nodegroups': {},
     'ssh_use_home_key': False,
     'cython_enable': False,
+    'loader_index': False,
+    'profiling': False,
+    'profiling_interval': 60,
+    'profiling_events': False,
     'enable_gpu_grains': False,
     # XXX: Remove 'key_logfile' support in 2014.1.0
     'key_logfile': os.path.join(salt.syspaths.LOGS_DIR, 'key'),
@@ -1580,6 +1732,9 @@ DEFAULT_MASTER_OPTS = {
     'syndic_wait': 5,
     'jinja_lstrip_blocks': False,
     'jinja_trim_blocks': False,
+    'jinja_env_cache': False,
+    'jinja_bytecode_cache': False,
+    'jinja_template_cache_size': 400,
     'tcp_keepalive': True,
     'tcp_keepalive_idle': 300,
     'tcp_keepalive_cnt': -1,
@@ -1588,6 +1743,8 @@ DEFAULT_MASTER_OPTS = {
     'keysize': 2048,
     'transport': 'zeromq',
     'gather_job_timeout': 10,
+    'job_completion_tracker': False,
+    'find_job_batch': 500,
     'syndic_event_forward_timeout': 0.5,
     'syndic_jid_forward_cache_hwm': 100,
     'regen_thin': False,
@@ -1621,6 +1778,12 @@ DEFAULT_MASTER_OPTS = {
     'sqlite_queue_dir': os.path.join(salt.syspaths.CACHE_DIR, 'master', 'queues'),
     'queue_dirs': [],
     'cli_summary': False,
+    'event_batch': False,
+    'batch_failure_threshold': None,
+    'presence_tracking': False,
+    'presence_interval': 10,
+    'presence_timeout': 300,
+    'presence_ping': True,
     'max_minions': 0,
     'master_sign_key_name': 'master_sign',
     'master_sign_pubkey': False,
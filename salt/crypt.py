@@ -65,6 +65,9 @@ from salt.exceptions import (
 
 log = logging.getLogger(__name__)
 
+# The public keys parsed by this process, see get_rsa_pub_key
+_PUB_KEYS = {}
+
 
 def dropfile(cachedir, user=None):
     '''
@@ -173,6 +176,32 @@ def _get_rsa_key(path, passphrase):
     return _get_key_with_evict(path, str(os.path.getmtime(path)), passphrase)
 
 
+def get_rsa_pub_key(path):
+    '''
+    Read a public key off the disk. The parsed keys are cached by the calling
+    process, a key is only parsed again once the mtime, inode or size of its
+    file changes. Raises the same errors as reading and importing the key
+    would.
+    '''
+    try:
+        fstat = os.stat(path)
+        sig = (fstat.st_mtime, fstat.st_ino, fstat.st_size)
+    except OSError:
+        # Let reading the file raise the error
+        sig = None
+    cached = _PUB_KEYS.get(path)
+    if sig is not None and cached is not None and cached[0] == sig:
+        return cached[1]
+    log.debug(u'salt.crypt.get_rsa_pub_key: Loading public key %s', path)
+    with salt.utils.files.fopen(path) as f:
+        key = RSA.importKey(f.read())
+    if sig is None:
+        _PUB_KEYS.pop(path, None)
+    else:
+        _PUB_KEYS[path] = (sig, key)
+    return key
+
+
 def sign_message(privkey_path, message, passphrase=None):
     '''
     Use Crypto.Signature.PKCS1_v1_5 to sign a message. Returns the signature.
@@ -189,8 +218,7 @@ def verify_signature(pubkey_path, message, signature):
     Returns True for valid signature.
     '''
     log.debug(u'salt.crypt.verify_signature: Loading public key')
-    with salt.utils.files.fopen(pubkey_path) as f:
-        pubkey = RSA.importKey(f.read())
+    pubkey = get_rsa_pub_key(pubkey_path)
     log.debug(u'salt.crypt.verify_signature: Verifying signature')
     verifier = PKCS1_v1_5.new(pubkey)
     return verifier.verify(SHA.new(message), signature)
@@ -782,8 +810,7 @@ class AsyncAuth(object):
             m_path = os.path.join(self.opts[u'pki_dir'], self.mpub)
             if os.path.exists(m_path):
                 try:
-                    with salt.utils.files.fopen(m_path) as f:
-                        mkey = RSA.importKey(f.read())
+                    mkey = get_rsa_pub_key(m_path)
                 except Exception:
                     return u'', u''
                 digest = hashlib.sha256(key_str).hexdigest()
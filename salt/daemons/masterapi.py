@@ -720,9 +720,11 @@ class RemoteFuncs(object):
         pillar_dirs = {}
         data = pillar.compile_pillar(pillar_dirs=pillar_dirs)
         if self.opts.get('minion_data_cache', False):
+            mdata = {'grains': load['grains'], 'pillar': data}
             self.cache.store('minions/{0}'.format(load['id']),
                              'data',
-                             {'grains': load['grains'], 'pillar': data})
+                             mdata)
+            self.ckminions.update_data_index(load['id'], mdata)
             self.event.fire_event('Minion data cache refresh', salt.utils.event.tagify(load['id'], 'refresh', 'minion'))
         return data
 
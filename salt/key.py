@@ -17,11 +17,9 @@ import logging
 
 # Import salt libs
 import salt.cache
-import salt.client
 import salt.crypt
-import salt.daemons.masterapi
 import salt.exceptions
-import salt.minion
+import salt.payload
 import salt.utils
 import salt.utils.args
 import salt.utils.event
@@ -151,6 +149,7 @@ class KeyCLI(object):
         self.auth = low
 
     def _get_args_kwargs(self, fun, args=None):
+        import salt.minion
         if args is None:
             argspec = salt.utils.args.get_function_argspec(fun)
             args = []
@@ -751,6 +750,7 @@ class Key(object):
 
         To preserve the master caches of minions who are matched, set preserve_minions
         '''
+        import salt.client
         if match is not None:
             matches = self.name_match(match)
         elif match_dict is not None and isinstance(match_dict, dict):
@@ -953,6 +953,7 @@ class RaetKey(Key):
     DEN = None
 
     def __init__(self, opts):
+        import salt.daemons.masterapi
         Key.__init__(self, opts)
         self.auto_key = salt.daemons.masterapi.AutoKey(self.opts)
         self.serial = salt.payload.Serial(self.opts)
@@ -1233,6 +1234,7 @@ class RaetKey(Key):
         Delete public keys. If "match" is passed, it is evaluated as a glob.
         Pre-gathered matches can also be passed via "match_dict".
         '''
+        import salt.client
         if match is not None:
             matches = self.name_match(match)
         elif match_dict is not None and isinstance(match_dict, dict):
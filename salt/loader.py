@@ -10,17 +10,23 @@ from __future__ import absolute_import
 import os
 import sys
 import time
+import json
+import shutil
+import hashlib
 import logging
 import inspect
 import tempfile
 import functools
 import types
 from collections import MutableMapping
+from multiprocessing.pool import ThreadPool
 from zipimport import zipimporter
 
 # Import salt libs
 import salt.config
+import salt.payload
 import salt.syspaths
+import salt.utils.atomicfile
 import salt.utils.context
 import salt.utils.dictupdate
 import salt.utils.event
@@ -28,7 +34,9 @@ import salt.utils.files
 import salt.utils.lazy
 import salt.utils.odict
 import salt.utils.platform
+import salt.utils.profiling
 import salt.utils.versions
+import salt.version
 from salt.exceptions import LoaderError
 from salt.template import check_render_pipe_str
 from salt.utils.decorators import Depends
@@ -95,6 +103,25 @@ LIBCLOUD_FUNCS_NOT_SUPPORTED = (
 # Will be set to pyximport module at runtime if cython is enabled in config.
 pyximport = None
 
+# Bumped when the format of the loader index changes
+LOADER_INDEX_VERSION = 1
+
+
+def _loader_index_dir(opts):
+    return os.path.join(opts[u'cachedir'], u'loader_index')
+
+
+def clear_loader_index(opts):
+    '''
+    Remove the loader indexes kept when ``loader_index`` is enabled, the
+    modules are then imported again by the next loaders
+    '''
+    if not opts.get(u'cachedir'):
+        return
+    index_dir = _loader_index_dir(opts)
+    if os.path.isdir(index_dir):
+        shutil.rmtree(index_dir, ignore_errors=True)
+
 
 def static_loader(
         opts,
@@ -645,6 +672,254 @@ def _load_cached_grains(opts, cfn):
         return None
 
 
+def _grains_func_cache_file(opts):
+    '''
+    Return the path to the cache of the returns of each grains function
+    '''
+    return os.path.join(opts[u'cachedir'], u'grains.funcs.cache.p')
+
+
+def _load_cached_grain_funcs(opts):
+    '''
+    Returns the cached returns of the grains functions, as a dict of the time
+    each function returned and its return keyed by the function name.
+    '''
+    cfn = _grains_func_cache_file(opts)
+    if not os.path.isfile(cfn):
+        return {}
+    try:
+        serial = salt.payload.Serial(opts)
+        with salt.utils.files.fopen(cfn, u'rb') as fp_:
+            cached = serial.load(fp_)
+    except Exception as exc:
+        log.debug(u'Unable to read the grains cache file %s: %s', cfn, exc)
+        return {}
+    if not isinstance(cached, dict):
+        return {}
+    return cached
+
+
+def _grains_cache_ttl(opts, key):
+    '''
+    Return the number of seconds the return of a grains function is cached
+    for. The TTL of the function is looked up first, then the one of its
+    module, grains_cache_expiration is used for the others.
+    '''
+    ttls = opts.get(u'grains_cache_ttl') or {}
+    if key in ttls:
+        return ttls[key]
+    return ttls.get(key.split(u'.', 1)[0],
+                    opts.get(u'grains_cache_expiration', 300))
+
+
+def _write_grains_cache(opts, cfn, data):
+    '''
+    Write data to a grains cache file, readable by the owner only
+    '''
+    cumask = os.umask(0o77)
+    try:
+        if salt.utils.platform.is_windows():
+            # Late import
+            from salt.modules.cmdmod import _run_quiet
+            # Make sure cache file isn't read-only
+            _run_quiet(u'attrib -R "{0}"'.format(cfn))
+        with salt.utils.files.fopen(cfn, u'w+b') as fp_:
+            try:
+                serial = salt.payload.Serial(opts)
+                serial.dump(data, fp_)
+            except TypeError as e:
+                log.error(u'Failed to serialize grains cache: %s', e)
+                raise  # re-throw for cleanup
+    except Exception as e:
+        log.error(u'Unable to write to grains cache file %s: %s', cfn, e)
+        # Based on the original exception, the file may or may not have been
+        # created. If it was, we will remove it now, as the exception means
+        # the serialized data is not to be trusted, no matter what the
+        # exception is.
+        if os.path.isfile(cfn):
+            os.unlink(cfn)
+    os.umask(cumask)
+
+
+def clear_grains_cache(opts, modules=None):
+    '''
+    Remove the cached grains. When modules, a list of grains module names or
+    of module.function names, is passed only the returns of these functions
+    are removed from the cache, the next grains refresh runs them again and
+    reads the other ones from the cache.
+    '''
+    paths = [os.path.join(opts[u'cachedir'], u'grains.cache.p')]
+    if modules:
+        cached = _load_cached_grain_funcs(opts)
+        kept = dict(
+            (key, value) for key, value in six.iteritems(cached)
+            if key not in modules and key.split(u'.', 1)[0] not in modules
+        )
+        if kept != cached:
+            _write_grains_cache(opts, _grains_func_cache_file(opts), kept)
+    else:
+        paths.append(_grains_func_cache_file(opts))
+    for path in paths:
+        if os.path.isfile(path):
+            try:
+                os.remove(path)
+            except OSError as exc:
+                log.error(u'Could not remove grains cache %s: %s', path, exc)
+
+
+# The pools of threads still running grains functions which did not return
+# within grains_timeout, as (pid, pool, {key: result}), joined once these
+# functions return
+_GRAIN_POOLS = []
+
+
+def _reap_grain_pools():
+    '''
+    Join the pools whose timed out grains functions returned since, and
+    return the keys of the functions still running
+    '''
+    pid = os.getpid()
+    running = set()
+    for entry in list(_GRAIN_POOLS):
+        owner, pool, results = entry
+        if owner != pid:
+            # The threads of the parent process do not exist in a fork
+            _GRAIN_POOLS.remove(entry)
+            continue
+        pending = [key for key, result in six.iteritems(results)
+                   if not result.ready()]
+        if pending:
+            running.update(pending)
+            continue
+        pool.join()
+        _GRAIN_POOLS.remove(entry)
+    return running
+
+
+def _call_grain_func(key, func, proxy, timings):
+    '''
+    Run a grains function and record how long it took. The exceptions of the
+    functions other than the core ones are logged and None is returned.
+    '''
+    log.trace(u'Loading %s grain', key)
+    start = time.time()
+    timings[key] = [start, None]
+    try:
+        if key.startswith(u'core.'):
+            return func()
+        # Grains are loaded too early to take advantage of the injected
+        # __proxy__ variable.  Pass an instance of that LazyLoader
+        # here instead to grains functions if the grains functions take
+        # one parameter.  Then the grains can have access to the
+        # proxymodule for retrieving information from the connected
+        # device.
+        if func.__code__.co_argcount == 1:
+            return func(proxy)
+        return func()
+    except Exception:
+        if key.startswith(u'core.'):
+            raise
+        if salt.utils.platform.is_proxy():
+            log.info(u'The following CRITICAL message may not be an error; the proxy may not be completely established yet.')
+        log.critical(
+            u'Failed to load grains defined in grain file %s in '
+            u'function %s, error:\n', key, func,
+            exc_info=True
+        )
+        return None
+    finally:
+        timings[key][1] = time.time() - start
+
+
+def _run_grain_funcs(opts, funcs, keys, proxy):
+    '''
+    Yield the key and the return of each of the grains functions, in the
+    order of the keys. With grains_concurrency set, the functions run on a
+    pool of threads, and the functions which don't return within
+    grains_timeout seconds are skipped. Their threads are joined once they
+    return, and they are not run again until then. The time taken by each
+    function is logged, and sent to the master with grains_timings_event.
+    '''
+    timings = {}
+    workers = opts.get(u'grains_concurrency', 0)
+    timeout = opts.get(u'grains_timeout', 0)
+    start = time.time()
+    running = _reap_grain_pools()
+    if running:
+        log.warning(
+            u'The %s grains functions are still running since they timed '
+            u'out, their grains are skipped', u', '.join(sorted(running))
+        )
+        keys = [key for key in keys if key not in running]
+    if workers > 1 and len(keys) > 1:
+        pool = ThreadPool(min(workers, len(keys)))
+        results = [
+            (key, pool.apply_async(_call_grain_func,
+                                   (key, funcs[key], proxy, timings)))
+            for key in keys
+        ]
+        pool.close()
+        timed_out = {}
+        for key, result in results:
+            if not timeout:
+                result.wait()
+            waiting = time.time()
+            while not result.ready():
+                # The timeout starts when the function starts, or when we
+                # start waiting for it if all the threads are busy
+                began = timings[key][0] if key in timings else waiting
+                left = began + timeout - time.time()
+                if left <= 0:
+                    break
+                result.wait(left)
+            if not result.ready():
+                log.warning(
+                    u'The %s grains function did not return within %s '
+                    u'seconds, its grains are skipped', key, timeout
+                )
+                timed_out[key] = result
+                continue
+            yield key, result.get()
+        if timed_out:
+            # The threads can not be stopped, join them once they return
+            _GRAIN_POOLS.append((os.getpid(), pool, timed_out))
+        else:
+            pool.join()
+    else:
+        for key in keys:
+            yield key, _call_grain_func(key, funcs[key], proxy, timings)
+
+    durations = sorted(
+        ((timing[1], key) for key, timing in list(timings.items())
+         if timing[1] is not None),
+        reverse=True)
+    log.debug(
+        u'Grains were collected in %.2fs, by function: %s',
+        time.time() - start,
+        u', '.join(u'{0} ({1:.3f}s)'.format(key, duration)
+                   for duration, key in durations)
+    )
+    if durations and opts.get(u'grains_timings_event', False):
+        _fire_grain_timings(opts, dict((key, round(duration, 6))
+                                       for duration, key in durations))
+
+
+def _fire_grain_timings(opts, timings):
+    '''
+    Send the time taken by each grains function to the master, through the
+    minion
+    '''
+    data = {u'timings': timings}
+    tag = salt.utils.event.tagify([opts[u'id'], u'grains_timings'], u'minion')
+    try:
+        evt = salt.utils.event.get_event(u'minion', opts=opts, listen=False)
+        evt.fire_event({u'data': data, u'tag': tag,
+                        u'events': None, u'pretag': None},
+                       u'fire_master')
+    except Exception as exc:
+        log.debug(u'Unable to fire the grains timings: %s', exc)
+
+
 def grains(opts, force_refresh=False, proxy=None):
     '''
     Return the functions for the dynamic grains and the values for the static
@@ -671,7 +946,15 @@ def grains(opts, force_refresh=False, proxy=None):
         opts[u'cachedir'],
         u'grains.cache.p'
     )
-    if not force_refresh and opts.get(u'grains_cache', False):
+    # With grains_cache_ttl set the returns of the grains functions are
+    # cached one by one instead of all together
+    cache_funcs = bool(opts.get(u'grains_cache', False) and
+                       opts.get(u'grains_cache_ttl'))
+    cached_funcs = {}
+    if cache_funcs:
+        if not force_refresh and not opts.get(u'refresh_grains_cache', False):
+            cached_funcs = _load_cached_grain_funcs(opts)
+    elif not force_refresh and opts.get(u'grains_cache', False):
         cached_grains = _load_cached_grains(opts, cfn)
         if cached_grains:
             return cached_grains
@@ -708,43 +991,31 @@ def grains(opts, force_refresh=False, proxy=None):
     funcs = grain_funcs(opts, proxy=proxy)
     if force_refresh:  # if we refresh, lets reload grain modules
         funcs.clear()
-    # Run core grains
-    for key in funcs:
-        if not key.startswith(u'core.'):
+    # Run the core grains first, then the rest of the grains
+    keys = [key for key in funcs if key.startswith(u'core.')]
+    keys.extend(key for key in funcs
+                if not key.startswith(u'core.') and key != u'_errors')
+    now = time.time()
+    run_keys = []
+    for key in keys:
+        ttl = _grains_cache_ttl(opts, key)
+        if key in cached_funcs and ttl > 0 and now - cached_funcs[key][0] < ttl:
             continue
-        log.trace(u'Loading %s grain', key)
-        ret = funcs[key]()
-        if not isinstance(ret, dict):
-            continue
-        if grains_deep_merge:
-            salt.utils.dictupdate.update(grains_data, ret)
+        run_keys.append(key)
+    if cached_funcs:
+        log.debug(u'Read %s grains functions from the cache, running %s',
+                  len(keys) - len(run_keys), len(run_keys))
+    rets = dict(_run_grain_funcs(opts, funcs, run_keys, proxy))
+    for key in keys:
+        if key in rets:
+            ret = rets[key]
+            if cache_funcs and isinstance(ret, dict):
+                cached_funcs[key] = [time.time(), ret]
+        elif key in cached_funcs:
+            # Either still fresh, or the function timed out and the last
+            # known return is better than nothing
+            ret = cached_funcs[key][1]
         else:
-            grains_data.update(ret)
-
-    # Run the rest of the grains
-    for key in funcs:
-        if key.startswith(u'core.') or key == u'_errors':
-            continue
-        try:
-            # Grains are loaded too early to take advantage of the injected
-            # __proxy__ variable.  Pass an instance of that LazyLoader
-            # here instead to grains functions if the grains functions take
-            # one parameter.  Then the grains can have access to the
-            # proxymodule for retrieving information from the connected
-            # device.
-            log.trace(u'Loading %s grain', key)
-            if funcs[key].__code__.co_argcount == 1:
-                ret = funcs[key](proxy)
-            else:
-                ret = funcs[key]()
-        except Exception:
-            if salt.utils.platform.is_proxy():
-                log.info(u'The following CRITICAL message may not be an error; the proxy may not be completely established yet.')
-            log.critical(
-                u'Failed to load grains defined in grain file %s in '
-                u'function %s, error:\n', key, funcs[key],
-                exc_info=True
-            )
             continue
         if not isinstance(ret, dict):
             continue
@@ -775,29 +1046,14 @@ def grains(opts, force_refresh=False, proxy=None):
     grains_data.update(opts[u'grains'])
     # Write cache if enabled
     if opts.get(u'grains_cache', False):
-        cumask = os.umask(0o77)
-        try:
-            if salt.utils.platform.is_windows():
-                # Late import
-                import salt.modules.cmdmod
-                # Make sure cache file isn't read-only
-                salt.modules.cmdmod._run_quiet(u'attrib -R "{0}"'.format(cfn))
-            with salt.utils.files.fopen(cfn, u'w+b') as fp_:
-                try:
-                    serial = salt.payload.Serial(opts)
-                    serial.dump(grains_data, fp_)
-                except TypeError as e:
-                    log.error(u'Failed to serialize grains cache: %s', e)
-                    raise  # re-throw for cleanup
-        except Exception as e:
-            log.error(u'Unable to write to grains cache file %s: %s', cfn, e)
-            # Based on the original exception, the file may or may not have been
-            # created. If it was, we will remove it now, as the exception means
-            # the serialized data is not to be trusted, no matter what the
-            # exception is.
-            if os.path.isfile(cfn):
-                os.unlink(cfn)
-        os.umask(cumask)
+        _write_grains_cache(opts, cfn, grains_data)
+        if cache_funcs and run_keys:
+            _write_grains_cache(
+                opts,
+                _grains_func_cache_file(opts),
+                dict((key, cached_funcs[key]) for key in keys
+                     if key in cached_funcs)
+            )
 
     if grains_deep_merge:
         salt.utils.dictupdate.update(grains_data, opts[u'grains'])
@@ -1105,6 +1361,14 @@ class LazyLoader(salt.utils.lazy.LazyDict):
             )
         )
 
+        # The on-disk index of the modules, see the loader_index option
+        self.index = None
+        self.index_path = None
+        self.index_records = {}  # mapping of file name -> index entry
+        self.index_checked = {}  # mapping of file name -> valid entry or None
+        if self.opts.get(u'loader_index') and self.opts.get(u'cachedir'):
+            self._read_index()
+
         self.refresh_file_mapping()
 
         super(LazyLoader, self).__init__()  # late init the lazy loader
@@ -1203,6 +1467,16 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         else:
             self.suffix_map[u''] = (u'', u'', imp.PKG_DIRECTORY)
 
+        self.index_checked = {}
+        if self._index_mapping_valid():
+            # None of the module directories changed since the index was
+            # written, don't list them again
+            self.file_mapping = salt.utils.odict.OrderedDict(
+                (name, (fpath, suffix))
+                for name, fpath, suffix in self.index[u'file_mapping']
+            )
+            return
+
         # create mapping of filename (without suffix) to (path, suffix)
         # The files are added in order of priority, so order *must* be retained.
         self.file_mapping = salt.utils.odict.OrderedDict()
@@ -1273,6 +1547,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         self.loaded_files = set()
         self.missing_modules = {}
         self.loaded_modules = {}
+        self.index_records = {}
         # if we have been loaded before, lets clear the file mapping since
         # we obviously want a re-do
         if hasattr(self, u'opts'):
@@ -1299,6 +1574,21 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         return mod_opts
 
     def _iter_files(self, mod_name):
+        '''
+        Iterate over all file_mapping files in order of closeness to mod_name,
+        skipping the unchanged files which the loader index knows don't
+        provide mod_name
+        '''
+        for name in self._iter_all_files(mod_name):
+            entry = self._index_entry(name)
+            if entry is None:
+                yield name
+            elif entry[u'failed']:
+                self._index_skip(name)
+            elif mod_name in entry[u'names']:
+                yield name
+
+    def _iter_all_files(self, mod_name):
         '''
         Iterate over all file_mapping files in order of closeness to mod_name
         '''
@@ -1330,6 +1620,30 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 self._reload_submodules(submodule)
 
     def _load_module(self, name):
+        start = time.time()
+        if self.index_path is None:
+            ret = self._import_module(name)
+        else:
+            missing = set(self.missing_modules)
+            ret = self._import_module(name)
+            if not ret:
+                # Record why the module did not load, under all the names it
+                # was known by
+                self.index_records[name] = {
+                    u'failed': True,
+                    u'error': self._index_error(self.missing_modules.get(name)),
+                    u'names': [key for key in self.missing_modules
+                               if key not in missing and key != name],
+                    u'funcs': [],
+                }
+        if self.opts.get(u'profiling', False):
+            salt.utils.profiling.record(self.opts,
+                                        u'load',
+                                        u'{0}.{1}'.format(self.tag, name),
+                                        time.time() - start)
+        return ret
+
+    def _import_module(self, name):
         mod = None
         fpath, suffix = self.file_mapping[name]
         self.loaded_files.add(name)
@@ -1480,8 +1794,15 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         if self.virtual_enable:
             virtual_funcs_to_process = [u'__virtual__'] + self.virtual_funcs
             for virtual_func in virtual_funcs_to_process:
+                start = time.time()
                 virtual_ret, module_name, virtual_err, virtual_aliases = \
                     self.process_virtual(mod, module_name, virtual_func)
+                if self.opts.get(u'profiling', False):
+                    salt.utils.profiling.record(
+                        self.opts,
+                        u'virtual',
+                        u'{0}.{1}'.format(self.tag, name),
+                        time.time() - start)
                 if virtual_err is not None:
                     log.trace(
                         u'Error loading %s.%s: %s',
@@ -1526,6 +1847,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
             (x, self.loaded_modules.get(x, self.mod_dict_class()))
             for x in mod_names
         ))
+        funcs = []
 
         for attr in getattr(mod, u'__load__', dir(mod)):
             if attr.startswith(u'_'):
@@ -1552,6 +1874,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 # Careful not to overwrite existing (higher priority) functions
                 if full_funcname not in self._dict:
                     self._dict[full_funcname] = func
+                funcs.append(full_funcname)
                 if funcname not in mod_dict[tgt_mod]:
                     setattr(mod_dict[tgt_mod], funcname, func)
                     mod_dict[tgt_mod][funcname] = func
@@ -1568,6 +1891,13 @@ class LazyLoader(salt.utils.lazy.LazyDict):
 
         for tgt_mod in mod_names:
             self.loaded_modules[tgt_mod] = mod_dict[tgt_mod]
+        if self.index_path is not None:
+            self.index_records[name] = {
+                u'failed': False,
+                u'error': None,
+                u'names': mod_names,
+                u'funcs': [func for func in funcs if func in self._dict],
+            }
         return True
 
     def _load(self, key):
@@ -1621,12 +1951,228 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         for name in self.file_mapping:
             if name in self.loaded_files or name in self.missing_modules:
                 continue
+            if self._index_skip(name):
+                continue
             self._load_module(name)
 
         self.loaded = True
+        if self.index_path is not None:
+            self._write_index()
+
+    def function_names(self):
+        '''
+        Return the sorted names of all the functions of this loader. When the
+        loader index covers all the modules, the names are read from it
+        instead of loading every module.
+        '''
+        if self.loaded or self.index is None:
+            return sorted(self)
+        names = set(self._dict)
+        for name in self.file_mapping:
+            entry = self._index_entry(name)
+            if entry is None:
+                # This module changed or was never loaded
+                return sorted(self)
+            names.update(entry[u'funcs'])
+        if self.whitelist:
+            names = [func for func in names
+                     if func.split(u'.', 1)[0] in self.whitelist]
+        return sorted(names)
+
+    def _index_key(self):
+        '''
+        Return the file name of the index of this loader. The first part of
+        the name identifies the loader, the second one the grains and salt
+        version the results of the __virtual__ functions depend on.
+        '''
+        loader_sig = repr((
+            self.tag,
+            self.module_dirs,
+            self.static_modules,
+            self.whitelist,
+            sorted(self.disabled),
+            self.virtual_enable,
+            self.virtual_funcs,
+            (self.opts.get(u'proxy') or {}).get(u'proxytype'),
+            self.opts.get(u'cython_enable', True),
+            self.opts.get(u'enable_zip_modules', True),
+        ))
+        try:
+            grains_sig = json.dumps(self.opts.get(u'grains', {}),
+                                    sort_keys=True,
+                                    default=repr)
+        except (TypeError, ValueError):
+            # Grains which can't be sorted
+            return None
+        grains_sig += salt.version.__version__ + sys.version
+        return u'{0}-{1}-{2}.p'.format(
+            self.tag,
+            hashlib.sha256(loader_sig.encode(u'utf-8')).hexdigest()[:16],
+            hashlib.sha256(grains_sig.encode(u'utf-8')).hexdigest()[:16])
+
+    def _read_index(self):
+        '''
+        Read the index of this loader off the disk
+        '''
+        key = self._index_key()
+        if key is None:
+            return
+        self.index_path = os.path.join(_loader_index_dir(self.opts), key)
+        try:
+            with salt.utils.files.fopen(self.index_path, u'rb') as fp_:
+                index = salt.payload.Serial(u'msgpack').load(fp_)
+        except (IOError, OSError):
+            return
+        except Exception as exc:
+            log.debug(u'Unable to read the loader index %s: %s',
+                      self.index_path, exc)
+            return
+        if isinstance(index, dict) \
+                and index.get(u'version') == LOADER_INDEX_VERSION:
+            self.index = index
+
+    def _index_dirs(self):
+        '''
+        Return the mtimes of the module directories and of the packages
+        '''
+        ret = {}
+        paths = list(self.module_dirs)
+        paths.extend(fpath for fpath, suffix in six.itervalues(self.file_mapping)
+                     if suffix == u'')
+        for path in paths:
+            try:
+                ret[path] = os.stat(path).st_mtime
+            except OSError:
+                ret[path] = None
+        return ret
+
+    def _index_mapping_valid(self):
+        '''
+        Return True if the file mapping of the index can be used
+        '''
+        if self.index is None:
+            return False
+        for path, mtime in six.iteritems(self.index[u'dirs']):
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return False
+            except OSError:
+                if mtime is not None:
+                    return False
+        return True
+
+    def _index_stat(self, name):
+        '''
+        Return the mtime and size of the file of a module, or of the __init__
+        file of a package. Static modules are part of salt and have no file
+        of their own. Raises OSError if the file is gone.
+        '''
+        fpath, suffix = self.file_mapping[name]
+        if suffix == u'.o':
+            return None
+        if suffix == u'':
+            for init_suffix in self.suffix_map:
+                if not init_suffix:
+                    continue
+                init_file = os.path.join(fpath, u'__init__{0}'.format(init_suffix))
+                if os.path.isfile(init_file):
+                    fpath = init_file
+                    break
+        fstat = os.stat(fpath)
+        return [fstat.st_mtime, fstat.st_size]
+
+    def _index_entry(self, name):
+        '''
+        Return the index entry of a module if its file did not change since
+        the index was written
+        '''
+        if self.index is None:
+            return None
+        if name in self.index_checked:
+            return self.index_checked[name]
+        entry = self.index[u'modules'].get(name)
+        if entry is not None:
+            try:
+                if self._index_stat(name) != entry[u'stat']:
+                    entry = None
+            except OSError:
+                entry = None
+        self.index_checked[name] = entry
+        return entry
+
+    def _index_error(self, error):
+        if error is None:
+            return None
+        return six.text_type(error)
+
+    def _index_skip(self, name):
+        '''
+        Return True if the index knows a module fails to load, after
+        recording the failure as loading it would have
+        '''
+        entry = self._index_entry(name)
+        if entry is None or not entry[u'failed']:
+            return False
+        if name not in self.loaded_files:
+            self.loaded_files.add(name)
+            for key in entry[u'names']:
+                self.missing_modules.setdefault(key, entry[u'error'])
+            self.missing_modules[name] = entry[u'error']
+            self.index_records[name] = entry
+        return True
+
+    def _write_index(self):
+        '''
+        Write the index of all the modules of this loader to the disk
+        '''
+        modules = {}
+        for name in self.file_mapping:
+            entry = self.index_records.get(name)
+            if entry is None:
+                # Not loaded by this loader, keep the previous result
+                entry = self._index_entry(name)
+                if entry is None:
+                    continue
+            else:
+                entry = dict(entry)
+                try:
+                    entry[u'stat'] = self._index_stat(name)
+                except OSError:
+                    continue
+            modules[name] = entry
+        index = {
+            u'version': LOADER_INDEX_VERSION,
+            u'dirs': self._index_dirs(),
+            u'file_mapping': [[name, fpath, suffix] for name, (fpath, suffix)
+                              in six.iteritems(self.file_mapping)],
+            u'modules': modules,
+        }
+        if index == self.index:
+            return
+        index_dir = os.path.dirname(self.index_path)
+        try:
+            if not os.path.isdir(index_dir):
+                os.makedirs(index_dir)
+            # Remove the indexes of this loader written for other grains
+            prefix = os.path.basename(self.index_path).rsplit(u'-', 1)[0] + u'-'
+            for fname in os.listdir(index_dir):
+                if fname.startswith(prefix):
+                    os.remove(os.path.join(index_dir, fname))
+            with salt.utils.atomicfile.atomic_open(self.index_path, u'wb') as fp_:
+                fp_.write(salt.payload.Serial(u'msgpack').dumps(index))
+        except (IOError, OSError) as exc:
+            log.debug(u'Unable to write the loader index %s: %s',
+                      self.index_path, exc)
+            return
+        self.index = index
+        self.index_checked = {}
 
     def reload_modules(self):
         self.loaded_files = set()
+        # The modules skipped by the index may load now
+        self.index = None
+        self.index_checked = {}
+        self.index_records = {}
         self._load_all()
 
     def _apply_outputter(self, func, mod):
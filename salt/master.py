@@ -13,6 +13,7 @@ import re
 import sys
 import time
 import errno
+import gc
 import signal
 import stat
 import logging
@@ -20,11 +21,6 @@ import multiprocessing
 import salt.serializers.msgpack
 
 # Import third party libs
-try:
-    from Cryptodome.PublicKey import RSA
-except ImportError:
-    # Fall back to pycrypto
-    from Crypto.PublicKey import RSA
 # pylint: disable=import-error,no-name-in-module,redefined-builtin
 from salt.ext import six
 from salt.ext.six.moves import range
@@ -44,11 +40,13 @@ except ImportError:
     HAS_ZMQ = False
 
 import tornado.gen  # pylint: disable=F0401
+import tornado.ioloop  # pylint: disable=F0401
 
 # Import salt libs
 import salt.crypt
 import salt.utils
 import salt.client
+import salt.cli.batch
 import salt.payload
 import salt.pillar
 import salt.state
@@ -75,7 +73,9 @@ import salt.utils.job
 import salt.utils.master
 import salt.utils.minions
 import salt.utils.platform
+import salt.utils.presence
 import salt.utils.process
+import salt.utils.profiling
 import salt.utils.schedule
 import salt.utils.verify
 import salt.utils.zeromq
@@ -162,6 +162,8 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.loop_interval = int(self.opts[u'loop_interval'])
         # Track key rotation intervals
         self.rotate = int(time.time())
+        # Track the profiling intervals
+        self.profiling_last = int(time.time())
         # A serializer for general maint operations
         self.serial = salt.payload.Serial(self.opts)
 
@@ -242,7 +244,9 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
             self.handle_schedule()
             self.handle_key_cache()
             self.handle_presence(old_present)
+            self.handle_presence_tracking()
             self.handle_key_rotate(now)
+            self.handle_profiling(now)
             salt.daemons.masterapi.fileserver_update(self.fileserver)
             salt.utils.verify.check_max_open_files(self.opts)
             last = now
@@ -269,6 +273,21 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
             with salt.utils.atomicfile.atomic_open(os.path.join(self.opts[u'pki_dir'], acc, u'.key_cache')) as cache_file:
                 self.serial.dump(keys, cache_file)
 
+    def handle_profiling(self, now):
+        '''
+        Save the timings of this process, and fire the timings of the master
+        on the event bus if profiling_events is set
+        '''
+        if not self.opts.get(u'profiling', False):
+            return
+        if now - self.profiling_last < self.opts[u'profiling_interval']:
+            return
+        self.profiling_last = now
+        salt.utils.profiling.flush(self.opts)
+        if self.opts.get(u'profiling_events', False):
+            self.event.fire_event(salt.utils.profiling.stats(self.opts),
+                                  tagify(u'master', u'profiling'))
+
     def handle_key_rotate(self, now):
         '''
         Rotate the AES key rotation
@@ -333,6 +352,24 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
         except Exception as exc:
             log.error(u'Exception %s occurred in scheduled job', exc)
 
+    def handle_presence_tracking(self):
+        '''
+        Forget the minions seen by the master which no longer have an accepted
+        key, with presence_tracking
+        '''
+        if not salt.utils.presence.enabled(self.opts):
+            return
+        if self.opts[u'transport'] in (u'zeromq', u'tcp'):
+            acc = u'minions'
+        else:
+            acc = u'accepted'
+        try:
+            accepted = os.listdir(os.path.join(self.opts[u'pki_dir'], acc))
+        except OSError as exc:
+            log.error(u'Unable to list the accepted minion keys: %s', exc)
+            return
+        salt.utils.presence.prune(self.opts, accepted)
+
     def handle_presence(self, old_present):
         '''
         Fire presence events if enabled
@@ -565,6 +602,10 @@ class Master(SMaster):
                 log.info(u'Creating master event return process')
                 self.process_manager.add_process(salt.utils.event.EventReturn, args=(self.opts,))
 
+            if self.opts.get(u'job_return_writer') and HAS_ZMQ:
+                log.info(u'Creating master job return writer process')
+                self.process_manager.add_process(salt.utils.job.ReturnWriter, args=(self.opts,))
+
             ext_procs = self.opts.get(u'ext_processes', [])
             for proc in ext_procs:
                 log.info(u'Creating ext_processes process: %s', proc)
@@ -654,6 +695,57 @@ class Halite(salt.utils.process.SignalHandlingMultiprocessingProcess):
         halite.start(self.hopts)
 
 
+def preload_worker_modules(opts):
+    '''
+    Import the modules used by the master workers, and the libraries they
+    depend on, in the ReqServer before it forks the workers when
+    ``worker_preload`` is set. The workers then share the memory of the
+    imported libraries copy-on-write instead of each one importing them
+    again.
+
+    Only the imported code is shared. The loaders are thrown away with the
+    modules they loaded, so the connections and the other state set up by
+    these modules, in their ``__virtual__`` function for instance, are not
+    inherited by the workers, which create their own loaders after the fork.
+    '''
+    start = time.time()
+    imported = set(sys.modules)
+    mminion = salt.minion.MasterMinion(
+        opts,
+        states=False,
+        rend=False,
+        ignore_config_errors=True
+    )
+    # The pillar and runner loaders are created for each request, loading
+    # them imports the libraries their modules depend on
+    loaders = [mminion.utils,
+               mminion.functions,
+               mminion.serializers,
+               mminion.returners,
+               salt.fileserver.Fileserver(opts).servers,
+               salt.loader.tops(opts),
+               salt.auth.LoadAuth(opts).auth,
+               salt.wheel.Wheel(opts).functions,
+               salt.loader.pillars(opts, mminion.functions),
+               salt.loader.runner(opts, utils=mminion.utils)]
+    for loader in loaders:
+        # Loads all the modules, the master_tops loader is wrapped
+        len(loader)
+    del loaders, mminion
+    loaded_prefix = u'{0}.'.format(salt.loader.LOADED_BASE_NAME)
+    for name in set(sys.modules) - imported:
+        if name.startswith(loaded_prefix):
+            del sys.modules[name]
+    # Close what the loaded modules opened before the fork
+    gc.collect()
+    if hasattr(gc, u'freeze'):
+        # Move everything imported out of the reach of the garbage
+        # collector, it would otherwise write to the shared pages
+        gc.freeze()
+    log.info(u'Preloaded the master worker modules in %.2f seconds',
+             time.time() - start)
+
+
 class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
     '''
     Starts up the master request server, minions send results to this
@@ -739,6 +831,9 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
                 log.warning(u'TCP transport supports only 1 worker on Windows '
                             u'when using Python 2.')
                 self.opts[u'worker_threads'] = 1
+        elif self.opts.get(u'worker_preload', False):
+            # The workers are forked, they share the imported modules
+            preload_worker_modules(self.opts)
 
         # Reset signals to default ones before adding processes to the process
         # manager. We don't want the processes being started to inherit those
@@ -843,6 +938,11 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.io_loop.make_current()
         for req_channel in self.req_channels:
             req_channel.post_fork(self._handle_payload, io_loop=self.io_loop)  # TODO: cleaner? Maybe lazily?
+        if salt.utils.presence.enabled(self.opts):
+            tornado.ioloop.PeriodicCallback(
+                lambda: salt.utils.presence.flush(self.opts),
+                self.opts[u'presence_interval'] * 1000,
+                io_loop=self.io_loop).start()
         try:
             self.io_loop.start()
         except (KeyboardInterrupt, SystemExit):
@@ -873,8 +973,14 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         '''
         key = payload[u'enc']
         load = payload[u'load']
+        start = time.time()
         ret = {u'aes': self._handle_aes,
                u'clear': self._handle_clear}[key](load)
+        if self.opts.get(u'profiling', False) and isinstance(load, dict):
+            salt.utils.profiling.record(self.opts,
+                                        u'request',
+                                        load.get(u'cmd'),
+                                        time.time() - start)
         raise tornado.gen.Return(ret)
 
     def _handle_clear(self, load):
@@ -949,6 +1055,10 @@ class AESFuncs(object):
             rend=False,
             ignore_config_errors=True
         )
+        # Hand the job returns over to the return writer process
+        self.return_writer = None
+        if self.opts.get(u'job_return_writer') and HAS_ZMQ:
+            self.return_writer = salt.utils.job.ReturnWriterClient(self.opts)
         self.__setup_fileserver()
         self.masterapi = salt.daemons.masterapi.RemoteFuncs(opts)
 
@@ -983,9 +1093,7 @@ class AESFuncs(object):
         pub_path = os.path.join(self.opts[u'pki_dir'], u'minions', id_)
 
         try:
-            with salt.utils.files.fopen(pub_path, u'r') as fp_:
-                minion_pub = fp_.read()
-                pub = RSA.importKey(minion_pub)
+            pub = salt.crypt.get_rsa_pub_key(pub_path)
         except (IOError, OSError):
             log.warning(
                 u'Salt minion claiming to be %s attempted to communicate with '
@@ -995,6 +1103,7 @@ class AESFuncs(object):
             return False
         except (ValueError, IndexError, TypeError) as err:
             log.error(u'Unable to load public key "%s": %s', pub_path, err)
+            return False
         try:
             if salt.crypt.public_decrypt(pub, token) == b'salt':  # future lint: disable=non-unicode-string
                 return True
@@ -1316,10 +1425,11 @@ class AESFuncs(object):
         data = pillar.compile_pillar(pillar_dirs=pillar_dirs)
         self.fs_.update_opts()
         if self.opts.get(u'minion_data_cache', False):
+            mdata = {u'grains': load[u'grains'], u'pillar': data}
             self.masterapi.cache.store(u'minions/{0}'.format(load[u'id']),
                                        u'data',
-                                       {u'grains': load[u'grains'],
-                                        u'pillar': data})
+                                       mdata)
+            self.ckminions.update_data_index(load[u'id'], mdata)
             self.event.fire_event({u'Minion data cache refresh': load[u'id']}, tagify(load[u'id'], u'refresh', u'minion'))
         return data
 
@@ -1406,7 +1516,8 @@ class AESFuncs(object):
 
         try:
             salt.utils.job.store_job(
-                self.opts, load, event=self.event, mminion=self.mminion)
+                self.opts, load, event=self.event, mminion=self.mminion,
+                writer=self.return_writer)
         except salt.exceptions.SaltCacheError:
             log.error(u'Could not store job information for load: %s', load)
 
@@ -1602,6 +1713,10 @@ class AESFuncs(object):
             return {}, {u'fun': u'send'}
         # Run the func
         if hasattr(self, func):
+            if func in salt.utils.presence.PRESENCE_FUNCS and \
+                    salt.utils.presence.enabled(self.opts) and \
+                    salt.utils.verify.valid_id(self.opts, load.get(u'id')):
+                salt.utils.presence.seen(self.opts, load[u'id'])
             try:
                 start = time.time()
                 ret = getattr(self, func)(load)
@@ -1662,6 +1777,8 @@ class ClearFuncs(object):
         self.wheel_ = salt.wheel.Wheel(opts)
         # Make a masterapi object
         self.masterapi = salt.daemons.masterapi.LocalFuncs(opts, key)
+        # Publisher channels are created on first use and then reused
+        self.pub_channels = None
 
     def runner(self, clear_load):
         '''
@@ -1962,6 +2079,17 @@ class ClearFuncs(object):
         if jid is None:
             return {u'enc': u'clear',
                     u'load': {u'error': u'Master failed to assign jid'}}
+        if extra.get(u'master_batch') and extra.get(u'batch') \
+                and not self.opts.get(u'order_masters'):
+            # The master runs the batch, the client only gets the jid
+            self._prep_batch(minions, jid, clear_load, extra)
+            return {
+                u'enc': u'clear',
+                u'load': {
+                    u'jid': clear_load[u'jid'],
+                    u'minions': minions
+                }
+            }
         payload = self._prep_pub(minions, jid, clear_load, extra)
 
         # Send it!
@@ -2000,12 +2128,55 @@ class ClearFuncs(object):
             return {u'error': msg}
         return jid
 
+    def _prep_batch(self, minions, jid, clear_load, extra):
+        '''
+        Save the load of a batch run in the master job cache, and start the
+        process of the master which publishes its sub-jobs
+        '''
+        clear_load[u'jid'] = jid
+        load = {
+            u'jid': jid,
+            u'tgt_type': clear_load[u'tgt_type'],
+            u'tgt': clear_load[u'tgt'],
+            u'user': clear_load[u'user'],
+            u'fun': clear_load[u'fun'],
+            u'arg': clear_load[u'arg'],
+            u'ret': clear_load.get(u'ret', u''),
+            u'batch': extra[u'batch'],
+            u'batch_wait': extra.get(u'batch_wait', 0),
+            u'batch_failure_threshold': extra.get(u'batch_failure_threshold'),
+        }
+        for key in (u'metadata', u'ret_config', u'ret_kwargs'):
+            if key in extra:
+                load[key] = extra[key]
+        self.event.fire_event(dict(load, minions=minions), tagify([jid, u'new'], u'batch'))
+        try:
+            fstr = u'{0}.save_load'.format(self.opts[u'master_job_cache'])
+            self.mminion.returners[fstr](jid, load, minions)
+        except KeyError:
+            log.critical(
+                u'The specified returner used for the master job cache '
+                u'"%s" does not have a save_load function!',
+                self.opts[u'master_job_cache']
+            )
+        except Exception:
+            log.critical(
+                u'The specified returner threw a stack trace:\n',
+                exc_info=True
+            )
+        salt.cli.batch.save_batch_status(self.opts, jid, {u'status': u'pending'})
+        salt.cli.batch.start_master_batch(self.opts, load, minions)
+
     def _send_pub(self, load):
         '''
         Take a load and send it across the network to connected minions
         '''
-        for transport, opts in iter_transport_opts(self.opts):
-            chan = salt.transport.server.PubServerChannel.factory(opts)
+        if self.pub_channels is None:
+            self.pub_channels = [
+                salt.transport.server.PubServerChannel.factory(opts)
+                for transport, opts in iter_transport_opts(self.opts)
+            ]
+        for chan in self.pub_channels:
             chan.publish(load)
 
     def _prep_pub(self, minions, jid, clear_load, extra):
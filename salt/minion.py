@@ -29,7 +29,7 @@ if six.PY3:
     import ipaddress
 else:
     import salt.ext.ipaddress as ipaddress
-from salt.ext.six.moves import range
+from salt.ext.six.moves import queue, range
 # pylint: enable=no-name-in-module,redefined-builtin
 
 # Import third party libs
@@ -96,7 +96,9 @@ import salt.utils.minion
 import salt.utils.minions
 import salt.utils.network
 import salt.utils.platform
+import salt.utils.profiling
 import salt.utils.schedule
+import salt.utils.snapshot
 import salt.utils.zeromq
 import salt.defaults.exitcodes
 import salt.cli.daemons
@@ -709,13 +711,15 @@ class SMinion(MinionBase):
 
             salt '*' sys.reload_modules
         '''
-        self.opts[u'pillar'] = salt.pillar.get_pillar(
+        self.opts[u'pillar'] = salt.utils.snapshot.pillar(
             self.opts,
-            self.opts[u'grains'],
-            self.opts[u'id'],
-            self.opts[u'environment'],
-            pillarenv=self.opts.get(u'pillarenv'),
-        ).compile_pillar()
+            lambda: salt.pillar.get_pillar(
+                self.opts,
+                self.opts[u'grains'],
+                self.opts[u'id'],
+                self.opts[u'environment'],
+                pillarenv=self.opts.get(u'pillarenv'),
+            ).compile_pillar())
 
         self.utils = salt.loader.utils(self.opts)
         self.functions = salt.loader.minion_mods(self.opts, utils=self.utils)
@@ -945,6 +949,8 @@ class Minion(MinionBase):
 
         self._running = None
         self.win_proc = []
+        self.job_pool = None
+        self.job_pool_worker = False
         self.loaded_base_name = loaded_base_name
         self.connected = False
         self.restart = False
@@ -1346,12 +1352,23 @@ class Minion(MinionBase):
                 self.functions, self.returners, self.function_errors, self.executors = self._load_modules()
                 self.schedule.functions = self.functions
                 self.schedule.returners = self.returners
+                if self.job_pool is not None:
+                    self.job_pool.recycle()
         # We stash an instance references to allow for the socket
         # communication in Windows. You can't pickle functions, and thus
         # python needs to be able to reconstruct the reference on the other
         # side.
         instance = self
         multiprocessing_enabled = self.opts.get(u'multiprocessing', True)
+        if multiprocessing_enabled and self.opts.get(u'job_pool_size', 0) > 0:
+            if self.job_pool is None:
+                self.job_pool = MinionJobPool(self)
+            if self.job_pool.run_job(data, self.connected):
+                return
+            log.debug(
+                u'All the job pool workers are busy, starting a new process '
+                u'for job %s', data[u'jid']
+            )
         if multiprocessing_enabled:
             if sys.platform.startswith(u'win'):
                 # let python reconstruct the minion on the other side if we're
@@ -1400,26 +1417,35 @@ class Minion(MinionBase):
             exitstack.enter_context(self.executors.context_dict.clone())
             return exitstack
 
+    @classmethod
+    def _target_instance(cls, opts, connected):
+        '''
+        Build the minion running the jobs in a process which doesn't inherit
+        it from the minion process
+        '''
+        minion_instance = cls(opts)
+        minion_instance.connected = connected
+        if not hasattr(minion_instance, u'functions'):
+            functions, returners, function_errors, executors = (
+                minion_instance._load_modules(grains=opts[u'grains'])
+                )
+            minion_instance.functions = functions
+            minion_instance.returners = returners
+            minion_instance.function_errors = function_errors
+            minion_instance.executors = executors
+        if not hasattr(minion_instance, u'serial'):
+            minion_instance.serial = salt.payload.Serial(opts)
+        if not hasattr(minion_instance, u'proc_dir'):
+            uid = salt.utils.get_uid(user=opts.get(u'user', None))
+            minion_instance.proc_dir = (
+                get_proc_dir(opts[u'cachedir'], uid=uid)
+                )
+        return minion_instance
+
     @classmethod
     def _target(cls, minion_instance, opts, data, connected):
         if not minion_instance:
-            minion_instance = cls(opts)
-            minion_instance.connected = connected
-            if not hasattr(minion_instance, u'functions'):
-                functions, returners, function_errors, executors = (
-                    minion_instance._load_modules(grains=opts[u'grains'])
-                    )
-                minion_instance.functions = functions
-                minion_instance.returners = returners
-                minion_instance.function_errors = function_errors
-                minion_instance.executors = executors
-            if not hasattr(minion_instance, u'serial'):
-                minion_instance.serial = salt.payload.Serial(opts)
-            if not hasattr(minion_instance, u'proc_dir'):
-                uid = salt.utils.get_uid(user=opts.get(u'user', None))
-                minion_instance.proc_dir = (
-                    get_proc_dir(opts[u'cachedir'], uid=uid)
-                    )
+            minion_instance = cls._target_instance(opts, connected)
 
         with tornado.stack_context.StackContext(minion_instance.ctx):
             if isinstance(data[u'fun'], tuple) or isinstance(data[u'fun'], list):
@@ -1435,16 +1461,19 @@ class Minion(MinionBase):
         '''
         fn_ = os.path.join(minion_instance.proc_dir, data[u'jid'])
 
-        if opts[u'multiprocessing'] and not salt.utils.platform.is_windows():
-            # Shutdown the multiprocessing before daemonizing
-            salt.log.setup.shutdown_multiprocessing_logging()
+        # The workers of the job pool run many jobs, they are not daemonized
+        # and keep their process title
+        if not minion_instance.job_pool_worker:
+            if opts[u'multiprocessing'] and not salt.utils.platform.is_windows():
+                # Shutdown the multiprocessing before daemonizing
+                salt.log.setup.shutdown_multiprocessing_logging()
 
-            salt.utils.daemonize_if(opts)
+                salt.utils.daemonize_if(opts)
 
-            # Reconfigure multiprocessing logging after daemonizing
-            salt.log.setup.setup_multiprocessing_logging()
+                # Reconfigure multiprocessing logging after daemonizing
+                salt.log.setup.setup_multiprocessing_logging()
 
-        salt.utils.appendproctitle(u'{0}._thread_return {1}'.format(cls.__name__, data[u'jid']))
+            salt.utils.appendproctitle(u'{0}._thread_return {1}'.format(cls.__name__, data[u'jid']))
 
         sdata = {u'pid': os.getpid()}
         sdata.update(data)
@@ -1487,6 +1516,7 @@ class Minion(MinionBase):
                     executors[-1] = u'sudo'  # replace the last one with sudo
                 log.trace(u'Executors list %s', executors)  # pylint: disable=no-member
 
+                start = time.time()
                 for name in executors:
                     fname = u'{0}.execute'.format(name)
                     if fname not in minion_instance.executors:
@@ -1494,6 +1524,7 @@ class Minion(MinionBase):
                     return_data = minion_instance.executors[fname](opts, data, func, args, kwargs)
                     if return_data is not None:
                         break
+                salt.utils.profiling.record(opts, u'function', function_name, time.time() - start)
 
                 if isinstance(return_data, types.GeneratorType):
                     ind = 0
@@ -1605,7 +1636,9 @@ class Minion(MinionBase):
                 try:
                     returner_str = u'{0}.returner'.format(returner)
                     if returner_str in minion_instance.returners:
+                        start = time.time()
                         minion_instance.returners[returner_str](ret)
+                        salt.utils.profiling.record(opts, u'returner', returner, time.time() - start)
                     else:
                         returner_err = minion_instance.returners.missing_fun_string(returner_str)
                         log.error(
@@ -1616,6 +1649,9 @@ class Minion(MinionBase):
                     log.exception(
                         u'The return failed for job %s: %s', data[u'jid'], exc
                     )
+        if opts[u'multiprocessing'] and not minion_instance.job_pool_worker:
+            # The job process exits, the minion merges its timings
+            salt.utils.profiling.spool(opts)
 
     @classmethod
     def _thread_multi_return(cls, minion_instance, opts, data):
@@ -1623,7 +1659,8 @@ class Minion(MinionBase):
         This method should be used as a threading target, start the actual
         minion side execution.
         '''
-        salt.utils.appendproctitle(u'{0}._thread_multi_return {1}'.format(cls.__name__, data[u'jid']))
+        if not minion_instance.job_pool_worker:
+            salt.utils.appendproctitle(u'{0}._thread_multi_return {1}'.format(cls.__name__, data[u'jid']))
         ret = {
             u'return': {},
             u'retcode': {},
@@ -1654,7 +1691,9 @@ class Minion(MinionBase):
                     data[u'arg'][ind],
                     data)
                 minion_instance.functions.pack[u'__context__'][u'retcode'] = 0
+                start = time.time()
                 ret[u'return'][data[u'fun'][ind]] = func(*args, **kwargs)
+                salt.utils.profiling.record(opts, u'function', data[u'fun'][ind], time.time() - start)
                 ret[u'retcode'][data[u'fun'][ind]] = minion_instance.functions.pack[u'__context__'].get(
                     u'retcode',
                     0
@@ -1682,14 +1721,19 @@ class Minion(MinionBase):
             for returner in set(data[u'ret'].split(u',')):
                 ret[u'id'] = opts[u'id']
                 try:
+                    start = time.time()
                     minion_instance.returners[u'{0}.returner'.format(
                         returner
                     )](ret)
+                    salt.utils.profiling.record(opts, u'returner', returner, time.time() - start)
                 except Exception as exc:
                     log.error(
                         u'The return failed for job %s: %s',
                         data[u'jid'], exc
                     )
+        if opts[u'multiprocessing'] and not minion_instance.job_pool_worker:
+            # The job process exits, the minion merges its timings
+            salt.utils.profiling.spool(opts)
 
     def _return_pub(self, ret, ret_cmd=u'_return', timeout=60, sync=True):
         '''
@@ -1843,6 +1887,9 @@ class Minion(MinionBase):
 
         self.schedule.functions = self.functions
         self.schedule.returners = self.returners
+        if self.job_pool is not None:
+            # The workers have the old modules loaded
+            self.job_pool.recycle()
 
     def beacons_refresh(self):
         '''
@@ -2190,6 +2237,10 @@ class Minion(MinionBase):
         # Add an extra fallback in case a forked process leaks through
         multiprocessing.active_children()
 
+        # Replace the job pool workers which exited
+        if self.job_pool is not None:
+            self.job_pool.check()
+
         # Cleanup Windows threads
         if not salt.utils.platform.is_windows():
             return
@@ -2279,6 +2330,16 @@ class Minion(MinionBase):
 
         self.periodic_callbacks[u'beacons'] = tornado.ioloop.PeriodicCallback(handle_beacons, loop_interval * 1000, io_loop=self.io_loop)
 
+        if self.opts.get(u'profiling', False):
+            def handle_profiling():
+                # Save the timings of this process, like the module loads
+                salt.utils.profiling.flush(self.opts)
+                if self.opts.get(u'profiling_events', False) and self.connected:
+                    self._fire_master(salt.utils.profiling.stats(self.opts),
+                                      tagify([self.opts[u'id']], u'profiling'),
+                                      sync=False)
+            self.periodic_callbacks[u'profiling'] = tornado.ioloop.PeriodicCallback(handle_profiling, self.opts[u'profiling_interval'] * 1000, io_loop=self.io_loop)
+
         # TODO: actually listen to the return and change period
         def handle_schedule():
             self.process_schedule(self, loop_interval)
@@ -2362,11 +2423,201 @@ class Minion(MinionBase):
         if hasattr(self, u'periodic_callbacks'):
             for cb in six.itervalues(self.periodic_callbacks):
                 cb.stop()
+        if getattr(self, u'job_pool', None) is not None:
+            self.job_pool.stop()
+            self.job_pool = None
 
     def __del__(self):
         self.destroy()
 
 
+class MinionJobWorker(SignalHandlingMultiprocessingProcess):
+    '''
+    A pre-forked process running the jobs of the minion one after the other
+    with the modules already loaded
+    '''
+    def __init__(self, minion_cls, minion_instance, opts, jobs, idle,
+                 generation, log_queue=None):
+        super(MinionJobWorker, self).__init__(log_queue=log_queue)
+        self.minion_cls = minion_cls
+        self.minion_instance = minion_instance
+        self.opts = opts
+        self.jobs = jobs
+        self.idle = idle
+        # Set while the token released by this worker is in idle, so that
+        # the pool can take it back if the worker dies
+        self.is_idle = multiprocessing.Value(u'b', 0)
+        self.generation = generation
+        self.worker_generation = generation.value
+
+    # __setstate__ and __getstate__ are only used on Windows.
+    # We do this so that __init__ will be invoked on Windows in the child
+    # process so that a register_after_fork() equivalent will work on Windows.
+    def __setstate__(self, state):
+        self._is_child = True
+        self.__init__(
+            state[u'minion_cls'],
+            None,
+            state[u'opts'],
+            state[u'jobs'],
+            state[u'idle'],
+            state[u'generation'],
+            log_queue=state[u'log_queue']
+        )
+        self.is_idle = state[u'is_idle']
+        self.worker_generation = state[u'worker_generation']
+
+    def __getstate__(self):
+        return {u'minion_cls': self.minion_cls,
+                u'opts': self.opts,
+                u'jobs': self.jobs,
+                u'idle': self.idle,
+                u'is_idle': self.is_idle,
+                u'generation': self.generation,
+                u'worker_generation': self.worker_generation,
+                u'log_queue': self.log_queue}
+
+    def _next_job(self):
+        '''
+        Wait for a job, return None once the pool is recycled
+        '''
+        while self.generation.value == self.worker_generation:
+            try:
+                job = self.jobs.get(timeout=1)
+            except queue.Empty:
+                continue
+            # The minion took the token of a worker to hand this job
+            self.is_idle.value = 0
+            return job
+        # Take back the token this worker gave when it became idle, the pool
+        # takes it back later if a job was handed for it
+        if self.idle.acquire(False):
+            self.is_idle.value = 0
+        return None
+
+    def run(self):
+        salt.utils.appendproctitle(self.__class__.__name__)
+        minion_instance = self.minion_instance
+        if minion_instance is None:
+            minion_instance = self.minion_cls._target_instance(self.opts, False)
+        # The pool belongs to the minion process
+        minion_instance.job_pool = None
+        minion_instance.job_pool_worker = True
+
+        max_jobs = self.opts.get(u'job_pool_max_jobs', 0)
+        done = 0
+        while not max_jobs or done < max_jobs:
+            with self.is_idle.get_lock():
+                try:
+                    self.idle.release()
+                except ValueError:
+                    # A recycled worker did not take back its token
+                    pass
+                self.is_idle.value = 1
+            job = self._next_job()
+            if job is None:
+                break
+            data, connected = job
+            minion_instance.connected = connected
+            try:
+                self.minion_cls._target(minion_instance, self.opts, data, connected)
+            except Exception:
+                log.exception(u'Job %s failed in the job pool', data.get(u'jid'))
+            finally:
+                # The process keeps running, the job is not running anymore
+                fn_ = os.path.join(minion_instance.proc_dir, data[u'jid'])
+                if os.path.isfile(fn_):
+                    try:
+                        os.remove(fn_)
+                    except OSError:
+                        pass
+            done += 1
+        salt.utils.profiling.spool(self.opts)
+
+
+class MinionJobPool(object):
+    '''
+    A bounded pool of pre-forked processes running the jobs published to the
+    minion, instead of starting a new process for every job. The workers are
+    replaced after job_pool_max_jobs jobs, when they exit or are killed, and
+    when the modules of the minion are refreshed.
+    '''
+    def __init__(self, minion):
+        self.minion = minion
+        self.opts = minion.opts
+        self.size = self.opts[u'job_pool_size']
+        self.jobs = multiprocessing.Queue()
+        # Each idle worker releases a token, the minion takes one before
+        # handing a job to the pool
+        self.idle = multiprocessing.BoundedSemaphore(self.size)
+        for _ in range(self.size):
+            self.idle.acquire()
+        self.generation = multiprocessing.Value(u'i', 0)
+        # The tokens released by the workers which died idle, and not taken
+        # back yet because a job was handed for them
+        self.dead_tokens = 0
+        self.workers = []
+        self.check()
+
+    def check(self):
+        '''
+        Replace the workers which exited, after taking back the tokens of the
+        ones which died idle
+        '''
+        alive = []
+        for worker in self.workers:
+            if worker.is_alive():
+                alive.append(worker)
+            elif worker.is_idle.value:
+                self.dead_tokens += 1
+        self.workers = alive
+        while self.dead_tokens and self.idle.acquire(False):
+            self.dead_tokens -= 1
+        # On Windows the minion can't be inherited, the workers build their own
+        if salt.utils.platform.is_windows():
+            instance = None
+        else:
+            instance = self.minion
+        while len(self.workers) < self.size:
+            worker = MinionJobWorker(type(self.minion),
+                                     instance,
+                                     self.opts,
+                                     self.jobs,
+                                     self.idle,
+                                     self.generation)
+            with default_signals(signal.SIGINT, signal.SIGTERM):
+                # Reset current signals before starting the process in
+                # order not to inherit the current signal handlers
+                worker.start()
+            self.workers.append(worker)
+
+    def run_job(self, data, connected):
+        '''
+        Hand a job to an idle worker, return False if all of them are busy
+        '''
+        if not self.idle.acquire(False):
+            return False
+        self.jobs.put((data, connected))
+        return True
+
+    def recycle(self):
+        '''
+        Replace all the workers, the busy ones exit after their job
+        '''
+        with self.generation.get_lock():
+            self.generation.value += 1
+
+    def stop(self):
+        '''
+        Stop the workers, the jobs they are running are stopped too
+        '''
+        self.recycle()
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+
+
 class Syndic(Minion):
     '''
     Make a Syndic minion, this minion will use the minion keys on the
@@ -3343,60 +3594,58 @@ class ProxyMinion(Minion):
         self.ready = True
 
     @classmethod
-    def _target(cls, minion_instance, opts, data, connected):
-        if not minion_instance:
-            minion_instance = cls(opts)
-            minion_instance.connected = connected
-            if not hasattr(minion_instance, u'functions'):
-                # Need to load the modules so they get all the dunder variables
-                functions, returners, function_errors, executors = (
-                    minion_instance._load_modules(grains=opts[u'grains'])
-                    )
-                minion_instance.functions = functions
-                minion_instance.returners = returners
-                minion_instance.function_errors = function_errors
-                minion_instance.executors = executors
+    def _target_instance(cls, opts, connected):
+        '''
+        Build the proxy minion running the jobs in a process which doesn't
+        inherit it from the proxy minion process
+        '''
+        minion_instance = cls(opts)
+        minion_instance.connected = connected
+        if not hasattr(minion_instance, u'functions'):
+            # Need to load the modules so they get all the dunder variables
+            functions, returners, function_errors, executors = (
+                minion_instance._load_modules(grains=opts[u'grains'])
+                )
+            minion_instance.functions = functions
+            minion_instance.returners = returners
+            minion_instance.function_errors = function_errors
+            minion_instance.executors = executors
 
-                # Pull in the utils
-                minion_instance.utils = salt.loader.utils(minion_instance.opts)
+            # Pull in the utils
+            minion_instance.utils = salt.loader.utils(minion_instance.opts)
 
-                # Then load the proxy module
-                minion_instance.proxy = salt.loader.proxy(minion_instance.opts, utils=minion_instance.utils)
+            # Then load the proxy module
+            minion_instance.proxy = salt.loader.proxy(minion_instance.opts, utils=minion_instance.utils)
 
-                # And re-load the modules so the __proxy__ variable gets injected
-                functions, returners, function_errors, executors = (
-                    minion_instance._load_modules(grains=opts[u'grains'])
-                    )
-                minion_instance.functions = functions
-                minion_instance.returners = returners
-                minion_instance.function_errors = function_errors
-                minion_instance.executors = executors
-
-                minion_instance.functions.pack[u'__proxy__'] = minion_instance.proxy
-                minion_instance.proxy.pack[u'__salt__'] = minion_instance.functions
-                minion_instance.proxy.pack[u'__ret__'] = minion_instance.returners
-                minion_instance.proxy.pack[u'__pillar__'] = minion_instance.opts[u'pillar']
-
-                # Reload utils as well (chicken and egg, __utils__ needs __proxy__ and __proxy__ needs __utils__
-                minion_instance.utils = salt.loader.utils(minion_instance.opts, proxy=minion_instance.proxy)
-                minion_instance.proxy.pack[u'__utils__'] = minion_instance.utils
-
-                # Reload all modules so all dunder variables are injected
-                minion_instance.proxy.reload_modules()
-
-                fq_proxyname = opts[u'proxy'][u'proxytype']
-                proxy_init_fn = minion_instance.proxy[fq_proxyname + u'.init']
-                proxy_init_fn(opts)
-            if not hasattr(minion_instance, u'serial'):
-                minion_instance.serial = salt.payload.Serial(opts)
-            if not hasattr(minion_instance, u'proc_dir'):
-                uid = salt.utils.get_uid(user=opts.get(u'user', None))
-                minion_instance.proc_dir = (
-                    get_proc_dir(opts[u'cachedir'], uid=uid)
-                    )
-
-        with tornado.stack_context.StackContext(minion_instance.ctx):
-            if isinstance(data[u'fun'], tuple) or isinstance(data[u'fun'], list):
-                Minion._thread_multi_return(minion_instance, opts, data)
-            else:
-                Minion._thread_return(minion_instance, opts, data)
+            # And re-load the modules so the __proxy__ variable gets injected
+            functions, returners, function_errors, executors = (
+                minion_instance._load_modules(grains=opts[u'grains'])
+                )
+            minion_instance.functions = functions
+            minion_instance.returners = returners
+            minion_instance.function_errors = function_errors
+            minion_instance.executors = executors
+
+            minion_instance.functions.pack[u'__proxy__'] = minion_instance.proxy
+            minion_instance.proxy.pack[u'__salt__'] = minion_instance.functions
+            minion_instance.proxy.pack[u'__ret__'] = minion_instance.returners
+            minion_instance.proxy.pack[u'__pillar__'] = minion_instance.opts[u'pillar']
+
+            # Reload utils as well (chicken and egg, __utils__ needs __proxy__ and __proxy__ needs __utils__
+            minion_instance.utils = salt.loader.utils(minion_instance.opts, proxy=minion_instance.proxy)
+            minion_instance.proxy.pack[u'__utils__'] = minion_instance.utils
+
+            # Reload all modules so all dunder variables are injected
+            minion_instance.proxy.reload_modules()
+
+            fq_proxyname = opts[u'proxy'][u'proxytype']
+            proxy_init_fn = minion_instance.proxy[fq_proxyname + u'.init']
+            proxy_init_fn(opts)
+        if not hasattr(minion_instance, u'serial'):
+            minion_instance.serial = salt.payload.Serial(opts)
+        if not hasattr(minion_instance, u'proc_dir'):
+            uid = salt.utils.get_uid(user=opts.get(u'user', None))
+            minion_instance.proc_dir = (
+                get_proc_dir(opts[u'cachedir'], uid=uid)
+                )
+        return minion_instance
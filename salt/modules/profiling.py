@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+'''
+Read the timings recorded by the minion when the :conf_minion:`profiling`
+option is set
+
+.. versionadded:: Oxygen
+'''
+from __future__ import absolute_import
+
+# Import salt libs
+import salt.utils.profiling
+
+__proxyenabled__ = ['*']
+
+
+def stats(category=None, top=None):
+    '''
+    Return the count, total, mean and maximum durations, in seconds, recorded
+    by all the minion processes. The durations are grouped by category:
+    ``load`` and ``virtual`` for the loader, ``function`` and ``returner`` for
+    the jobs, and ``state`` for the state functions.
+
+    category
+        Only return the timings of this category
+
+    top
+        Only return this number of timings with the highest total duration in
+        each category
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' profiling.stats
+        salt '*' profiling.stats category=function top=10
+    '''
+    return salt.utils.profiling.stats(__opts__, category=category, top=top)
+
+
+def reset():
+    '''
+    Remove the timings recorded so far
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' profiling.reset
+    '''
+    return salt.utils.profiling.reset(__opts__)
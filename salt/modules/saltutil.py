@@ -42,6 +42,7 @@ import salt
 import salt.config
 import salt.client
 import salt.client.ssh.client
+import salt.loader
 import salt.payload
 import salt.runner
 import salt.state
@@ -110,13 +111,8 @@ def _sync(form, saltenv=None, extmod_whitelist=None, extmod_blacklist=None):
         mod_file = os.path.join(__opts__['cachedir'], 'module_refresh')
         with salt.utils.files.fopen(mod_file, 'a+') as ofile:
             ofile.write('')
-    if form == 'grains' and \
-       __opts__.get('grains_cache') and \
-       os.path.isfile(os.path.join(__opts__['cachedir'], 'grains.cache.p')):
-        try:
-            os.remove(os.path.join(__opts__['cachedir'], 'grains.cache.p'))
-        except OSError:
-            log.error('Could not remove grains cache!')
+    if form == 'grains' and __opts__.get('grains_cache'):
+        salt.loader.clear_grains_cache(__opts__)
     return ret
 
 
@@ -370,16 +366,31 @@ def refresh_grains(**kwargs):
     refresh_pillar : True
         Set to ``False`` to keep pillar data from being refreshed.
 
+    modules
+        .. versionadded:: Oxygen
+
+        A list, or a comma-separated string, of grains modules or of
+        ``module.function`` names to run again. With :conf_minion:`grains_cache`
+        and :conf_minion:`grains_cache_ttl` set, the cached returns of the
+        other grains functions are kept. Otherwise the whole grains cache is
+        cleared.
+
     CLI Examples:
 
     .. code-block:: bash
 
         salt '*' saltutil.refresh_grains
+        salt '*' saltutil.refresh_grains modules=disks,core.ip_interfaces
     '''
     kwargs = salt.utils.args.clean_kwargs(**kwargs)
     _refresh_pillar = kwargs.pop('refresh_pillar', True)
+    modules = kwargs.pop('modules', None)
     if kwargs:
         salt.utils.args.invalid_kwargs(kwargs)
+    if modules:
+        if isinstance(modules, six.string_types):
+            modules = modules.split(',')
+        salt.loader.clear_grains_cache(__opts__, modules)
     # Modules and pillar need to be refreshed in case grains changes affected
     # them, and the module refresh process reloads the grains and assigns the
     # newly-reloaded grains to each execution module's __grains__ dunder.
@@ -924,6 +935,9 @@ def refresh_modules(async=True):
 
         salt '*' saltutil.refresh_modules
     '''
+    # Modules may load now which did not before, the loader index has to be
+    # rebuilt
+    salt.loader.clear_loader_index(__opts__)
     try:
         if async:
             #  If we're going to block, first setup a listener
@@ -33,6 +33,7 @@ import salt.utils.event
 import salt.utils.files
 import salt.utils.jid
 import salt.utils.platform
+import salt.utils.snapshot
 import salt.utils.url
 import salt.utils.versions
 from salt.exceptions import CommandExecutionError, SaltInvocationError
@@ -1744,6 +1745,10 @@ def clear_cache():
     Remember that the state cache is completely disabled by default, this
     execution only applies if cache=True is used in states
 
+    .. versionchanged:: Oxygen
+        The snapshots of masterless minions, see :conf_minion:`local_snapshot`,
+        are also removed
+
     CLI Example:
 
     .. code-block:: bash
@@ -1758,6 +1763,7 @@ def clear_cache():
                 continue
             os.remove(path)
             ret.append(fn_)
+    ret.extend(salt.utils.snapshot.clear(__opts__))
     return ret
 
 
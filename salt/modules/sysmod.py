@@ -356,19 +356,26 @@ def list_functions(*args, **kwargs):  # pylint: disable=unused-argument
     # ## NOTE: **kwargs is used here to prevent a traceback when garbage
     # ##       arguments are tacked on to the end.
 
+    # The loader can list its functions from the loader index, without
+    # loading all the modules
+    if hasattr(__salt__, 'function_names'):
+        functions = __salt__.function_names()
+    else:
+        functions = sorted(__salt__)
+
     if not args:
         # We're being asked for all functions
-        return sorted(__salt__)
+        return functions
 
     names = set()
     for module in args:
         if '*' in module or '.' in module:
-            for func in fnmatch.filter(__salt__, module):
+            for func in fnmatch.filter(functions, module):
                 names.add(func)
         else:
             # "sys" should just match sys without also matching sysctl
             moduledot = module + '.'
-            for func in __salt__:
+            for func in functions:
                 if func.startswith(moduledot):
                     names.add(func)
     return sorted(names)
@@ -194,6 +194,7 @@ import time
 import fnmatch
 import logging
 from copy import copy
+from datetime import timedelta
 from collections import defaultdict
 
 # pylint: disable=import-error
@@ -204,6 +205,7 @@ import tornado.httpserver
 import tornado.ioloop
 import tornado.web
 import tornado.gen
+import tornado.queues
 from tornado.concurrent import Future
 from zmq.eventloop import ioloop
 from salt.ext import six
@@ -216,6 +218,7 @@ ioloop.install()
 import salt.netapi
 import salt.utils
 import salt.utils.event
+import salt.utils.jobtracker
 from salt.utils.event import tagify
 import salt.client
 import salt.runner
@@ -309,6 +312,9 @@ class EventListener(object):
         # map of future -> timeout_callback
         self.timeout_map = {}
 
+        # tag -> list of callbacks called with every matching event
+        self.listener_map = defaultdict(list)
+
         self.event.set_event_handler(self._handle_event_socket_recv)
 
     def clean_timeout_futures(self, request):
@@ -358,6 +364,24 @@ class EventListener(object):
 
         return future
 
+    def add_listener(self, tag, callback):
+        '''
+        Call callback with every event whose tag starts with tag, until
+        remove_listener is called. Unlike the futures of get_event, no event
+        is missed between two calls.
+        '''
+        self.listener_map[tag].append(callback)
+
+    def remove_listener(self, tag, callback):
+        '''
+        Stop calling callback with the events whose tag starts with tag
+        '''
+        callbacks = self.listener_map.get(tag, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.listener_map.pop(tag, None)
+
     def _timeout_future(self, tag, future):
         '''
         Timeout a specific future
@@ -386,6 +410,10 @@ class EventListener(object):
                     if future in self.timeout_map:
                         tornado.ioloop.IOLoop.current().remove_timeout(self.timeout_map[future])
                         del self.timeout_map[future]
+        for tag_prefix, callbacks in six.iteritems(self.listener_map):
+            if mtag.startswith(tag_prefix):
+                for callback in list(callbacks):
+                    callback({'data': data, 'tag': mtag})
 
 
 class BaseSaltAPIHandler(tornado.web.RequestHandler, SaltClientsMixIn):  # pylint: disable=W0223
@@ -918,6 +946,10 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
         if 'jid' not in pub_data:
             raise tornado.gen.Return('No minions matched the target. No command was sent, no jid was assigned.')
 
+        if self.application.opts.get('job_completion_tracker', False):
+            chunk_ret = yield self._track_local(pub_data)
+            raise tornado.gen.Return(chunk_ret)
+
         # seed minions_remaining with the pub_data
         minions_remaining = pub_data['minions']
 
@@ -942,6 +974,53 @@ class SaltAPIHandler(BaseSaltAPIHandler, SaltClientsMixIn):  # pylint: disable=W
 
         raise tornado.gen.Return(chunk_ret)
 
+    @tornado.gen.coroutine
+    def _track_local(self, pub_data):
+        '''
+        Return a future which will complete once all the minions returned or
+        timed out, only sending a saltutil.find_job to the minions which did
+        not return in time
+        '''
+        opts = self.application.opts
+        jid = pub_data['jid']
+        tracker = salt.utils.jobtracker.JobTracker(
+            jid,
+            pub_data['minions'],
+            opts['timeout'],
+            opts['gather_job_timeout'],
+            batch_size=opts.get('find_job_batch', 0),
+            syndic_wait=opts['syndic_wait'] if opts['order_masters'] else 0)
+        chunk_ret = {}
+        events = tornado.queues.Queue()
+        tags = ['salt/job/']
+        if opts['order_masters']:
+            tags.append('syndic/')
+
+        def next_event(wait):
+            return events.get(timeout=timedelta(seconds=wait))
+
+        def find_job(minions):
+            return self.saltclients['local'](minions,
+                                             'saltutil.find_job',
+                                             [jid],
+                                             tgt_type='list')
+
+        def add_return(minion, event):
+            chunk_ret[minion] = event['data']['return']
+
+        event_listener = self.application.event_listener
+        for tag in tags:
+            event_listener.add_listener(tag, events.put_nowait)
+        try:
+            yield salt.utils.jobtracker.wait_for_job(tracker,
+                                                     next_event,
+                                                     find_job,
+                                                     on_return=add_return)
+        finally:
+            for tag in tags:
+                event_listener.remove_listener(tag, events.put_nowait)
+        raise tornado.gen.Return(chunk_ret)
+
     @tornado.gen.coroutine
     def all_returns(self,
                     jid,
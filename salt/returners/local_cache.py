@@ -6,8 +6,10 @@ Return data to local job cache
 from __future__ import absolute_import
 
 # Import python libs
+import datetime
 import errno
 import glob
+import json
 import logging
 import os
 import shutil
@@ -43,6 +45,8 @@ RETURN_P = 'return.p'
 OUT_P = 'out.p'
 # endtime is the end time for a job, not stored as msgpack
 ENDTIME = 'endtime'
+# the length in seconds of the time buckets of the jid index
+INDEX_BUCKET = 3600
 
 
 def _job_dir():
@@ -52,6 +56,255 @@ def _job_dir():
     return os.path.join(__opts__['cachedir'], 'jobs')
 
 
+def _index_dir():
+    '''
+    Return the directory of the time bucketed jid index. Every file in it is
+    named after the epoch at which its bucket starts and lists the jids
+    generated during that bucket, one per line.
+    '''
+    return os.path.join(__opts__['cachedir'], 'jobs_index')
+
+
+def _index_marker():
+    '''
+    Return the path of the file written once the jobs already in the job cache
+    were added to the jid index
+    '''
+    return os.path.join(_index_dir(), 'built')
+
+
+def _jid_bucket(jid, created=None):
+    '''
+    Return the start time of the bucket of the jid index of a jid, from the
+    time it was generated at. The jids which are not generated from a time
+    go to the bucket of their creation time, or of the current time.
+    '''
+    try:
+        when = time.mktime(time.strptime(str(jid)[:14], '%Y%m%d%H%M%S'))
+    except (ValueError, OverflowError):
+        when = time.time() if created is None else created
+    return int(when) // INDEX_BUCKET * INDEX_BUCKET
+
+
+def _index_jid(jid):
+    '''
+    Add a newly created jid to its bucket of the jid index
+    '''
+    if not __opts__.get('job_cache_index', False):
+        return
+    index_dir = _index_dir()
+    bucket = _jid_bucket(jid)
+    try:
+        if not os.path.isdir(index_dir):
+            os.makedirs(index_dir)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
+    try:
+        # Appending a single short line is atomic, several processes can
+        # write to the same bucket at once.
+        with salt.utils.files.fopen(os.path.join(index_dir, str(bucket)), 'a') as fh_:
+            fh_.write('{0}\n'.format(jid))
+    except IOError as exc:
+        log.error('Could not add job %s to the jid index: %s', jid, exc)
+
+
+def _meta_path(bucket):
+    '''
+    Return the path of the file listing the metadata of the jobs of a bucket
+    of the jid index
+    '''
+    return os.path.join(_index_dir(), '{0}.meta'.format(bucket))
+
+
+def _index_load(jid, load, minions=None):
+    '''
+    Add the metadata of a job and the number of minions it targets to the
+    bucket of its jid in the jid index, as a line of JSON. The last line of a
+    jid wins when its load is saved again.
+    '''
+    if not __opts__.get('job_cache_index', False):
+        return
+    bucket = _jid_bucket(jid)
+    meta = {'jid': jid}
+    for key in ('fun', 'arg', 'tgt', 'tgt_type', 'user'):
+        if key in load:
+            meta[key] = load[key]
+    if minions is not None:
+        meta['minion_count'] = len(minions)
+    if 'metadata' in load:
+        meta['metadata'] = load['metadata']
+    elif isinstance(load.get('kwargs'), dict) and 'metadata' in load['kwargs']:
+        meta['metadata'] = load['kwargs']['metadata']
+    try:
+        line = json.dumps(meta, default=repr)
+    except (TypeError, ValueError) as exc:
+        log.error('Could not add the load of job %s to the jid index: %s', jid, exc)
+        return
+    try:
+        if not os.path.isdir(_index_dir()):
+            os.makedirs(_index_dir())
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
+    try:
+        with salt.utils.files.fopen(_meta_path(bucket), 'a') as fh_:
+            fh_.write(line + '\n')
+    except IOError as exc:
+        log.error('Could not add the load of job %s to the jid index: %s', jid, exc)
+
+
+def _read_meta(bucket):
+    '''
+    Return the metadata of the jobs of a bucket of the jid index, by jid
+    '''
+    ret = {}
+    try:
+        with salt.utils.files.fopen(_meta_path(bucket), 'r') as fh_:
+            for line in fh_:
+                try:
+                    meta = json.loads(line)
+                except ValueError:
+                    # A line being written
+                    continue
+                if isinstance(meta, dict) and 'jid' in meta:
+                    ret[meta['jid']] = meta
+    except IOError:
+        pass
+    return ret
+
+
+def _index_buckets():
+    '''
+    Return the start times of the buckets of the jid index, oldest first
+    '''
+    try:
+        names = os.listdir(_index_dir())
+    except OSError:
+        return []
+    return sorted(int(name) for name in names if name.isdigit())
+
+
+def _read_bucket(bucket):
+    '''
+    Return the jids listed in a bucket of the jid index, in creation order
+    '''
+    ret = []
+    seen = set()
+    try:
+        with salt.utils.files.fopen(os.path.join(_index_dir(), str(bucket)), 'r') as fh_:
+            for line in fh_:
+                jid = line.strip()
+                if jid and jid not in seen:
+                    seen.add(jid)
+                    ret.append(jid)
+    except IOError as exc:
+        log.error('Could not read bucket %s of the jid index: %s', bucket, exc)
+    return ret
+
+
+def _build_index():
+    '''
+    Add all the jobs already in the job cache to the jid index. The jids
+    which are not generated from a time are added using the creation time of
+    their jid file.
+    '''
+    log.info('Building the jid index of the job cache')
+    job_dir = _job_dir()
+    buckets = {}
+    for top in (os.listdir(job_dir) if os.path.isdir(job_dir) else []):
+        t_path = os.path.join(job_dir, top)
+        if not os.path.isdir(t_path):
+            continue
+        for final in os.listdir(t_path):
+            jid_file = os.path.join(t_path, final, 'jid')
+            try:
+                with salt.utils.files.fopen(jid_file, 'r') as fh_:
+                    jid = fh_.read().strip()
+                created = os.stat(jid_file).st_ctime
+            except (IOError, OSError):
+                continue
+            bucket = _jid_bucket(jid, created)
+            buckets.setdefault(bucket, []).append(jid)
+    index_dir = _index_dir()
+    if not os.path.isdir(index_dir):
+        os.makedirs(index_dir)
+    for bucket, jids in six.iteritems(buckets):
+        with salt.utils.files.fopen(os.path.join(index_dir, str(bucket)), 'a') as fh_:
+            fh_.write(''.join('{0}\n'.format(jid) for jid in jids))
+    # The new jobs were indexed while building, the index is complete
+    with salt.utils.files.fopen(_index_marker(), 'w') as fh_:
+        fh_.write('{0}\n'.format(int(time.time())))
+
+
+def _walk_index(newest_first=False):
+    '''
+    Walk through the jid index and yield the jobs still in the job cache
+    '''
+    serial = salt.payload.Serial(__opts__)
+    buckets = _index_buckets()
+    if newest_first:
+        buckets.reverse()
+    for bucket in buckets:
+        jids = _read_bucket(bucket)
+        if newest_first:
+            jids.reverse()
+        for jid in jids:
+            jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__['hash_type'])
+            try:
+                with salt.utils.files.fopen(os.path.join(jid_dir, LOAD_P), 'rb') as rfh:
+                    job = serial.load(rfh)
+            except IOError:
+                continue
+            yield job['jid'], job
+
+
+def _walk_index_meta(newest_first=False, start_jid=None, end_jid=None):
+    '''
+    Walk through the jid index and yield the jobs created between start_jid
+    and end_jid, from the metadata of the index. The load of the jobs added
+    to the cache before their metadata was indexed is read instead.
+    '''
+    serial = salt.payload.Serial(__opts__)
+    buckets = _index_buckets()
+    if start_jid:
+        # No jid of a bucket which ended before start_jid can match
+        buckets = [bucket for bucket in buckets
+                   if salt.utils.jid.time_to_jid(datetime.datetime.fromtimestamp(
+                       bucket + INDEX_BUCKET)) >= start_jid]
+    if end_jid:
+        buckets = [bucket for bucket in buckets
+                   if salt.utils.jid.time_to_jid(datetime.datetime.fromtimestamp(
+                       bucket)) <= end_jid]
+    if newest_first:
+        buckets.reverse()
+    for bucket in buckets:
+        jids = _read_bucket(bucket)
+        if newest_first:
+            jids.reverse()
+        metas = _read_meta(bucket)
+        for jid in jids:
+            if start_jid and jid < start_jid or end_jid and jid > end_jid:
+                continue
+            job = metas.get(jid)
+            if job is None:
+                jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__['hash_type'])
+                try:
+                    with salt.utils.files.fopen(os.path.join(jid_dir, LOAD_P), 'rb') as rfh:
+                        job = serial.load(rfh)
+                except IOError:
+                    continue
+            yield jid, job
+
+
+def _use_index():
+    '''
+    Return True if the jid index can be used to look up the jobs, i.e. once
+    it lists the jobs created before it was enabled too
+    '''
+    return __opts__.get('job_cache_index', False) and os.path.isfile(_index_marker())
+
+
 def _walk_through(job_dir):
     '''
     Walk though the jid dir and look for jobs
@@ -105,6 +358,8 @@ def prep_jid(nocache=False, passed_jid=None, recurse_count=0):
             time.sleep(0.1)
             if passed_jid is None:
                 return prep_jid(nocache=nocache, recurse_count=recurse_count+1)
+        else:
+            _index_jid(jid)
 
     try:
         with salt.utils.files.fopen(os.path.join(jid_dir, 'jid'), 'wb+') as fn_:
@@ -138,6 +393,32 @@ def returner(load):
     if os.path.exists(os.path.join(jid_dir, 'nocache')):
         return
 
+    return _write_return(serial, jid_dir, load)
+
+
+def returner_many(loads):
+    '''
+    Return a batch of returns to the local job cache, the directory of each
+    job is only looked up once
+    '''
+    serial = salt.payload.Serial(__opts__)
+    jid_dirs = {}
+    for load in loads:
+        if load['jid'] == 'req':
+            load['jid'] = prep_jid(nocache=load.get('nocache', False))
+        if load['jid'] not in jid_dirs:
+            jid_dir = salt.utils.jid.jid_dir(load['jid'], _job_dir(), __opts__['hash_type'])
+            if os.path.exists(os.path.join(jid_dir, 'nocache')):
+                jid_dir = None
+            jid_dirs[load['jid']] = jid_dir
+        if jid_dirs[load['jid']] is not None:
+            _write_return(serial, jid_dirs[load['jid']], load)
+
+
+def _write_return(serial, jid_dir, load):
+    '''
+    Write the return of a minion to the job directory
+    '''
     hn_dir = os.path.join(jid_dir, load['id'])
 
     try:
@@ -202,6 +483,7 @@ def save_load(jid, clear_load, minions=None, recurse_count=0):
     try:
         if not os.path.exists(jid_dir):
             os.makedirs(jid_dir)
+            _index_jid(jid)
     except OSError as exc:
         if exc.errno == errno.EEXIST:
             # rarely, the directory can be already concurrently created between
@@ -232,6 +514,8 @@ def save_load(jid, clear_load, minions=None, recurse_count=0):
         # save the minions to a cache so we can see in the UI
         save_minions(jid, minions)
 
+    _index_load(jid, clear_load, minions)
+
 
 def save_minions(jid, minions, syndic_id=None):
     '''
@@ -253,6 +537,7 @@ def save_minions(jid, minions, syndic_id=None):
     try:
         if not os.path.exists(jid_dir):
             os.makedirs(jid_dir)
+            _index_jid(jid)
     except OSError as exc:
         if exc.errno == errno.EEXIST:
             # rarely, the directory can be already concurrently created between
@@ -275,6 +560,8 @@ def save_minions(jid, minions, syndic_id=None):
                 os.makedirs(jid_dir)
             except OSError:
                 pass
+            else:
+                _index_jid(jid)
         with salt.utils.files.fopen(minions_path, 'w+b') as wfh:
             serial.dump(minions, wfh)
     except IOError as exc:
@@ -358,7 +645,11 @@ def get_jids():
     Return a dict mapping all job ids to job information
     '''
     ret = {}
-    for jid, job, _, _ in _walk_through(_job_dir()):
+    if _use_index():
+        jobs = _walk_index()
+    else:
+        jobs = ((jid, job) for jid, job, _, _ in _walk_through(_job_dir()))
+    for jid, job in jobs:
         ret[jid] = salt.utils.jid.format_jid_instance(jid, job)
 
         if __opts__.get('job_cache_store_endtime'):
@@ -375,6 +666,18 @@ def get_jids_filter(count, filter_find_job=True):
     :param int count: show not more than the count of most recent jobs
     :param bool filter_find_jobs: filter out 'saltutil.find_job' jobs
     '''
+    if _use_index():
+        # The index is ordered by time, only read the newest jobs
+        ret = []
+        for jid, job in _walk_index(newest_first=True):
+            if len(ret) >= count:
+                break
+            job = salt.utils.jid.format_jid_instance_ext(jid, job)
+            if filter_find_job and job['Function'] == 'saltutil.find_job':
+                continue
+            ret.append(job)
+        return sorted(ret, key=lambda job: job['JID'])
+
     keys = []
     ret = []
     for jid, job, _, _ in _walk_through(_job_dir()):
@@ -392,10 +695,99 @@ def get_jids_filter(count, filter_find_job=True):
     return ret
 
 
+def list_jobs(search_function=None,
+              search_target=None,
+              search_user=None,
+              search_metadata=None,
+              start_jid=None,
+              end_jid=None,
+              newest_first=False,
+              offset=0,
+              limit=None):
+    '''
+    Yield the jid and the information of the jobs matching the filters, in
+    the order they were started, for a page of ``limit`` jobs after the first
+    ``offset`` ones. The filters are the ones of
+    :py:func:`salt.utils.jid.match_job`, and the jobs started between the
+    ``start_jid`` and ``end_jid`` jids.
+
+    With :conf_master:`job_cache_index`, only the buckets of the index in the
+    time range are read, the jobs are filtered on the metadata stored in the
+    index, and the walk stops once the page is full.
+    '''
+    if _use_index():
+        jobs = _walk_index_meta(newest_first, start_jid, end_jid)
+    else:
+        jobs = sorted(((jid, job) for jid, job, _, _ in _walk_through(_job_dir())
+                       if not (start_jid and jid < start_jid or end_jid and jid > end_jid)),
+                      key=lambda item: item[0],
+                      reverse=newest_first)
+    skipped = 0
+    count = 0
+    for jid, job in jobs:
+        if limit is not None and count >= limit:
+            return
+        info = salt.utils.jid.format_jid_instance(jid, job)
+        if not salt.utils.jid.match_job(info,
+                                        search_function=search_function,
+                                        search_target=search_target,
+                                        search_user=search_user,
+                                        search_metadata=search_metadata):
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        if __opts__.get('job_cache_store_endtime'):
+            endtime = get_endtime(jid)
+            if endtime:
+                info['EndTime'] = endtime
+        count += 1
+        yield jid, info
+
+
+def _clean_old_jobs_index():
+    '''
+    Clean out the old jobs from the job cache by removing the jobs of the
+    expired buckets of the jid index. The directories of the jobs which are
+    still to be kept are never looked at.
+    '''
+    if not os.path.isfile(_index_marker()):
+        # The new jobs may already be indexed, not the ones created before
+        # the index was enabled
+        _build_index()
+    cutoff = time.time() - __opts__['keep_jobs'] * 3600
+    jid_root = _job_dir()
+    for bucket in _index_buckets():
+        if bucket + INDEX_BUCKET > cutoff:
+            break
+        for jid in _read_bucket(bucket):
+            jid_dir = salt.utils.jid.jid_dir(jid, jid_root, __opts__['hash_type'])
+            shutil.rmtree(jid_dir, ignore_errors=True)
+            try:
+                # Remove the parent directory once it is empty
+                os.rmdir(os.path.dirname(jid_dir))
+            except OSError:
+                pass
+        os.remove(os.path.join(_index_dir(), str(bucket)))
+        try:
+            os.remove(_meta_path(bucket))
+        except OSError:
+            pass
+
+
 def clean_old_jobs():
     '''
     Clean out the old jobs from the job cache
     '''
+    if __opts__['keep_jobs'] != 0 and __opts__.get('job_cache_index', False):
+        _clean_old_jobs_index()
+        return
+
+    if os.path.isdir(_index_dir()):
+        # The jid index is not maintained any longer, drop it so that it is
+        # rebuilt from scratch if it gets enabled again.
+        shutil.rmtree(_index_dir(), ignore_errors=True)
+
     if __opts__['keep_jobs'] != 0:
         cur = time.time()
         jid_root = _job_dir()
@@ -456,6 +848,7 @@ def update_endtime(jid, time):
     try:
         if not os.path.exists(jid_dir):
             os.makedirs(jid_dir)
+            _index_jid(jid)
         with salt.utils.files.fopen(os.path.join(jid_dir, ENDTIME), 'w') as etfile:
             etfile.write(time)
     except IOError as exc:
@@ -298,6 +298,33 @@ def returner(ret):
         log.critical('Could not store return with MySQL returner. MySQL server unavailable.')
 
 
+def returner_many(rets):
+    '''
+    Return a batch of returns to a mysql server with a single multi-row
+    insert
+    '''
+    for ret in rets:
+        # if a minion is returning a standalone job, get a jobid
+        if ret['jid'] == 'req':
+            ret['jid'] = prep_jid(nocache=ret.get('nocache', False))
+            save_load(ret['jid'], ret)
+
+    try:
+        with _get_serv(rets[0], commit=True) as cur:
+            sql = '''INSERT INTO `salt_returns`
+                    (`fun`, `jid`, `return`, `id`, `success`, `full_ret` )
+                    VALUES (%s, %s, %s, %s, %s, %s)'''
+
+            cur.executemany(sql, [(ret['fun'], ret['jid'],
+                                   json.dumps(ret['return']),
+                                   ret['id'],
+                                   ret.get('success', False),
+                                   json.dumps(ret)) for ret in rets])
+    except salt.exceptions.SaltMasterError as exc:
+        log.critical(exc)
+        log.critical('Could not store returns with MySQL returner. MySQL server unavailable.')
+
+
 def event_return(events):
     '''
     Return event to mysql server
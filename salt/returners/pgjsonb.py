@@ -279,6 +279,29 @@ def returner(ret):
         log.critical('Could not store return with pgjsonb returner. PostgreSQL server unavailable.')
 
 
+def returner_many(rets):
+    '''
+    Return a batch of returns to a Pg server with a single multi-row insert
+    '''
+    try:
+        with _get_serv(rets[0], commit=True) as cur:
+            alter_time = time.strftime('%Y-%m-%d %H:%M:%S %z', time.localtime())
+            values = ','.join(
+                cur.mogrify('(%s, %s, %s, %s, %s, %s, %s)',
+                            (ret['fun'], ret['jid'],
+                             psycopg2.extras.Json(ret['return']),
+                             ret['id'],
+                             ret.get('success', False),
+                             psycopg2.extras.Json(ret),
+                             alter_time)).decode('utf-8')
+                for ret in rets)
+            cur.execute('''INSERT INTO salt_returns
+                    (fun, jid, return, id, success, full_ret, alter_time)
+                    VALUES ''' + values)
+    except salt.exceptions.SaltMasterError:
+        log.critical('Could not store returns with pgjsonb returner. PostgreSQL server unavailable.')
+
+
 def event_return(events):
     '''
     Return event to Pg server
@@ -242,6 +242,30 @@ def returner(ret):
         log.critical('Could not store return with postgres returner. PostgreSQL server unavailable.')
 
 
+def returner_many(rets):
+    '''
+    Return a batch of returns to a postgres server with a single multi-row
+    insert
+    '''
+    try:
+        with _get_serv(rets[0], commit=True) as cur:
+            values = ','.join(
+                cur.mogrify(
+                    '(%s, %s, %s, %s, %s, %s)', (
+                        ret['fun'],
+                        ret['jid'],
+                        json.dumps(ret['return']),
+                        ret['id'],
+                        ret.get('success', False),
+                        json.dumps(ret))).decode('utf-8')
+                for ret in rets)
+            cur.execute('''INSERT INTO salt_returns
+                    (fun, jid, return, id, success, full_ret)
+                    VALUES ''' + values)
+    except salt.exceptions.SaltMasterError:
+        log.critical('Could not store returns with postgres returner. PostgreSQL server unavailable.')
+
+
 def event_return(events):
     '''
     Return event to Pg server
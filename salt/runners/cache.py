@@ -495,3 +495,69 @@ def flush(bank, key=None, cachedir=None):
     except TypeError:
         cache = salt.cache.Cache(__opts__)
     return cache.flush(bank, key)
+
+
+def _walk_bank(cache, bank):
+    '''
+    Yield the name and the keys with their data of a bank and, recursively, of
+    all the banks below it
+    '''
+    keys = []
+    for entry in cache.list(bank):
+        if cache.contains(bank, entry):
+            keys.append(entry)
+        sub_bank = '{0}/{1}'.format(bank, entry)
+        if cache.contains(sub_bank):
+            for item in _walk_bank(cache, sub_bank):
+                yield item
+    if keys:
+        yield bank, cache.fetch_many(bank, keys)
+
+
+def migrate(src='localfs', dst=None, bank='minions', cachedir=None):
+    '''
+    .. versionadded:: Oxygen
+
+    Copy the content of a cache bank, including all the banks below it, from
+    one cache driver to another. This is useful to move the minion data cache
+    of an existing master to a new cache driver. The master should be stopped
+    while the data is migrated.
+
+    src : localfs
+        The cache driver to copy the data from
+
+    dst
+        The cache driver to copy the data to. Defaults to the :conf_master:`cache`
+        configured on the master.
+
+    bank : minions
+        The bank to copy
+
+    Returns the number of keys copied for each bank.
+
+    CLI Examples:
+
+    .. code-block:: bash
+
+        salt-run cache.migrate localfs sqlite
+        salt-run cache.migrate src=localfs dst=sqlite bank=cloud
+    '''
+    if cachedir is None:
+        cachedir = __opts__['cachedir']
+    if dst is None:
+        dst = __opts__['cache']
+    if src == dst:
+        raise SaltInvocationError(
+            'The source and destination cache drivers must be different'
+        )
+
+    src_opts = dict(__opts__, cache=src)
+    dst_opts = dict(__opts__, cache=dst)
+    src_cache = salt.cache.Cache(src_opts, cachedir=cachedir)
+    dst_cache = salt.cache.Cache(dst_opts, cachedir=cachedir)
+
+    ret = {}
+    for sub_bank, data in _walk_bank(src_cache, bank):
+        dst_cache.store_many(sub_bank, data)
+        ret[sub_bank] = len(data)
+    return ret
@@ -5,11 +5,11 @@ A convenience system to manage jobs, both active and already run
 
 # Import python libs
 from __future__ import absolute_import, print_function
-import fnmatch
 import logging
 import os
 
 # Import salt libs
+import salt.cli.batch
 import salt.client
 import salt.payload
 import salt.utils
@@ -21,6 +21,7 @@ import salt.returners
 # Import 3rd-party libs
 from salt.ext import six
 from salt.exceptions import SaltClientError
+from salt.utils.odict import OrderedDict
 
 try:
     import dateutil.parser as dateutil_parser
@@ -204,6 +205,12 @@ def list_job(jid, ext_source=None, display_progress=False):
         if endtime:
             ret['EndTime'] = endtime
 
+    if isinstance(job, dict) and job.get('batch'):
+        # The status of a batch run of the master
+        status = salt.cli.batch.get_batch_status(__opts__, jid)
+        if status:
+            ret['BatchStatus'] = status
+
     return ret
 
 
@@ -214,7 +221,11 @@ def list_jobs(ext_source=None,
               search_target=None,
               start_time=None,
               end_time=None,
-              display_progress=False):
+              display_progress=False,
+              search_user=None,
+              newest_first=False,
+              offset=0,
+              limit=None):
     '''
     List all detectable jobs and associated functions
 
@@ -280,8 +291,33 @@ def list_jobs(ext_source=None,
         module is not installed, this argument will be ignored). Returns jobs
         which started before this timestamp.
 
+    search_user
+        Can be passed as a string or a list. Returns jobs which were
+        published by the specified user. Globbing is allowed.
+
+        .. versionadded:: Oxygen
+
     .. _dateutil: https://pypi.python.org/pypi/python-dateutil
 
+    **PAGINATION OPTIONS**
+
+    .. versionadded:: Oxygen
+
+    newest_first
+        Sort the jobs from the newest to the oldest. Default: ``False``.
+
+    offset
+        Skip this number of the matching jobs. Default: ``0``.
+
+    limit
+        Return at most this number of jobs. Default: all of them.
+
+    With :conf_master:`job_cache_index`, the ``local_cache`` returner filters
+    the jobs on the metadata kept in its index, only reads the index for the
+    requested time range, and stops once ``limit`` jobs are found. With
+    ``display_progress``, the jobs are also fired as progress events as they
+    are found.
+
     CLI Example:
 
     .. code-block:: bash
@@ -289,6 +325,7 @@ def list_jobs(ext_source=None,
         salt-run jobs.list_jobs
         salt-run jobs.list_jobs search_function='test.*' search_target='localhost' search_metadata='{"bar": "foo"}'
         salt-run jobs.list_jobs start_time='2015, Mar 16 19:00' end_time='2015, Mar 18 22:00'
+        salt-run jobs.list_jobs search_user=root newest_first=True limit=20 offset=20
 
     '''
     returner = _get_returner((
@@ -303,68 +340,44 @@ def list_jobs(ext_source=None,
         )
     mminion = salt.minion.MasterMinion(__opts__)
 
-    ret = mminion.returners['{0}.get_jids'.format(returner)]()
-
-    mret = {}
-    for item in ret:
-        _match = True
-        if search_metadata:
-            _match = False
-            if 'Metadata' in ret[item]:
-                if isinstance(search_metadata, dict):
-                    for key in search_metadata:
-                        if key in ret[item]['Metadata']:
-                            if ret[item]['Metadata'][key] == search_metadata[key]:
-                                _match = True
-                else:
-                    log.info('The search_metadata parameter must be specified'
-                             ' as a dictionary.  Ignoring.')
-        if search_target and _match:
-            _match = False
-            if 'Target' in ret[item]:
-                targets = ret[item]['Target']
-                if isinstance(targets, six.string_types):
-                    targets = [targets]
-                for target in targets:
-                    for key in salt.utils.split_input(search_target):
-                        if fnmatch.fnmatch(target, key):
-                            _match = True
-
-        if search_function and _match:
-            _match = False
-            if 'Function' in ret[item]:
-                for key in salt.utils.split_input(search_function):
-                    if fnmatch.fnmatch(ret[item]['Function'], key):
-                        _match = True
-
-        if start_time and _match:
-            _match = False
-            if DATEUTIL_SUPPORT:
-                parsed_start_time = dateutil_parser.parse(start_time)
-                _start_time = dateutil_parser.parse(ret[item]['StartTime'])
-                if _start_time >= parsed_start_time:
-                    _match = True
-            else:
-                log.error(
-                    '\'dateutil\' library not available, skipping start_time '
-                    'comparison.'
-                )
-
-        if end_time and _match:
-            _match = False
-            if DATEUTIL_SUPPORT:
-                parsed_end_time = dateutil_parser.parse(end_time)
-                _start_time = dateutil_parser.parse(ret[item]['StartTime'])
-                if _start_time <= parsed_end_time:
-                    _match = True
-            else:
-                log.error(
-                    '\'dateutil\' library not available, skipping end_time '
-                    'comparison.'
-                )
+    start_jid = end_jid = None
+    if start_time or end_time:
+        if DATEUTIL_SUPPORT:
+            if start_time:
+                start_jid = salt.utils.jid.time_to_jid(dateutil_parser.parse(start_time))
+            if end_time:
+                end_jid = salt.utils.jid.time_to_jid(dateutil_parser.parse(end_time))
+        else:
+            log.error(
+                '\'dateutil\' library not available, skipping start_time '
+                'and end_time comparison.'
+            )
+
+    filters = {'search_function': search_function,
+               'search_target': search_target,
+               'search_user': search_user,
+               'search_metadata': search_metadata,
+               'start_jid': start_jid,
+               'end_jid': end_jid,
+               'newest_first': newest_first,
+               'offset': int(offset or 0),
+               'limit': int(limit) if limit is not None else None}
+    if search_metadata and not isinstance(search_metadata, dict):
+        log.info('The search_metadata parameter must be specified'
+                 ' as a dictionary.  Ignoring.')
+
+    fun = '{0}.list_jobs'.format(returner)
+    if fun in mminion.returners:
+        jobs = mminion.returners[fun](**filters)
+    else:
+        jobs = _filter_jobs(mminion.returners['{0}.get_jids'.format(returner)](),
+                            **filters)
 
-        if _match:
-            mret[item] = ret[item]
+    mret = OrderedDict()
+    for jid, job in jobs:
+        if display_progress:
+            __jid_event__.fire_event({'message': {jid: job}}, 'progress')
+        mret[jid] = job
 
     if outputter:
         return {'outputter': outputter, 'data': mret}
@@ -372,6 +385,36 @@ def list_jobs(ext_source=None,
         return mret
 
 
+def _filter_jobs(jobs,
+                 search_function=None,
+                 search_target=None,
+                 search_user=None,
+                 search_metadata=None,
+                 start_jid=None,
+                 end_jid=None,
+                 newest_first=False,
+                 offset=0,
+                 limit=None):
+    '''
+    Filter, sort and page the jobs returned by the get_jids function of a
+    returner without a list_jobs function
+    '''
+    ret = []
+    for jid, job in six.iteritems(jobs):
+        if start_jid and jid < start_jid or end_jid and jid > end_jid:
+            continue
+        if salt.utils.jid.match_job(job,
+                                    search_function=search_function,
+                                    search_target=search_target,
+                                    search_user=search_user,
+                                    search_metadata=search_metadata):
+            ret.append((jid, job))
+    ret.sort(key=lambda item: item[0], reverse=newest_first)
+    if limit is None:
+        return ret[offset:]
+    return ret[offset:offset + limit]
+
+
 def list_jobs_filter(count,
                      filter_find_job=True,
                      ext_source=None,
@@ -518,7 +561,8 @@ def last_run(ext_source=None,
             return False
 
     _all_jobs = list_jobs(ext_source, outputter, metadata,
-                          function, target, display_progress)
+                          function, target, display_progress=display_progress,
+                          newest_first=True, limit=1)
     if _all_jobs:
         last_job = sorted(_all_jobs)[-1]
         return print_job(last_job, ext_source)
@@ -24,6 +24,7 @@ import salt.key
 import salt.utils.compat
 import salt.utils.files
 import salt.utils.minions
+import salt.utils.presence
 import salt.utils.raetevent
 import salt.utils.versions
 import salt.client
@@ -69,6 +70,28 @@ def _ping(tgt, tgt_type, timeout, gather_job_timeout):
     return returned, not_returned
 
 
+def _presence(tgt, tgt_type, timeout, gather_job_timeout):
+    '''
+    Return the minions which are up and down from the last time the master
+    heard from them, only the minions not seen for presence_timeout seconds
+    are pinged, or reported down if presence_ping is False
+    '''
+    ckminions = salt.utils.minions.CkMinions(__opts__)
+    minions = ckminions.check_minions(tgt, tgt_type)
+    fresh, stale = salt.utils.presence.split(__opts__, minions)
+    log.debug(
+        'manage runner found %s minion(s) seen in the last %s seconds',
+        len(fresh), __opts__['presence_timeout']
+    )
+    if not stale or not __opts__.get('presence_ping', True):
+        return fresh, stale
+    pinged = _ping(stale, 'list', timeout, gather_job_timeout)
+    if not pinged:
+        return fresh, stale
+    returned, not_returned = pinged
+    return sorted(fresh + returned), not_returned
+
+
 def status(output=True, tgt='*', tgt_type='glob', expr_form=None, timeout=None, gather_job_timeout=None):
     '''
     .. versionchanged:: 2017.7.0
@@ -77,6 +100,11 @@ def status(output=True, tgt='*', tgt_type='glob', expr_form=None, timeout=None,
 
     Print the status of all known salt minions
 
+    .. versionchanged:: Oxygen
+        With the :conf_master:`presence_tracking` option, only the minions
+        the master did not hear from for :conf_master:`presence_timeout`
+        seconds are pinged.
+
     CLI Example:
 
     .. code-block:: bash
@@ -103,7 +131,10 @@ def status(output=True, tgt='*', tgt_type='glob', expr_form=None, timeout=None,
     if not gather_job_timeout:
         gather_job_timeout = __opts__['gather_job_timeout']
 
-    ret['up'], ret['down'] = _ping(tgt, tgt_type, timeout, gather_job_timeout)
+    if salt.utils.presence.enabled(__opts__):
+        ret['up'], ret['down'] = _presence(tgt, tgt_type, timeout, gather_job_timeout)
+    else:
+        ret['up'], ret['down'] = _ping(tgt, tgt_type, timeout, gather_job_timeout)
     return ret
 
 
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+'''
+Read the timings recorded by the master when the :conf_master:`profiling`
+option is set
+
+.. versionadded:: Oxygen
+'''
+from __future__ import absolute_import
+
+# Import salt libs
+import salt.utils.profiling
+
+
+def stats(category=None, top=None):
+    '''
+    Return the count, total, mean and maximum durations, in seconds, recorded
+    by all the master processes. The durations are grouped by category:
+    ``load`` and ``virtual`` for the loader, and ``request`` for the commands
+    sent to the master, like ``_return`` or ``_pillar``.
+
+    category
+        Only return the timings of this category
+
+    top
+        Only return this number of timings with the highest total duration in
+        each category
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt-run profiling.stats
+        salt-run profiling.stats category=request
+    '''
+    return salt.utils.profiling.stats(__opts__, category=category, top=top)
+
+
+def reset():
+    '''
+    Remove the timings recorded so far
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt-run profiling.reset
+    '''
+    return salt.utils.profiling.reset(__opts__)
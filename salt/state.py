@@ -41,6 +41,8 @@ import salt.utils.immutabletypes as immutabletypes
 import salt.utils.url
 import salt.utils.platform
 import salt.utils.process
+import salt.utils.profiling
+import salt.utils.snapshot
 import salt.syspaths as syspaths
 from salt.template import compile_template, compile_template_str
 from salt.exceptions import (
@@ -129,6 +131,11 @@ def _odict_hashable(self):
 
 OrderedDict.__hash__ = _odict_hashable
 
+# fnmatch matches case insensitively on some platforms, plain strings can only
+# be looked up directly where it does not.
+_NORMCASE_IS_IDENTITY = os.path.normcase(u'A/b') == u'A/b'
+_GLOB_CHARS = re.compile(r'[*?[]')
+
 
 def split_low_tag(tag):
     '''
@@ -185,17 +192,29 @@ def state_args(id_, state, high):
     return args
 
 
-def find_name(name, state, high):
+def find_name(name, state, high, index=None):
     '''
     Scan high data for the id referencing the given name and return a list of (IDs, state) tuples that match
 
     Note: if `state` is sls, then we are looking for all IDs that match the given SLS
+
+    If an ``index`` generated by :py:func:`index_high` is passed, it is used
+    instead of scanning the high data.
     '''
     ext_id = []
     if name in high:
         ext_id.append((name, state))
+        return ext_id
+    if index is not None:
+        try:
+            if state == u'sls':
+                return [(nid, first) for nid, first, _ in index[u'sls'].get(name, ())]
+            return [(nid, state) for nid in index[u'args'].get((state, name), ())]
+        except TypeError:
+            # Unhashable name, scan the high data
+            pass
     # if we are requiring an entire SLS, then we need to add ourselves to everything in that SLS
-    elif state == u'sls':
+    if state == u'sls':
         for nid, item in six.iteritems(high):
             if item[u'__sls__'] == name:
                 ext_id.append((nid, next(iter(item))))
@@ -215,11 +234,22 @@ def find_name(name, state, high):
     return ext_id
 
 
-def find_sls_ids(sls, high):
+def find_sls_ids(sls, high, index=None):
     '''
     Scan for all ids in the given sls and return them in a dict; {name: state}
+
+    If an ``index`` generated by :py:func:`index_high` is passed, it is used
+    instead of scanning the high data.
     '''
     ret = []
+    if index is not None:
+        try:
+            for nid, _, states in index[u'sls'].get(sls, ()):
+                ret.extend((nid, st_) for st_ in states)
+            return ret
+        except TypeError:
+            # Unhashable sls, scan the high data
+            pass
     for nid, item in six.iteritems(high):
         if item[u'__sls__'] == sls:
             for st_ in item:
@@ -229,6 +259,124 @@ def find_sls_ids(sls, high):
     return ret
 
 
+def index_high(high):
+    '''
+    Index the high data for find_name and find_sls_ids. The index maps every
+    SLS to the IDs it defines, and every (state, argument value) pair to the
+    IDs using it, so that requisites can be resolved without scanning the
+    whole high data for each of them.
+    '''
+    sls_index = {}
+    arg_index = {}
+    for nid, item in six.iteritems(high):
+        if not isinstance(item, dict):
+            continue
+        try:
+            sls_index.setdefault(item.get(u'__sls__'), []).append(
+                (nid,
+                 next(iter(item), None),
+                 [st_ for st_ in item if not st_.startswith(u'__')]))
+        except TypeError:
+            pass
+        for state, run in six.iteritems(item):
+            if not isinstance(run, list):
+                continue
+            for arg in run:
+                if not isinstance(arg, dict) or len(arg) != 1:
+                    continue
+                try:
+                    arg_index.setdefault(
+                        (state, arg[next(iter(arg))]), []).append(nid)
+                except TypeError:
+                    # Unhashable value, it can't be a name
+                    continue
+    return {u'sls': sls_index, u'args': arg_index}
+
+
+class ChunkIndex(object):
+    '''
+    Index a list of low chunks by ID, name, state and SLS so that the
+    requisites of a chunk can be found without scanning all the chunks.
+    Lookups return the matching chunks in the order of the chunk list.
+    '''
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.size = len(chunks)
+        self.ids = {}
+        self.names = {}
+        self.sls = {}
+        self.state_ids = {}
+        self.state_names = {}
+        self._lookups = {}
+        for pos, chunk in enumerate(chunks):
+            state = chunk.get(u'state')
+            self._add(self.ids, chunk.get(u'__id__'), pos)
+            self._add(self.names, chunk.get(u'name'), pos)
+            self._add(self.sls, chunk.get(u'__sls__'), pos)
+            self._add(self.state_ids.setdefault(state, {}), chunk.get(u'__id__'), pos)
+            self._add(self.state_names.setdefault(state, {}), chunk.get(u'name'), pos)
+
+    @staticmethod
+    def _add(table, key, pos):
+        try:
+            table.setdefault(key, []).append(pos)
+        except TypeError:
+            # Unhashable value, it can't be referenced by a requisite
+            pass
+
+    def valid_for(self, chunks):
+        '''
+        Return True if the index has been built for this list of chunks
+        '''
+        return self.chunks is chunks and self.size == len(chunks)
+
+    def lookup(self, req_key, req_val):
+        '''
+        Return the chunks matched by a requisite, ``req_key`` being either
+        ``id``, ``sls`` or a state name. Like fnmatch, this raises a
+        TypeError if ``req_val`` is not a string.
+        '''
+        if not isinstance(req_val, six.string_types):
+            raise TypeError(u'Requisite values must be strings')
+        if (req_key, req_val) in self._lookups:
+            return self._lookups[(req_key, req_val)]
+        if req_key == u'sls':
+            tables = [self.sls]
+        elif req_key == u'id':
+            tables = [self.ids, self.names]
+        else:
+            tables = [self.state_ids.get(req_key, {}),
+                      self.state_names.get(req_key, {})]
+        positions = set()
+        if _NORMCASE_IS_IDENTITY and not _GLOB_CHARS.search(req_val):
+            # Matching a plain string with fnmatch is an equality check
+            for table in tables:
+                positions.update(table.get(req_val, ()))
+        else:
+            for table in tables:
+                keys = [key for key in table if isinstance(key, six.string_types)]
+                for key in fnmatch.filter(keys, req_val):
+                    positions.update(table[key])
+        ret = [self.chunks[pos] for pos in sorted(positions)]
+        self._lookups[(req_key, req_val)] = ret
+        return ret
+
+    def get(self, state, name):
+        '''
+        Return the last chunk of the given state with the given ID or name,
+        or None
+        '''
+        positions = []
+        try:
+            positions.extend(self.state_ids.get(state, {}).get(name, ()))
+            positions.extend(self.state_names.get(state, {}).get(name, ()))
+        except TypeError:
+            return None
+        if not positions:
+            return None
+        return self.chunks[max(positions)]
+
+
 def format_log(ret):
     '''
     Format the state into a log message
@@ -698,6 +846,7 @@ class State(object):
         self.mod_init = set()
         self.pre = {}
         self.__run_num = 0
+        self._chunk_index = None
         self.jid = jid
         self.instance_id = str(id(self))
         self.inject_globals = {}
@@ -737,14 +886,18 @@ class State(object):
                 log.error(u'Pillar override was not passed as a dictionary')
                 self._pillar_override = None
 
-        pillar = salt.pillar.get_pillar(
-                self.opts,
-                self.opts[u'grains'],
-                self.opts[u'id'],
-                self.opts[u'environment'],
-                pillar_override=self._pillar_override,
-                pillarenv=self.opts.get(u'pillarenv'))
-        return pillar.compile_pillar()
+        def compile_pillar():
+            return salt.pillar.get_pillar(
+                    self.opts,
+                    self.opts[u'grains'],
+                    self.opts[u'id'],
+                    self.opts[u'environment'],
+                    pillar_override=self._pillar_override,
+                    pillarenv=self.opts.get(u'pillarenv')).compile_pillar()
+
+        if self._pillar_override:
+            return compile_pillar()
+        return salt.utils.snapshot.pillar(self.opts, compile_pillar)
 
     def _mod_init(self, low):
         '''
@@ -923,6 +1076,9 @@ class State(object):
                 log.error(u'Error encountered during module reload. Modules were not reloaded.')
             except TypeError:
                 log.error(u'Error encountered during module reload. Modules were not reloaded.')
+        # Modules may load now which did not before, e.g. once their
+        # dependency is installed, do not load them from the loader index
+        salt.loader.clear_loader_index(self.opts)
         self.load_modules()
         if not self.opts.get(u'local', False) and self.opts.get(u'multiprocessing', True):
             self.functions[u'saltutil.refresh_modules']()
@@ -1339,8 +1495,18 @@ class State(object):
                         live[u'fun'] = fun
                         chunks.append(live)
         chunks = self.order_chunks(chunks)
+        self._chunk_index = ChunkIndex(chunks)
         return chunks
 
+    def _get_chunk_index(self, chunks):
+        '''
+        Return the requisite index of a list of chunks, reusing the one built
+        for the chunks of the current run if possible
+        '''
+        if self._chunk_index is not None and self._chunk_index.valid_for(chunks):
+            return self._chunk_index
+        return ChunkIndex(chunks)
+
     def reconcile_extend(self, high):
         '''
         Pull the extend data and add it to the respective high data
@@ -1473,6 +1639,9 @@ class State(object):
                     ]))
         extend = {}
         errors = []
+        # The high data is not modified until all the requisites are
+        # gathered, index it once for all the lookups
+        index = index_high(high)
         for id_, body in six.iteritems(high):
             if not isinstance(body, dict):
                 continue
@@ -1547,7 +1716,7 @@ class State(object):
                                 pname = ind[pstate]
                                 if pstate == u'sls':
                                     # Expand hinges here
-                                    hinges = find_sls_ids(pname, high)
+                                    hinges = find_sls_ids(pname, high, index)
                                 else:
                                     hinges.append((pname, pstate))
                                 if u'.' in pstate:
@@ -1577,7 +1746,7 @@ class State(object):
                                                 )
                                     if key == u'prereq':
                                         # Add prerequired to prereqs
-                                        ext_ids = find_name(name, _state, high)
+                                        ext_ids = find_name(name, _state, high, index)
                                         for ext_id, _req_state in ext_ids:
                                             if ext_id not in extend:
                                                 extend[ext_id] = OrderedDict()
@@ -1590,7 +1759,7 @@ class State(object):
                                     if key == u'use_in':
                                         # Add the running states args to the
                                         # use_in states
-                                        ext_ids = find_name(name, _state, high)
+                                        ext_ids = find_name(name, _state, high, index)
                                         for ext_id, _req_state in ext_ids:
                                             if not ext_id:
                                                 continue
@@ -1617,7 +1786,7 @@ class State(object):
                                     if key == u'use':
                                         # Add the use state's args to the
                                         # running state
-                                        ext_ids = find_name(name, _state, high)
+                                        ext_ids = find_name(name, _state, high, index)
                                         for ext_id, _req_state in ext_ids:
                                             if not ext_id:
                                                 continue
@@ -1900,6 +2069,10 @@ class State(object):
         # duration in milliseconds.microseconds
         duration = (delta.seconds * 1000000 + delta.microseconds)/1000.0
         ret[u'duration'] = duration
+        salt.utils.profiling.record(self.opts,
+                                    u'state',
+                                    u'{0}.{1}'.format(low[u'state'], low[u'fun']),
+                                    duration / 1000.0)
         ret[u'__id__'] = low[u'__id__']
         log.info(
             u'Completed state [%s] at time %s (duration_in_ms=%s)',
@@ -2012,6 +2185,8 @@ class State(object):
                         self.__run_num += 1
                         chunks.remove(low)
                         break
+        if self._chunk_index is None or not self._chunk_index.valid_for(chunks):
+            self._chunk_index = ChunkIndex(chunks)
         running = {}
         for low in chunks:
             if u'__FAILHARD__' in running:
@@ -2108,43 +2283,31 @@ class State(object):
                 u'onchanges': []}
         if pre:
             reqs[u'prerequired'] = []
+        index = self._get_chunk_index(chunks)
         for r_state in reqs:
             if r_state in low and low[r_state] is not None:
                 for req in low[r_state]:
                     if isinstance(req, six.string_types):
                         req = {u'id': req}
                     req = trim_req(req)
-                    found = False
-                    for chunk in chunks:
-                        req_key = next(iter(req))
-                        req_val = req[req_key]
-                        if req_val is None:
-                            continue
-                        if req_key == u'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk[u'__sls__'], req_val):
-                                found = True
-                                reqs[r_state].append(chunk)
-                            continue
-                        try:
-                            if (fnmatch.fnmatch(chunk[u'name'], req_val) or
-                                fnmatch.fnmatch(chunk[u'__id__'], req_val)):
-                                if req_key == u'id' or chunk[u'state'] == req_key:
-                                    found = True
-                                    reqs[r_state].append(chunk)
-                        except KeyError as exc:
-                            raise SaltRenderError(
-                                u'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk[u'name']))
-                        except TypeError:
-                            # On Python 2, the above req_val, being an OrderedDict, will raise a KeyError,
-                            # however on Python 3 it will raise a TypeError
-                            # This was found when running tests.unit.test_state.StateCompilerTestCase.test_render_error_on_invalid_requisite
-                            raise SaltRenderError(
-                                u'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk[u'name']))
+                    req_key = next(iter(req))
+                    req_val = req[req_key]
+                    if req_val is None or not chunks:
+                        return u'unmet', ()
+                    try:
+                        # Matches the name or the ID of the chunks, or their
+                        # SLS to allow requisite tracking of entire sls files
+                        found = index.lookup(req_key, req_val)
+                    except TypeError:
+                        # The requisite value is not a string, an OrderedDict
+                        # for instance.
+                        # This was found when running tests.unit.test_state.StateCompilerTestCase.test_render_error_on_invalid_requisite
+                        raise SaltRenderError(
+                            u'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
+                                req_key, chunks[0][u'name']))
                     if not found:
                         return u'unmet', ()
+                    reqs[r_state].extend(found)
         fun_stats = set()
         for r_state, chunks in six.iteritems(reqs):
             if r_state == u'prereq':
@@ -2260,6 +2423,7 @@ class State(object):
         else:
             status, reqs = self.check_requisite(low, running, chunks)
         if status == u'unmet':
+            index = self._get_chunk_index(chunks)
             lost = {}
             reqs = []
             for requisite in requisites:
@@ -2270,29 +2434,17 @@ class State(object):
                     if isinstance(req, six.string_types):
                         req = {u'id': req}
                     req = trim_req(req)
-                    found = False
                     req_key = next(iter(req))
                     req_val = req[req_key]
-                    for chunk in chunks:
-                        if req_val is None:
-                            continue
-                        if req_key == u'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk[u'__sls__'], req_val):
-                                if requisite == u'prereq':
-                                    chunk[u'__prereq__'] = True
-                                reqs.append(chunk)
-                                found = True
-                            continue
-                        if (fnmatch.fnmatch(chunk[u'name'], req_val) or
-                            fnmatch.fnmatch(chunk[u'__id__'], req_val)):
-                            if req_key == u'id' or chunk[u'state'] == req_key:
-                                if requisite == u'prereq':
-                                    chunk[u'__prereq__'] = True
-                                elif requisite == u'prerequired':
-                                    chunk[u'__prerequired__'] = True
-                                reqs.append(chunk)
-                                found = True
+                    found = []
+                    if req_val is not None:
+                        found = index.lookup(req_key, req_val)
+                    for chunk in found:
+                        if requisite == u'prereq':
+                            chunk[u'__prereq__'] = True
+                        elif requisite == u'prerequired' and req_key != u'sls':
+                            chunk[u'__prerequired__'] = True
+                        reqs.append(chunk)
                     if not found:
                         lost[requisite].append(req)
             if lost[u'require'] or lost[u'watch'] or lost[u'prereq'] \
@@ -2447,10 +2599,8 @@ class State(object):
         Find all of the listen routines and call the associated mod_watch runs
         '''
         listeners = []
-        crefs = {}
+        index = self._get_chunk_index(chunks)
         for chunk in chunks:
-            crefs[(chunk[u'state'], chunk[u'name'])] = chunk
-            crefs[(chunk[u'state'], chunk[u'__id__'])] = chunk
             if u'listen' in chunk:
                 listeners.append({(chunk[u'state'], chunk[u'__id__']): chunk[u'listen']})
             if u'listen_in' in chunk:
@@ -2465,7 +2615,8 @@ class State(object):
                     if not isinstance(listen_to, dict):
                         continue
                     for lkey, lval in six.iteritems(listen_to):
-                        if (lkey, lval) not in crefs:
+                        lchunk = index.get(lkey, lval)
+                        if lchunk is None:
                             rerror = {_l_tag(lkey, lval):
                                       {
                                           u'comment': u'Referenced state {0}: {1} does not exist'.format(lkey, lval),
@@ -2475,11 +2626,12 @@ class State(object):
                                       }}
                             errors.update(rerror)
                             continue
-                        to_tag = _gen_tag(crefs[(lkey, lval)])
+                        to_tag = _gen_tag(lchunk)
                         if to_tag not in running:
                             continue
                         if running[to_tag][u'changes']:
-                            if key not in crefs:
+                            chunk = index.get(*key)
+                            if chunk is None:
                                 rerror = {_l_tag(key[0], key[1]):
                                              {u'comment': u'Referenced state {0}: {1} does not exist'.format(key[0], key[1]),
                                               u'name': u'listen_{0}:{1}'.format(key[0], key[1]),
@@ -2487,7 +2639,6 @@ class State(object):
                                               u'changes': {}}}
                                 errors.update(rerror)
                                 continue
-                            chunk = crefs[key]
                             low = chunk.copy()
                             low[u'sfun'] = chunk[u'fun']
                             low[u'fun'] = u'mod_watch'
@@ -3638,6 +3789,21 @@ class BaseHighState(object):
                 with salt.utils.files.fopen(cfn, u'rb') as fp_:
                     high = self.serial.load(fp_)
                     return self.state.call_high(high, orchestration_jid)
+        snapshot_key = None
+        if salt.utils.snapshot.highstate_supported(self.opts) \
+                and not self.state.opts[u'pillar'].get(u'_errors'):
+            # Masterless run, the highstate rendered by a previous run is
+            # used if none of the files, the pillar and the config changed
+            snapshot_key = salt.utils.snapshot.key(
+                self.opts,
+                self.opts[u'file_roots'],
+                u'highstate',
+                self.state.opts[u'pillar'],
+                exclude,
+                whitelist)
+            high = salt.utils.snapshot.get(self.opts, u'highstate', snapshot_key)
+            if high is not None:
+                return self.state.call_high(high, orchestration_jid)
         # File exists so continue
         err = []
         try:
@@ -3693,6 +3859,7 @@ class BaseHighState(object):
             log.error(u'Unable to write to "state.highstate" cache file %s', cfn)
 
         os.umask(cumask)
+        salt.utils.snapshot.put(self.opts, u'highstate', snapshot_key, high)
         return self.state.call_high(high, orchestration_jid)
 
     def compile_highstate(self):
@@ -5,7 +5,9 @@ IPC transport classes
 
 # Import Python libs
 from __future__ import absolute_import
+import fnmatch
 import logging
+import re
 import socket
 import weakref
 import time
@@ -464,6 +466,36 @@ class IPCMessageServer(IPCServer):
     '''
 
 
+def tag_filter_matcher(tag_filter):
+    '''
+    Return a function telling if a tag matches the tag filter of a
+    subscriber, or None if all the tags match
+
+    :param list tag_filter: A list of [tag, match_type] pairs, match_type
+                            being 'startswith' or 'fnmatch', or None
+    '''
+    if tag_filter is None:
+        return None
+    prefixes = []
+    globs = []
+    for tag, match_type in tag_filter:
+        if match_type == 'startswith':
+            prefixes.append(tag)
+        elif match_type == 'fnmatch':
+            globs.append(fnmatch.translate(tag))
+        else:
+            # Can't be matched here, the subscriber matches the tags itself
+            return None
+    prefixes = tuple(prefixes)
+    glob_regex = re.compile('|'.join(globs)) if globs else None
+
+    def match(tag):
+        if prefixes and tag.startswith(prefixes):
+            return True
+        return glob_regex is not None and glob_regex.match(tag) is not None
+    return match
+
+
 class IPCMessagePublisher(object):
     '''
     A Tornado IPC Publisher similar to Tornado's TCPServer class
@@ -492,6 +524,8 @@ class IPCMessagePublisher(object):
         self.io_loop = io_loop or IOLoop.current()
         self._closing = False
         self.streams = set()
+        # The tag filters of the subscribers which sent one, by stream
+        self.filters = {}
 
     def start(self):
         '''
@@ -524,16 +558,55 @@ class IPCMessagePublisher(object):
             yield stream.write(pack)
         except tornado.iostream.StreamClosedError:
             log.trace('Client disconnected from IPC {0}'.format(self.socket_path))
-            self.streams.discard(stream)
+            self._discard(stream)
         except Exception as exc:
             log.error('Exception occurred while handling stream: {0}'.format(exc))
             if not stream.closed():
                 stream.close()
-            self.streams.discard(stream)
+            self._discard(stream)
+
+    def _discard(self, stream):
+        self.streams.discard(stream)
+        self.filters.pop(stream, None)
 
-    def publish(self, msg):
+    @tornado.gen.coroutine
+    def _read_tag_filter(self, stream):
+        '''
+        Read the tag filters sent by a subscriber with
+        IPCMessageSubscriber.set_tag_filter
+        '''
+        if six.PY2:
+            encoding = None
+        else:
+            encoding = 'utf-8'
+        unpacker = msgpack.Unpacker(encoding=encoding)
+        while not stream.closed():
+            try:
+                wire_bytes = yield stream.read_bytes(4096, partial=True)
+                unpacker.feed(wire_bytes)
+                for framed_msg in unpacker:
+                    body = framed_msg['body']
+                    if not isinstance(body, dict) or 'tag_filter' not in body:
+                        continue
+                    match = tag_filter_matcher(body['tag_filter'])
+                    if match is None:
+                        self.filters.pop(stream, None)
+                    else:
+                        self.filters[stream] = match
+            except tornado.iostream.StreamClosedError:
+                log.trace('Client disconnected from IPC {0}'.format(self.socket_path))
+                self._discard(stream)
+                break
+            except Exception as exc:
+                log.error('Exception occurred while reading a tag filter: {0}'.format(exc))
+                self.filters.pop(stream, None)
+
+    def publish(self, msg, tag=None):
         '''
         Send message to all connected sockets
+
+        If the tag of the message is passed, the subscribers which set a tag
+        filter only get the message if the tag matches their filter.
         '''
         if not len(self.streams):
             return
@@ -541,6 +614,9 @@ class IPCMessagePublisher(object):
         pack = salt.transport.frame.frame_msg_ipc(msg, raw_body=True)
 
         for stream in self.streams:
+            if tag is not None and stream in self.filters \
+                    and not self.filters[stream](tag):
+                continue
             self.io_loop.spawn_callback(self._write, stream, pack)
 
     def handle_connection(self, connection, address):
@@ -559,6 +635,7 @@ class IPCMessagePublisher(object):
                     io_loop=self.io_loop
                 )
             self.streams.add(stream)
+            self.io_loop.spawn_callback(self._read_tag_filter, stream)
         except Exception as exc:
             log.error('IPC streaming error: {0}'.format(exc))
 
@@ -574,6 +651,7 @@ class IPCMessagePublisher(object):
         for stream in self.streams:
             stream.close()
         self.streams.clear()
+        self.filters.clear()
         if hasattr(self.sock, 'close'):
             self.sock.close()
 
@@ -622,6 +700,40 @@ class IPCMessageSubscriber(IPCClient):
         self._sync_ioloop_running = False
         self.saved_data = []
         self._sync_read_in_progress = Semaphore()
+        self._tag_filter = None
+
+    def connect(self, callback=None, timeout=None):
+        '''
+        Connect to the IPC socket, and send the tag filter to the publisher
+        once connected
+        '''
+        future = super(IPCMessageSubscriber, self).connect(
+            callback=callback, timeout=timeout)
+        future.add_done_callback(self._connected)
+        return future
+
+    def _connected(self, future):
+        if future.exception() is None and self._tag_filter is not None:
+            self._send_tag_filter()
+
+    def _send_tag_filter(self):
+        future = self.stream.write(
+            salt.transport.frame.frame_msg_ipc({'tag_filter': self._tag_filter}))
+        # Read the result, a closed stream is noticed by the next read
+        future.add_done_callback(lambda future: future.exc_info())
+
+    def set_tag_filter(self, tag_filter):
+        '''
+        Only receive the messages whose tag matches the tag filter, a list of
+        [tag, match_type] pairs with the 'startswith' or 'fnmatch' match
+        types. None receives all the messages, which is the default.
+
+        The filter is sent to the publisher, which skips the messages not
+        matching it. Publishers not reading filters send all the messages.
+        '''
+        self._tag_filter = tag_filter
+        if self.connected():
+            self._send_tag_filter()
 
     @tornado.gen.coroutine
     def _read_sync(self, timeout):
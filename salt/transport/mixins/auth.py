@@ -18,6 +18,7 @@ import salt.transport.frame
 import salt.utils.event
 import salt.utils.files
 import salt.utils.minions
+import salt.utils.presence
 import salt.utils.stringutils
 import salt.utils.verify
 from salt.utils.cache import CacheCli
@@ -27,10 +28,8 @@ from salt.ext import six
 import tornado.gen
 try:
     from Cryptodome.Cipher import PKCS1_OAEP
-    from Cryptodome.PublicKey import RSA
 except ImportError:
     from Crypto.Cipher import PKCS1_OAEP
-    from Crypto.PublicKey import RSA
 
 
 log = logging.getLogger(__name__)
@@ -115,8 +114,7 @@ class AESReqServerMixin(object):
             self.opts,
             key)
         try:
-            with salt.utils.files.fopen(pubfn) as f:
-                pub = RSA.importKey(f.read())
+            pub = salt.crypt.get_rsa_pub_key(pubfn)
         except (ValueError, IndexError, TypeError):
             return self.crypticle.dumps({})
         except IOError:
@@ -421,8 +419,7 @@ class AESReqServerMixin(object):
         # The key payload may sometimes be corrupt when using auto-accept
         # and an empty request comes in
         try:
-            with salt.utils.files.fopen(pubfn) as f:
-                pub = RSA.importKey(f.read())
+            pub = salt.crypt.get_rsa_pub_key(pubfn)
         except (ValueError, IndexError, TypeError) as err:
             log.error('Corrupt public key "{0}": {1}'.format(pubfn, err))
             return {'enc': 'clear',
@@ -482,6 +479,7 @@ class AESReqServerMixin(object):
         # Be aggressive about the signature
         digest = hashlib.sha256(aes).hexdigest()
         ret['sig'] = salt.crypt.private_encrypt(self.master_key.key, digest)
+        salt.utils.presence.seen(self.opts, load['id'])
         eload = {'result': True,
                  'act': 'accept',
                  'id': load['id'],
@@ -10,6 +10,7 @@ import sys
 import copy
 import errno
 import signal
+import time
 import hashlib
 import logging
 import weakref
@@ -686,10 +687,53 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         self.opts = opts
         self.serial = salt.payload.Serial(self.opts)  # TODO: in init?
         self.ckminions = salt.utils.minions.CkMinions(self.opts)
+        # The PUSH socket used by publish() is created lazily and kept open
+        # for the lifetime of the process which created it.
+        self._pub_context = None
+        self._pub_sock = None
+        self._pub_pid = None
+        self._pub_batch = []
+        self._pub_batch_start = None
+        self._pub_batch_timeout = None
 
     def connect(self):
         return tornado.gen.sleep(5)
 
+    @property
+    def pull_uri(self):
+        '''
+        The URI of the publish daemon's PULL socket
+        '''
+        if self.opts.get('ipc_mode', '') == 'tcp':
+            return 'tcp://127.0.0.1:{0}'.format(
+                self.opts.get('tcp_master_publish_pull', 4514)
+                )
+        return 'ipc://{0}'.format(
+            os.path.join(self.opts['sock_dir'], 'publish_pull.ipc')
+            )
+
+    def _send_package(self, pub_sock, unpacked_package):
+        '''
+        Forward a single unpacked package from the PULL socket to the minions
+        '''
+        payload = unpacked_package['payload']
+        if self.opts['zmq_filtering']:
+            # if you have a specific topic list, use that
+            if 'topic_lst' in unpacked_package:
+                for topic in unpacked_package['topic_lst']:
+                    # zmq filters are substring match, hash the topic
+                    # to avoid collisions
+                    htopic = hashlib.sha1(topic).hexdigest()
+                    pub_sock.send(htopic, flags=zmq.SNDMORE)
+                    pub_sock.send(payload)
+                    # otherwise its a broadcast
+            else:
+                # TODO: constants file for "broadcast"
+                pub_sock.send('broadcast', flags=zmq.SNDMORE)
+                pub_sock.send(payload)
+        else:
+            pub_sock.send(payload)
+
     def _publish_daemon(self):
         '''
         Bind to the interface specified in the configuration file
@@ -717,14 +761,7 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         # Prepare minion pull socket
         pull_sock = context.socket(zmq.PULL)
 
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            pull_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_publish_pull', 4514)
-                )
-        else:
-            pull_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'publish_pull.ipc')
-                )
+        pull_uri = self.pull_uri
         salt.utils.zeromq.check_ipc_path_max_len(pull_uri)
 
         # Start the minion command publisher
@@ -748,23 +785,10 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
                     unpacked_package = salt.payload.unpackage(package)
                     if six.PY3:
                         unpacked_package = salt.transport.frame.decode_embedded_strs(unpacked_package)
-                    payload = unpacked_package['payload']
-                    if self.opts['zmq_filtering']:
-                        # if you have a specific topic list, use that
-                        if 'topic_lst' in unpacked_package:
-                            for topic in unpacked_package['topic_lst']:
-                                # zmq filters are substring match, hash the topic
-                                # to avoid collisions
-                                htopic = hashlib.sha1(topic).hexdigest()
-                                pub_sock.send(htopic, flags=zmq.SNDMORE)
-                                pub_sock.send(payload)
-                                # otherwise its a broadcast
-                        else:
-                            # TODO: constants file for "broadcast"
-                            pub_sock.send('broadcast', flags=zmq.SNDMORE)
-                            pub_sock.send(payload)
-                    else:
-                        pub_sock.send(payload)
+                    # Several publishes may have been coalesced into a
+                    # single message by a batching publisher
+                    for item in unpacked_package.get('batch', [unpacked_package]):
+                        self._send_package(pub_sock, item)
                 except zmq.ZMQError as exc:
                     if exc.errno == errno.EINTR:
                         continue
@@ -791,6 +815,103 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         '''
         process_manager.add_process(self._publish_daemon)
 
+    def _get_pub_sock(self):
+        '''
+        Return the PUSH socket connected to the publish daemon, creating it
+        if needed. The socket is kept open between calls to publish(); a
+        process which inherited the socket through a fork gets its own.
+        '''
+        pid = os.getpid()
+        if self._pub_pid != pid:
+            # ZeroMQ contexts are not fork safe, drop (but do not close) any
+            # socket inherited from the parent process.
+            self._pub_context = None
+            self._pub_sock = None
+            self._pub_batch = []
+            self._pub_batch_start = None
+            self._pub_batch_timeout = None
+            self._pub_pid = pid
+        if self._pub_sock is None:
+            if self._pub_context is None:
+                self._pub_context = zmq.Context(1)
+            self._pub_sock = self._pub_context.socket(zmq.PUSH)
+            self._pub_sock.connect(self.pull_uri)
+        return self._pub_sock
+
+    def _close_pub_sock(self):
+        '''
+        Close the PUSH socket so that the next send reconnects
+        '''
+        if self._pub_sock is not None and self._pub_pid == os.getpid():
+            if self._pub_sock.closed is False:
+                self._pub_sock.close()
+        self._pub_sock = None
+
+    def _send_int_payload(self, package):
+        '''
+        Send a serialized package to the publish daemon, reconnecting once if
+        the socket has gone bad
+        '''
+        try:
+            self._get_pub_sock().send(package)
+        except zmq.ZMQError as exc:
+            log.warning(
+                'Error sending to the publisher, reconnecting: {0}'.format(exc)
+            )
+            self._close_pub_sock()
+            self._get_pub_sock().send(package)
+
+    def flush(self):
+        '''
+        Send any publishes queued up while batching
+        '''
+        if self._pub_batch_timeout is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._pub_batch_timeout)
+            self._pub_batch_timeout = None
+        if not self._pub_batch or self._pub_pid != os.getpid():
+            return
+        batch, self._pub_batch = self._pub_batch, []
+        self._pub_batch_start = None
+        if len(batch) == 1:
+            self._send_int_payload(self.serial.dumps(batch[0]))
+        else:
+            self._send_int_payload(self.serial.dumps({'batch': batch}))
+
+    def _queue_int_payload(self, int_payload):
+        '''
+        Add a publish to the pending batch, flushing it when it is full or
+        old enough. Any remainder is flushed from the IOLoop once
+        ``zmq_pub_batch_latency`` has passed.
+        '''
+        if self._pub_pid != os.getpid():
+            self._get_pub_sock()
+        now = time.time()
+        if not self._pub_batch:
+            self._pub_batch_start = now
+        self._pub_batch.append(int_payload)
+        latency = self.opts.get('zmq_pub_batch_latency', 0.01)
+        if len(self._pub_batch) >= self.opts['zmq_pub_batch_size'] \
+                or now - self._pub_batch_start >= latency:
+            self.flush()
+        elif self._pub_batch_timeout is None:
+            self._pub_batch_timeout = tornado.ioloop.IOLoop.current().call_later(
+                latency, self.flush
+            )
+
+    def close(self):
+        '''
+        Flush pending publishes and close the publisher socket
+        '''
+        if self._pub_pid != os.getpid():
+            return
+        try:
+            self.flush()
+        finally:
+            self._close_pub_sock()
+            if self._pub_context is not None and self._pub_context.closed is False:
+                self._pub_context.term()
+            self._pub_context = None
+
     def publish(self, load):
         '''
         Publish "load" to minions
@@ -805,18 +926,6 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
             master_pem_path = os.path.join(self.opts['pki_dir'], 'master.pem')
             log.debug("Signing data packet")
             payload['sig'] = salt.crypt.sign_message(master_pem_path, payload['load'])
-        # Send 0MQ to the publisher
-        context = zmq.Context(1)
-        pub_sock = context.socket(zmq.PUSH)
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            pull_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_publish_pull', 4514)
-                )
-        else:
-            pull_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'publish_pull.ipc')
-                )
-        pub_sock.connect(pull_uri)
         int_payload = {'payload': self.serial.dumps(payload)}
 
         # add some targeting stuff for lists only (for now)
@@ -834,9 +943,11 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
             # Send list of miions thru so zmq can target them
             int_payload['topic_lst'] = match_ids
 
-        pub_sock.send(self.serial.dumps(int_payload))
-        pub_sock.close()
-        context.term()
+        # Send 0MQ to the publisher
+        if self.opts.get('zmq_pub_batch_size', 1) > 1:
+            self._queue_int_payload(int_payload)
+        else:
+            self._send_int_payload(self.serial.dumps(int_payload))
 
 
 class AsyncReqMessageClientPool(salt.transport.MessageClientPool):
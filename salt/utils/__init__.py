@@ -23,7 +23,6 @@ import shlex
 import shutil
 import socket
 import sys
-import pstats
 import tempfile
 import time
 import types
@@ -46,32 +45,6 @@ if six.PY3:
 else:
     import imp
 
-try:
-    import cProfile
-    HAS_CPROFILE = True
-except ImportError:
-    HAS_CPROFILE = False
-
-# Import 3rd-party libs
-try:
-    import Crypto.Random
-    HAS_CRYPTO = True
-except ImportError:
-    HAS_CRYPTO = False
-
-try:
-    import timelib
-    HAS_TIMELIB = True
-except ImportError:
-    HAS_TIMELIB = False
-
-try:
-    import parsedatetime
-
-    HAS_PARSEDATETIME = True
-except ImportError:
-    HAS_PARSEDATETIME = False
-
 try:
     import win32api
     HAS_WIN32API = True
@@ -104,15 +77,6 @@ try:
 except ImportError:
     HAS_SETPROCTITLE = False
 
-try:
-    import ctypes
-    import ctypes.util
-    libc = ctypes.cdll.LoadLibrary(ctypes.util.find_library("c"))
-    res_init = libc.__res_init
-    HAS_RESINIT = True
-except (ImportError, OSError, AttributeError, TypeError):
-    HAS_RESINIT = False
-
 # Import salt libs
 from salt.defaults import DEFAULT_TARGET_DELIM
 import salt.defaults.exitcodes
@@ -132,6 +96,10 @@ from salt.exceptions import (
 log = logging.getLogger(__name__)
 _empty = object()
 
+# The optional libraries which are only imported when first needed, so the
+# CLI commands importing salt.utils start faster
+_LAZY_LIBS = {}
+
 
 def get_color_theme(theme):
     '''
@@ -317,6 +285,9 @@ def _win_user_token_is_admin(user_token):
     See MSDN entry here:
         http://msdn.microsoft.com/en-us/library/aa376389(VS.85).aspx
     '''
+    import ctypes
+    import ctypes.wintypes
+
     class SID_IDENTIFIER_AUTHORITY(ctypes.Structure):
         _fields_ = [
             ("byte0", ctypes.c_byte),
@@ -421,8 +392,11 @@ def reinit_crypto():
         child processes after using os.fork()
 
     '''
-    if HAS_CRYPTO:
-        Crypto.Random.atfork()
+    # pycrypto is not imported here to keep the import of salt.utils fast,
+    # there is nothing to reinit if it has not been imported yet
+    crypto_random = sys.modules.get('Crypto.Random')
+    if crypto_random is not None:
+        crypto_random.atfork()
 
 
 def daemonize(redirect_out=True):
@@ -504,6 +478,7 @@ def profile_func(filename=None):
         def profiled_func(*args, **kwargs):
             logging.info('Profiling function {0}'.format(fun.__name__))
             try:
+                import cProfile
                 profiler = cProfile.Profile()
                 retval = profiler.runcall(fun, *args, **kwargs)
                 profiler.dump_stats((filename or '{0}_func.profile'
@@ -521,11 +496,13 @@ def profile_func(filename=None):
 def activate_profile(test=True):
     pr = None
     if test:
-        if HAS_CPROFILE:
+        try:
+            import cProfile
+        except ImportError:
+            log.error('cProfile is not available on your platform')
+        else:
             pr = cProfile.Profile()
             pr.enable()
-        else:
-            log.error('cProfile is not available on your platform')
     return pr
 
 
@@ -536,7 +513,8 @@ def output_profile(pr, stats_path='/tmp/stats', stop=False, id_=None):
     import salt.utils.path
     import salt.utils.stringutils
 
-    if pr is not None and HAS_CPROFILE:
+    if pr is not None:
+        import pstats
         try:
             pr.disable()
             if not os.path.isdir(stats_path):
@@ -655,11 +633,29 @@ def ip_bracket(addr):
     return addr
 
 
+def _res_init():
+    '''
+    Return the res_init function of the libc, or None if it is not available.
+    Looking up the libc runs external commands, so this is only done the
+    first time it is needed.
+    '''
+    if 'res_init' not in _LAZY_LIBS:
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.cdll.LoadLibrary(ctypes.util.find_library('c'))
+            _LAZY_LIBS['res_init'] = libc.__res_init
+        except (ImportError, OSError, AttributeError, TypeError):
+            _LAZY_LIBS['res_init'] = None
+    return _LAZY_LIBS['res_init']
+
+
 def refresh_dns():
     '''
     issue #21397: force glibc to re-read resolv.conf
     '''
-    if HAS_RESINIT:
+    res_init = _res_init()
+    if res_init is not None:
         res_init()
 
 
@@ -1867,6 +1863,19 @@ def enable_ctrl_logoff_handler():
         win32api.SetConsoleCtrlHandler(_win_console_event_handler, 1)
 
 
+def _timelib():
+    '''
+    Return the timelib module, or None if it is not installed
+    '''
+    if 'timelib' not in _LAZY_LIBS:
+        try:
+            import timelib
+            _LAZY_LIBS['timelib'] = timelib
+        except ImportError:
+            _LAZY_LIBS['timelib'] = None
+    return _LAZY_LIBS['timelib']
+
+
 def date_cast(date):
     '''
     Casts any object into a datetime.datetime object
@@ -1883,7 +1892,8 @@ def date_cast(date):
     try:
         if isinstance(date, six.string_types):
             try:
-                if HAS_TIMELIB:
+                timelib = _timelib()
+                if timelib is not None:
                     # py3: yes, timelib.strtodatetime wants bytes, not str :/
                     return timelib.strtodatetime(to_bytes(date))
             except ValueError:
@@ -1897,7 +1907,7 @@ def date_cast(date):
 
         return datetime.datetime.fromtimestamp(date)
     except Exception:
-        if HAS_TIMELIB:
+        if _timelib() is not None:
             raise ValueError('Unable to parse {0}'.format(date))
 
         raise RuntimeError(
@@ -110,6 +110,7 @@ TAGS = {
     'cloud': 'cloud',  # prefix for all salt/cloud events
     'fileserver': 'fileserver',  # prefix for all salt/fileserver events
     'queue': 'queue',  # prefix for all salt/queue events
+    'batch': 'batch',  # prefix for all salt/batch events (master batch runs)
 }
 
 
@@ -184,6 +185,16 @@ def fire_args(opts, jid, tag_data, prefix=''):
             )
 
 
+def package_tag(package):
+    '''
+    Return the tag of a packed event, as sent to the event publisher
+    '''
+    if isinstance(package, six.binary_type):
+        tag = package.partition(salt.utils.stringutils.to_bytes(TAGEND))[0]
+        return salt.utils.stringutils.to_str(tag)
+    return package.partition(TAGEND)[0]
+
+
 def tagify(suffix='', prefix='', base=SALT):
     '''
     convenience function to build a namespaced event tag string
@@ -256,6 +267,7 @@ class SaltEvent(object):
         self.puburi, self.pulluri = self.__load_uri(sock_dir, node)
         self.pending_tags = []
         self.pending_events = []
+        self.tag_filter = None
         self.__load_cache_regex()
         if listen and not self.cpub:
             # Only connect to the publisher at initialization time if
@@ -333,6 +345,8 @@ class SaltEvent(object):
             return
         match_func = self._get_match_func(match_type)
         self.pending_tags.append([tag, match_func])
+        if self.tag_filter is not None:
+            self._send_tag_filter()
 
     def unsubscribe(self, tag, match_type=None):
         '''
@@ -349,6 +363,56 @@ class SaltEvent(object):
         for evt in old_events:
             if any(pmatch_func(evt['tag'], ptag) for ptag, pmatch_func in self.pending_tags):
                 self.pending_events.append(evt)
+        if self.tag_filter is not None:
+            self._send_tag_filter()
+
+    def set_tag_filter(self, tags, match_type=None):
+        '''
+        Only receive the events whose tag matches one of the passed tags or
+        one of the subscribed tags. Pass None to receive all the events again,
+        which is the default. A tag may also be a ``[tag, match_type]`` pair,
+        so the ``tag_filter`` attribute can be saved and set again later.
+
+        The tags are matched by the event publisher, so the events which are
+        not wanted are not sent to this listener at all, instead of being
+        read and discarded by get_event. Only the 'startswith' and 'fnmatch'
+        match types can be matched by the publisher, all the events are
+        received when a tag uses another one.
+
+        The asynchronous listeners sharing an io_loop share the connection to
+        the publisher, and so the filter.
+
+        .. versionadded:: Oxygen
+        '''
+        if tags is None:
+            self.tag_filter = None
+        else:
+            if match_type is None:
+                match_type = self.opts['event_match_type']
+            self.tag_filter = [
+                list(tag) if isinstance(tag, (list, tuple)) else [tag, match_type]
+                for tag in tags
+            ]
+        self._send_tag_filter()
+
+    def _publisher_tag_filter(self):
+        '''
+        Return the tag filter sent to the publisher, with the subscribed tags
+        '''
+        if self.tag_filter is None:
+            return None
+        tag_filter = list(self.tag_filter)
+        for tag, match_func in self.pending_tags:
+            name = getattr(match_func, '__name__', '')
+            tag_filter.append([tag, name[len('_match_tag_'):]])
+        if any(match_type not in ('startswith', 'fnmatch')
+               for _, match_type in tag_filter):
+            return None
+        return tag_filter
+
+    def _send_tag_filter(self):
+        if self.subscriber is not None:
+            self.subscriber.set_tag_filter(self._publisher_tag_filter())
 
     def connect_pub(self, timeout=None):
         '''
@@ -361,9 +425,10 @@ class SaltEvent(object):
             with salt.utils.async.current_ioloop(self.io_loop):
                 if self.subscriber is None:
                     self.subscriber = salt.transport.ipc.IPCMessageSubscriber(
-                    self.puburi,
-                    io_loop=self.io_loop
-                )
+                        self.puburi,
+                        io_loop=self.io_loop
+                    )
+                    self.subscriber.set_tag_filter(self._publisher_tag_filter())
                 try:
                     self.io_loop.run_sync(
                         lambda: self.subscriber.connect(timeout=timeout))
@@ -373,9 +438,10 @@ class SaltEvent(object):
         else:
             if self.subscriber is None:
                 self.subscriber = salt.transport.ipc.IPCMessageSubscriber(
-                self.puburi,
-                io_loop=self.io_loop
-            )
+                    self.puburi,
+                    io_loop=self.io_loop
+                )
+                self.subscriber.set_tag_filter(self._publisher_tag_filter())
 
             # For the async case, the connect will be defered to when
             # set_event_handler() is invoked.
@@ -1031,7 +1097,10 @@ class AsyncEventPublisher(object):
         Get something from epull, publish it out epub, and return the package (or None)
         '''
         try:
-            self.publisher.publish(package)
+            if self.publisher.filters:
+                self.publisher.publish(package, tag=package_tag(package))
+            else:
+                self.publisher.publish(package)
             return package
         # Add an extra fallback in case a forked process leeks through
         except Exception:
@@ -1130,7 +1199,10 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
         Get something from epull, publish it out epub, and return the package (or None)
         '''
         try:
-            self.publisher.publish(package)
+            if self.publisher.filters:
+                self.publisher.publish(package, tag=package_tag(package))
+            else:
+                self.publisher.publish(package)
             return package
         # Add an extra fallback in case a forked process leeks through
         except Exception:
@@ -1245,6 +1317,10 @@ class EventReturn(salt.utils.process.SignalHandlingMultiprocessingProcess):
         '''
         salt.utils.appendproctitle(self.__class__.__name__)
         self.event = get_event('master', opts=self.opts, listen=True)
+        if self.opts['event_return_whitelist']:
+            # The other events are not sent to the returner at all
+            self.event.set_tag_filter(self.opts['event_return_whitelist'],
+                                      'fnmatch')
         events = self.event.iter_events(full=True)
         self.event.fire_event({}, 'salt/event_listen/start')
         try:
@@ -18,6 +18,7 @@ import stat
 import subprocess
 import time
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 
 # Import salt libs
 import salt.utils
@@ -2181,27 +2182,80 @@ class GitBase(object):
             errors.extend(failed)
         return cleared, errors
 
+    def _fetch_remote(self, repo):
+        '''
+        Fetch a single remote. Return whether or not it was updated, along
+        with the metrics of the fetch.
+        '''
+        start = time.time()
+        changed = False
+        error = None
+        try:
+            changed = bool(repo.fetch())
+        except Exception as exc:
+            log.error(
+                'Exception caught while fetching %s remote \'%s\': %s',
+                self.role, repo.id, exc,
+                exc_info=True
+            )
+            error = six.text_type(exc)
+        return changed, {'changed': changed,
+                         'duration': round(time.time() - start, 3),
+                         'error': error}
+
     def fetch_remotes(self):
         '''
         Fetch all remotes and return a boolean to let the calling function know
         whether or not any remotes were updated in the process of fetching
+
+        When ``<role>_fetch_workers`` is greater than 1, that many remotes are
+        fetched at the same time. Each remote is still fetched under its own
+        update lock.
         '''
-        changed = False
-        for repo in self.remotes:
+        try:
+            workers = int(self.opts.get('{0}_fetch_workers'.format(self.role), 1))
+        except (TypeError, ValueError):
+            log.error(
+                'Invalid %s_fetch_workers value, fetching remotes one at a time',
+                self.role
+            )
+            workers = 1
+        workers = max(min(workers, len(self.remotes)), 1)
+
+        start = time.time()
+        if workers > 1:
+            pool = ThreadPool(workers)
             try:
-                if repo.fetch():
-                    # We can't just use the return value from repo.fetch()
-                    # because the data could still have changed if old remotes
-                    # were cleared above. Additionally, we're running this in a
-                    # loop and later remotes without changes would override
-                    # this value and make it incorrect.
-                    changed = True
-            except Exception as exc:
-                log.error(
-                    'Exception caught while fetching %s remote \'%s\': %s',
-                    self.role, repo.id, exc,
-                    exc_info=True
-                )
+                results = pool.map(self._fetch_remote, self.remotes)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [self._fetch_remote(repo) for repo in self.remotes]
+
+        # We can't just use the return value from the last repo.fetch()
+        # because the data could still have changed if old remotes were
+        # cleared above. Additionally, later remotes without changes would
+        # override this value and make it incorrect.
+        changed = any(result[0] for result in results)
+
+        if self.opts.get('fileserver_events', False) and self.remotes:
+            metrics = {'changed': changed,
+                       'duration': round(time.time() - start, 3),
+                       'workers': workers,
+                       'remotes': {}}
+            for repo, result in zip(self.remotes, results):
+                metrics['remotes'][repo.id] = result[1]
+            event = salt.utils.event.get_event(
+                    'master',
+                    self.opts['sock_dir'],
+                    self.opts['transport'],
+                    opts=self.opts,
+                    listen=False)
+            event.fire_event(
+                metrics,
+                tagify([self.role, 'fetch'], prefix='fileserver')
+            )
         return changed
 
     def lock(self, remote=None):
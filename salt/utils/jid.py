@@ -4,6 +4,7 @@ from __future__ import print_function
 
 from calendar import month_abbr as months
 import datetime
+import fnmatch
 import hashlib
 import os
 
@@ -68,6 +69,10 @@ def format_job_instance(job):
            'Target-type': job.get('tgt_type', []),
            'User': job.get('user', 'root')}
 
+    if 'minion_count' in job:
+        # Kept by the job caches which index the jobs
+        ret['Minion-count'] = job['minion_count']
+
     if 'metadata' in job:
         ret['Metadata'] = job.get('metadata', {})
     else:
@@ -97,6 +102,52 @@ def format_jid_instance_ext(jid, job):
     return ret
 
 
+def time_to_jid(when):
+    '''
+    Convert a datetime into the jid of a job invoked at this time, jids sort
+    like the times they were invoked at
+    '''
+    return '{0:%Y%m%d%H%M%S%f}'.format(when)
+
+
+def _globs(val):
+    if isinstance(val, list):
+        return val
+    return [x.strip() for x in six.text_type(val).split(',')]
+
+
+def match_job(job,
+              search_function=None,
+              search_target=None,
+              search_user=None,
+              search_metadata=None):
+    '''
+    Return True if a job formatted by format_job_instance matches all the
+    filters passed. The function, target and user filters are globs, lists of
+    globs or comma separated globs. A job matches search_metadata, a dict, if
+    any of its key/value pairs is in the metadata of the job.
+    '''
+    if search_metadata:
+        metadata = job.get('Metadata')
+        if not isinstance(search_metadata, dict) or not isinstance(metadata, dict):
+            return False
+        if not any(key in metadata and metadata[key] == value
+                   for key, value in six.iteritems(search_metadata)):
+            return False
+    if search_target:
+        targets = job.get('Target', [])
+        if isinstance(targets, six.string_types):
+            targets = [targets]
+        if not any(fnmatch.fnmatch(six.text_type(target), key)
+                   for target in targets for key in _globs(search_target)):
+            return False
+    for field, search in (('Function', search_function), ('User', search_user)):
+        if search and not any(fnmatch.fnmatch(six.text_type(job.get(field, '')), key)
+                              for key in _globs(search)):
+            return False
+    return True
+
+
 def jid_dir(jid, job_dir=None, hash_type='sha256'):
     '''
     Return the jid_dir for the given job id
@@ -3,19 +3,47 @@
 # Import Python libs
 from __future__ import absolute_import
 import logging
+import os
+import struct
+import time
 
 # Import Salt libs
 import salt.minion
+import salt.payload
+import salt.utils
+import salt.utils.files
 import salt.utils.jid
 import salt.utils.event
+import salt.utils.process
 import salt.utils.verify
+from salt.ext import six
+
+# Import third party libs
+try:
+    import zmq
+    HAS_ZMQ = True
+except ImportError:
+    HAS_ZMQ = False
 
 log = logging.getLogger(__name__)
 
 
-def store_job(opts, load, event=None, mminion=None):
+def _caches_return(opts, load):
+    '''
+    Return True if the return is to be written to the master job cache
+    '''
+    if not opts['job_cache'] or opts.get('ext_job_cache'):
+        return False
+    return load.get('jid') != 'nocache'
+
+
+def store_job(opts, load, event=None, mminion=None, writer=None):
     '''
     Store job information using the configured master_job_cache
+
+    When a ReturnWriterClient is passed as ``writer``, the return is handed
+    over to the return writer process once the events are fired, and is only
+    stored here if the writer queue is full.
     '''
     # Generate EndTime
     endtime = salt.utils.jid.jid_to_time(salt.utils.jid.gen_jid())
@@ -28,6 +56,7 @@ def store_job(opts, load, event=None, mminion=None):
         mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
 
     job_cache = opts['master_job_cache']
+    defer = writer is not None and _caches_return(opts, load)
     if load['jid'] == 'req':
         # The minion is returning a standalone job, request a jobid
         load['arg'] = load.get('arg', load.get('fun_args', []))
@@ -50,15 +79,9 @@ def store_job(opts, load, event=None, mminion=None):
             emsg = "Returner '{0}' does not support function save_load".format(job_cache)
             log.error(emsg)
             raise KeyError(emsg)
-    elif salt.utils.jid.is_jid(load['jid']):
+    elif salt.utils.jid.is_jid(load['jid']) and not defer:
         # Store the jid
-        jidstore_fstr = '{0}.prep_jid'.format(job_cache)
-        try:
-            mminion.returners[jidstore_fstr](False, passed_jid=load['jid'])
-        except KeyError:
-            emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
-            log.error(emsg)
-            raise KeyError(emsg)
+        _prep_jid(opts, load['jid'], mminion)
 
     if event:
         # If the return data is invalid, just ignore it
@@ -77,17 +100,51 @@ def store_job(opts, load, event=None, mminion=None):
         log.debug('Ignoring job return with jid for caching {jid} from {id}'.format(**load))
         return
 
+    if defer:
+        if writer.put(load, endtime):
+            return
+        log.debug('The job return writer queue is full, storing the return '
+                  'of %s for job %s directly', load['id'], load['jid'])
+        if salt.utils.jid.is_jid(load['jid']):
+            _prep_jid(opts, load['jid'], mminion)
+
     # otherwise, write to the master cache
+    _save_returns(opts, [(load, endtime)], mminion)
+
+
+def _prep_jid(opts, jid, mminion):
+    '''
+    Store a jid using the configured master_job_cache
+    '''
+    job_cache = opts['master_job_cache']
+    jidstore_fstr = '{0}.prep_jid'.format(job_cache)
+    try:
+        mminion.returners[jidstore_fstr](False, passed_jid=jid)
+    except KeyError:
+        emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
+        log.error(emsg)
+        raise KeyError(emsg)
+
+
+def _save_returns(opts, returns, mminion, stored=None):
+    '''
+    Write a list of (load, endtime) tuples to the master job cache. The
+    returner_many function of the returner is used when it has one. The
+    tuples are appended to the stored list, if passed, once written.
+    '''
+    job_cache = opts['master_job_cache']
     savefstr = '{0}.save_load'.format(job_cache)
     getfstr = '{0}.get_load'.format(job_cache)
     fstr = '{0}.returner'.format(job_cache)
+    manyfstr = '{0}.returner_many'.format(job_cache)
     updateetfstr = '{0}.update_endtime'.format(job_cache)
-    if 'fun' not in load and load.get('return', {}):
-        ret_ = load.get('return', {})
-        if 'fun' in ret_:
-            load.update({'fun': ret_['fun']})
-        if 'user' in ret_:
-            load.update({'user': ret_['user']})
+    for load, _ in returns:
+        if 'fun' not in load and load.get('return', {}):
+            ret_ = load.get('return', {})
+            if 'fun' in ret_:
+                load.update({'fun': ret_['fun']})
+            if 'user' in ret_:
+                load.update({'user': ret_['user']})
 
     # Try to reach returner methods
     try:
@@ -99,15 +156,63 @@ def store_job(opts, load, event=None, mminion=None):
         log.error(emsg)
         raise KeyError(emsg)
 
-    if 'jid' in load \
-            and 'get_load' in mminion.returners \
-            and not mminion.returners[getfstr](load.get('jid', '')):
-        mminion.returners[savefstr](load['jid'], load)
-    mminion.returners[fstr](load)
+    # The load and the end time only need to be stored once per job
+    jobs = {}
+    for load, endtime in returns:
+        if load['jid'] in jobs:
+            jobs[load['jid']][1] = max(jobs[load['jid']][1], endtime)
+        else:
+            jobs[load['jid']] = [load, endtime]
+
+    for jid, (load, _) in six.iteritems(jobs):
+        if 'get_load' in mminion.returners \
+                and not mminion.returners[getfstr](jid):
+            mminion.returners[savefstr](jid, load)
+
+    if len(returns) > 1 and manyfstr in mminion.returners:
+        mminion.returners[manyfstr]([load for load, _ in returns])
+        if stored is not None:
+            stored.extend(returns)
+    else:
+        for ret in returns:
+            mminion.returners[fstr](ret[0])
+            if stored is not None:
+                stored.append(ret)
 
     if (opts.get('job_cache_store_endtime')
             and updateetfstr in mminion.returners):
-        mminion.returners[updateetfstr](load['jid'], endtime)
+        for jid, (_, endtime) in six.iteritems(jobs):
+            mminion.returners[updateetfstr](jid, endtime)
+
+
+def store_jobs(opts, returns, mminion=None):
+    '''
+    Store a batch of job returns using the configured master_job_cache. The
+    returns are a list of (load, endtime) tuples which store_job already
+    validated and fired the events of. The jid of each job is prepared once
+    for the whole batch.
+
+    Returns the list of the tuples which were stored. The error which stopped
+    the others from being stored is logged.
+    '''
+    stored = []
+    if not returns:
+        return stored
+    if mminion is None:
+        mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
+    try:
+        for jid in set(load['jid'] for load, _ in returns):
+            if salt.utils.jid.is_jid(jid):
+                _prep_jid(opts, jid, mminion)
+        _save_returns(opts, returns, mminion, stored=stored)
+    except Exception as exc:
+        if len(returns) == 1:
+            log.error('Could not store the return of %s for job %s: %s',
+                      returns[0][0].get('id'), returns[0][0].get('jid'), exc)
+        else:
+            log.error('Could not store %d of a batch of %d job returns: %s',
+                      len(returns) - len(stored), len(returns), exc)
+    return stored
 
 
 def store_minions(opts, jid, minions, mminion=None, syndic_id=None):
@@ -143,4 +248,193 @@ def get_retcode(ret):
         return 1
     return retcode
 
+
+def _writer_sock(opts):
+    return os.path.join(opts['sock_dir'], 'job_returns.ipc')
+
+
+class ReturnWriterClient(object):
+    '''
+    Hand job returns over to the ReturnWriter process. Used by the MWorkers
+    when ``job_return_writer`` is enabled.
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+        self.serial = salt.payload.Serial(self.opts)
+        self.context = zmq.Context()
+        self.socket = self.context.socket(zmq.PUSH)
+        self.socket.setsockopt(zmq.LINGER, 1000)
+        self.socket.setsockopt(zmq.SNDHWM, self.opts['job_return_writer_queue'])
+        if hasattr(zmq, 'IMMEDIATE'):
+            # Don't queue anything while the writer is not running
+            self.socket.setsockopt(zmq.IMMEDIATE, 1)
+        self.socket.connect('ipc://' + _writer_sock(self.opts))
+
+    def put(self, load, endtime):
+        '''
+        Queue a return for the writer. Returns False if the queue is full or
+        the writer is not running, the return then needs to be stored by the
+        caller.
+        '''
+        try:
+            self.socket.send(
+                self.serial.dumps({'load': load, 'endtime': endtime}),
+                zmq.NOBLOCK)
+        except zmq.ZMQError:
+            return False
+        return True
+
+    def close(self):
+        self.socket.close()
+        self.context.term()
+
+
+class ReturnWriter(salt.utils.process.SignalHandlingMultiprocessingProcess):
+    '''
+    A dedicated master process which writes the job returns received by the
+    MWorkers to the master job cache in batches
+    '''
+    def __init__(self, opts, log_queue=None):
+        super(ReturnWriter, self).__init__(log_queue=log_queue)
+        self.opts = opts
+        self.serial = salt.payload.Serial(self.opts)
+        self.batch_size = max(1, self.opts['job_return_writer_batch_size'])
+        self.interval = self.opts['job_return_writer_interval']
+        self.journal_path = None
+        if self.opts['job_return_writer_durability'] == 'journal':
+            self.journal_path = os.path.join(self.opts['cachedir'],
+                                             'job_returns.journal')
+        self.journal = None
+        self.mminion = None
+        self.queue = []
+
+    # __setstate__ and __getstate__ are only used on Windows.
+    # We do this so that __init__ will be invoked on Windows in the child
+    # process so that a register_after_fork() equivalent will work on Windows.
+    def __setstate__(self, state):
+        self._is_child = True
+        self.__init__(state['opts'], log_queue=state['log_queue'])
+
+    def __getstate__(self):
+        return {'opts': self.opts,
+                'log_queue': self.log_queue}
+
+    def _read_journal(self):
+        '''
+        Return the returns left in the journal by a writer which did not get
+        to store them
+        '''
+        ret = []
+        if not self.journal_path or not os.path.isfile(self.journal_path):
+            return ret
+        with salt.utils.files.fopen(self.journal_path, 'rb') as fp_:
+            while True:
+                header = fp_.read(4)
+                if len(header) < 4:
+                    break
+                size = struct.unpack('>I', header)[0]
+                msg = fp_.read(size)
+                if len(msg) < size:
+                    # The writer died while appending this return
+                    break
+                ret.append(self.serial.loads(msg))
+        return ret
+
+    def _open_journal(self):
+        if self.journal_path:
+            self.journal = salt.utils.files.fopen(self.journal_path, 'wb')
+
+    def _receive(self, socket):
+        '''
+        Read all the returns waiting on the socket, up to the batch size
+        '''
+        received = False
+        while len(self.queue) < self.batch_size:
+            try:
+                msg = socket.recv(zmq.NOBLOCK)
+            except zmq.ZMQError:
+                break
+            if self.journal is not None:
+                self.journal.write(struct.pack('>I', len(msg)))
+                self.journal.write(msg)
+            self.queue.append(self.serial.loads(msg))
+            received = True
+        if received and self.journal is not None:
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+
+    def flush(self):
+        '''
+        Store the queued returns in the master job cache
+        '''
+        if not self.queue:
+            return
+        returns = [(item['load'], item['endtime']) for item in self.queue]
+        start = time.time()
+        stored = store_jobs(self.opts, returns, mminion=self.mminion)
+        if len(stored) < len(returns):
+            # Only retry the returns which were not stored, one by one
+            stored = set(id(ret) for ret in stored)
+            for ret in returns:
+                if id(ret) not in stored:
+                    store_jobs(self.opts, [ret], mminion=self.mminion)
+        log.debug('Stored %d job returns in %.3fs', len(returns),
+                  time.time() - start)
+        del self.queue[:]
+        if self.journal is not None:
+            self.journal.seek(0)
+            self.journal.truncate()
+
+    def run(self):
+        '''
+        Receive the returns from the MWorkers and store them, once the batch
+        is full or the oldest queued return has waited for
+        ``job_return_writer_interval`` seconds
+        '''
+        salt.utils.appendproctitle(self.__class__.__name__)
+        self.mminion = salt.minion.MasterMinion(self.opts, states=False, rend=False)
+        self.queue.extend(self._read_journal())
+        if self.queue:
+            log.info('Storing %d job returns left in the journal',
+                     len(self.queue))
+            self.flush()
+        self._open_journal()
+
+        sock = _writer_sock(self.opts)
+        context = zmq.Context()
+        pull = context.socket(zmq.PULL)
+        pull.setsockopt(zmq.LINGER, 100)
+        pull.setsockopt(zmq.RCVHWM, self.opts['job_return_writer_queue'])
+        pull.bind('ipc://' + sock)
+        os.chmod(sock, 0o600)
+        poller = zmq.Poller()
+        poller.register(pull, zmq.POLLIN)
+        oldest = None
+        try:
+            while True:
+                if self.queue:
+                    timeout = max(0, oldest + self.interval - time.time())
+                else:
+                    timeout = 1
+                if poller.poll(timeout * 1000):
+                    if not self.queue:
+                        oldest = time.time()
+                    self._receive(pull)
+                if self.queue and (len(self.queue) >= self.batch_size
+                                   or time.time() >= oldest + self.interval):
+                    self.flush()
+                    # Returns left on the socket start the next batch
+                    oldest = time.time()
+        finally:
+            # Store what was received before exiting
+            while True:
+                self._receive(pull)
+                if not self.queue:
+                    break
+                self.flush()
+            if self.journal is not None:
+                self.journal.close()
+            pull.close()
+            context.term()
+
 # vim:set et sts=4 ts=4 tw=80:
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+'''
+Track the completion of a job from its return events, used when the
+``job_completion_tracker`` option is set.
+
+.. versionadded:: Oxygen
+
+The tracker keeps the state of each targeted minion. A minion which did not
+return ``timeout`` seconds after the job was published, or after it was last
+found running the job, is sent a ``saltutil.find_job``. Only the minions which
+are overdue are checked, and no more than ``find_job_batch`` of them at once,
+instead of publishing a ``saltutil.find_job`` to all the minions which did not
+return yet every ``gather_job_timeout`` seconds. A minion which does not
+answer the ``saltutil.find_job`` in ``gather_job_timeout`` seconds has timed
+out, the job is complete once every minion returned or timed out.
+
+The tracker does not read the events or publish anything itself:
+``LocalClient.get_iter_returns`` drives it from the event bus of the client
+and :py:func:`wait_for_job` from the coroutines of ``salt-api``.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import heapq
+import logging
+import time
+
+# Import 3rd-party libs
+import tornado.gen
+
+log = logging.getLogger(__name__)
+
+
+class JobTracker(object):
+    '''
+    The state of the minions targeted by the job ``jid``
+
+    :param jid: The jid of the job
+    :param minions: The minions the job was published to
+    :param timeout: The seconds to wait for a return before checking if the
+        minion still runs the job
+    :param gather_job_timeout: The seconds to wait for the answer of a
+        ``saltutil.find_job``
+    :param batch_size: The maximum number of minions being checked at once,
+        0 for no limit
+    :param syndic_wait: The seconds to wait for the lists of minions of the
+        syndics, the job is not complete before
+    '''
+    def __init__(self,
+                 jid,
+                 minions,
+                 timeout,
+                 gather_job_timeout,
+                 batch_size=0,
+                 syndic_wait=0,
+                 now=None):
+        if now is None:
+            now = time.time()
+        self.jid = jid
+        self.timeout = timeout
+        self.gather_job_timeout = gather_job_timeout + syndic_wait
+        self.batch_size = batch_size
+        self.syndic_wait_at = now + syndic_wait if syndic_wait else None
+        self.minions = set()
+        self.found = set()
+        self.timed_out = set()
+        # minion -> time at which it is checked, and the heap of the
+        # (time, minion), the stale entries are skipped
+        self._waiting = {}
+        self._waiting_at = []
+        # minion -> time at which it times out if it did not answer the
+        # saltutil.find_job sent to it
+        self._checking = {}
+        self._checking_at = []
+        # jid of a saltutil.find_job -> minions it was sent to
+        self.find_jobs = {}
+        for minion in minions:
+            self._add(minion, now)
+
+    def _add(self, minion, now):
+        if minion in self.minions:
+            return
+        self.minions.add(minion)
+        self._wait(minion, now)
+
+    def _wait(self, minion, now):
+        self._checking.pop(minion, None)
+        self._waiting[minion] = now + self.timeout
+        heapq.heappush(self._waiting_at, (now + self.timeout, minion))
+
+    def _end(self, minion):
+        self._waiting.pop(minion, None)
+        self._checking.pop(minion, None)
+
+    @staticmethod
+    def _next(heap, states):
+        # Drop the stale entries from the top of the heap
+        while heap and states.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def handle_event(self, tag, data, now=None):
+        '''
+        Update the state of the minions from an event, return the id of the
+        minion if it is a return of the job, else None
+        '''
+        if not isinstance(data, dict):
+            return None
+        if now is None:
+            now = time.time()
+        jid = data.get('jid')
+        if 'minions' in data and (jid == self.jid or tag.endswith('/' + self.jid)):
+            # The minions of the job, or of a syndic
+            for minion in data['minions']:
+                self._add(minion, now)
+            return None
+        if jid == self.jid:
+            if 'id' not in data or 'return' not in data:
+                return None
+            minion = data['id']
+            self.found.add(minion)
+            self.timed_out.discard(minion)
+            self._end(minion)
+            return minion
+        if jid in self.find_jobs and 'id' in data and 'return' in data:
+            self._handle_find_job(data, now)
+        return None
+
+    def _handle_find_job(self, data, now):
+        minion = data['id']
+        if minion in self.found:
+            return
+        retcode = data.get('retcode')
+        if isinstance(retcode, int) and retcode > 0:
+            log.error('saltutil returning errors on minion %s', minion)
+            self.minions.discard(minion)
+            self.timed_out.discard(minion)
+            self._end(minion)
+            return
+        ret = data['return']
+        if not ret or isinstance(ret, dict) and ret.get('return') == {}:
+            # The job is not running there, the minion times out unless its
+            # return is on the way
+            return
+        # Still running, wait for it again
+        if minion not in self.minions:
+            self.minions.add(minion)
+        self.timed_out.discard(minion)
+        self._wait(minion, now)
+
+    def due(self, now=None):
+        '''
+        Time out the minions which did not answer their ``saltutil.find_job``
+        in time, and return the minions to send one to now. These are then
+        being checked, pass the jid of the ``saltutil.find_job`` to
+        :py:meth:`watch`.
+        '''
+        if now is None:
+            now = time.time()
+        while self._checking_at and self._checking_at[0][0] <= now:
+            timeout_at, minion = heapq.heappop(self._checking_at)
+            if self._checking.get(minion) != timeout_at:
+                continue
+            del self._checking[minion]
+            self.timed_out.add(minion)
+            log.debug('jid %s timed out on %s', self.jid, minion)
+        due = []
+        while self._waiting_at and self._waiting_at[0][0] <= now:
+            if self.batch_size and len(self._checking) >= self.batch_size:
+                break
+            check_at, minion = heapq.heappop(self._waiting_at)
+            if self._waiting.get(minion) != check_at:
+                continue
+            del self._waiting[minion]
+            self._checking[minion] = now + self.gather_job_timeout
+            heapq.heappush(self._checking_at, (now + self.gather_job_timeout, minion))
+            due.append(minion)
+        return due
+
+    def watch(self, find_jid, minions):
+        '''
+        Record the jid of the ``saltutil.find_job`` sent to minions
+        '''
+        if find_jid:
+            self.find_jobs[find_jid] = set(minions)
+
+    def next_deadline(self):
+        '''
+        Return the time at which :py:meth:`due` has something to do next, or
+        None
+        '''
+        deadlines = []
+        checking_at = self._next(self._checking_at, self._checking)
+        if checking_at is not None:
+            deadlines.append(checking_at)
+        if not self.batch_size or len(self._checking) < self.batch_size:
+            waiting_at = self._next(self._waiting_at, self._waiting)
+            if waiting_at is not None:
+                deadlines.append(waiting_at)
+        if self.syndic_wait_at is not None:
+            deadlines.append(self.syndic_wait_at)
+        return min(deadlines) if deadlines else None
+
+    def done(self, now=None):
+        '''
+        Return True once every minion returned or timed out
+        '''
+        if self.syndic_wait_at is not None:
+            if now is None:
+                now = time.time()
+            if now < self.syndic_wait_at:
+                return False
+            self.syndic_wait_at = None
+        return not self._waiting and not self._checking
+
+    @property
+    def missing(self):
+        '''
+        The minions which did not return
+        '''
+        return self.minions - self.found
+
+
+@tornado.gen.coroutine
+def wait_for_job(tracker, next_event, find_job, on_return=None):
+    '''
+    Drive tracker from a coroutine until the job is complete, and return the
+    minions which did not return.
+
+    :param next_event: A callable taking the number of seconds to wait, and
+        returning a future resolving to the next event of the job or of its
+        ``saltutil.find_job``, as a dict with the ``tag`` and ``data`` keys.
+        The future may resolve to None or raise ``tornado.gen.TimeoutError``
+        when there was no event.
+    :param find_job: A callable taking a list of minions, which sends them a
+        ``saltutil.find_job`` for the job and returns a future resolving to
+        the publish data
+    :param on_return: A callable called with the minion id and the event of
+        each return of the job
+    '''
+    while True:
+        now = time.time()
+        minions = tracker.due(now)
+        if minions:
+            try:
+                pub_data = yield find_job(minions)
+            except Exception as exc:
+                log.error('Unable to check if jid %s still runs on %s: %s',
+                          tracker.jid, minions, exc)
+                pub_data = {}
+            tracker.watch((pub_data or {}).get('jid'), minions)
+            continue
+        if tracker.done(now):
+            break
+        deadline = tracker.next_deadline()
+        wait = max(deadline - now, 0.01) if deadline is not None else tracker.timeout
+        try:
+            event = yield next_event(wait)
+        except tornado.gen.TimeoutError:
+            event = None
+        if not event:
+            continue
+        minion = tracker.handle_event(event.get('tag', ''), event.get('data'))
+        if minion is not None and on_return is not None:
+            on_return(minion, event)
+    raise tornado.gen.Return(tracker.missing)
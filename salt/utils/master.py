@@ -125,10 +125,11 @@ class MasterPillarUtil(object):
             return mine_data
         if not minion_ids:
             minion_ids = self.cache.ls('minions')
+        minion_ids = [minion_id for minion_id in minion_ids
+                      if salt.utils.verify.valid_id(self.opts, minion_id)]
+        cdata = self.cache.list_with_data('minions', 'mine', entries=minion_ids)
         for minion_id in minion_ids:
-            if not salt.utils.verify.valid_id(self.opts, minion_id):
-                continue
-            mdata = self.cache.fetch('minions/{0}'.format(minion_id), 'mine')
+            mdata = cdata.get(minion_id)
             if isinstance(mdata, dict):
                 mine_data[minion_id] = mdata
         return mine_data
@@ -144,10 +145,11 @@ class MasterPillarUtil(object):
             return grains, pillars
         if not minion_ids:
             minion_ids = self.cache.ls('minions')
+        minion_ids = [minion_id for minion_id in minion_ids
+                      if salt.utils.verify.valid_id(self.opts, minion_id)]
+        cdata = self.cache.list_with_data('minions', 'data', entries=minion_ids)
         for minion_id in minion_ids:
-            if not salt.utils.verify.valid_id(self.opts, minion_id):
-                continue
-            mdata = self.cache.fetch('minions/{0}'.format(minion_id), 'data')
+            mdata = cdata.get(minion_id)
             if not isinstance(mdata, dict):
                 log.warning(
                     'cache.fetch should always return a dict. ReturnedType: {0}, MinionId: {1}'.format(
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+'''
+Data recorded in memory by several processes of the master or of the minion
+and merged into a file of the cachedir, used by :py:mod:`salt.utils.profiling`
+and :py:mod:`salt.utils.presence`.
+
+.. versionadded:: Oxygen
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import logging
+import os
+import time
+
+# Import salt libs
+import salt.utils.atomicfile
+import salt.utils.files
+from salt.exceptions import FileLockError
+
+log = logging.getLogger(__name__)
+
+# A lock older than this is left behind by a killed process
+STALE_LOCK = 60
+
+
+class ProcessBuffer(dict):
+    '''
+    The data recorded by a process and not merged into a file yet. A forked
+    process discards the data of its parent.
+    '''
+    def __init__(self):
+        super(ProcessBuffer, self).__init__()
+        self.pid = os.getpid()
+
+    def check_pid(self):
+        '''
+        Empty the buffer in a forked process, return True if it was emptied
+        '''
+        pid = os.getpid()
+        if self.pid == pid:
+            return False
+        self.clear()
+        self.pid = pid
+        return True
+
+
+def _serial(opts):
+    # Late import, salt.payload imports the loader which uses this module
+    import salt.payload
+    return salt.payload.Serial(opts)
+
+
+def read(opts, path):
+    '''
+    Return the dict serialized in path, or an empty dict
+    '''
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with salt.utils.files.fopen(path, 'rb') as fp_:
+            data = _serial(opts).loads(fp_.read())
+    except Exception as exc:
+        log.debug('Unable to read the data in %s: %s', path, exc)
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return data
+
+
+def remove_stale_lock(path):
+    '''
+    Remove the lock of path if it was left behind by a killed process
+    '''
+    lock_fn = path + '.w'
+    try:
+        if time.time() - os.path.getmtime(lock_fn) > STALE_LOCK:
+            os.remove(lock_fn)
+    except OSError:
+        pass
+
+
+def update(opts, path, merge, on_write=None):
+    '''
+    Replace the dict serialized in path by the one returned by merge, called
+    with the current dict, while holding the lock of path. on_write is called
+    once the new dict is written, before the lock is released. Return False
+    if the file could not be updated.
+    '''
+    try:
+        with salt.utils.files.wait_lock(path, timeout=1):
+            data = merge(read(opts, path))
+            with salt.utils.atomicfile.atomic_open(path, 'wb') as fp_:
+                fp_.write(_serial(opts).dumps(data))
+            if on_write is not None:
+                on_write()
+    except (FileLockError, IOError, OSError) as exc:
+        log.debug('Unable to write the data to %s: %s', path, exc)
+        remove_stale_lock(path)
+        return False
+    return True
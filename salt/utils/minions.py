@@ -9,6 +9,7 @@ from __future__ import absolute_import
 import os
 import fnmatch
 import re
+import time
 import logging
 
 # Import salt libs
@@ -37,6 +38,9 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# Per process minion data indexes, see get_data_index()
+_DATA_INDEXES = {}
+
 TARGET_REX = re.compile(
         r'''(?x)
         (
@@ -170,6 +174,198 @@ def nodegroup_comp(nodegroup, nodegroups, skip=None, first_call=True):
         return ret
 
 
+class MinionDataIndex(object):
+    '''
+    Inverted index of the grains and pillar data held in the minion data
+    cache, used to answer grain and pillar targets without fetching the cached
+    data of every minion.
+
+    Leaf values are indexed by the path of dict keys leading to them, so a
+    target like ``os:Ubuntu`` becomes a lookup of ``('os',) -> 'ubuntu'``.
+    Minions whose data at a path cannot be answered from the index (lists
+    holding dicts, list indexes, ``*:`` wildcards) are kept as candidates
+    which are verified with :py:func:`salt.utils.subdict_match` against the
+    in-memory copy of their data.
+
+    The index lives in the memory of each process. Data stored by the process
+    itself is indexed right away, and minions added to or removed from the
+    cache are picked up on each lookup. The data of the other minions is only
+    validated against the cache's ``updated`` timestamps once ``ttl`` seconds
+    passed since the last check, so data stored by other master processes is
+    picked up within ``ttl`` seconds without asking the cache driver about
+    every minion on every targeting call. Cache drivers without timestamps
+    have the minion data reloaded in bulk instead.
+    '''
+    search_types = ('grains', 'pillar')
+    tables = ('values', 'nodes', 'dicts', 'lists', 'complex')
+
+    def __init__(self, cache, ttl=0):
+        self.cache = cache
+        self.ttl = ttl
+        self.data = {}
+        self.stamps = {}
+        # The minions listed in the cache at the last refresh, and the time
+        # at which the data of all of them was last checked
+        self.listed = set()
+        self.checked = None
+        self.index = dict(
+            (stype, dict((table, {}) for table in self.tables))
+            for stype in self.search_types
+        )
+
+    def _walk(self, stype, minion_id, node, path, add):
+        '''
+        Add or remove (according to ``add``) the index entries of a minion
+        for the data below ``path``
+        '''
+        index = self.index[stype]
+
+        def _mark(table, key, value=None):
+            entry = index[table]
+            if value is not None:
+                entry = entry.setdefault(key, {})
+                key = value
+            if add:
+                entry.setdefault(key, set()).add(minion_id)
+            else:
+                entry.get(key, set()).discard(minion_id)
+
+        if isinstance(node, dict):
+            if path and node:
+                _mark('dicts', path)
+            for key, value in six.iteritems(node):
+                _mark('nodes', path + (key,))
+                self._walk(stype, minion_id, value, path + (key,), add)
+        elif isinstance(node, list):
+            _mark('lists', path)
+            for member in node:
+                if isinstance(member, (dict, list)):
+                    _mark('complex', path)
+                else:
+                    _mark('values', path, six.text_type(member).lower())
+        elif path:
+            _mark('values', path, six.text_type(node).lower())
+
+    def _remove(self, minion_id):
+        mdata = self.data.pop(minion_id, None)
+        self.stamps.pop(minion_id, None)
+        if isinstance(mdata, dict):
+            for stype in self.search_types:
+                self._walk(stype, minion_id, mdata.get(stype), (), False)
+
+    def _add(self, minion_id, mdata, stamp):
+        self._remove(minion_id)
+        if not isinstance(mdata, dict):
+            return
+        self.data[minion_id] = mdata
+        # The cache timestamps have a resolution of one second, a write within
+        # the current second could go unnoticed so look at the data again on
+        # the next refresh.
+        if stamp is not None and stamp < int(time.time()):
+            self.stamps[minion_id] = stamp
+        for stype in self.search_types:
+            self._walk(stype, minion_id, mdata.get(stype), (), True)
+
+    def update(self, minion_id, mdata):
+        '''
+        Index data which was just stored in the cache for a minion
+        '''
+        stamp = None
+        if '{0}.updated'.format(self.cache.driver) in self.cache.modules:
+            stamp = self.cache.updated('minions/{0}'.format(minion_id), 'data')
+        self._add(minion_id, mdata, stamp)
+
+    def refresh(self):
+        '''
+        Bring the index in line with the contents of the minion data cache
+        and return the ids of the minions with cached data
+        '''
+        cached = set(self.cache.list('minions'))
+        for minion_id in set(self.data) - cached:
+            self._remove(minion_id)
+        now = time.time()
+        if self.checked is None or now - self.checked >= self.ttl:
+            self.checked = now
+            check = cached
+        else:
+            # Only the minions new to the cache
+            check = cached - self.listed
+        self.listed = cached
+        if not check:
+            return set(self.data)
+        if '{0}.updated'.format(self.cache.driver) not in self.cache.modules:
+            # Without timestamps reload the data in bulk and only reindex the
+            # minions whose data changed
+            cdata = self.cache.list_with_data('minions', 'data', entries=check)
+            for minion_id, mdata in six.iteritems(cdata):
+                if mdata != self.data.get(minion_id):
+                    self._add(minion_id, mdata, None)
+            return set(self.data)
+        for minion_id in check:
+            bank = 'minions/{0}'.format(minion_id)
+            stamp = self.cache.updated(bank, 'data')
+            if stamp is None:
+                self._remove(minion_id)
+            elif stamp != self.stamps.get(minion_id):
+                self._add(minion_id, self.cache.fetch(bank, 'data'), stamp)
+        return set(self.data)
+
+    def match(self, search_type, expr, delimiter, exact_match=False):
+        '''
+        Return the set of minions with cached data matching a glob (or, with
+        ``exact_match``, a literal) grain or pillar expression
+        '''
+        index = self.index[search_type]
+        matched = set()
+        candidates = set()
+        splits = expr.split(delimiter)
+        for idx in range(1, len(splits)):
+            path = tuple(splits[:idx])
+            matchstr = delimiter.join(splits[idx:])
+            pattern = matchstr.lower()
+            leaves = index['values'].get(path, {})
+            if exact_match or not any(char in pattern for char in '*?['):
+                matched.update(leaves.get(pattern, ()))
+            else:
+                for value, ids in six.iteritems(leaves):
+                    if fnmatch.fnmatch(value, pattern):
+                        matched.update(ids)
+            # Matching against a dict checks for the existence of a key, the
+            # deeper levels of the dict are covered by the longer paths.
+            dicts = index['dicts'].get(path, set())
+            if matchstr == '*':
+                matched.update(dicts)
+            elif matchstr.startswith('*:') or delimiter != DEFAULT_TARGET_DELIM:
+                candidates.update(dicts)
+            else:
+                matched.update(index['nodes'].get(path + (matchstr,), ()))
+            candidates.update(index['complex'].get(path, ()))
+            # Lists along the path may be indexed into or hold dicts
+            for plen in range(1, idx):
+                candidates.update(index['lists'].get(path[:plen], ()))
+        for minion_id in candidates - matched:
+            mdata = self.data.get(minion_id)
+            if mdata is not None and salt.utils.subdict_match(
+                    mdata.get(search_type),
+                    expr,
+                    delimiter=delimiter,
+                    exact_match=exact_match):
+                matched.add(minion_id)
+        return matched
+
+
+def get_data_index(opts, cache):
+    '''
+    Return the minion data index shared by all CkMinions objects of this
+    process using the same cache
+    '''
+    key = (opts.get('cache', 'localfs'), opts.get('cachedir'))
+    if key not in _DATA_INDEXES:
+        _DATA_INDEXES[key] = MinionDataIndex(
+            cache, ttl=opts.get('minion_data_index_ttl', 0))
+    return _DATA_INDEXES[key]
+
+
 class CkMinions(object):
     '''
     Used to check what minions should respond from a target
@@ -267,6 +463,19 @@ class CkMinions(object):
         else:
             return []
 
+        if cache_enabled and not regex_match \
+                and self.opts.get('minion_data_index', False):
+            index = get_data_index(self.opts, self.cache)
+            cached = index.refresh()
+            matched = index.match(search_type,
+                                  expr,
+                                  delimiter,
+                                  exact_match=exact_match)
+            if greedy:
+                return [id_ for id_ in minions
+                        if id_ in matched or id_ not in cached]
+            return list(matched)
+
         if cache_enabled:
             if greedy:
                 cminions = list_cached_minions()
@@ -275,10 +484,11 @@ class CkMinions(object):
             if not cminions:
                 return minions
             minions = set(minions)
+            if greedy:
+                cminions = [id_ for id_ in cminions if id_ in minions]
+            cdata = self.cache.list_with_data('minions', 'data', entries=cminions)
             for id_ in cminions:
-                if greedy and id_ not in minions:
-                    continue
-                mdata = self.cache.fetch('minions/{0}'.format(id_), 'data')
+                mdata = cdata.get(id_)
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -293,6 +503,14 @@ class CkMinions(object):
             minions = list(minions)
         return minions
 
+    def update_data_index(self, minion_id, mdata):
+        '''
+        Add grains and pillar data which was just stored in the minion data
+        cache to the minion data index of this process
+        '''
+        if self.opts.get('minion_data_index', False):
+            get_data_index(self.opts, self.cache).update(minion_id, mdata)
+
     def _check_grain_minions(self, expr, delimiter, greedy):
         '''
         Return the minions found by looking via grains
@@ -1949,7 +1949,8 @@ class SaltCMDOptionParser(six.with_metaclass(OptionParserMeta,
             dest='batch',
             help=('Execute the salt job in batch mode, pass either the number '
                   'of minions to batch at a time, or the percentage of '
-                  'minions to have running.')
+                  'minions to have running. With --async, the batch is run '
+                  'by the master.')
         )
         self.add_option(
             '--batch-wait',
@@ -1959,6 +1960,14 @@ class SaltCMDOptionParser(six.with_metaclass(OptionParserMeta,
             help=('Wait the specified time in seconds after each job is done '
                   'before freeing the slot in the batch for the next one.')
         )
+        self.add_option(
+            '--batch-failure-threshold',
+            default=None,
+            dest='batch_failure_threshold',
+            help=('Stop starting new minions of the batch once this number, or '
+                  'percentage, of minions failed or did not return. Requires '
+                  'the event_batch option or --async.')
+        )
         self.add_option(
             '--batch-safe-limit',
             default=0,
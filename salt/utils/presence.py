@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+'''
+The times at which the master last heard from each minion, recorded when the
+``presence_tracking`` option is set.
+
+.. versionadded:: Oxygen
+
+The master workers note the time of the authentications of the minions and of
+the ``_return``, ``_pillar`` and ``_minion_event`` requests they send, in
+memory. Every ``presence_interval`` seconds each worker sets the modification
+time of the files of the minions it heard from under ``<cachedir>/presence``,
+one empty file per minion, so only the minions seen are written and the
+workers do not wait on each other. The maintenance process of the master
+removes the files of the minions which no longer have an accepted key.
+
+``manage.status``, ``manage.up`` and ``manage.down`` read these times instead
+of pinging all the minions. The minions which were not seen for
+``presence_timeout`` seconds are pinged, or reported down when
+``presence_ping`` is False. The minion ``ping_interval`` option keeps the idle
+minions seen.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import errno
+import logging
+import os
+import time
+
+# Import salt libs
+import salt.utils.files
+import salt.utils.mergefile
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+# The master requests which show that a minion is up
+PRESENCE_FUNCS = frozenset(('_return', '_pillar', '_minion_event'))
+
+# The minions seen by this process and not saved yet, as {minion_id: time}
+_SEEN = salt.utils.mergefile.ProcessBuffer()
+
+
+def enabled(opts):
+    '''
+    Return True if the presence of the minions is tracked
+    '''
+    return bool(opts.get('presence_tracking', False))
+
+
+def seen(opts, minion_id):
+    '''
+    Note that the master just heard from minion_id
+    '''
+    if not opts.get('presence_tracking', False) or not minion_id:
+        return
+    _SEEN.check_pid()
+    _SEEN[minion_id] = int(time.time())
+
+
+def _dir(opts):
+    return os.path.join(opts['cachedir'], 'presence')
+
+
+def _touch(path, when):
+    '''
+    Set the time of a minion, unless another process saved a later one
+    '''
+    try:
+        if os.path.getmtime(path) >= when:
+            return
+    except OSError as exc:
+        if exc.errno != errno.ENOENT:
+            raise
+        with salt.utils.files.fopen(path, 'a'):
+            pass
+    os.utime(path, (when, when))
+
+
+def flush(opts):
+    '''
+    Save the times of the minions seen by this process
+    '''
+    _SEEN.check_pid()
+    if not _SEEN:
+        return
+    presence_dir = _dir(opts)
+    try:
+        if not os.path.isdir(presence_dir):
+            os.makedirs(presence_dir)
+    except OSError as exc:
+        log.debug('Unable to create the presence directory %s: %s', presence_dir, exc)
+        return
+    for minion_id, when in list(six.iteritems(_SEEN)):
+        try:
+            _touch(os.path.join(presence_dir, minion_id), when)
+        except (IOError, OSError) as exc:
+            # Keep the minion for the next flush
+            log.debug('Unable to save the presence of %s: %s', minion_id, exc)
+            continue
+        if _SEEN.get(minion_id) == when:
+            del _SEEN[minion_id]
+
+
+def _read(opts, minions=None):
+    presence_dir = _dir(opts)
+    if minions is None:
+        try:
+            minions = os.listdir(presence_dir)
+        except OSError:
+            return {}
+    data = {}
+    for minion_id in minions:
+        try:
+            data[minion_id] = int(os.path.getmtime(os.path.join(presence_dir, minion_id)))
+        except OSError:
+            continue
+    return data
+
+
+def last_seen(opts, minions=None):
+    '''
+    Return the last time each minion was seen, as {minion_id: time}, for the
+    minions in minions, or all of them. The minions never seen are left out.
+    '''
+    _SEEN.check_pid()
+    data = _read(opts, minions)
+    if minions is not None:
+        minions = set(minions)
+    for minion_id, when in six.iteritems(_SEEN):
+        if minions is not None and minion_id not in minions:
+            continue
+        if when > data.get(minion_id, 0):
+            data[minion_id] = when
+    return data
+
+
+def prune(opts, accepted):
+    '''
+    Remove the times of the minions which are not in accepted
+    '''
+    presence_dir = _dir(opts)
+    try:
+        saved = os.listdir(presence_dir)
+    except OSError:
+        return
+    for minion_id in set(saved) - set(accepted):
+        try:
+            os.remove(os.path.join(presence_dir, minion_id))
+        except OSError:
+            pass
+
+
+def split(opts, minions, now=None):
+    '''
+    Return the minions seen in the last ``presence_timeout`` seconds and the
+    others, as two sorted lists
+    '''
+    if now is None:
+        now = time.time()
+    limit = now - opts.get('presence_timeout', 300)
+    data = last_seen(opts, minions)
+    fresh = []
+    stale = []
+    for minion_id in minions:
+        if data.get(minion_id, 0) >= limit:
+            fresh.append(minion_id)
+        else:
+            stale.append(minion_id)
+    return sorted(fresh), sorted(stale)
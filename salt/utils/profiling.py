@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+'''
+Low overhead timings of the loader, of the minion jobs and of the master
+requests, recorded when the ``profiling`` option is set.
+
+.. versionadded:: Oxygen
+
+Each process adds up the durations it measures in memory, as a count, a total
+and a maximum per name. These are merged into ``<cachedir>/profiling.p``,
+shared by all the processes of the master or of the minion, at most every
+``profiling_interval`` seconds. A minion job process about to exit writes its
+durations to a file of its own under ``<cachedir>/profiling.d`` instead, which
+the next merge of the minion process adds up.
+
+The durations are grouped in categories:
+
+load
+    The time taken to load each module by the loader, named ``<tag>.<module>``
+virtual
+    The time taken by the ``__virtual__`` function of each module
+function
+    The execution time of each function run in a minion job
+returner
+    The time taken by each returner of the minion jobs
+state
+    The execution time of each state function
+request
+    The time taken by the master to handle each command sent by the minions
+    and the clients, like ``_return`` or ``_pillar``
+reactor
+    The age of the events when the reactor handles them, named ``lag``, and
+    the time taken to render the reactions to an event, named ``render``
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import logging
+import os
+import tempfile
+import time
+
+# Import salt libs
+import salt.payload
+import salt.utils.files
+import salt.utils.mergefile
+from salt.exceptions import FileLockError
+from salt.ext import six
+from salt.utils.odict import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# The durations measured by this process and not merged into the profiling
+# file yet, as {category: {name: [count, total, max]}}
+_STATS = salt.utils.mergefile.ProcessBuffer()
+# The time of the last flush of this process
+_STATE = {'flushed': time.time()}
+
+
+def _check_pid():
+    if _STATS.check_pid():
+        _STATE['flushed'] = time.time()
+
+
+def record(opts, category, name, duration):
+    '''
+    Add a duration, in seconds, to the timings of this process
+    '''
+    if not opts.get('profiling', False):
+        return
+    _check_pid()
+    names = _STATS.setdefault(category, {})
+    stats = names.get(name)
+    if stats is None:
+        names[name] = [1, duration, duration]
+    else:
+        stats[0] += 1
+        stats[1] += duration
+        if duration > stats[2]:
+            stats[2] = duration
+    if time.time() - _STATE['flushed'] >= opts.get('profiling_interval', 60):
+        flush(opts)
+
+
+def _path(opts):
+    return os.path.join(opts['cachedir'], 'profiling.p')
+
+
+def _spool_dir(opts):
+    return os.path.join(opts['cachedir'], 'profiling.d')
+
+
+def _spooled(opts):
+    '''
+    Return the paths of the timings saved by the exited processes
+    '''
+    spool_dir = _spool_dir(opts)
+    try:
+        return [os.path.join(spool_dir, fn_) for fn_ in os.listdir(spool_dir)
+                if fn_.endswith('.p')]
+    except OSError:
+        return []
+
+
+def _merge(into, stats):
+    '''
+    Merge the timings of stats into the ones of into
+    '''
+    for category, names in six.iteritems(stats):
+        dest = into.setdefault(category, {})
+        for name, (count, total, max_) in six.iteritems(names):
+            if name in dest:
+                prev = dest[name]
+                dest[name] = [prev[0] + count, prev[1] + total, max(prev[2], max_)]
+            else:
+                dest[name] = [count, total, max_]
+    return into
+
+
+def _read(opts):
+    '''
+    Return the timings of the profiling file and of the exited processes
+    '''
+    data = salt.utils.mergefile.read(opts, _path(opts))
+    for spool_fn in _spooled(opts):
+        _merge(data, salt.utils.mergefile.read(opts, spool_fn))
+    return data
+
+
+def flush(opts):
+    '''
+    Merge the timings of this process into the profiling file
+    '''
+    _check_pid()
+    _STATE['flushed'] = time.time()
+    spooled = _spooled(opts)
+    if not _STATS and not spooled:
+        return
+
+    def _merge_all(data):
+        _merge(data, _STATS)
+        for spool_fn in spooled:
+            _merge(data, salt.utils.mergefile.read(opts, spool_fn))
+        return data
+
+    def _remove_spooled():
+        for spool_fn in spooled:
+            os.remove(spool_fn)
+
+    if salt.utils.mergefile.update(opts, _path(opts), _merge_all, _remove_spooled):
+        _STATS.clear()
+    # Otherwise keep the timings for the next flush
+
+
+def spool(opts):
+    '''
+    Save the timings of a process about to exit to a file of its own, merged
+    by the next flush of a long running process, rather than locking and
+    rewriting the profiling file
+    '''
+    _check_pid()
+    if not _STATS:
+        return
+    spool_dir = _spool_dir(opts)
+    try:
+        if not os.path.isdir(spool_dir):
+            os.makedirs(spool_dir)
+        fd_, tmp_fn = tempfile.mkstemp(prefix='{0}-'.format(os.getpid()),
+                                       suffix='.tmp',
+                                       dir=spool_dir)
+        with os.fdopen(fd_, 'wb') as fp_:
+            fp_.write(salt.payload.Serial(opts).dumps(_STATS))
+        # Only the complete files are merged
+        os.rename(tmp_fn, tmp_fn[:-len('.tmp')] + '.p')
+    except (IOError, OSError) as exc:
+        log.debug('Unable to save the profiling data to %s: %s', spool_dir, exc)
+        return
+    _STATS.clear()
+
+
+def stats(opts, category=None, top=None):
+    '''
+    Return the timings of all the processes, the count, total, mean and
+    maximum durations of each name, by category. The names are sorted by
+    total duration, top limits the number of names of each category.
+    '''
+    _check_pid()
+    data = _merge(_read(opts), _STATS)
+    ret = {}
+    for cat, names in six.iteritems(data):
+        if category is not None and cat != category:
+            continue
+        items = sorted(six.iteritems(names), key=lambda item: item[1][1], reverse=True)
+        if top:
+            items = items[:top]
+        ret[cat] = OrderedDict(
+            (name, {'count': count,
+                    'total': round(total, 6),
+                    'mean': round(float(total) / count, 6) if count else 0,
+                    'max': round(max_, 6)})
+            for name, (count, total, max_) in items
+        )
+    return ret
+
+
+def reset(opts):
+    '''
+    Remove the timings recorded so far
+    '''
+    _check_pid()
+    _STATS.clear()
+    path = _path(opts)
+    try:
+        with salt.utils.files.wait_lock(path, timeout=1):
+            if os.path.isfile(path):
+                os.remove(path)
+            for spool_fn in _spooled(opts):
+                os.remove(spool_fn)
+    except (FileLockError, IOError, OSError) as exc:
+        log.error('Unable to remove the profiling data in %s: %s', path, exc)
+        return False
+    return True
@@ -132,6 +132,12 @@ class RAETEvent(object):
         '''
         return
 
+    def set_tag_filter(self, tags, match_type=None):
+        '''
+        Included for compat with zeromq events, not required
+        '''
+        return
+
     def connect_pub(self):
         '''
         Establish the publish connection
@@ -2,9 +2,15 @@
 
 # Import python libs
 from __future__ import absolute_import
+import copy
+import datetime
 import fnmatch
 import glob
 import logging
+import os
+import re
+import threading
+import time
 
 # Import salt libs
 import salt.runner
@@ -14,6 +20,7 @@ import salt.utils.cache
 import salt.utils.event
 import salt.utils.files
 import salt.utils.process
+import salt.utils.profiling
 import salt.defaults.exitcodes
 
 # Import 3rd-party libs
@@ -22,6 +29,97 @@ from salt.ext import six
 
 log = logging.getLogger(__name__)
 
+# The characters making a tag of the reactor map a glob
+GLOB_CHARS = re.compile(r'[*?[]')
+
+# The renderers whose output only depends on the content of a file without
+# template code
+STATIC_RENDERERS = ('jinja', 'yaml', 'json')
+
+# The tags of the events managing the reactors at runtime
+MANAGE_TAG = 'salt/reactors/manage/'
+
+
+class ReactorMap(object):
+    '''
+    The reactor map compiled to find the reactors of an event without matching
+    its tag against every tag of the map. Tags without glob characters are
+    looked up in a dict, tags ending with the only ``*`` of the tag in a trie
+    of the prefixes, and the other tags are compiled to regular expressions.
+    The reactors are returned in the order of the map.
+    '''
+    def __init__(self, react_map):
+        self.literals = {}
+        self.prefixes = {}
+        self.globs = []
+        self.tags = []
+        for index, ropt in enumerate(react_map or []):
+            if not isinstance(ropt, dict):
+                continue
+            if len(ropt) != 1:
+                continue
+            key = next(six.iterkeys(ropt))
+            val = ropt[key]
+            if isinstance(val, six.string_types):
+                val = [val]
+            elif not isinstance(val, list):
+                continue
+            if not isinstance(key, six.string_types):
+                continue
+            self.tags.append(key)
+            entry = (index, val)
+            pattern = os.path.normcase(key)
+            if not GLOB_CHARS.search(pattern):
+                self.literals.setdefault(pattern, []).append(entry)
+            elif pattern.endswith('*') and not GLOB_CHARS.search(pattern[:-1]):
+                node = self.prefixes
+                for char in pattern[:-1]:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append(entry)
+            else:
+                self.globs.append(
+                    (index, re.compile(fnmatch.translate(pattern)), val))
+
+    def match(self, tag):
+        '''
+        Return the list of the reactors of a tag
+        '''
+        tag = os.path.normcase(tag)
+        entries = list(self.literals.get(tag, ()))
+        node = self.prefixes
+        entries.extend(node.get(None, ()))
+        for char in tag:
+            node = node.get(char)
+            if node is None:
+                break
+            entries.extend(node.get(None, ()))
+        for index, regex, val in self.globs:
+            if regex.match(tag):
+                entries.append((index, val))
+        entries.sort(key=lambda entry: entry[0])
+        reactors = []
+        for _, val in entries:
+            reactors.extend(val)
+        return reactors
+
+
+def event_age(data):
+    '''
+    Return the number of seconds since an event was fired, or None if the
+    event has no time stamp
+    '''
+    stamp = data.get('_stamp') if isinstance(data, dict) else None
+    if not isinstance(stamp, six.string_types):
+        return None
+    for fmt in ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            fired = datetime.datetime.strptime(stamp, fmt)
+        except ValueError:
+            continue
+        delta = datetime.datetime.utcnow() - fired
+        return delta.days * 86400 + delta.seconds + delta.microseconds / 1e6
+    return None
+
 
 class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.state.Compiler):
     '''
@@ -36,6 +134,17 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         local_minion_opts['file_client'] = 'local'
         self.minion = salt.minion.MasterMinion(local_minion_opts)
         salt.state.Compiler.__init__(self, opts, self.minion.rend)
+        # The compiled reactor map, and the modification time of the file it
+        # was read from when the reactor option is a path
+        self.reactor_map = None
+        self.reactor_map_mtime = None
+        # The rendered reaction files without template code, by path
+        self.render_cache = {}
+        # The code compiled for the Jinja reaction files, by path, see
+        # salt.utils.templates.render_jinja_tmpl
+        self.template_cache = {}
+        # The file client of the minion is not thread safe
+        self.file_client_lock = threading.Lock()
 
     # We need __setstate__ and __getstate__ to avoid pickling errors since
     # 'self.rend' (from salt.state.Compiler) contains a function reference
@@ -60,16 +169,14 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         react = {}
 
         if glob_ref.startswith('salt://'):
-            glob_ref = self.minion.functions['cp.cache_file'](glob_ref) or ''
+            with self.file_client_lock:
+                glob_ref = self.minion.functions['cp.cache_file'](glob_ref) or ''
         globbed_ref = glob.glob(glob_ref)
         if not globbed_ref:
             log.error('Can not render SLS {0} for tag {1}. File missing or not found.'.format(glob_ref, tag))
         for fn_ in globbed_ref:
             try:
-                res = self.render_template(
-                    fn_,
-                    tag=tag,
-                    data=data)
+                res = self.render_cached(fn_, tag, data)
 
                 # for #20841, inject the sls name here since verify_high()
                 # assumes it exists in case there are any errors
@@ -81,14 +188,63 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 log.error('Failed to render "{0}": '.format(fn_), exc_info=True)
         return react
 
-    def list_reactors(self, tag):
+    def render_cached(self, fn_, tag, data):
         '''
-        Take in the tag from an event and return a list of the reactors to
-        process
+        Render a reaction file. The files without template code render to
+        the same data for every event, these are only rendered again when
+        they change. The code compiled for the Jinja files is kept until
+        they change, and rendered with the data of each event.
+        '''
+        try:
+            fstat = os.stat(fn_)
+            stamp = (fstat.st_mtime, fstat.st_size)
+        except OSError:
+            stamp = None
+        cached = self.render_cache.get(fn_)
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            if cached[1] is None:
+                return self.render_template(
+                    fn_, tag=tag, data=data, _jinja_codes=self.template_cache)
+            return copy.deepcopy(cached[1])
+        res = self.render_template(
+            fn_, tag=tag, data=data, _jinja_codes=self.template_cache)
+        if stamp is not None:
+            static = self.is_static(fn_)
+            self.render_cache[fn_] = (stamp, copy.deepcopy(res) if static else None)
+        return res
+
+    def is_static(self, fn_):
+        '''
+        Return True if the reaction file has no template code, so it renders
+        to the same data whatever the event
+        '''
+        try:
+            with salt.utils.files.fopen(fn_, 'r') as fp_:
+                content = fp_.read()
+        except (OSError, IOError):
+            return False
+        renderers = self.opts['renderer']
+        if content.startswith('#!'):
+            renderers = content.splitlines()[0][2:]
+        for renderer in renderers.split('|'):
+            if renderer.strip().split(' ')[0] not in STATIC_RENDERERS:
+                return False
+        return not any(mark in content for mark in ('{{', '{%', '{#'))
+
+    def get_reactor_map(self):
+        '''
+        Return the compiled reactor map. It is compiled again when the
+        reactors are managed at runtime, and when the file it is read from
+        changes if the reactor option is a path.
         '''
-        log.debug('Gathering reactors for tag {0}'.format(tag))
-        reactors = []
         if isinstance(self.opts['reactor'], six.string_types):
+            try:
+                mtime = os.path.getmtime(self.opts['reactor'])
+            except OSError:
+                mtime = None
+            if self.reactor_map is not None and mtime == self.reactor_map_mtime:
+                return self.reactor_map
+            react_map = []
             try:
                 with salt.utils.files.fopen(self.opts['reactor']) as fp_:
                     react_map = yaml.safe_load(fp_.read())
@@ -104,21 +260,30 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                         self.opts['reactor']
                         )
                     )
-        else:
-            react_map = self.opts['reactor']
-        for ropt in react_map:
-            if not isinstance(ropt, dict):
-                continue
-            if len(ropt) != 1:
-                continue
-            key = next(six.iterkeys(ropt))
-            val = ropt[key]
-            if fnmatch.fnmatch(tag, key):
-                if isinstance(val, six.string_types):
-                    reactors.append(val)
-                elif isinstance(val, list):
-                    reactors.extend(val)
-        return reactors
+            self.reactor_map_mtime = mtime
+            self.reactor_map = ReactorMap(react_map)
+        elif self.reactor_map is None:
+            self.reactor_map = ReactorMap(self.opts['reactor'])
+        return self.reactor_map
+
+    def list_reactors(self, tag):
+        '''
+        Take in the tag from an event and return a list of the reactors to
+        process
+        '''
+        log.debug('Gathering reactors for tag {0}'.format(tag))
+        return self.get_reactor_map().match(tag)
+
+    def set_tag_filter(self):
+        '''
+        Only get the events of the reactor map and the events managing the
+        reactors from the event publisher. A map read from a file can change
+        at any time, the reactor then gets all the events.
+        '''
+        if isinstance(self.opts['reactor'], six.string_types):
+            return
+        tags = self.get_reactor_map().tags + ['*' + MANAGE_TAG + '*']
+        self.event.set_tag_filter(tags, 'fnmatch')
 
     def list_all(self):
         '''
@@ -157,6 +322,7 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 return {'status': False, 'comment': 'Reactor already exists.'}
 
         self.minion.opts['reactor'].append({tag: reaction})
+        self.reactor_map = None
         return {'status': True, 'comment': 'Reactor added.'}
 
     def delete_reactor(self, tag):
@@ -168,6 +334,7 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
             _tag = next(six.iterkeys(reactor))
             if _tag == tag:
                 self.minion.opts['reactor'].remove(reactor)
+                self.reactor_map = None
                 return {'status': True, 'comment': 'Reactor deleted.'}
 
         return {'status': False, 'comment': 'Reactor does not exists.'}
@@ -201,6 +368,22 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
         for chunk in chunks:
             self.wrap.run(chunk)
 
+    def react(self, tag, data, reactors):
+        '''
+        Render and run the reactions to an event
+        '''
+        age = event_age(data)
+        if age is not None:
+            salt.utils.profiling.record(self.opts, 'reactor', 'lag', age)
+        start = time.time()
+        chunks = self.reactions(tag, data, reactors)
+        salt.utils.profiling.record(self.opts, 'reactor', 'render', time.time() - start)
+        if chunks:
+            try:
+                self.call_reactions(chunks)
+            except SystemExit:
+                log.warning('Exit ignored by reactor')
+
     def run(self):
         '''
         Enter into the server loop
@@ -215,6 +398,12 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 opts=self.opts,
                 listen=True)
         self.wrap = ReactWrap(self.opts)
+        self.set_tag_filter()
+        concurrent = self.opts.get('reactor_concurrent_render', False)
+        if concurrent:
+            # Load the renderers now, so that the threads rendering the
+            # reactions don't load them at the same time
+            len(self.rend)
 
         for data in self.event.iter_events(full=True):
             # skip all events fired by ourselves
@@ -223,12 +412,14 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
             if data['tag'].endswith('salt/reactors/manage/add'):
                 _data = data['data']
                 res = self.add_reactor(_data['event'], _data['reactors'])
+                self.set_tag_filter()
                 self.event.fire_event({'reactors': self.list_all(),
                                        'result': res},
                                       'salt/reactors/manage/add-complete')
             elif data['tag'].endswith('salt/reactors/manage/delete'):
                 _data = data['data']
                 res = self.delete_reactor(_data['event'])
+                self.set_tag_filter()
                 self.event.fire_event({'reactors': self.list_all(),
                                        'result': res},
                                       'salt/reactors/manage/delete-complete')
@@ -239,12 +430,12 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 reactors = self.list_reactors(data['tag'])
                 if not reactors:
                     continue
-                chunks = self.reactions(data['tag'], data['data'], reactors)
-                if chunks:
-                    try:
-                        self.call_reactions(chunks)
-                    except SystemExit:
-                        log.warning('Exit ignored by reactor')
+                if concurrent and self.wrap.pool.fire_async(
+                        self.react, args=(data['tag'], data['data'], reactors)):
+                    continue
+                # Not rendered concurrently, or the queue of the workers is
+                # full
+                self.react(data['tag'], data['data'], reactors)
 
 
 class ReactWrap(object):
@@ -264,6 +455,10 @@ class ReactWrap(object):
             self.opts['reactor_worker_threads'],  # number of workers for runner/wheel
             queue_size=self.opts['reactor_worker_hwm']  # queue size for those workers
         )
+        # With reactor_concurrent_render, the reactions are run by the
+        # workers. The clients are created once, and the local and caller
+        # clients are not thread safe.
+        self.client_lock = threading.Lock()
 
     def run(self, low):
         '''
@@ -296,10 +491,11 @@ class ReactWrap(object):
         '''
         Wrap LocalClient for running :ref:`execution modules <all-salt.modules>`
         '''
-        if 'local' not in self.client_cache:
-            self.client_cache['local'] = salt.client.LocalClient(self.opts['conf_file'])
         try:
-            self.client_cache['local'].cmd_async(*args, **kwargs)
+            with self.client_lock:
+                if 'local' not in self.client_cache:
+                    self.client_cache['local'] = salt.client.LocalClient(self.opts['conf_file'])
+                self.client_cache['local'].cmd_async(*args, **kwargs)
         except SystemExit:
             log.warning('Attempt to exit reactor. Ignored.')
         except Exception as exc:
@@ -311,15 +507,16 @@ class ReactWrap(object):
         '''
         Wrap RunnerClient for executing :ref:`runner modules <all-salt.runners>`
         '''
-        if 'runner' not in self.client_cache:
-            self.client_cache['runner'] = salt.runner.RunnerClient(self.opts)
-            # The len() function will cause the module functions to load if
-            # they aren't already loaded. We want to load them so that the
-            # spawned threads don't need to load them. Loading in the spawned
-            # threads creates race conditions such as sometimes not finding
-            # the required function because another thread is in the middle
-            # of loading the functions.
-            len(self.client_cache['runner'].functions)
+        with self.client_lock:
+            if 'runner' not in self.client_cache:
+                self.client_cache['runner'] = salt.runner.RunnerClient(self.opts)
+                # The len() function will cause the module functions to load if
+                # they aren't already loaded. We want to load them so that the
+                # spawned threads don't need to load them. Loading in the spawned
+                # threads creates race conditions such as sometimes not finding
+                # the required function because another thread is in the middle
+                # of loading the functions.
+                len(self.client_cache['runner'].functions)
         try:
             self.pool.fire_async(self.client_cache['runner'].low, args=(fun, kwargs))
         except SystemExit:
@@ -331,15 +528,16 @@ class ReactWrap(object):
         '''
         Wrap Wheel to enable executing :ref:`wheel modules <all-salt.wheel>`
         '''
-        if 'wheel' not in self.client_cache:
-            self.client_cache['wheel'] = salt.wheel.Wheel(self.opts)
-            # The len() function will cause the module functions to load if
-            # they aren't already loaded. We want to load them so that the
-            # spawned threads don't need to load them. Loading in the spawned
-            # threads creates race conditions such as sometimes not finding
-            # the required function because another thread is in the middle
-            # of loading the functions.
-            len(self.client_cache['wheel'].functions)
+        with self.client_lock:
+            if 'wheel' not in self.client_cache:
+                self.client_cache['wheel'] = salt.wheel.Wheel(self.opts)
+                # The len() function will cause the module functions to load if
+                # they aren't already loaded. We want to load them so that the
+                # spawned threads don't need to load them. Loading in the spawned
+                # threads creates race conditions such as sometimes not finding
+                # the required function because another thread is in the middle
+                # of loading the functions.
+                len(self.client_cache['wheel'].functions)
         try:
             self.pool.fire_async(self.client_cache['wheel'].low, args=(fun, kwargs))
         except SystemExit:
@@ -354,10 +552,11 @@ class ReactWrap(object):
         log.debug("in caller with fun {0} args {1} kwargs {2}".format(fun, args, kwargs))
         args = kwargs.get('args', [])
         kwargs = kwargs.get('kwargs', {})
-        if 'caller' not in self.client_cache:
-            self.client_cache['caller'] = salt.client.Caller(self.opts['conf_file'])
         try:
-            self.client_cache['caller'].cmd(fun, *args, **kwargs)
+            with self.client_lock:
+                if 'caller' not in self.client_cache:
+                    self.client_cache['caller'] = salt.client.Caller(self.opts['conf_file'])
+                self.client_cache['caller'].cmd(fun, *args, **kwargs)
         except SystemExit:
             log.warning('Attempt to exit reactor. Ignored.')
         except Exception as exc:
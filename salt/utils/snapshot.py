@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+'''
+Snapshots of the compiled pillar and of the rendered highstate of masterless
+minions, enabled by the ``local_snapshot`` option.
+
+.. versionadded:: Oxygen
+
+A ``salt-call --local`` run stores the pillar it compiled and the highstate it
+rendered in ``<cachedir>/snapshot``, along with a key. The next run computes
+the key again and, if it did not change, uses the stored data instead of
+compiling the pillar and rendering the SLS files. The key is a hash of:
+
+- the names, sizes and modification times of the files in the
+  ``pillar_roots`` or ``file_roots`` directories
+- the configuration values the rendering depends on, listed in
+  ``SNAPSHOT_OPTS``
+- the grains, and for the highstate the pillar and the arguments of the run
+
+The states are always run, a snapshot only saves the rendering. The grains and
+the module map of the loader have caches of their own, see the
+``grains_cache`` and ``loader_index`` options.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import hashlib
+import json
+import logging
+import os
+
+# Import salt libs
+import salt.payload
+import salt.utils.atomicfile
+import salt.utils.files
+import salt.version
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+# The configuration values which change the compiled pillar or the rendered
+# highstate
+SNAPSHOT_OPTS = (
+    'id',
+    'environment',
+    'saltenv',
+    'pillarenv',
+    'pillarenv_from_saltenv',
+    'file_roots',
+    'pillar_roots',
+    'state_top',
+    'state_top_saltenv',
+    'top_file_merging_strategy',
+    'env_order',
+    'default_top',
+    'renderer',
+    'renderer_whitelist',
+    'renderer_blacklist',
+    'jinja_env',
+    'jinja_sls_env',
+    'pillar_source_merging_strategy',
+    'pillar_merge_lists',
+    'pillar_includes_override_sls',
+    'pillar_safe_render_error',
+    'decrypt_pillar',
+    'file_ignore_regex',
+    'file_ignore_glob',
+    'extension_modules',
+)
+
+# Increased when the content of the snapshots changes
+SNAPSHOT_VERSION = 1
+
+# The renderers decrypting secrets, the pillar they render is not stored
+SECRET_RENDERERS = ('gpg', 'pass')
+
+
+def enabled(opts):
+    '''
+    Return True if snapshots are used. Only masterless minions use them, the
+    files of a master are not known to the minion.
+    '''
+    return bool(opts.get('local_snapshot', False)) \
+        and opts.get('file_client') == 'local' \
+        and not opts.get('use_master_when_local', False)
+
+
+def _secret_renderer(renderers):
+    '''
+    Return True if the render pipe renderers, e.g. ``jinja|yaml|gpg``,
+    decrypts secrets
+    '''
+    if not isinstance(renderers, six.string_types):
+        return False
+    for renderer in renderers.split('|'):
+        if renderer.strip().split(' ')[0] in SECRET_RENDERERS:
+            return True
+    return False
+
+
+def _has_secrets(opts):
+    '''
+    Return True if the pillar is decrypted, by decrypt_pillar or by the
+    default renderer or the shebang line of a file in the pillar_roots
+    '''
+    if opts.get('decrypt_pillar') or _secret_renderer(opts.get('renderer')):
+        return True
+    roots = opts.get('pillar_roots')
+    if not isinstance(roots, dict):
+        return False
+    for dirs in six.itervalues(roots):
+        if isinstance(dirs, six.string_types):
+            dirs = [dirs]
+        for root in dirs or []:
+            for dirpath, _, filenames in os.walk(root, followlinks=True):
+                for name in filenames:
+                    try:
+                        with salt.utils.files.fopen(os.path.join(dirpath, name), 'rb') as fp_:
+                            line = fp_.readline()
+                    except (IOError, OSError):
+                        continue
+                    if line.startswith(b'#!') \
+                            and _secret_renderer(line[2:].decode('utf-8', 'replace')):
+                        return True
+    return False
+
+
+def pillar_supported(opts):
+    '''
+    Return True if the pillar only depends on what the key covers, and has no
+    decrypted secrets
+    '''
+    return enabled(opts) \
+        and not opts.get('ext_pillar') \
+        and not opts.get('pillar_opts', False) \
+        and not _has_secrets(opts)
+
+
+def highstate_supported(opts):
+    '''
+    Return True if the highstate only depends on what the key covers
+    '''
+    backends = opts.get('fileserver_backend', ['roots'])
+    return enabled(opts) \
+        and all(backend == 'roots' for backend in backends) \
+        and not opts.get('master_tops')
+
+
+def _roots_hash(roots, hash_):
+    '''
+    Add the names, sizes and modification times of the files in the
+    directories of roots, a dict of lists of directories by environment
+    '''
+    if not isinstance(roots, dict):
+        return
+    for saltenv in sorted(roots, key=six.text_type):
+        dirs = roots[saltenv]
+        if isinstance(dirs, six.string_types):
+            dirs = [dirs]
+        for root in dirs or []:
+            hash_.update(u'{0}\0{1}\0'.format(saltenv, root).encode('utf-8'))
+            for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        fstat = os.stat(path)
+                    except OSError:
+                        continue
+                    hash_.update(u'{0}\0{1}\0{2!r}\0'.format(
+                        path, fstat.st_size, fstat.st_mtime).encode('utf-8'))
+
+
+def key(opts, roots, *args):
+    '''
+    Return the key of a snapshot, computed from the files of roots, the
+    configuration, the grains and the other args. Returns None if these
+    can't be hashed.
+    '''
+    hash_ = hashlib.sha256()
+    try:
+        sig = json.dumps([[name, opts.get(name)] for name in SNAPSHOT_OPTS]
+                         + [opts.get('grains', {})]
+                         + list(args),
+                         sort_keys=True,
+                         default=repr)
+    except (TypeError, ValueError):
+        # Data with keys which can't be sorted
+        return None
+    hash_.update(sig.encode('utf-8'))
+    hash_.update(salt.version.__version__.encode('utf-8'))
+    _roots_hash(roots, hash_)
+    return hash_.hexdigest()
+
+
+def _path(opts, kind):
+    return os.path.join(opts['cachedir'], 'snapshot', '{0}.p'.format(kind))
+
+
+def get(opts, kind, snapshot_key):
+    '''
+    Return the data of the snapshot of this kind, or None if there is none
+    for this key
+    '''
+    if snapshot_key is None:
+        return None
+    path = _path(opts, kind)
+    try:
+        with salt.utils.files.fopen(path, 'rb') as fp_:
+            snapshot = salt.payload.Serial('msgpack').load(fp_)
+    except (IOError, OSError):
+        return None
+    except Exception as exc:
+        log.debug('Unable to read the snapshot %s: %s', path, exc)
+        return None
+    if not isinstance(snapshot, dict) \
+            or snapshot.get('version') != SNAPSHOT_VERSION \
+            or snapshot.get('key') != snapshot_key:
+        return None
+    log.debug('Using the %s snapshot %s', kind, path)
+    return snapshot.get('data')
+
+
+def put(opts, kind, snapshot_key, data):
+    '''
+    Store the data of the snapshot of this kind, only readable by the user of
+    the minion
+    '''
+    if snapshot_key is None:
+        return
+    path = _path(opts, kind)
+    snapshot = {'version': SNAPSHOT_VERSION, 'key': snapshot_key, 'data': data}
+    try:
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname, 0o700)
+        if os.path.isfile(path):
+            # atomic_open gives the new file the mode of the previous one,
+            # its temporary file is created with 0600
+            os.chmod(path, 0o600)
+        with salt.utils.atomicfile.atomic_open(path, 'wb') as fp_:
+            salt.payload.Serial('msgpack').dump(snapshot, fp_)
+    except (IOError, OSError, TypeError) as exc:
+        # TypeError is raised by the data which can't be serialized
+        log.debug('Unable to write the snapshot %s: %s', path, exc)
+
+
+def pillar(opts, compile_pillar):
+    '''
+    Return the pillar of the snapshot if it is still valid, otherwise the
+    pillar returned by compile_pillar, which is stored unless it has errors
+    '''
+    snapshot_key = None
+    if pillar_supported(opts):
+        snapshot_key = key(opts, opts.get('pillar_roots'), 'pillar')
+        data = get(opts, 'pillar', snapshot_key)
+        if data is not None:
+            return data
+    data = compile_pillar()
+    if snapshot_key is not None and not data.get('_errors'):
+        put(opts, 'pillar', snapshot_key, data)
+    return data
+
+
+def clear(opts):
+    '''
+    Remove all the snapshots, return the names of the removed files
+    '''
+    ret = []
+    dirname = os.path.join(opts['cachedir'], 'snapshot')
+    if not os.path.isdir(dirname):
+        return ret
+    for name in os.listdir(dirname):
+        try:
+            os.remove(os.path.join(dirname, name))
+        except OSError:
+            continue
+        ret.append(os.path.join('snapshot', name))
+    return ret
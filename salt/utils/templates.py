@@ -7,9 +7,11 @@ from __future__ import absolute_import
 
 # Import Python libs
 import codecs
+import hashlib
 import os
 import logging
 import tempfile
+import threading
 import traceback
 import sys
 
@@ -34,6 +36,7 @@ import salt.utils.platform
 import salt.utils.yamlencoding
 import salt.utils.locales
 import salt.utils.hashutils
+import salt.version
 from salt.exceptions import (
     SaltRenderError, CommandExecutionError, SaltInvocationError
 )
@@ -52,6 +55,12 @@ TEMPLATE_DIRNAME = os.path.join(saltpath[0], 'templates')
 SLS_ENCODING = 'utf-8'  # this one has no BOM.
 SLS_ENCODER = codecs.getencoder(SLS_ENCODING)
 
+# The Jinja environments kept by each thread with jinja_env_cache, see
+# _jinja_env_cache
+_JINJA_ENVS = threading.local()
+# The number of environments kept by each thread
+JINJA_ENV_CACHE_SIZE = 16
+
 
 class AliasedLoader(object):
     '''
@@ -285,25 +294,62 @@ def _get_jinja_error(trace, context=None):
     return line, out
 
 
-def render_jinja_tmpl(tmplstr, context, tmplpath=None):
-    opts = context['opts']
-    saltenv = context['saltenv']
-    loader = None
-    newline = False
-
-    if tmplstr and not isinstance(tmplstr, six.text_type):
-        # http://jinja.pocoo.org/docs/api/#unicode
-        tmplstr = tmplstr.decode(SLS_ENCODING)
-
-    if tmplstr.endswith('\n'):
-        newline = True
-
-    if not saltenv:
-        if tmplpath:
-            loader = jinja2.FileSystemLoader(os.path.dirname(tmplpath))
-    else:
-        loader = salt.utils.jinja.SaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
-
+def _jinja_bytecode_cache(opts, env_opts):
+    '''
+    Return a bytecode cache keeping the compiled templates in the cachedir, or
+    None if it can't be used. The Salt version and the environment options
+    are part of the directory name, as they change the code generated for a
+    template.
+    '''
+    if not opts.get('cachedir'):
+        return None
+    digest = hashlib.sha256(
+        repr((salt.version.__version__,) + env_opts).encode(SLS_ENCODING)
+    ).hexdigest()[:16]
+    directory = os.path.join(opts['cachedir'], 'jinja', digest)
+    try:
+        os.makedirs(directory)
+    except OSError as exc:
+        if not os.path.isdir(directory):
+            log.warning(
+                'Unable to create the Jinja bytecode cache %s: %s',
+                directory, exc
+            )
+            return None
+    return jinja2.FileSystemBytecodeCache(directory)
+
+
+class _JinjaCodeCache(jinja2.BytecodeCache):
+    '''
+    Keep the code compiled for the templates loaded by an environment in
+    memory, in front of the bytecode cache of the cachedir if any
+    '''
+    def __init__(self, size, fallback=None):
+        self.codes = jinja2.utils.LRUCache(size)
+        self.fallback = fallback
+
+    def load_bytecode(self, bucket):
+        entry = self.codes.get(bucket.key)
+        if entry is not None and entry[0] == bucket.checksum:
+            bucket.code = entry[1]
+        elif self.fallback is not None:
+            self.fallback.load_bytecode(bucket)
+            if bucket.code is not None:
+                self.codes[bucket.key] = (bucket.checksum, bucket.code)
+
+    def dump_bytecode(self, bucket):
+        self.codes[bucket.key] = (bucket.checksum, bucket.code)
+        if self.fallback is not None:
+            self.fallback.dump_bytecode(bucket)
+
+
+def _make_jinja_env(opts, loader, env_opts, reused=False):
+    '''
+    Create a Jinja environment with the Salt extensions, tests, filters and
+    globals. An environment reused by several renders keeps the compiled
+    code of the templates it loads, but not the templates themselves, so
+    that the templates imported by a render are evaluated again.
+    '''
     env_args = {'extensions': [], 'loader': loader}
 
     if hasattr(jinja2.ext, 'with_'):
@@ -325,6 +371,16 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         log.debug('Jinja2 lstrip_blocks is enabled')
         env_args['lstrip_blocks'] = True
 
+    bytecode_cache = None
+    if opts.get('jinja_bytecode_cache', False):
+        bytecode_cache = _jinja_bytecode_cache(opts, env_opts)
+    if reused:
+        env_args['cache_size'] = 0
+        bytecode_cache = _JinjaCodeCache(
+            opts.get('jinja_template_cache_size', 400), bytecode_cache)
+    if bytecode_cache is not None:
+        env_args['bytecode_cache'] = bytecode_cache
+
     if opts.get('allow_undefined', False):
         jinja_env = jinja2.Environment(**env_args)
     else:
@@ -341,6 +397,126 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
 
     jinja_env.tests['list'] = salt.utils.is_list
 
+    return jinja_env
+
+
+def _jinja_env_cache():
+    '''
+    Return the Jinja environments kept by this thread
+    '''
+    pid = os.getpid()
+    if getattr(_JINJA_ENVS, 'pid', None) != pid:
+        # Never reuse the file clients of the parent process
+        _JINJA_ENVS.pid = pid
+        _JINJA_ENVS.envs = OrderedDict()
+    return _JINJA_ENVS.envs
+
+
+def _get_jinja_env(opts, saltenv, tmplpath=None, pillar_rend=False):
+    '''
+    Return the Jinja environment to render a template with, the LRU cache of
+    the code compiled for the templates passed as strings, which is None if
+    the environment is not reused, and the globals of the environment.
+
+    With jinja_env_cache enabled, an environment is reused by the following
+    renders with the same opts, e.g. the SLS files of a state run or of a
+    pillar compilation, so that the templates they import are compiled once.
+    '''
+    env_opts = (bool(opts.get('jinja_trim_blocks', False)),
+                bool(opts.get('jinja_lstrip_blocks', False)),
+                bool(opts.get('allow_undefined', False)))
+
+    def _loader():
+        if not saltenv:
+            if tmplpath:
+                return jinja2.FileSystemLoader(os.path.dirname(tmplpath))
+            return None
+        return salt.utils.jinja.SaltCacheLoader(opts, saltenv,
+                                                pillar_rend=pillar_rend)
+
+    if not opts.get('jinja_env_cache', False):
+        jinja_env = _make_jinja_env(opts, _loader(), env_opts)
+        return jinja_env, None, jinja_env.globals
+
+    # The cached entries hold a reference to opts, its id can't be reused
+    key = (id(opts), saltenv, bool(pillar_rend), env_opts,
+           None if saltenv or not tmplpath else os.path.dirname(tmplpath))
+    envs = _jinja_env_cache()
+    entry = envs.pop(key, None)
+    if entry is None:
+        jinja_env = _make_jinja_env(opts, _loader(), env_opts, reused=True)
+        # The loader adds the path of each template it loads to the globals
+        # of the environment, the renders start from the initial ones
+        entry = (opts,
+                 jinja_env,
+                 jinja2.utils.LRUCache(opts.get('jinja_template_cache_size', 400)),
+                 dict(jinja_env.globals))
+    envs[key] = entry
+    while len(envs) > JINJA_ENV_CACHE_SIZE:
+        envs.popitem(last=False)
+    return entry[1], entry[2], entry[3]
+
+
+def _jinja_from_string(jinja_env, tmplstr, tmpl_globals, tmplpath=None,
+                       codes=None, path_codes=None):
+    '''
+    Load a template from a string with the given globals like
+    jinja_env.from_string does, reusing its compiled code from the bytecode
+    cache of the environment, or from the codes LRU cache, if available.
+
+    path_codes is a dict passed by the callers rendering the same files
+    again, it keeps the code of the file at tmplpath until its modification
+    time or size change.
+    '''
+    stamp = None
+    if path_codes is not None and tmplpath:
+        try:
+            fstat = os.stat(tmplpath)
+            stamp = (fstat.st_mtime, fstat.st_size)
+        except OSError:
+            pass
+        entry = path_codes.get(tmplpath)
+        if stamp is not None and entry is not None and entry[0] == stamp:
+            return jinja_env.template_class.from_code(
+                jinja_env, entry[1], tmpl_globals)
+
+    bcc = jinja_env.bytecode_cache
+    if bcc is not None and tmplpath:
+        # The bucket of a template is found by its path, a modified
+        # template replaces its previous code
+        bucket = bcc.get_bucket(jinja_env, tmplpath, None, tmplstr)
+        if bucket.code is None:
+            bucket.code = jinja_env.compile(tmplstr)
+            bcc.set_bucket(bucket)
+        code = bucket.code
+    elif codes is not None:
+        digest = hashlib.sha256(tmplstr.encode(SLS_ENCODING)).hexdigest()
+        code = codes.get(digest)
+        if code is None:
+            code = codes[digest] = jinja_env.compile(tmplstr)
+    elif stamp is not None:
+        code = jinja_env.compile(tmplstr)
+    else:
+        return jinja_env.from_string(tmplstr, globals=tmpl_globals)
+    if stamp is not None:
+        path_codes[tmplpath] = (stamp, code)
+    return jinja_env.template_class.from_code(jinja_env, code, tmpl_globals)
+
+
+def render_jinja_tmpl(tmplstr, context, tmplpath=None):
+    opts = context['opts']
+    saltenv = context['saltenv']
+    newline = False
+
+    if tmplstr and not isinstance(tmplstr, six.text_type):
+        # http://jinja.pocoo.org/docs/api/#unicode
+        tmplstr = tmplstr.decode(SLS_ENCODING)
+
+    if tmplstr.endswith('\n'):
+        newline = True
+
+    jinja_env, codes, env_globals = _get_jinja_env(
+        opts, saltenv, tmplpath, context.get('_pillar_rend', False))
     decoded_context = {}
     for key, value in six.iteritems(context):
         if not isinstance(value, six.string_types):
@@ -349,9 +525,15 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
 
         decoded_context[key] = salt.utils.locales.sdecode(value)
 
+    # The context is given to the template as its globals too, so that the
+    # macros it defines see it
+    tmpl_globals = dict(env_globals)
+    tmpl_globals.update(decoded_context)
+
     try:
-        template = jinja_env.from_string(tmplstr)
-        template.globals.update(decoded_context)
+        template = _jinja_from_string(
+            jinja_env, tmplstr, tmpl_globals, tmplpath, codes,
+            context.get('_jinja_codes'))
         output = template.render(**decoded_context)
     except jinja2.exceptions.TemplateSyntaxError as exc:
         trace = traceback.extract_tb(sys.exc_info()[2])
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+'''
+Measure the events per second going through the master event bus with N
+listeners, with and without tag filters on the listeners.
+
+An event publisher is started in a temporary sock_dir. The listeners want one
+event out of --ratio, the others are noise. Without a filter each listener
+reads and discards the noise itself, with a filter the publisher only sends
+the wanted events. No master needs to be running.
+
+Example:
+
+    python tests/perf/event_bench.py -l 1 -l 10 -n 20000
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import multiprocessing
+import optparse
+import os
+import shutil
+import tempfile
+import time
+
+# Import salt libs
+import salt.config
+import salt.utils.event
+
+
+def parse():
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-l',
+        '--listeners',
+        dest='listeners',
+        default=[],
+        action='append',
+        type='int',
+        help='The number of listeners, can be passed several times. '
+             'Defaults to 1 and 10')
+    parser.add_option(
+        '-n',
+        '--events',
+        dest='events',
+        default=10000,
+        type='int',
+        help='The number of events to fire. Defaults to 10000')
+    parser.add_option(
+        '-r',
+        '--ratio',
+        dest='ratio',
+        default=100,
+        type='int',
+        help='One event out of ratio is wanted by the listeners. '
+             'Defaults to 100')
+    options, _ = parser.parse_args()
+    if not options.listeners:
+        options.listeners = [1, 10]
+    return options
+
+
+def listen(opts, tag_filter, ready, results):
+    '''
+    Read the events until the stop event, report the number of events read
+    and the CPU time used
+    '''
+    event = salt.utils.event.get_master_event(opts, opts['sock_dir'], listen=True)
+    if tag_filter:
+        event.set_tag_filter(['bench/wanted/', 'bench/stop'], 'startswith')
+    ready.put(True)
+    start = os.times()
+    read = 0
+    wanted = 0
+    while True:
+        ret = event.get_event(wait=30, full=True)
+        if ret is None:
+            break
+        read += 1
+        if ret['tag'] == 'bench/stop':
+            break
+        if ret['tag'].startswith('bench/wanted/'):
+            wanted += 1
+    end = os.times()
+    results.put((read, wanted, end[0] + end[1] - start[0] - start[1]))
+    event.destroy()
+
+
+def run_listeners(opts, options, count, tag_filter):
+    ready = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    procs = []
+    for _ in range(count):
+        proc = multiprocessing.Process(
+            target=listen, args=(opts, tag_filter, ready, results))
+        proc.start()
+        procs.append(proc)
+    for _ in range(count):
+        ready.get()
+    # Let the publisher read the filters
+    time.sleep(1)
+    event = salt.utils.event.get_master_event(opts, opts['sock_dir'], listen=False)
+    start = time.time()
+    for idx in range(options.events):
+        if idx % options.ratio == 0:
+            tag = 'bench/wanted/{0}'.format(idx)
+        else:
+            tag = 'bench/noise/{0}'.format(idx)
+        event.fire_event({'idx': idx}, tag)
+    event.fire_event({}, 'bench/stop')
+    stats = [results.get() for _ in range(count)]
+    duration = time.time() - start
+    for proc in procs:
+        proc.join()
+    event.destroy()
+    print('{0} listeners, filter {1}: {2:.0f} events/s, {3:.0f} events read '
+          'and {4:.0f} wanted per listener, {5:.2f}s CPU per listener'.format(
+              count, 'on' if tag_filter else 'off',
+              (options.events + 1) / duration,
+              sum(stat[0] for stat in stats) / float(count),
+              sum(stat[1] for stat in stats) / float(count),
+              sum(stat[2] for stat in stats) / float(count)))
+
+
+def run(options):
+    tmpdir = tempfile.mkdtemp()
+    opts = salt.config.master_config(None)
+    opts['sock_dir'] = tmpdir
+    publisher = salt.utils.event.EventPublisher(opts)
+    publisher.start()
+    try:
+        # Wait for the publisher to bind its sockets
+        time.sleep(2)
+        for count in options.listeners:
+            for tag_filter in (False, True):
+                run_listeners(opts, options, count, tag_filter)
+    finally:
+        publisher.terminate()
+        publisher.join()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(parse())
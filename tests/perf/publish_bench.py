@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+'''
+Measure how many publications per second make it through the ZeroMQ
+publisher, from ZeroMQPubServerChannel.publish() via the _publish_daemon
+process to a subscribed minion socket.
+
+Example:
+
+    python tests/perf/publish_bench.py -n 20000 --batch-size 50
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import ctypes
+import multiprocessing
+import optparse
+import shutil
+import socket
+import tempfile
+import time
+
+# Import third party libs
+import zmq
+import zmq.eventloop.ioloop
+
+# Import salt libs
+import salt.config
+import salt.crypt
+import salt.master
+import salt.transport.server
+
+
+def _free_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def parse():
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-n',
+        '--count',
+        dest='count',
+        default=10000,
+        type='int',
+        help='The number of publications to send')
+    parser.add_option(
+        '--batch-size',
+        dest='batch_size',
+        default=1,
+        type='int',
+        help='The value to use for zmq_pub_batch_size')
+    parser.add_option(
+        '--fresh-channel',
+        dest='fresh_channel',
+        default=False,
+        action='store_true',
+        help='Create a new publisher channel for every publication, this '
+             'is how the master behaved before channels were reused')
+    options, _ = parser.parse_args()
+    return options
+
+
+def run(options):
+    tmpdir = tempfile.mkdtemp()
+    opts = salt.config.master_config(None)
+    opts.update({
+        'transport': 'zeromq',
+        'interface': '127.0.0.1',
+        'publish_port': _free_port(),
+        'sock_dir': tmpdir,
+        'pki_dir': tmpdir,
+        'cachedir': tmpdir,
+        'sign_pub_messages': False,
+        'zmq_pub_batch_size': options.batch_size,
+    })
+    salt.master.SMaster.secrets['aes'] = {
+        'secret': multiprocessing.Array(
+            ctypes.c_char,
+            salt.crypt.Crypticle.generate_key_string().encode()),
+        'reload': salt.crypt.Crypticle.generate_key_string,
+    }
+    daemon_chan = salt.transport.server.PubServerChannel.factory(opts)
+    daemon = multiprocessing.Process(target=daemon_chan._publish_daemon)
+    daemon.start()
+
+    context = zmq.Context()
+    sub = context.socket(zmq.SUB)
+    sub.setsockopt(zmq.SUBSCRIBE, b'')
+    sub.setsockopt(zmq.RCVHWM, 0)
+    sub.connect('tcp://127.0.0.1:{0}'.format(opts['publish_port']))
+    # Give the daemon time to bind and the subscription time to propagate
+    time.sleep(2)
+
+    load = {'fun': 'test.ping', 'arg': [], 'tgt': '*', 'jid': '1',
+            'ret': '', 'tgt_type': 'glob', 'user': 'root'}
+    io_loop = zmq.eventloop.ioloop.ZMQIOLoop()
+    io_loop.make_current()
+    chan = salt.transport.server.PubServerChannel.factory(opts)
+    start = time.time()
+    try:
+        for _ in range(options.count):
+            if options.fresh_channel:
+                fresh = salt.transport.server.PubServerChannel.factory(opts)
+                fresh.publish(load)
+                fresh.close()
+            else:
+                chan.publish(load)
+        chan.flush()
+        sent = time.time() - start
+        received = 0
+        poller = zmq.Poller()
+        poller.register(sub, zmq.POLLIN)
+        while received < options.count:
+            if not poller.poll(5000):
+                break
+            sub.recv()
+            received += 1
+        elapsed = time.time() - start
+    finally:
+        chan.close()
+        sub.close()
+        context.term()
+        daemon.terminate()
+        daemon.join()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print('Sent {0} publications in {1:.2f}s ({2:.0f}/s)'.format(
+        options.count, sent, options.count / sent))
+    print('Received {0} publications in {1:.2f}s ({2:.0f}/s)'.format(
+        received, elapsed, received / elapsed))
+
+
+if __name__ == '__main__':
+    run(parse())
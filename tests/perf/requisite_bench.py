@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+'''
+Measure how long it takes to compile and run synthetic highstates made of
+thousands of chunks with require, watch and onchanges requisites. The states
+used are from the test state module, so nothing is changed on the system.
+
+Example:
+
+    python tests/perf/requisite_bench.py -n 1000 -n 10000
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import optparse
+import shutil
+import tempfile
+import time
+
+# Import salt libs
+import salt.config
+import salt.state
+from salt.utils.odict import OrderedDict
+
+
+def parse():
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-n',
+        '--chunks',
+        dest='chunks',
+        default=[],
+        action='append',
+        type='int',
+        help='The number of chunks in the highstate, can be passed several '
+             'times. Defaults to 1000 and 10000')
+    parser.add_option(
+        '--glob',
+        dest='glob',
+        default=False,
+        action='store_true',
+        help='Use globs in the requisites instead of IDs')
+    options, _ = parser.parse_args()
+    if not options.chunks:
+        options.chunks = [1000, 10000]
+    return options
+
+
+def gen_high(count, glob=False):
+    '''
+    Generate a highstate of count chunks split among 100 SLS files. Each
+    chunk requires the previous one, and every tenth chunk also watches the
+    previous ten and has an onchanges requisite on the previous SLS.
+    '''
+    high = OrderedDict()
+    for num in range(count):
+        block = num * 100 // count
+        sls = 'sls{0}'.format(block)
+        # Run the chunks in order, the requisites are then always met and
+        # the requisite chains don't recurse
+        args = [{'name': '/srv/file{0}'.format(num)}, {'order': num + 1}]
+        if num:
+            if glob:
+                args.append({'require': [{'test': 'stat?{0}'.format(num - 1)}]})
+            else:
+                args.append({'require': [{'test': 'state{0}'.format(num - 1)}]})
+        if num and not num % 10:
+            args.append({'watch': [{'test': 'state{0}'.format(prev)}
+                                   for prev in range(num - 10, num)]})
+            if block:
+                args.append({'onchanges': [{'sls': 'sls{0}'.format(block - 1)}]})
+        args.append('succeed_with_changes' if num % 2 else 'succeed_without_changes')
+        high['state{0}'.format(num)] = OrderedDict([
+            ('test', args),
+            ('__sls__', sls),
+            ('__env__', 'base'),
+        ])
+    return high
+
+
+def run(options):
+    tmpdir = tempfile.mkdtemp()
+    opts = salt.config.minion_config(None)
+    opts.update({
+        'file_client': 'local',
+        'local': True,
+        'cachedir': tmpdir,
+        'pillar_roots': {'base': [tmpdir]},
+        'file_roots': {'base': [tmpdir]},
+        'state_events': False,
+    })
+    try:
+        state = salt.state.State(opts)
+        for count in options.chunks:
+            high = gen_high(count, options.glob)
+            start = time.time()
+            high, errors = state.requisite_in(high)
+            chunks = state.compile_high_data(high)
+            compiled = time.time() - start
+            ret = state.call_chunks(chunks)
+            elapsed = time.time() - start
+            failed = [tag for tag in ret if ret[tag]['result'] is False]
+            print('{0} chunks: compiled in {1:.2f}s, ran in {2:.2f}s, '
+                  '{3} failed, {4} errors'.format(
+                      count, compiled, elapsed - compiled,
+                      len(failed), len(errors)))
+            state.reset_run_num()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(parse())
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+'''
+Measure the memory used by the master workers and the time they take to be
+ready to handle requests, with and without the ``worker_preload`` option.
+
+Each worker is forked and sets up the objects handling the requests like an
+MWorker process does. The memory is read from /proc, so this only runs on
+Linux. No master needs to be running.
+
+Example:
+
+    python tests/perf/worker_preload_bench.py -w 8 -w 32
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import optparse
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+# Import salt libs
+import salt.config
+import salt.master
+import salt.utils.files
+
+# Import 3rd-party libs
+import yaml
+
+
+def parse():
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-w',
+        '--workers',
+        dest='workers',
+        default=[],
+        action='append',
+        type='int',
+        help='The number of workers to fork, can be passed several times. '
+             'Defaults to 8')
+    options, _ = parser.parse_args()
+    if not options.workers:
+        options.workers = [8]
+    return options
+
+
+def memory(pid):
+    '''
+    Return the proportional and the private memory of a process, in MB. The
+    proportional memory splits the shared pages among the processes sharing
+    them.
+    '''
+    mem = {}
+    with open('/proc/{0}/smaps_rollup'.format(pid)) as fp_:
+        for line in fp_:
+            fields = line.split()
+            if len(fields) == 3 and fields[2] == 'kB':
+                mem[fields[0].rstrip(':')] = int(fields[1])
+    private = mem.get('Private_Clean', 0) + mem.get('Private_Dirty', 0)
+    return mem.get('Pss', 0) / 1024.0, private / 1024.0
+
+
+def worker(opts, write_fd):
+    '''
+    Set up the request handlers like MWorker.run and report the time taken
+    '''
+    start = time.time()
+    salt.master.ClearFuncs(opts, {})
+    salt.master.AESFuncs(opts)
+    os.write(write_fd, '{0:.6f}\n'.format(time.time() - start).encode())
+    # Stay alive until the memory is measured
+    signal.pause()
+
+
+def run_workers(opts, count, preload=False):
+    start = time.time()
+    if preload:
+        salt.master.preload_worker_modules(opts)
+    preloaded = time.time() - start
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(count):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                worker(opts, write_fd)
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+        pids.append(pid)
+    os.close(write_fd)
+    times = []
+    with os.fdopen(read_fd) as fp_:
+        # Not iterating over the file, Python 2 reads ahead until the end of
+        # the file, which the paused workers keep open
+        while len(times) < count:
+            times.append(float(fp_.readline()))
+    ready = time.time() - start
+    pss, private = 0, 0
+    for pid in [os.getpid()] + pids:
+        pid_pss, pid_private = memory(pid)
+        pss += pid_pss
+        private += pid_private
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    print('{0} workers, preload {1}: preloaded in {2:.2f}s, workers set up '
+          'in {3:.2f}s on average, all ready after {4:.2f}s, {5:.0f}MB '
+          'proportional, {6:.0f}MB private'.format(
+              count, 'on' if preload else 'off', preloaded,
+              sum(times) / len(times), ready, pss, private))
+    # Printed from a forked process which exits without flushing
+    sys.stdout.flush()
+
+
+def run(options):
+    tmpdir = tempfile.mkdtemp()
+    config = {
+        'cachedir': os.path.join(tmpdir, 'cache'),
+        'sock_dir': os.path.join(tmpdir, 'sock'),
+        'pki_dir': os.path.join(tmpdir, 'pki'),
+        'file_roots': {'base': [tmpdir]},
+        'pillar_roots': {'base': [tmpdir]},
+    }
+    for dirname in (config['cachedir'], config['sock_dir'], config['pki_dir']):
+        os.makedirs(dirname)
+    # The request handlers create a LocalClient, which reads the master
+    # key from the cachedir of the configuration file
+    conf_file = os.path.join(tmpdir, 'master')
+    with salt.utils.files.fopen(conf_file, 'w') as fp_:
+        yaml.safe_dump(config, fp_, default_flow_style=False)
+    opts = salt.config.master_config(conf_file)
+    try:
+        for count in options.workers:
+            for preload in (False, True):
+                # Measure from a fresh process each time, the preloaded
+                # modules would otherwise stay loaded for the next runs
+                pid = os.fork()
+                if pid == 0:
+                    try:
+                        run_workers(opts, count, preload)
+                    finally:
+                        os._exit(0)  # pylint: disable=protected-access
+                os.waitpid(pid, 0)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(parse())
@@ -12,6 +12,8 @@ from tests.support.unit import skipIf, TestCase
 from tests.support.mock import (
     NO_MOCK,
     NO_MOCK_REASON,
+    MagicMock,
+    call,
     patch,
 )
 
@@ -42,6 +44,68 @@ class CacheFunctionsTest(TestCase):
         self.assertIsInstance(ret, salt.cache.MemCache)
 
 
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class CacheBulkTest(TestCase):
+    '''
+    Validate the bulk methods of the Cache class
+    '''
+    def setUp(self):
+        self.opts = {'cache': 'fake_driver'}
+        self.cache = salt.cache.Cache(self.opts)
+        self.data = {'minions/alpha': {'data': {'grains': {}}},
+                     'minions/beta': {'data': {'pillar': {}}, 'mine': {}}}
+        self.modules = {
+            'fake_driver.fetch': MagicMock(
+                side_effect=lambda bank, key: self.data.get(bank, {}).get(key, {})),
+            'fake_driver.store': MagicMock(),
+            'fake_driver.ls': MagicMock(side_effect=self._ls),
+        }
+        self.cache._modules = self.modules
+        self.cache._kwargs = {}
+
+    def _ls(self, bank):
+        prefix = bank + '/'
+        ret = set()
+        for path, keys in self.data.items():
+            if path == bank:
+                ret.update(keys)
+            elif path.startswith(prefix):
+                ret.add(path[len(prefix):].split('/')[0])
+        return sorted(ret)
+
+    def test_store_many_fallback(self):
+        self.cache.store_many('bank', {'key1': 1, 'key2': 2})
+        self.modules['fake_driver.store'].assert_has_calls(
+            [call('bank', 'key1', 1), call('bank', 'key2', 2)],
+            any_order=True)
+
+    def test_fetch_many_fallback(self):
+        self.assertEqual(
+            self.cache.fetch_many('minions/beta', ['data', 'missing']),
+            {'data': {'pillar': {}}, 'missing': {}})
+
+    def test_list_with_data_fallback(self):
+        self.assertEqual(
+            self.cache.list_with_data('minions', 'data'),
+            {'alpha': {'grains': {}}, 'beta': {'pillar': {}}})
+        self.assertEqual(
+            self.cache.list_with_data('minions', 'mine', entries=['beta']),
+            {'beta': {}})
+        self.assertEqual(
+            self.cache.list_with_data('minions/beta'),
+            {'data': {'pillar': {}}, 'mine': {}})
+
+    def test_native(self):
+        for fun in ('store_many', 'fetch_many', 'list_with_data'):
+            self.modules['fake_driver.{0}'.format(fun)] = MagicMock(return_value=fun)
+        self.assertEqual(self.cache.store_many('bank', {'key': 1}), 'store_many')
+        self.assertEqual(self.cache.fetch_many('bank', ['key']), 'fetch_many')
+        self.assertEqual(self.cache.list_with_data('bank', 'key'), 'list_with_data')
+        self.modules['fake_driver.list_with_data'].assert_called_once_with(
+            'bank', key='key', entries=None)
+        self.modules['fake_driver.store'].assert_not_called()
+
+
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 class MemCacheTest(TestCase):
     '''
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+'''
+unit tests for the sqlite cache
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.paths import TMP
+from tests.support.unit import skipIf, TestCase
+
+# Import Salt libs
+import salt.payload
+import salt.cache.sqlite_cache as sqlite_cache
+
+
+@skipIf(not sqlite_cache.HAS_SQLITE3, 'sqlite3 is not available')
+class SQLiteCacheTest(TestCase, LoaderModuleMockMixin):
+    '''
+    Validate the functions in the sqlite cache
+    '''
+
+    def setup_loader_modules(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.addCleanup(sqlite_cache._CONNECTIONS.clear)
+        return {sqlite_cache: {'__opts__': {'cachedir': self.tmp_dir},
+                               '__context__': {'serial': salt.payload.Serial('msgpack')}}}
+
+    def _store(self):
+        sqlite_cache.store('minions/alpha', 'data', {'grains': {'os': 'Linux'}}, self.tmp_dir)
+        sqlite_cache.store('minions/beta', 'data', {'pillar': {}}, self.tmp_dir)
+        sqlite_cache.store('minions/beta', 'mine', {'network.ip_addrs': []}, self.tmp_dir)
+
+    def test_store_fetch(self):
+        self._store()
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, 'cache.db')))
+        self.assertEqual(sqlite_cache.fetch('minions/alpha', 'data', self.tmp_dir),
+                         {'grains': {'os': 'Linux'}})
+        self.assertEqual(sqlite_cache.fetch('minions/alpha', 'mine', self.tmp_dir), {})
+        self.assertIsInstance(sqlite_cache.updated('minions/alpha', 'data', self.tmp_dir), int)
+        self.assertIsNone(sqlite_cache.updated('minions/alpha', 'mine', self.tmp_dir))
+
+    def test_ls_contains(self):
+        self._store()
+        self.assertEqual(sorted(sqlite_cache.ls('minions', self.tmp_dir)), ['alpha', 'beta'])
+        self.assertEqual(sorted(sqlite_cache.ls('minions/beta', self.tmp_dir)), ['data', 'mine'])
+        self.assertTrue(sqlite_cache.contains('minions', None, self.tmp_dir))
+        self.assertTrue(sqlite_cache.contains('minions/beta', 'mine', self.tmp_dir))
+        self.assertFalse(sqlite_cache.contains('minions/alpha', 'mine', self.tmp_dir))
+        self.assertFalse(sqlite_cache.contains('minion', None, self.tmp_dir))
+
+    def test_flush(self):
+        self._store()
+        self.assertTrue(sqlite_cache.flush('minions/beta', 'mine', self.tmp_dir))
+        self.assertFalse(sqlite_cache.flush('minions/beta', 'mine', self.tmp_dir))
+        self.assertEqual(sqlite_cache.ls('minions/beta', self.tmp_dir), ['data'])
+        self.assertTrue(sqlite_cache.flush('minions', cachedir=self.tmp_dir))
+        self.assertEqual(sqlite_cache.ls('minions', self.tmp_dir), [])
+
+    def test_bulk(self):
+        self._store()
+        sqlite_cache.store_many('bank', {'key1': 1, 'key2': 2}, self.tmp_dir)
+        self.assertEqual(sqlite_cache.fetch_many('bank', ['key1', 'key3'], self.tmp_dir),
+                         {'key1': 1, 'key3': {}})
+        self.assertEqual(sqlite_cache.list_with_data('minions', 'data', cachedir=self.tmp_dir),
+                         {'alpha': {'grains': {'os': 'Linux'}}, 'beta': {'pillar': {}}})
+        self.assertEqual(sqlite_cache.list_with_data('bank', cachedir=self.tmp_dir),
+                         {'key1': 1, 'key2': 2})
@@ -7,7 +7,7 @@
 from __future__ import absolute_import
 
 # Import Salt Libs
-from salt.cli.batch import Batch
+from salt.cli.batch import Batch, EventBatch, MasterBatch
 
 # Import Salt Testing Libs
 from tests.support.unit import skipIf, TestCase
@@ -65,3 +65,129 @@ class BatchTestCase(TestCase):
         '''
         ret = Batch.get_bnum(self.batch)
         self.assertEqual(ret, None)
+
+
+class FakeEvent(object):
+    '''
+    The event listener of a LocalClient, returning queued events
+    '''
+    cpub = True
+
+    def __init__(self):
+        self.events = []
+        self.set_tag_filter = MagicMock()
+        self.subscribe = MagicMock()
+        self.unsubscribe = MagicMock()
+        self.fire_event = MagicMock()
+
+    def get_event(self, **kwargs):
+        if self.events:
+            return self.events.pop(0)
+        return None
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class EventBatchTestCase(TestCase):
+    '''
+    Unit Tests for the event driven batch runs
+    '''
+    def setUp(self):
+        self.opts = {'batch': '2',
+                     'conf_file': {},
+                     'tgt': '*',
+                     'fun': 'test.retcode',
+                     'arg': [],
+                     'transport': '',
+                     'timeout': 5,
+                     'gather_job_timeout': 5}
+        self.minions = ['foo', 'bar', 'baz', 'qux']
+        self.retcodes = {}
+        self.targets = []
+        self.pub_kwargs = []
+        self.event = FakeEvent()
+        self.local = MagicMock()
+        self.local.event = self.event
+        self.local.run_job = self._run_job
+
+    def _run_job(self, tgt, fun, arg, jid=None, **kwargs):
+        if fun == 'test.ping':
+            minions = self.minions
+            returns = dict((minion, True) for minion in minions)
+        else:
+            self.targets.append(tgt)
+            self.pub_kwargs.append(kwargs)
+            minions = tgt
+            returns = dict((minion, self.retcodes.get(minion, 0)) for minion in minions)
+        for minion in minions:
+            self.event.events.append({
+                'tag': 'salt/job/{0}/ret/{1}'.format(jid, minion),
+                'data': {'id': minion,
+                         'jid': jid,
+                         'return': returns[minion],
+                         'retcode': returns[minion] if fun != 'test.ping' else 0}})
+        return {'jid': jid, 'minions': list(minions)}
+
+    def _batch(self):
+        with patch('salt.client.get_local_client', MagicMock(return_value=self.local)):
+            return EventBatch(self.opts, quiet=True)
+
+    def test_sliding_window(self):
+        '''
+        The minions are sent the job as soon as others return
+        '''
+        rets = list(self._batch().run())
+        self.assertEqual(self.targets, [['foo', 'bar'], ['baz', 'qux']])
+        self.assertEqual(rets, [{'foo': 0}, {'bar': 0}, {'baz': 0}, {'qux': 0}])
+        self.event.set_tag_filter.assert_called_with(None)
+
+    def test_failure_threshold(self):
+        '''
+        No more minions are run once enough of them failed
+        '''
+        self.opts['batch_failure_threshold'] = '25%'
+        self.retcodes['foo'] = 1
+        rets = list(self._batch().run())
+        self.assertEqual(self.targets, [['foo', 'bar']])
+        self.assertEqual(rets, [{'foo': 1}, {'bar': 0}])
+
+    def test_master_batch(self):
+        '''
+        The batch run of the master stores the returns under its own jid,
+        publishes the sub-jobs as the user of the run and saves its status in
+        the cache
+        '''
+        self.opts['master_job_cache'] = 'local_cache'
+        self.retcodes['foo'] = 1
+        load = {'jid': '20171018120000000000',
+                'tgt': '*',
+                'fun': 'test.retcode',
+                'arg': [],
+                'user': 'alice',
+                'ret': 'mysql',
+                'metadata': {'change': 42},
+                'batch': '2'}
+        cache = MagicMock()
+        cache.list.return_value = []
+        with patch('salt.minion.MasterMinion', MagicMock()), \
+                patch('salt.cache.factory', MagicMock(return_value=cache)), \
+                patch('salt.utils.job.store_job', MagicMock()) as store_job, \
+                patch('salt.client.get_local_client', MagicMock(return_value=self.local)):
+            MasterBatch(self.opts, load, self.minions).run_master()
+        self.assertEqual(self.targets, [['foo', 'bar'], ['baz', 'qux']])
+        self.assertEqual(self.local.salt_user, 'alice')
+        for kwargs in self.pub_kwargs:
+            self.assertEqual(kwargs['ret'], 'mysql')
+            self.assertEqual(kwargs['metadata'], {'change': 42})
+        self.assertEqual(
+            [(call[0][1]['jid'], call[0][1]['id'], call[0][1]['retcode'])
+             for call in store_job.call_args_list],
+            [(load['jid'], 'foo', 1), (load['jid'], 'bar', 0),
+             (load['jid'], 'baz', 0), (load['jid'], 'qux', 0)])
+        bank, jid, status = cache.store.call_args[0]
+        self.assertEqual((bank, jid), ('batch', load['jid']))
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(status['returned'], 4)
+        self.assertEqual(status['failed'], ['foo'])
+        tags = [call[0][1] for call in self.event.fire_event.call_args_list]
+        self.assertEqual(tags[0], 'salt/batch/{0}/start'.format(load['jid']))
+        self.assertEqual(tags[-1], 'salt/batch/{0}/done'.format(load['jid']))
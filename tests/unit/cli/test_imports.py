@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+'''
+Check that the command line entry points only import what they need when they
+start
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import json
+import os
+import subprocess
+import sys
+
+# Import Salt Testing libs
+from tests.support.paths import CODE_DIR
+from tests.support.unit import TestCase
+
+# The module imported by each entry point of salt/scripts.py
+ENTRY_POINTS = ('salt.cli.salt', 'salt.cli.call', 'salt.cli.run', 'salt.cli.key')
+
+# The modules which are slow to import and only needed once a command runs
+HEAVY_MODULES = ('salt.minion', 'salt.client', 'salt.cli.caller', 'salt.crypt',
+                 'salt.transport', 'salt.loader', 'tornado', 'zmq', 'Crypto',
+                 'timelib', 'cProfile')
+
+
+def _imported(code):
+    '''
+    Run code in a fresh interpreter and return the heavy modules it imported
+    '''
+    code += '\nimport json, sys\n' \
+            'print(json.dumps([name for name in {0!r} if name in sys.modules]))'.format(
+                HEAVY_MODULES)
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(
+        [CODE_DIR] + [path for path in [env.get('PYTHONPATH')] if path])
+    out = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return json.loads(out.decode('utf-8').splitlines()[-1])
+
+
+class EntryPointImportsTestCase(TestCase):
+    '''
+    Test the modules imported when the commands start
+    '''
+    def test_entry_points(self):
+        '''
+        The heavy modules are not imported with the entry points
+        '''
+        for module in ENTRY_POINTS:
+            self.assertEqual(_imported('import {0}'.format(module)), [], module)
+
+    def test_salt_call_version(self):
+        '''
+        salt-call does not import the minion to print its version
+        '''
+        code = ('import sys\n'
+                'sys.argv = ["salt-call", "--version"]\n'
+                'import salt.cli.call\n'
+                'try:\n'
+                '    salt.cli.call.SaltCall().run()\n'
+                'except SystemExit:\n'
+                '    pass')
+        self.assertEqual(_imported(code), [])
@@ -25,10 +25,11 @@ except ImportError:
 # Import Salt Testing Libs
 from tests.support.mixins import LoaderModuleMockMixin
 from tests.support.unit import TestCase, skipIf
-from tests.support.mock import NO_MOCK, NO_MOCK_REASON, patch
+from tests.support.mock import MagicMock, NO_MOCK, NO_MOCK_REASON, patch
 from tests.support.paths import TMP, FILES
 
 # Import salt libs
+import salt.utils.files
 import salt.utils.gitfs
 import salt.fileserver.gitfs as gitfs
 
@@ -259,3 +260,111 @@ class GitFSTest(TestCase, LoaderModuleMockMixin):
     def test_envs(self):
         ret = gitfs.envs()
         self.assertIn('base', ret)
+
+
+@skipIf(not HAS_GITPYTHON, 'GitPython is not installed')
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class GitFSFetchWorkersTest(TestCase, LoaderModuleMockMixin):
+    '''
+    Fetch several local bare repositories at the same time
+    '''
+    def setup_loader_modules(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        return {
+            gitfs: {
+                '__opts__': {
+                    'cachedir': os.path.join(self.tmp_dir, 'cache'),
+                    'sock_dir': self.tmp_dir,
+                    'gitfs_root': '',
+                    'fileserver_backend': ['git'],
+                    'gitfs_base': 'master',
+                    'fileserver_events': True,
+                    'transport': 'zeromq',
+                    'gitfs_mountpoint': '',
+                    'gitfs_saltenv': [],
+                    'gitfs_env_whitelist': [],
+                    'gitfs_env_blacklist': [],
+                    'gitfs_saltenv_whitelist': [],
+                    'gitfs_saltenv_blacklist': [],
+                    'gitfs_user': '',
+                    'gitfs_password': '',
+                    'gitfs_insecure_auth': False,
+                    'gitfs_privkey': '',
+                    'gitfs_pubkey': '',
+                    'gitfs_passphrase': '',
+                    'gitfs_refspecs': [
+                        '+refs/heads/*:refs/remotes/origin/*',
+                        '+refs/tags/*:refs/tags/*'
+                    ],
+                    'gitfs_ssl_verify': True,
+                    'gitfs_disable_saltenv_mapping': False,
+                    'gitfs_ref_types': ['branch', 'tag', 'sha'],
+                    'gitfs_global_lock': True,
+                    'gitfs_fetch_workers': 3,
+                    '__role': 'master',
+                }
+            }
+        }
+
+    def setUp(self):
+        if 'USERNAME' not in os.environ:
+            try:
+                os.environ['USERNAME'] = pwd.getpwuid(os.geteuid()).pw_name
+            except AttributeError:
+                os.environ['USERNAME'] = 'root'
+        work_dir = os.path.join(self.tmp_dir, 'work')
+        work = git.Repo.init(work_dir)
+        with salt.utils.files.fopen(os.path.join(work_dir, 'top.sls'), 'w') as fp_:
+            fp_.write('base: {}\n')
+        work.index.add(['top.sls'])
+        work.index.commit('Test')
+        remotes = []
+        for idx in range(4):
+            bare_dir = os.path.join(self.tmp_dir, 'bare{0}'.format(idx))
+            work.clone(bare_dir, bare=True)
+            remotes.append('file://' + bare_dir)
+        self.git_fs = salt.utils.gitfs.GitFS(gitfs.__opts__)
+        self.git_fs.init_remotes(
+            remotes, gitfs.PER_REMOTE_OVERRIDES, gitfs.PER_REMOTE_ONLY)
+
+    def _fetch_remotes(self):
+        event = MagicMock()
+        with patch('salt.utils.event.get_event', MagicMock(return_value=event)):
+            changed = self.git_fs.fetch_remotes()
+        self.assertEqual(event.fire_event.call_count, 1)
+        metrics, tag = event.fire_event.call_args[0]
+        self.assertEqual(tag, 'salt/fileserver/gitfs/fetch')
+        return changed, metrics
+
+    def test_fetch_remotes(self):
+        '''
+        All the remotes are fetched and their locks are released
+        '''
+        changed, metrics = self._fetch_remotes()
+        self.assertTrue(changed)
+        self.assertEqual(metrics['workers'], 3)
+        self.assertEqual(sorted(metrics['remotes']),
+                         sorted(repo.id for repo in self.git_fs.remotes))
+        for repo in self.git_fs.remotes:
+            self.assertTrue(metrics['remotes'][repo.id]['changed'])
+            self.assertIsNone(metrics['remotes'][repo.id]['error'])
+            self.assertFalse(os.path.exists(repo._get_lock_file('update')))
+
+        changed, metrics = self._fetch_remotes()
+        self.assertFalse(changed)
+
+    def test_fetch_remotes_locked(self):
+        '''
+        A remote with an update lock is skipped and its lock is kept
+        '''
+        locked = self.git_fs.remotes[0]
+        locked.lock()
+        self.addCleanup(locked.clear_lock)
+        changed, metrics = self._fetch_remotes()
+        self.assertTrue(changed)
+        self.assertFalse(metrics['remotes'][locked.id]['changed'])
+        self.assertTrue(os.path.exists(locked._get_lock_file('update')))
+        for repo in self.git_fs.remotes[1:]:
+            self.assertTrue(metrics['remotes'][repo.id]['changed'])
+            self.assertFalse(os.path.exists(repo._get_lock_file('update')))
@@ -15,16 +15,18 @@ import shutil
 import os
 import collections
 import sys
+import threading
 import imp
 import copy
 
 # Import Salt Testing libs
 from tests.support.unit import TestCase
-from tests.support.mock import patch
+from tests.support.mock import patch, MagicMock
 from tests.support.paths import TMP
 
 # Import Salt libs
 import salt.config
+import salt.loader
 import salt.utils.files
 import salt.utils.stringutils
 # pylint: disable=import-error,no-name-in-module,redefined-builtin
@@ -32,7 +34,7 @@ from salt.ext import six
 from salt.ext.six.moves import range
 # pylint: enable=no-name-in-module,redefined-builtin
 
-from salt.loader import LazyLoader, _module_dirs, grains, utils, proxy, minion_mods
+from salt.loader import LazyLoader, _module_dirs, _run_grain_funcs, clear_grains_cache, clear_loader_index, grains, utils, proxy, minion_mods
 
 log = logging.getLogger(__name__)
 
@@ -917,3 +919,307 @@ class LazyLoaderDeepSubmodReloadingTest(TestCase):
                 self.update_lib(lib)
                 self.loader.clear()
                 self._verify_libs()
+
+
+index_modules = {
+    'indexed': '''
+__virtualname__ = 'indexvirt'
+
+
+def __virtual__():
+    return __virtualname__
+
+
+def ping():
+    return True
+''',
+    'indexfail': '''
+def __virtual__():
+    return (False, 'not on this system')
+
+
+def ping():
+    return True
+''',
+    'indexother': '''
+def ping():
+    return True
+''',
+}
+
+
+class LazyLoaderIndexTest(TestCase):
+    '''
+    Test the loader index
+    '''
+    @classmethod
+    def setUpClass(cls):
+        if not os.path.isdir(TMP):
+            os.makedirs(TMP)
+
+    def setUp(self):
+        self.module_dir = tempfile.mkdtemp(dir=TMP)
+        self.cache_dir = tempfile.mkdtemp(dir=TMP)
+        for name, content in six.iteritems(index_modules):
+            self._write_module(name, content)
+        self.opts = salt.config.minion_config(None)
+        self.opts['grains'] = {'os': 'IndexTest'}
+        self.opts['cachedir'] = self.cache_dir
+        self.opts['loader_index'] = True
+        # Build the index
+        loader = self._loader()
+        loader._load_all()
+        self.functions = sorted(loader)
+
+    def tearDown(self):
+        shutil.rmtree(self.module_dir)
+        shutil.rmtree(self.cache_dir)
+        del self.opts
+        # Don't let the next test import the modules over these ones
+        for name in list(sys.modules):
+            if name.startswith('salt.loaded.') and name.rsplit('.', 1)[-1] in index_modules:
+                del sys.modules[name]
+
+    def _write_module(self, name, content):
+        path = os.path.join(self.module_dir, '{0}.py'.format(name))
+        with salt.utils.files.fopen(path, 'w') as fh:
+            fh.write(content)
+        remove_bytecode(path)
+
+    def _loader(self):
+        loader = LazyLoader([self.module_dir], copy.deepcopy(self.opts), tag='module')
+        loader._import_module = MagicMock(side_effect=loader._import_module)
+        return loader
+
+    def _imported(self, loader):
+        return [call[0][0] for call in loader._import_module.call_args_list]
+
+    def test_index_written(self):
+        self.assertEqual(self.functions, ['indexother.ping', 'indexvirt.ping'])
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, 'loader_index'))), 1)
+
+    def test_virtual_name(self):
+        '''
+        Only the module providing the virtual name is imported
+        '''
+        loader = self._loader()
+        self.assertTrue(loader['indexvirt.ping']())
+        self.assertEqual(self._imported(loader), ['indexed'])
+
+    def test_failed_module(self):
+        '''
+        A module failing its __virtual__ function is not imported again
+        '''
+        loader = self._loader()
+        self.assertNotIn('indexfail.ping', loader)
+        self.assertIn('not on this system',
+                      loader.missing_fun_string('indexfail.ping'))
+        self.assertEqual(self._imported(loader), [])
+
+    def test_clear_index(self):
+        '''
+        The modules are imported again once the index is cleared, e.g. by a
+        module refresh
+        '''
+        clear_loader_index(self.opts)
+        loader = self._loader()
+        self.assertNotIn('indexfail.ping', loader)
+        self.assertIn('indexfail', self._imported(loader))
+
+    def test_function_names(self):
+        loader = self._loader()
+        self.assertEqual(loader.function_names(), self.functions)
+        self.assertEqual(self._imported(loader), [])
+
+    def test_changed_module(self):
+        '''
+        A module is imported again once its file changes
+        '''
+        self._write_module('indexother', index_modules['indexother'] + '''
+
+def pong():
+    return True
+''')
+        loader = self._loader()
+        self.assertIn('indexother.pong', loader.function_names())
+        self.assertIn('indexother', self._imported(loader))
+
+    def test_grains_changed(self):
+        '''
+        The index is not used when the grains change
+        '''
+        self.opts['grains'] = {'os': 'OtherOS'}
+        loader = self._loader()
+        self.assertEqual(loader.function_names(), self.functions)
+        self.assertEqual(sorted(self._imported(loader)),
+                         ['indexed', 'indexfail', 'indexother'])
+
+
+class GrainsConcurrencyTest(TestCase):
+    '''
+    Test running the grains functions concurrently
+    '''
+    def setUp(self):
+        self.event = threading.Event()
+
+        def slow():
+            self.event.wait(5)
+            return {'slow': True}
+
+        def failing():
+            raise ValueError('failing grain')
+
+        self.funcs = collections.OrderedDict([
+            ('core.first', lambda: {'a': 1, 'b': 1}),
+            ('custom.slow', slow),
+            ('custom.failing', failing),
+            ('custom.last', lambda: {'b': 2}),
+        ])
+
+    def tearDown(self):
+        self.event.set()
+        for _, pool, _ in salt.loader._GRAIN_POOLS:
+            pool.join()
+        del salt.loader._GRAIN_POOLS[:]
+
+    def _run(self, **opts):
+        return list(_run_grain_funcs(opts, self.funcs, list(self.funcs), None))
+
+    def test_order(self):
+        '''
+        The returns come in the order of the keys, whichever function
+        finishes first
+        '''
+        self.event.set()
+        expected = [('core.first', {'a': 1, 'b': 1}),
+                    ('custom.slow', {'slow': True}),
+                    ('custom.failing', None),
+                    ('custom.last', {'b': 2})]
+        self.assertEqual(self._run(), expected)
+        self.assertEqual(self._run(grains_concurrency=4), expected)
+
+    def test_timeout(self):
+        '''
+        The functions running for too long are skipped
+        '''
+        ret = self._run(grains_concurrency=4, grains_timeout=0.2)
+        self.assertEqual([key for key, _ in ret],
+                         ['core.first', 'custom.failing', 'custom.last'])
+
+    def test_core_exception(self):
+        '''
+        An exception in a core grains function is raised
+        '''
+        self.event.set()
+        self.funcs['core.first'] = self.funcs.pop('custom.failing')
+        self.assertRaises(ValueError, self._run, grains_concurrency=4)
+
+    def test_timed_out_not_run_again(self):
+        '''
+        A function which timed out is not run again until it returns, its
+        thread is then joined
+        '''
+        calls = []
+        slow = self.funcs['custom.slow']
+        self.funcs['custom.slow'] = lambda: calls.append(1) or slow()
+        self._run(grains_concurrency=4, grains_timeout=0.2)
+        ret = self._run(grains_concurrency=4, grains_timeout=0.2)
+        self.assertEqual([key for key, _ in ret],
+                         ['core.first', 'custom.failing', 'custom.last'])
+        self.assertEqual(len(calls), 1)
+        self.event.set()
+        salt.loader._GRAIN_POOLS[0][2]['custom.slow'].wait()
+        ret = self._run(grains_concurrency=4, grains_timeout=0.2)
+        self.assertIn(('custom.slow', {'slow': True}), ret)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(salt.loader._GRAIN_POOLS, [])
+
+    def test_timings_event(self):
+        '''
+        The time taken by each function is sent to the master
+        '''
+        self.event.set()
+        with patch('salt.utils.event.get_event') as get_event:
+            self._run(id='minion')
+            self.assertFalse(get_event.called)
+            self._run(id='minion', grains_timings_event=True)
+        data, tag = get_event.return_value.fire_event.call_args[0]
+        self.assertEqual(tag, 'fire_master')
+        self.assertEqual(data['tag'], 'salt/minion/minion/grains_timings')
+        self.assertEqual(sorted(data['data']['timings']), sorted(self.funcs))
+
+
+class GrainFuncs(collections.OrderedDict):
+    '''
+    Grains functions which, like a LazyLoader, are still there after a clear
+    '''
+    def clear(self):
+        pass
+
+
+class GrainsCacheTest(TestCase):
+    '''
+    Test caching the returns of the grains functions one by one
+    '''
+    @classmethod
+    def setUpClass(cls):
+        if not os.path.isdir(TMP):
+            os.makedirs(TMP)
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.opts = {'cachedir': self.cachedir,
+                     'grains_cache': True,
+                     'grains_cache_ttl': {'disks': 3600, 'core.network': 0}}
+        self.calls = collections.Counter()
+
+        def grain_func(key, ret):
+            def func():
+                self.calls[key] += 1
+                return ret
+            return func
+
+        self.funcs = GrainFuncs([
+            ('core.network', grain_func('core.network', {'ip': '10.0.0.1'})),
+            ('disks.disks', grain_func('disks.disks', {'disks': ['sda']})),
+            ('disks.ssds', grain_func('disks.ssds', {'SSDs': []})),
+        ])
+        patcher = patch('salt.loader.grain_funcs', MagicMock(return_value=self.funcs))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def test_ttl(self):
+        '''
+        Only the expired functions run again
+        '''
+        expected = {'ip': '10.0.0.1', 'disks': ['sda'], 'SSDs': []}
+        self.assertEqual(grains(self.opts), expected)
+        self.assertEqual(grains(self.opts), expected)
+        self.assertEqual(self.calls, {'core.network': 2,
+                                      'disks.disks': 1,
+                                      'disks.ssds': 1})
+
+    def test_clear_modules(self):
+        '''
+        Clearing the cache of a module only runs its functions again
+        '''
+        grains(self.opts)
+        clear_grains_cache(self.opts, ['disks.ssds'])
+        grains(self.opts)
+        self.assertEqual(self.calls, {'core.network': 2,
+                                      'disks.disks': 1,
+                                      'disks.ssds': 2})
+        clear_grains_cache(self.opts)
+        grains(self.opts)
+        self.assertEqual(self.calls['disks.disks'], 2)
+
+    def test_force_refresh(self):
+        '''
+        A forced refresh runs all the functions
+        '''
+        grains(self.opts)
+        grains(self.opts, force_refresh=True)
+        self.assertEqual(self.calls['disks.disks'], 2)
@@ -8,10 +8,12 @@ Unit tests for the Default Job Cache (local_cache).
 
 # Import Python libs
 from __future__ import absolute_import
+import datetime
 import os
 import shutil
 import logging
 import tempfile
+import time
 
 # Import Salt Testing libs
 from tests.integration import AdaptedConfigurationTestCaseMixin
@@ -168,6 +170,140 @@ class LocalCacheCleanOldJobsTestCase(TestCase, LoaderModuleMockMixin):
         return temp_dir, jid_file_path
 
 
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class LocalCacheJidIndexTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the time bucketed jid index of the local_cache returner.
+    '''
+    def setup_loader_modules(self):
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+        return {local_cache: {'__opts__': {'cachedir': self.cachedir,
+                                           'keep_jobs': 1,
+                                           'hash_type': 'sha256',
+                                           'job_cache_index': True}}}
+
+    def _add_job(self, created):
+        jid = salt.utils.jid.time_to_jid(datetime.datetime.fromtimestamp(created))
+        local_cache.prep_jid(passed_jid=jid)
+        local_cache.save_load(jid, {'jid': jid, 'fun': 'test.ping'})
+        return jid, salt.utils.jid.jid_dir(jid, os.path.join(self.cachedir, 'jobs'), 'sha256')
+
+    def test_prep_jid_indexes_jid(self):
+        '''
+        New jids are added to the bucket of the hour they were generated in
+        '''
+        created = time.mktime((2017, 1, 1, 1, 1, 1, 0, 1, -1))
+        bucket = int(created) // 3600 * 3600
+        jid, _ = self._add_job(created)
+        self.assertEqual(local_cache._index_buckets(), [bucket])
+        self.assertEqual(local_cache._read_bucket(bucket), [jid])
+        self.assertEqual(list(local_cache.get_jids()), [jid])
+
+    def test_load_indexed_in_jid_bucket(self):
+        '''
+        The metadata of a job goes to the bucket of its jid, whenever its load
+        is saved, with the number of minions it targets
+        '''
+        created = time.mktime((2017, 1, 1, 1, 1, 1, 0, 1, -1))
+        bucket = int(created) // 3600 * 3600
+        jid = salt.utils.jid.time_to_jid(datetime.datetime.fromtimestamp(created))
+        with patch('time.time', MagicMock(return_value=created + 2 * 3600)):
+            local_cache.prep_jid(passed_jid=jid)
+            local_cache.save_load(jid, {'jid': jid, 'fun': 'test.ping', 'tgt': 'minion*'},
+                                  minions=['minion1', 'minion2'])
+        self.assertEqual(local_cache._index_buckets(), [bucket])
+        self.assertEqual(local_cache._read_meta(bucket)[jid]['minion_count'], 2)
+        local_cache._build_index()
+        self.assertEqual(dict(local_cache.list_jobs())[jid]['Minion-count'], 2)
+
+    def test_clean_old_jobs_removes_expired_buckets(self):
+        '''
+        Only the jobs of expired buckets are removed
+        '''
+        now = time.time()
+        _, old_dir = self._add_job(now - 3 * 3600)
+        _, new_dir = self._add_job(now)
+        local_cache.clean_old_jobs()
+        self.assertFalse(os.path.exists(old_dir))
+        self.assertTrue(os.path.exists(new_dir))
+        self.assertEqual(len(local_cache._index_buckets()), 1)
+
+    def test_other_jid_dirs_indexed(self):
+        '''
+        The jid directories created when the minions or the end time of a job
+        are saved are indexed too, and removed with their bucket
+        '''
+        created = time.mktime((2017, 1, 1, 1, 1, 1, 0, 1, -1))
+        bucket = int(created) // 3600 * 3600
+        jids = [salt.utils.jid.time_to_jid(datetime.datetime.fromtimestamp(created + idx))
+                for idx in range(2)]
+        local_cache.save_minions(jids[0], ['minion'], syndic_id='syndic')
+        local_cache.update_endtime(jids[1], salt.utils.jid.jid_to_time(jids[1]))
+        self.assertEqual(local_cache._read_bucket(bucket), jids)
+        local_cache._build_index()
+        local_cache.clean_old_jobs()
+        self.assertEqual(os.listdir(os.path.join(self.cachedir, 'jobs')), [])
+
+    def test_clean_old_jobs_builds_index(self):
+        '''
+        Jobs created before the index was enabled are indexed on the first
+        cleanup, even when new jobs were indexed already, and the index is
+        only used then
+        '''
+        now = time.time()
+        with patch.dict(local_cache.__opts__, {'job_cache_index': False}):
+            old_jid, jid_dir = self._add_job(now - 1)
+        self.assertEqual(local_cache._index_buckets(), [])
+        new_jid, _ = self._add_job(now)
+        self.assertFalse(local_cache._use_index())
+        self.assertEqual(sorted(local_cache.get_jids()), [old_jid, new_jid])
+        local_cache.clean_old_jobs()
+        self.assertTrue(os.path.exists(jid_dir))
+        self.assertTrue(local_cache._use_index())
+        self.assertEqual(sorted(local_cache.get_jids()), [old_jid, new_jid])
+
+    def test_get_jids_filter(self):
+        '''
+        Only the newest jobs are read from the index
+        '''
+        local_cache._build_index()
+        created = time.mktime((2017, 1, 1, 1, 1, 1, 0, 1, -1))
+        jids = [self._add_job(created + 3600 * idx)[0] for idx in range(3)]
+        ret = local_cache.get_jids_filter(2)
+        self.assertEqual([job['JID'] for job in ret], jids[1:])
+
+    def test_list_jobs(self):
+        '''
+        The jobs are filtered on the metadata kept in the index, and paged
+        '''
+        local_cache._build_index()
+        jids = []
+        for hour in range(4):
+            jid = '201701010{0}0000000000'.format(hour)
+            local_cache.prep_jid(passed_jid=jid)
+            local_cache.save_load(jid, {'jid': jid,
+                                        'fun': 'test.ping' if hour % 2 else 'state.apply',
+                                        'arg': [],
+                                        'user': 'root'})
+            jids.append(jid)
+        # The load is not read when its metadata is in the index
+        jid_dir = salt.utils.jid.jid_dir(jids[1], os.path.join(self.cachedir, 'jobs'), 'sha256')
+        os.remove(os.path.join(jid_dir, local_cache.LOAD_P))
+
+        def _list(**kwargs):
+            return [jid for jid, _ in local_cache.list_jobs(**kwargs)]
+
+        self.assertEqual(_list(), jids)
+        self.assertEqual(_list(search_function='test.*'), [jids[1], jids[3]])
+        self.assertEqual(_list(newest_first=True, limit=1), [jids[3]])
+        self.assertEqual(_list(offset=1, limit=2), jids[1:3])
+        self.assertEqual(_list(start_jid=jids[2]), jids[2:])
+        self.assertEqual(_list(end_jid=jids[1], search_user='ro*'), jids[:2])
+        self.assertEqual(dict(local_cache.list_jobs(limit=2))[jids[1]]['Function'],
+                         'test.ping')
+
+
 class Local_CacheTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderModuleMockMixin):
     '''
     Test the local cache returner
@@ -78,3 +78,33 @@ class JobsTest(TestCase, LoaderModuleMockMixin):
 
             self.assertEqual(jobs.list_jobs(search_target='non-existant'),
                              returns['non-existant'])
+
+    def test_list_jobs_paged(self):
+        '''
+        test jobs.list_jobs runner sorting and paging the jobs of a returner
+        without a list_jobs function
+        '''
+        mock_jobs_cache = dict(
+            ('2016052403550{0}000000'.format(idx),
+             {'Arguments': [],
+              'Function': 'test.ping',
+              'StartTime': '2016, May 24 03:55:0{0}.000000'.format(idx),
+              'Target': 'node-1-1.com',
+              'Target-type': 'glob',
+              'User': 'root' if idx % 2 else 'sudo_ubuntu'})
+            for idx in range(5))
+        jids = sorted(mock_jobs_cache)
+
+        class MockMasterMinion(object):
+
+            returners = {'local_cache.get_jids': lambda: mock_jobs_cache}
+
+            def __init__(self, *args, **kwargs):
+                pass
+
+        with patch.object(salt.minion, 'MasterMinion', MockMasterMinion):
+            self.assertEqual(list(jobs.list_jobs(limit=2)), jids[:2])
+            self.assertEqual(list(jobs.list_jobs(newest_first=True, offset=1, limit=2)),
+                             [jids[3], jids[2]])
+            self.assertEqual(list(jobs.list_jobs(search_user='root')),
+                             [jids[1], jids[3]])
@@ -10,6 +10,7 @@ import json
 import datetime
 import pprint
 import re
+import shutil
 
 # Import Salt Testing libs
 from tests.support.unit import skipIf, TestCase
@@ -22,6 +23,7 @@ import salt.config
 from salt.ext import six
 import salt.loader
 import salt.utils.files
+import salt.utils.templates
 from salt.utils import get_context
 from salt.exceptions import SaltRenderError
 from salt.ext.six.moves import builtins
@@ -481,6 +483,111 @@ class TestGetTemplate(TestCase):
         )
 
 
+class TestJinjaEnvCache(TestCase):
+    '''
+    Test the reuse of the Jinja environments and the bytecode cache
+    '''
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+        roots = {'test': [os.path.join(TEMPLATES_DIR, 'files', 'test')]}
+        self.opts = {
+            'cachedir': self.cachedir,
+            'file_client': 'remote',
+            'file_roots': roots,
+            'pillar_roots': roots,
+            'jinja_env_cache': True,
+        }
+        self.filename = os.path.join(TEMPLATES_DIR, 'files', 'test', 'hello_import')
+        with salt.utils.files.fopen(self.filename) as fp_:
+            self.tmplstr = fp_.read()
+
+    def _render(self, tmplstr, opts, **kwargs):
+        kwargs.update(opts=opts, saltenv='test', salt={})
+        return render_jinja_tmpl(tmplstr, kwargs, tmplpath=self.filename)
+
+    def test_env_reused(self):
+        '''
+        The renders using the same opts share an environment, the imported
+        templates are only loaded once
+        '''
+        fc = MockFileClient()
+        with patch.object(SaltCacheLoader, 'file_client', MagicMock(return_value=fc)):
+            self.assertEqual(self._render(self.tmplstr, self.opts, a='Hi', b='Salt'),
+                             'Hey world !Hi Salt !\n')
+            self.assertEqual(self._render(self.tmplstr, self.opts, a='Hello'),
+                             'Hey world !Hello b !\n')
+            self.assertEqual(
+                self._render(self.tmplstr, dict(self.opts), a='Hi', b='Salt'),
+                'Hey world !Hi Salt !\n')
+        # Once per environment
+        self.assertEqual([req['path'] for req in fc.requests],
+                         ['salt://macro', 'salt://macro'])
+
+    def test_context_not_kept(self):
+        '''
+        The context of a render is not visible to the following ones
+        '''
+        self.assertEqual(self._render('{{ foo }}', self.opts, foo='bar'), 'bar')
+        self.assertEqual(self._render('{{ foo is defined }}', self.opts), 'False')
+
+    def test_env_globals_unchanged(self):
+        '''
+        The context of a render is not added to the globals of the reused
+        environment
+        '''
+        self.assertEqual(self._render('{{ foo }}', self.opts, foo='bar'), 'bar')
+        for entry in salt.utils.templates._jinja_env_cache().values():
+            self.assertNotIn('foo', entry[1].globals)
+
+    def test_path_codes(self):
+        '''
+        The code of a file rendered again is reused until the file changes
+        '''
+        opts = dict(self.opts, jinja_env_cache=False)
+        path = os.path.join(self.cachedir, 'reaction.sls')
+        codes = {}
+
+        def _render(**kwargs):
+            with salt.utils.files.fopen(path) as fp_:
+                tmplstr = fp_.read()
+            kwargs.update(opts=opts, saltenv='', salt={}, _jinja_codes=codes)
+            return render_jinja_tmpl(tmplstr, kwargs, tmplpath=path)
+
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('{{ data }}')
+        self.assertEqual(_render(data='foo'), 'foo')
+        self.assertIn(path, codes)
+        with patch.object(Environment, 'compile',
+                          MagicMock(side_effect=AssertionError('compiled'))):
+            self.assertEqual(_render(data='bar'), 'bar')
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('{{ data }}!')
+        self.assertEqual(_render(data='bar'), 'bar!')
+
+    def test_bytecode_cache(self):
+        '''
+        The compiled templates are stored in the cachedir and reused by new
+        environments
+        '''
+        self.opts['jinja_bytecode_cache'] = True
+        fc = MockFileClient()
+        with patch.object(SaltCacheLoader, 'file_client', MagicMock(return_value=fc)):
+            self.assertEqual(self._render(self.tmplstr, self.opts, a='Hi', b='Salt'),
+                             'Hey world !Hi Salt !\n')
+            # The template and the imported macro file
+            cache_dirs = os.listdir(os.path.join(self.cachedir, 'jinja'))
+            self.assertEqual(len(cache_dirs), 1)
+            self.assertEqual(
+                len(os.listdir(os.path.join(self.cachedir, 'jinja', cache_dirs[0]))),
+                2)
+            with patch.object(Environment, 'compile',
+                              MagicMock(side_effect=AssertionError('compiled'))):
+                self.assertEqual(
+                    self._render(self.tmplstr, dict(self.opts), a='Hi', b='Salt'),
+                    'Hey world !Hi Salt !\n')
+
+
 class TestCustomExtensions(TestCase):
 
     def __init__(self, *args, **kws):
@@ -83,3 +83,22 @@ class LocalClientTestCase(TestCase,
                 self.assertRaises(SaltInvocationError,
                                   self.client.pub,
                                   'non_existent_group', 'test.ping', tgt_type='nodegroup')
+
+    def test_gather_job_info_subscribes_first(self):
+        '''
+        The returns of the saltutil.find_job are subscribed to before it is
+        published, so that the event publisher sends them all
+        '''
+        subscribed = []
+
+        def run_job(*args, **kwargs):
+            subscribed.extend(tag for tag, _ in self.client.event.pending_tags)
+            return {'jid': kwargs['jid'], 'minions': ['m1']}
+
+        with patch.object(self.client, 'run_job', side_effect=run_job) as run_job_mock:
+            pub_data = self.client.gather_job_info('1234', ['m1'], 'list')
+        find_jid = run_job_mock.call_args[1]['jid']
+        self.assertEqual(pub_data['jid'], find_jid)
+        self.assertIn('salt/job/{0}'.format(find_jid), subscribed)
+        self.assertNotIn('salt/job/{0}'.format(find_jid),
+                         [tag for tag, _ in self.client.event.pending_tags])
@@ -3,6 +3,8 @@
 # python libs
 from __future__ import absolute_import
 import os
+import shutil
+import tempfile
 
 # salt testing libs
 from tests.support.unit import TestCase, skipIf
@@ -133,3 +135,39 @@ class CryptTestCase(TestCase):
     def test_verify_signature(self):
         with patch('salt.utils.files.fopen', mock_open(read_data=PUBKEY_DATA)):
             self.assertTrue(crypt.verify_signature('/keydir/keyname.pub', MSG, SIG))
+
+
+@skipIf(not HAS_PYCRYPTO_RSA, 'pycrypto >= 2.6 is not available')
+class PubKeyCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.pub_path = os.path.join(self.tmpdir, 'minion.pub')
+        with salt.utils.files.fopen(self.pub_path, 'w') as fp_:
+            fp_.write(PUBKEY_DATA)
+        crypt._PUB_KEYS.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        crypt._PUB_KEYS.clear()
+
+    def test_get_rsa_pub_key_cached(self):
+        key = crypt.get_rsa_pub_key(self.pub_path)
+        # The key is not parsed again
+        with patch('salt.crypt.RSA.importKey', MagicMock(side_effect=ValueError)):
+            self.assertIs(crypt.get_rsa_pub_key(self.pub_path), key)
+            self.assertTrue(crypt.verify_signature(self.pub_path, MSG, SIG))
+
+    def test_get_rsa_pub_key_invalidated(self):
+        key = crypt.get_rsa_pub_key(self.pub_path)
+        mtime = os.path.getmtime(self.pub_path)
+        os.utime(self.pub_path, (mtime + 10, mtime + 10))
+        new_key = crypt.get_rsa_pub_key(self.pub_path)
+        self.assertIsNot(new_key, key)
+        self.assertEqual(new_key.publickey().exportKey(),
+                         key.publickey().exportKey())
+
+    def test_get_rsa_pub_key_missing(self):
+        crypt.get_rsa_pub_key(self.pub_path)
+        os.remove(self.pub_path)
+        self.assertRaises(IOError, crypt.get_rsa_pub_key, self.pub_path)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.master
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import sys
+import types
+
+# Import Salt Testing libs
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import patch, MagicMock, NO_MOCK, NO_MOCK_REASON
+
+# Import Salt libs
+import salt.master
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class PreloadWorkerModulesTestCase(TestCase):
+    '''
+    Test the modules imported before the master workers are forked
+    '''
+    def setUp(self):
+        self.opts = {'conf_file': '', 'sock_dir': ''}
+        patches = (
+            # Don't freeze the objects of the test process
+            'salt.master.gc',
+            'salt.minion.MasterMinion',
+            'salt.fileserver.Fileserver',
+            'salt.auth.LoadAuth',
+            'salt.wheel.Wheel',
+            'salt.loader.tops',
+            'salt.loader.pillars',
+            'salt.loader.runner',
+        )
+        for target in patches:
+            patcher = patch(target, MagicMock())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_preload_loads_all(self):
+        '''
+        All the modules of the loaders are loaded
+        '''
+        salt.master.preload_worker_modules(self.opts)
+        mminion = salt.minion.MasterMinion.return_value
+        for loader in (mminion.functions,
+                       mminion.returners,
+                       salt.fileserver.Fileserver.return_value.servers,
+                       salt.loader.tops.return_value,
+                       salt.auth.LoadAuth.return_value.auth,
+                       salt.wheel.Wheel.return_value.functions,
+                       salt.loader.pillars.return_value,
+                       salt.loader.runner.return_value):
+            self.assertTrue(loader.__len__.called)
+
+    def test_loaded_modules_dropped(self):
+        '''
+        The modules loaded by the loaders are not kept for the workers, the
+        libraries they imported are
+        '''
+        loaded = '{0}.int.module.preload_test'.format(salt.loader.LOADED_BASE_NAME)
+        library = 'salt_preload_test_lib'
+
+        def _load_all():
+            sys.modules[loaded] = types.ModuleType(loaded)
+            sys.modules[library] = types.ModuleType(library)
+            return 1
+
+        self.addCleanup(sys.modules.pop, loaded, None)
+        self.addCleanup(sys.modules.pop, library, None)
+        salt.loader.tops.return_value.__len__.side_effect = _load_all
+        salt.master.preload_worker_modules(self.opts)
+        self.assertNotIn(loaded, sys.modules)
+        self.assertIn(library, sys.modules)
@@ -131,3 +131,79 @@ class MinionTestCase(TestCase):
                 self.assertEqual(minion.jid_queue, [456, 789])
             finally:
                 minion.destroy()
+
+    def test_handle_decoded_payload_job_pool(self):
+        '''
+        Tests that the _handle_decoded_payload function hands the job to the job pool, and only starts a
+        new process when all the workers of the pool are busy.
+        '''
+        mock_start = MagicMock(return_value=True)
+        mock_pool = MagicMock()
+        with patch('salt.minion.Minion.ctx', MagicMock(return_value={})), \
+                patch('salt.minion.MinionJobPool', MagicMock(return_value=mock_pool)), \
+                patch('salt.utils.process.SignalHandlingMultiprocessingProcess.start', mock_start), \
+                patch('salt.utils.process.SignalHandlingMultiprocessingProcess.join', MagicMock(return_value=True)):
+            mock_opts = copy.copy(salt.config.DEFAULT_MINION_OPTS)
+            mock_opts['job_pool_size'] = 2
+            try:
+                minion = salt.minion.Minion(mock_opts, jid_queue=[], io_loop=tornado.ioloop.IOLoop())
+                mock_pool.run_job.return_value = True
+                minion._handle_decoded_payload({'fun': 'foo.bar', 'jid': 123})
+                mock_pool.run_job.assert_called_once_with({'fun': 'foo.bar', 'jid': 123}, minion.connected)
+                self.assertFalse(mock_start.called)
+
+                mock_pool.run_job.return_value = False
+                minion._handle_decoded_payload({'fun': 'foo.bar', 'jid': 456})
+                self.assertEqual(mock_start.call_count, 1)
+            finally:
+                minion.destroy()
+        self.assertTrue(mock_pool.stop.called)
+
+    def test_job_pool_run_job(self):
+        '''
+        Tests that the job pool only takes jobs when a worker is idle
+        '''
+        mock_opts = copy.copy(salt.config.DEFAULT_MINION_OPTS)
+        mock_opts['job_pool_size'] = 1
+        with patch('salt.minion.MinionJobWorker', MagicMock()):
+            pool = salt.minion.MinionJobPool(MagicMock(opts=mock_opts))
+        self.assertEqual(len(pool.workers), 1)
+        self.assertFalse(pool.run_job({'fun': 'foo.bar', 'jid': 123}, True))
+        # The worker becomes idle
+        pool.idle.release()
+        self.assertTrue(pool.run_job({'fun': 'foo.bar', 'jid': 123}, True))
+        self.assertEqual(pool.jobs.get(timeout=5), ({'fun': 'foo.bar', 'jid': 123}, True))
+        self.assertFalse(pool.run_job({'fun': 'foo.bar', 'jid': 456}, True))
+        pool.recycle()
+        self.assertEqual(pool.generation.value, 1)
+
+    def test_job_pool_dead_idle_worker(self):
+        '''
+        Tests that the token of a worker which died idle is taken back before
+        its replacement releases one
+        '''
+        mock_opts = copy.copy(salt.config.DEFAULT_MINION_OPTS)
+        mock_opts['job_pool_size'] = 1
+        with patch('salt.minion.MinionJobWorker', MagicMock(side_effect=lambda *args: MagicMock())):
+            pool = salt.minion.MinionJobPool(MagicMock(opts=mock_opts))
+            # The worker becomes idle and dies
+            pool.idle.release()
+            pool.workers[0].is_idle.value = 1
+            pool.workers[0].is_alive.return_value = False
+            pool.check()
+            self.assertEqual(len(pool.workers), 1)
+            self.assertFalse(pool.run_job({'fun': 'foo.bar', 'jid': 123}, True))
+
+            # The replacement becomes idle, a job is handed for its token,
+            # and it dies before taking it
+            pool.idle.release()
+            pool.workers[0].is_idle.value = 1
+            self.assertTrue(pool.run_job({'fun': 'foo.bar', 'jid': 123}, True))
+            pool.workers[0].is_alive.return_value = False
+            pool.check()
+            self.assertEqual(pool.dead_tokens, 1)
+            # The next replacement takes the job after releasing its token
+            pool.idle.release()
+            pool.check()
+            self.assertEqual(pool.dead_tokens, 0)
+            self.assertFalse(pool.run_job({'fun': 'foo.bar', 'jid': 456}, True))
@@ -63,6 +63,102 @@ class StateCompilerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
                 state_obj.call_high(high_data)
 
 
+class RequisiteIndexTestCase(TestCase):
+    '''
+    TestCase for the indexes used to resolve requisites
+    '''
+    def setUp(self):
+        self.chunks = [
+            {'state': 'file', '__id__': 'conf', 'name': '/etc/app.conf',
+             '__sls__': 'app', 'fun': 'managed'},
+            {'state': 'pkg', '__id__': 'app', 'name': 'app',
+             '__sls__': 'app', 'fun': 'installed'},
+            {'state': 'file', '__id__': 'motd', 'name': '/etc/motd',
+             '__sls__': 'base.motd', 'fun': 'managed'},
+            {'state': 'service', '__id__': 'app-svc', 'name': 'app',
+             '__sls__': 'app.service', 'fun': 'running'},
+        ]
+        self.index = salt.state.ChunkIndex(self.chunks)
+
+    def test_lookup_id_and_name(self):
+        '''
+        An id requisite matches both the IDs and the names of the chunks
+        '''
+        self.assertEqual(self.index.lookup('id', 'app'),
+                         [self.chunks[1], self.chunks[3]])
+        self.assertEqual(self.index.lookup('id', '/etc/motd'),
+                         [self.chunks[2]])
+        self.assertEqual(self.index.lookup('id', 'missing'), [])
+
+    def test_lookup_state(self):
+        '''
+        A state requisite only matches the chunks of this state
+        '''
+        self.assertEqual(self.index.lookup('pkg', 'app'), [self.chunks[1]])
+        self.assertEqual(self.index.lookup('file', 'conf'), [self.chunks[0]])
+        self.assertEqual(self.index.lookup('service', 'conf'), [])
+
+    def test_lookup_glob(self):
+        '''
+        Globs are matched against the IDs, names and SLS of the chunks
+        '''
+        self.assertEqual(self.index.lookup('file', '/etc/*'),
+                         [self.chunks[0], self.chunks[2]])
+        self.assertEqual(self.index.lookup('id', 'app*'),
+                         [self.chunks[1], self.chunks[3]])
+        self.assertEqual(self.index.lookup('sls', 'app*'),
+                         [self.chunks[0], self.chunks[1], self.chunks[3]])
+        self.assertEqual(self.index.lookup('sls', 'app'),
+                         [self.chunks[0], self.chunks[1]])
+
+    def test_lookup_invalid_value(self):
+        '''
+        Requisite values which are not strings can't be resolved
+        '''
+        with self.assertRaises(TypeError):
+            self.index.lookup('file', OrderedDict([('test1', 'test')]))
+
+    def test_get(self):
+        '''
+        Exact lookups by state and ID or name, as used by listen
+        '''
+        self.assertIs(self.index.get('file', 'motd'), self.chunks[2])
+        self.assertIs(self.index.get('file', '/etc/motd'), self.chunks[2])
+        self.assertIsNone(self.index.get('file', '/etc/*'))
+        self.assertIsNone(self.index.get('pkg', 'motd'))
+
+    def test_valid_for(self):
+        '''
+        The index is only reused for the list of chunks it was built for
+        '''
+        self.assertTrue(self.index.valid_for(self.chunks))
+        self.assertFalse(self.index.valid_for(list(self.chunks)))
+        self.chunks.pop()
+        self.assertFalse(self.index.valid_for(self.chunks))
+
+    def test_find_name_index(self):
+        '''
+        find_name and find_sls_ids return the same with or without an index
+        '''
+        high = {
+            'conf': {'file': [{'name': '/etc/app.conf'}, 'managed'],
+                     '__sls__': 'app', '__env__': 'base'},
+            'app': {'pkg': ['installed'], 'service': ['running'],
+                    '__sls__': 'app', '__env__': 'base'},
+            'motd': {'file': [{'name': '/etc/motd'}, {'mode': 644}, 'managed'],
+                     '__sls__': 'base.motd', '__env__': 'base'},
+        }
+        index = salt.state.index_high(high)
+        for name, state in (('/etc/motd', 'file'), ('app', 'pkg'),
+                            ('/etc/app.conf', 'pkg'), ('app', 'sls'),
+                            (644, 'file')):
+            self.assertEqual(salt.state.find_name(name, state, high),
+                             salt.state.find_name(name, state, high, index))
+        for sls in ('app', 'base.motd', 'missing'):
+            self.assertEqual(sorted(salt.state.find_sls_ids(sls, high)),
+                             sorted(salt.state.find_sls_ids(sls, high, index)))
+
+
 class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
     def setUp(self):
         root_dir = tempfile.mkdtemp(dir=integration.TMP)
@@ -24,6 +24,7 @@ import salt.transport.client
 from salt.ext.six.moves import range
 
 # Import Salt Testing libs
+from tests.support.unit import TestCase
 from tests.support.mock import MagicMock
 from tests.support.paths import TMP
 
@@ -151,3 +152,26 @@ class IPCMessageClient(BaseIPCReqCase):
         self.channel.send({'stop': True})
         self.wait()
         self.assertEqual(self.payloads[:-1], [None, None, 'foo', 'foo'])
+
+
+class TagFilterMatcherTestCase(TestCase):
+    '''
+    Test the matching of the tag filters of the subscribers
+    '''
+    def test_match(self):
+        match = salt.transport.ipc.tag_filter_matcher(
+            [['salt/job/', 'startswith'], ['salt/minion/*/start', 'fnmatch']])
+        self.assertTrue(match('salt/job/20171018120000000000/ret/minion'))
+        self.assertTrue(match('salt/minion/minion1/start'))
+        self.assertFalse(match('salt/minion/minion1/stop'))
+        self.assertFalse(match('salt/auth'))
+
+    def test_no_filter(self):
+        self.assertIsNone(salt.transport.ipc.tag_filter_matcher(None))
+        # The other match types are matched by the subscriber
+        self.assertIsNone(salt.transport.ipc.tag_filter_matcher(
+            [['salt/job/', 'startswith'], ['job', 'find']]))
+
+    def test_empty_filter(self):
+        match = salt.transport.ipc.tag_filter_matcher([])
+        self.assertFalse(match('salt/job/20171018120000000000/new'))
@@ -29,6 +29,7 @@ from salt.ext import six
 import salt.utils
 import salt.transport.server
 import salt.transport.client
+import salt.transport.zeromq
 import salt.exceptions
 from salt.ext.six.moves import range
 from salt.transport.zeromq import AsyncReqMessageClientPool
@@ -305,3 +306,63 @@ class AsyncReqMessageClientPoolTest(TestCase):
     def test_destroy(self):
         self.message_client_pool.destroy()
         self.assertEqual([], self.message_client_pool.message_clients)
+
+
+class ZMQPubServerChannelPublishTest(TestCase):
+    '''
+    Tests around the publisher PUSH socket used by ZeroMQPubServerChannel
+    '''
+    def setUp(self):
+        super(ZMQPubServerChannelPublishTest, self).setUp()
+        self.opts = {'transport': 'zeromq',
+                     'sock_dir': '/tmp',
+                     'zmq_filtering': False,
+                     'sign_pub_messages': False}
+        with patch('salt.utils.minions.CkMinions'):
+            self.channel = salt.transport.zeromq.ZeroMQPubServerChannel(self.opts)
+        self.load = {'tgt_type': 'glob', 'tgt': '*'}
+
+    def tearDown(self):
+        del self.channel
+        super(ZMQPubServerChannelPublishTest, self).tearDown()
+
+    def _publish(self, count=1):
+        with patch('salt.crypt.Crypticle') as crypticle, \
+                patch('salt.master.SMaster.secrets',
+                      {'aes': {'secret': MagicMock()}}, create=True):
+            crypticle.return_value.dumps.return_value = b'encrypted load'
+            for _ in range(count):
+                self.channel.publish(self.load)
+
+    def test_publish_reuses_socket(self):
+        with patch('zmq.Context') as context:
+            self._publish(count=3)
+        context.assert_called_once_with(1)
+        sock = context.return_value.socket.return_value
+        sock.connect.assert_called_once_with('ipc:///tmp/publish_pull.ipc')
+        self.assertEqual(sock.send.call_count, 3)
+
+    def test_publish_after_fork(self):
+        with patch('zmq.Context') as context:
+            self._publish()
+            with patch('os.getpid', MagicMock(return_value=-1)):
+                self._publish()
+        self.assertEqual(context.call_count, 2)
+
+    def test_publish_reconnects_on_error(self):
+        with patch('zmq.Context') as context:
+            sock = context.return_value.socket.return_value
+            sock.send.side_effect = [zmq.ZMQError(), None]
+            self._publish()
+        self.assertEqual(sock.connect.call_count, 2)
+        self.assertEqual(sock.send.call_count, 2)
+
+    def test_publish_batch(self):
+        self.opts['zmq_pub_batch_size'] = 3
+        with patch('zmq.Context') as context, \
+                patch('tornado.ioloop.IOLoop.current'):
+            self._publish(count=3)
+        sock = context.return_value.socket.return_value
+        sock.send.assert_called_once()
+        package = self.channel.serial.loads(sock.send.call_args[0][0])
+        self.assertEqual(len(package['batch']), 3)
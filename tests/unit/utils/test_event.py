@@ -292,6 +292,36 @@ class TestSaltEvent(TestCase):
             evt2 = me2.get_event(tag='evt1')
             self.assertGotEvent(evt2, {'data': 'foo1'})
 
+    def test_event_tag_filter_restore(self):
+        '''Test a saved tag filter can be set again'''
+        me = salt.utils.event.MasterEvent(SOCK_DIR, listen=False)
+        me.set_tag_filter(['evt1'], 'startswith')
+        prev_filter = me.tag_filter
+        me.set_tag_filter(['evt2'], 'fnmatch')
+        me.set_tag_filter(prev_filter)
+        self.assertEqual(me.tag_filter, [['evt1', 'startswith']])
+
+    def test_event_tag_filter(self):
+        '''Test the publisher only sends the events matching the tag filter'''
+        with eventpublisher_process():
+            me = salt.utils.event.MasterEvent(SOCK_DIR, listen=True)
+            me.set_tag_filter(['evt1'])
+            me.subscribe('evt3')
+            # Let the publisher read the filter
+            time.sleep(0.5)
+            me.fire_event({'data': 'foo2'}, 'evt2')
+            me.fire_event({'data': 'foo1'}, 'evt1')
+            me.fire_event({'data': 'foo3'}, 'evt3')
+            evt1 = me.get_event()
+            self.assertGotEvent(evt1, {'data': 'foo1'})
+            evt3 = me.get_event()
+            self.assertGotEvent(evt3, {'data': 'foo3'})
+            me.set_tag_filter(None)
+            time.sleep(0.5)
+            me.fire_event({'data': 'foo2'}, 'evt2')
+            evt2 = me.get_event()
+            self.assertGotEvent(evt2, {'data': 'foo2'})
+
     @expectedFailure
     def test_event_nested_sub_all(self):
         '''Test nested event subscriptions do not drop events, get event for all tags'''
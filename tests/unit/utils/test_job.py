@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.utils.job
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+
+# Import Salt testing libs
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import MagicMock, NO_MOCK, NO_MOCK_REASON
+
+# Import Salt libs
+import salt.utils.job
+
+JID = '20170913131527123456'
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class StoreJobTestCase(TestCase):
+    '''
+    Test storing job returns, directly and through the return writer
+    '''
+    def setUp(self):
+        self.opts = {'id': 'master',
+                     'pki_dir': os.path.join(os.sep, 'pki'),
+                     'master_job_cache': 'local_cache',
+                     'job_cache': True,
+                     'job_cache_store_endtime': False}
+        self.returners = {'local_cache.{0}'.format(fun): MagicMock(return_value=True)
+                          for fun in ('prep_jid', 'save_load', 'get_load',
+                                      'returner', 'returner_many')}
+        self.mminion = MagicMock(returners=self.returners)
+
+    def _load(self, minion, jid=JID):
+        return {'jid': jid, 'id': minion, 'fun': 'test.ping', 'return': True}
+
+    def test_store_job_writer(self):
+        '''
+        The writer gets the return once the events are fired, nothing is
+        written by the caller
+        '''
+        event = MagicMock()
+        writer = MagicMock()
+        writer.put.return_value = True
+        salt.utils.job.store_job(self.opts, self._load('minion1'),
+                                 event=event, mminion=self.mminion,
+                                 writer=writer)
+        self.assertTrue(event.fire_event.called)
+        self.assertEqual(writer.put.call_count, 1)
+        self.assertFalse(self.returners['local_cache.prep_jid'].called)
+        self.assertFalse(self.returners['local_cache.returner'].called)
+
+    def test_store_job_writer_full(self):
+        '''
+        The caller writes the return when the writer queue is full
+        '''
+        writer = MagicMock()
+        writer.put.return_value = False
+        load = self._load('minion1')
+        salt.utils.job.store_job(self.opts, load, mminion=self.mminion,
+                                 writer=writer)
+        self.returners['local_cache.prep_jid'].assert_called_once_with(
+            False, passed_jid=JID)
+        self.returners['local_cache.returner'].assert_called_once_with(load)
+
+    def test_store_job_writer_nocache(self):
+        '''
+        Returns which are not cached are not sent to the writer
+        '''
+        self.opts['job_cache'] = False
+        writer = MagicMock()
+        salt.utils.job.store_job(self.opts, self._load('minion1'),
+                                 mminion=self.mminion, writer=writer)
+        self.assertFalse(writer.put.called)
+        self.assertEqual(self.returners['local_cache.prep_jid'].call_count, 1)
+
+    def test_store_jobs(self):
+        '''
+        A batch prepares each jid once and is stored with returner_many
+        '''
+        self.opts['job_cache_store_endtime'] = True
+        self.returners['local_cache.update_endtime'] = MagicMock()
+        other_jid = '20170913131527654321'
+        returns = [(self._load('minion1'), 'end1'),
+                   (self._load('minion2'), 'end2'),
+                   (self._load('minion1', other_jid), 'end3')]
+        salt.utils.job.store_jobs(self.opts, returns, mminion=self.mminion)
+        self.assertEqual(
+            sorted(call[1]['passed_jid'] for call in
+                   self.returners['local_cache.prep_jid'].call_args_list),
+            [JID, other_jid])
+        self.returners['local_cache.returner_many'].assert_called_once_with(
+            [load for load, _ in returns])
+        self.assertFalse(self.returners['local_cache.returner'].called)
+        self.assertEqual(
+            sorted(call[0] for call in
+                   self.returners['local_cache.update_endtime'].call_args_list),
+            [(JID, 'end2'), (other_jid, 'end3')])
+
+    def test_store_jobs_without_returner_many(self):
+        '''
+        Returners without returner_many get the returns one by one
+        '''
+        del self.returners['local_cache.returner_many']
+        returns = [(self._load('minion1'), 'end1'),
+                   (self._load('minion2'), 'end2')]
+        salt.utils.job.store_jobs(self.opts, returns, mminion=self.mminion)
+        self.assertEqual(self.returners['local_cache.prep_jid'].call_count, 1)
+        self.assertEqual(self.returners['local_cache.returner'].call_count, 2)
+
+    def test_store_jobs_partial(self):
+        '''
+        The returns stored before an error are reported
+        '''
+        del self.returners['local_cache.returner_many']
+        self.returners['local_cache.returner'].side_effect = [True, Exception('down')]
+        returns = [(self._load('minion1'), 'end1'),
+                   (self._load('minion2'), 'end2'),
+                   (self._load('minion3'), 'end3')]
+        stored = salt.utils.job.store_jobs(self.opts, returns, mminion=self.mminion)
+        self.assertEqual(stored, returns[:1])
+
+    def test_writer_flush_retries_the_rest(self):
+        '''
+        The writer only stores again the returns of a batch which were not
+        stored
+        '''
+        del self.returners['local_cache.returner_many']
+        self.returners['local_cache.returner'].side_effect = [
+            True, Exception('down'), True, True]
+        self.opts.update({'job_return_writer_batch_size': 10,
+                          'job_return_writer_interval': 1,
+                          'job_return_writer_durability': 'memory'})
+        writer = salt.utils.job.ReturnWriter(self.opts)
+        writer.mminion = self.mminion
+        writer.queue = [{'load': self._load(minion), 'endtime': 'end'}
+                        for minion in ('minion1', 'minion2', 'minion3')]
+        writer.flush()
+        self.assertEqual(
+            [call[0][0]['id'] for call in
+             self.returners['local_cache.returner'].call_args_list],
+            ['minion1', 'minion2', 'minion2', 'minion3'])
+        self.assertEqual(writer.queue, [])
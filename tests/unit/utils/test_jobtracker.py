@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.utils.jobtracker
+'''
+
+# Import python libs
+from __future__ import absolute_import
+
+# Import 3rd-party libs
+import tornado.concurrent
+import tornado.gen
+import tornado.testing
+
+# Import Salt testing libs
+from tests.support.unit import TestCase
+
+# Import Salt libs
+import salt.utils.jobtracker
+
+
+def _ret(jid, minion, ret, **kwargs):
+    data = {'jid': jid, 'id': minion, 'return': ret}
+    data.update(kwargs)
+    return 'salt/job/{0}/ret/{1}'.format(jid, minion), data
+
+
+class JobTrackerTestCase(TestCase):
+    '''
+    Test the state kept for the minions of a job
+    '''
+    def test_find_job_overdue_minions(self):
+        '''
+        Only the minions which did not return in time are checked, no more
+        than batch_size at once
+        '''
+        tracker = salt.utils.jobtracker.JobTracker(
+            '1', ['foo', 'bar', 'baz', 'qux'], 5, 10, batch_size=2, now=0)
+        self.assertEqual(tracker.handle_event(*_ret('1', 'foo', True), now=1), 'foo')
+        self.assertEqual(tracker.due(now=4), [])
+        self.assertEqual(tracker.next_deadline(), 5)
+        self.assertEqual(sorted(tracker.due(now=5)), ['bar', 'baz'])
+        tracker.watch('2', ['bar', 'baz'])
+        # No more slots until the checked minions answer or time out
+        self.assertEqual(tracker.due(now=6), [])
+        self.assertEqual(tracker.next_deadline(), 15)
+        # bar still runs the job, baz does not
+        tracker.handle_event(*_ret('2', 'bar', {'jid': '1'}), now=7)
+        tracker.handle_event(*_ret('2', 'baz', {}), now=7)
+        self.assertEqual(tracker.due(now=7), ['qux'])
+        self.assertFalse(tracker.done(now=7))
+        tracker.watch('3', ['qux'])
+        self.assertEqual(tracker.handle_event(*_ret('1', 'bar', True), now=8), 'bar')
+        self.assertEqual(tracker.due(now=17), [])
+        self.assertTrue(tracker.done(now=17))
+        self.assertEqual(tracker.timed_out, set(['baz', 'qux']))
+        self.assertEqual(tracker.missing, set(['baz', 'qux']))
+
+    def test_find_job_errors(self):
+        '''
+        A minion answering the saltutil.find_job with an error is dropped, the
+        events of the other jobs are ignored
+        '''
+        tracker = salt.utils.jobtracker.JobTracker('1', ['foo'], 5, 10, now=0)
+        self.assertIsNone(tracker.handle_event(*_ret('9', 'foo', True), now=1))
+        self.assertEqual(tracker.due(now=5), ['foo'])
+        tracker.watch('2', ['foo'])
+        tracker.handle_event(*_ret('2', 'foo', 'error', retcode=1), now=6)
+        self.assertTrue(tracker.done(now=6))
+        self.assertEqual(tracker.missing, set())
+
+    def test_syndic_wait(self):
+        '''
+        The minions of the syndics are added until syndic_wait passed
+        '''
+        tracker = salt.utils.jobtracker.JobTracker('1', [], 5, 10, syndic_wait=2, now=0)
+        self.assertFalse(tracker.done(now=1))
+        tracker.handle_event('syndic/master/1', {'minions': ['foo']}, now=1)
+        self.assertEqual(tracker.handle_event(*_ret('1', 'foo', True), now=1), 'foo')
+        self.assertFalse(tracker.done(now=1))
+        self.assertTrue(tracker.done(now=2))
+
+
+class WaitForJobTestCase(tornado.testing.AsyncTestCase):
+    '''
+    Test waiting for a job from a coroutine
+    '''
+    @tornado.testing.gen_test
+    def test_wait_for_job(self):
+        events = [_ret('1', 'foo', True), None]
+        finds = []
+        returns = {}
+
+        def next_event(wait):
+            future = tornado.concurrent.Future()
+            if events:
+                event = events.pop(0)
+                if event is not None:
+                    event = {'tag': event[0], 'data': event[1]}
+                future.set_result(event)
+            else:
+                future.set_exception(tornado.gen.TimeoutError())
+            return future
+
+        def find_job(minions):
+            finds.append(sorted(minions))
+            future = tornado.concurrent.Future()
+            future.set_result({'jid': '2', 'minions': minions})
+            return future
+
+        def add_return(minion, event):
+            returns[minion] = event['data']['return']
+
+        tracker = salt.utils.jobtracker.JobTracker('1', ['foo', 'bar'], 0.01, 0.01)
+        missing = yield salt.utils.jobtracker.wait_for_job(
+            tracker, next_event, find_job, on_return=add_return)
+        self.assertEqual(missing, set(['bar']))
+        self.assertEqual(finds, [['bar']])
+        self.assertEqual(returns, {'foo': True})
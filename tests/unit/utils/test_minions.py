@@ -2,12 +2,16 @@
 
 # Import python libs
 from __future__ import absolute_import
+import copy
 
 # Import Salt Libs
+import salt.utils
 import salt.utils.minions as minions
+from salt.ext import six
 
 # Import Salt Testing Libs
 from tests.support.unit import TestCase
+from tests.support.mock import MagicMock, patch
 
 NODEGROUPS = {
     'group1': 'L@host1,host2,host3',
@@ -36,3 +40,134 @@ class MinionsTestCase(TestCase):
             expected = EXPECTED[nodegroup]
             ret = minions.nodegroup_comp(nodegroup, NODEGROUPS)
             self.assertEqual(ret, expected)
+
+
+MINION_DATA = {
+    'web1': {'grains': {'os': 'Ubuntu',
+                        'roles': ['web', 'db'],
+                        'ip_interfaces': {'eth0': ['10.0.0.1']},
+                        'extra': [{'rack': 'a1'}]},
+             'pillar': {'env': 'prod'}},
+    'db1': {'grains': {'os': 'CentOS',
+                       'roles': ['db'],
+                       'ip_interfaces': {'eth0': ['10.0.0.2']},
+                       'extra': [{'rack': 'b2'}]},
+            'pillar': {'env': 'dev'}},
+    'web2': {'grains': {'os': 'ubuntu',
+                        'roles': 'web',
+                        'ip_interfaces': {}},
+             'pillar': {}},
+}
+
+
+class MinionDataIndexTestCase(TestCase):
+    '''
+    TestCase for salt.utils.minions.MinionDataIndex
+    '''
+    def setUp(self):
+        self.data = copy.deepcopy(MINION_DATA)
+        self.cache = MagicMock()
+        self.cache.driver = 'localfs'
+        self.cache.modules = {'localfs.updated': None}
+        self.cache.list.side_effect = lambda bank: list(self.data)
+        self.cache.updated.side_effect = \
+            lambda bank, key: 1 if bank.split('/')[1] in self.data else None
+        self.cache.fetch.side_effect = \
+            lambda bank, key: self.data[bank.split('/')[1]]
+        self.index = minions.MinionDataIndex(self.cache)
+
+    def test_match_same_as_subdict_match(self):
+        '''
+        The index must give the same results as matching the data of every
+        minion with subdict_match
+        '''
+        self.assertEqual(self.index.refresh(), set(MINION_DATA))
+        exprs = ('os:ubuntu', 'os:Ub*', 'os:*', 'roles:web', 'roles:d?',
+                 'ip_interfaces:eth0', 'ip_interfaces:*',
+                 'ip_interfaces:eth0:10.0.0.*', 'ip_interfaces:*:10.0.0.2',
+                 'extra:rack:a1', 'extra:0:rack:b2', 'missing:foo')
+        for exact_match in (False, True):
+            for expr in exprs:
+                expected = set(
+                    id_ for id_, mdata in six.iteritems(MINION_DATA)
+                    if salt.utils.subdict_match(mdata['grains'],
+                                                expr,
+                                                exact_match=exact_match))
+                self.assertEqual(
+                    self.index.match('grains', expr, ':', exact_match=exact_match),
+                    expected)
+
+    def test_refresh(self):
+        '''
+        Minions removed from or changed in the cache are reindexed
+        '''
+        self.index.refresh()
+        self.assertEqual(self.index.match('pillar', 'env:prod', ':'), set(['web1']))
+        del self.data['web1']
+        self.data['db1']['pillar']['env'] = 'prod'
+        self.cache.updated.side_effect = \
+            lambda bank, key: 2 if bank.split('/')[1] in self.data else None
+        self.assertEqual(self.index.refresh(), set(['db1', 'web2']))
+        self.assertEqual(self.index.match('pillar', 'env:prod', ':'), set(['db1']))
+        self.assertEqual(self.index.match('grains', 'os:ubuntu', ':'), set(['web2']))
+
+    def test_refresh_ttl(self):
+        '''
+        The data of the minions already indexed is only checked again once
+        the ttl expired, new minions are indexed right away
+        '''
+        index = minions.MinionDataIndex(self.cache, ttl=60)
+        with patch('time.time', MagicMock(return_value=1000)):
+            index.refresh()
+        self.assertEqual(self.cache.updated.call_count, len(MINION_DATA))
+        self.cache.updated.reset_mock()
+        self.data['db1']['pillar']['env'] = 'prod'
+        self.data['db2'] = {'grains': {}, 'pillar': {'env': 'prod'}}
+        self.cache.updated.side_effect = \
+            lambda bank, key: 2 if bank.split('/')[1] in self.data else None
+        with patch('time.time', MagicMock(return_value=1030)):
+            self.assertEqual(index.refresh(), set(self.data))
+        self.cache.updated.assert_called_once_with('minions/db2', 'data')
+        self.assertEqual(index.match('pillar', 'env:prod', ':'), set(['web1', 'db2']))
+        with patch('time.time', MagicMock(return_value=1060)):
+            index.refresh()
+        self.assertEqual(index.match('pillar', 'env:prod', ':'),
+                         set(['web1', 'db1', 'db2']))
+
+    def test_update(self):
+        '''
+        Data stored by this process is indexed right away
+        '''
+        self.index.refresh()
+        self.index.update('web2', {'grains': {'os': 'Debian'}, 'pillar': {}})
+        self.assertEqual(self.index.match('grains', 'os:debian', ':'), set(['web2']))
+        self.assertEqual(self.index.match('grains', 'os:ubuntu', ':'), set(['web1']))
+
+    def test_refresh_without_updated(self):
+        '''
+        Cache drivers without timestamps have the data reloaded in bulk
+        '''
+        self.cache.modules = {}
+        self.cache.list_with_data.side_effect = \
+            lambda bank, key, entries: dict((id_, self.data[id_]) for id_ in entries)
+        self.assertEqual(self.index.refresh(), set(MINION_DATA))
+        self.data['web1'] = {'grains': {'os': 'Debian'}}
+        self.index.refresh()
+        self.assertEqual(self.index.match('grains', 'os:debian', ':'), set(['web1']))
+        self.assertEqual(self.index.match('grains', 'os:ubuntu', ':'), set(['web2']))
+
+    def test_default_ttl(self):
+        '''
+        By default the data stored by the other processes is used on the next
+        targeting call
+        '''
+        opts = {'cache': 'test_default_ttl', 'cachedir': ''}
+        self.addCleanup(minions._DATA_INDEXES.pop, ('test_default_ttl', ''), None)
+        index = minions.get_data_index(opts, self.cache)
+        self.assertEqual(index.ttl, 0)
+        index.refresh()
+        self.data['db1']['pillar']['env'] = 'prod'
+        self.cache.updated.side_effect = \
+            lambda bank, key: 2 if bank.split('/')[1] in self.data else None
+        index.refresh()
+        self.assertEqual(index.match('pillar', 'env:prod', ':'), set(['web1', 'db1']))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.utils.presence
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+import time
+
+# Import Salt testing libs
+from tests.support.unit import TestCase
+from tests.support.paths import TMP
+
+# Import Salt libs
+import salt.utils.presence
+
+
+class PresenceTestCase(TestCase):
+    '''
+    Test recording and merging the times the minions were seen
+    '''
+    def setUp(self):
+        if not os.path.isdir(TMP):
+            os.makedirs(TMP)
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.opts = {'cachedir': self.cachedir,
+                     'presence_tracking': True,
+                     'presence_timeout': 300}
+        salt.utils.presence._SEEN.clear()
+
+    def tearDown(self):
+        salt.utils.presence._SEEN.clear()
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def test_disabled(self):
+        '''
+        Nothing is recorded when presence tracking is disabled
+        '''
+        self.opts['presence_tracking'] = False
+        salt.utils.presence.seen(self.opts, 'foo')
+        self.assertEqual(salt.utils.presence.last_seen(self.opts), {})
+
+    def test_flush_keeps_latest(self):
+        '''
+        The flushed times are merged with the ones of the other processes,
+        keeping the latest time of each minion
+        '''
+        salt.utils.presence._SEEN.update({'foo': 100, 'bar': 200})
+        salt.utils.presence.flush(self.opts)
+        self.assertEqual(salt.utils.presence._SEEN, {})
+        salt.utils.presence._SEEN.update({'foo': 50, 'bar': 300, 'baz': 10})
+        salt.utils.presence.flush(self.opts)
+        self.assertEqual(salt.utils.presence.last_seen(self.opts),
+                         {'foo': 100, 'bar': 300, 'baz': 10})
+        self.assertEqual(salt.utils.presence.last_seen(self.opts, ['bar', 'qux']),
+                         {'bar': 300})
+
+    def test_flush_writes_seen(self):
+        '''
+        A flush only writes the minions seen, and the times of the minions
+        without an accepted key are removed
+        '''
+        salt.utils.presence._SEEN.update({'foo': 100, 'bar': 200})
+        salt.utils.presence.flush(self.opts)
+        presence_dir = os.path.join(self.cachedir, 'presence')
+        self.assertEqual(sorted(os.listdir(presence_dir)), ['bar', 'foo'])
+        os.utime(os.path.join(presence_dir, 'bar'), (250, 250))
+        salt.utils.presence._SEEN.update({'foo': 150})
+        salt.utils.presence.flush(self.opts)
+        self.assertEqual(salt.utils.presence.last_seen(self.opts),
+                         {'foo': 150, 'bar': 250})
+        salt.utils.presence.prune(self.opts, ['foo', 'baz'])
+        self.assertEqual(salt.utils.presence.last_seen(self.opts), {'foo': 150})
+
+    def test_forked(self):
+        '''
+        A forked process drops the minions its parent has not saved yet
+        '''
+        salt.utils.presence.seen(self.opts, 'foo')
+        salt.utils.presence._SEEN.pid = -1
+        salt.utils.presence.seen(self.opts, 'bar')
+        self.assertEqual(list(salt.utils.presence.last_seen(self.opts)), ['bar'])
+
+    def test_split(self):
+        '''
+        The minions not seen for presence_timeout seconds are stale
+        '''
+        now = time.time()
+        salt.utils.presence._SEEN.update({'foo': now - 10, 'bar': now - 400})
+        self.assertEqual(
+            salt.utils.presence.split(self.opts, ['qux', 'bar', 'foo'], now=now),
+            (['foo'], ['bar', 'qux']))
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.utils.profiling
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt testing libs
+from tests.support.unit import TestCase
+from tests.support.paths import TMP
+
+# Import Salt libs
+import salt.utils.profiling
+
+
+class ProfilingTestCase(TestCase):
+    '''
+    Test recording and merging the timings
+    '''
+    def setUp(self):
+        if not os.path.isdir(TMP):
+            os.makedirs(TMP)
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.opts = {'cachedir': self.cachedir,
+                     'profiling': True,
+                     'profiling_interval': 60}
+        salt.utils.profiling._STATS.clear()
+
+    def tearDown(self):
+        salt.utils.profiling._STATS.clear()
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def test_disabled(self):
+        '''
+        Nothing is recorded when profiling is disabled
+        '''
+        self.opts['profiling'] = False
+        salt.utils.profiling.record(self.opts, 'function', 'test.ping', 0.5)
+        self.assertEqual(salt.utils.profiling.stats(self.opts), {})
+
+    def test_record(self):
+        '''
+        The count, total, mean and max are computed by name
+        '''
+        salt.utils.profiling.record(self.opts, 'function', 'test.ping', 0.5)
+        salt.utils.profiling.record(self.opts, 'function', 'test.ping', 1.5)
+        salt.utils.profiling.record(self.opts, 'function', 'test.sleep', 3)
+        salt.utils.profiling.record(self.opts, 'load', 'modules.test', 0.1)
+        ret = salt.utils.profiling.stats(self.opts)
+        self.assertEqual(ret['function']['test.ping'],
+                         {'count': 2, 'total': 2.0, 'mean': 1.0, 'max': 1.5})
+        # Sorted by total duration
+        self.assertEqual(list(ret['function']), ['test.sleep', 'test.ping'])
+        self.assertEqual(list(salt.utils.profiling.stats(self.opts, category='load')),
+                         ['load'])
+        self.assertEqual(
+            list(salt.utils.profiling.stats(self.opts, top=1)['function']),
+            ['test.sleep'])
+
+    def test_flush(self):
+        '''
+        The timings of several flushes are merged in the profiling file
+        '''
+        salt.utils.profiling.record(self.opts, 'request', '_return', 1)
+        salt.utils.profiling.flush(self.opts)
+        self.assertEqual(salt.utils.profiling._STATS, {})
+        self.assertTrue(os.path.isfile(os.path.join(self.cachedir, 'profiling.p')))
+        salt.utils.profiling.record(self.opts, 'request', '_return', 3)
+        salt.utils.profiling.flush(self.opts)
+        self.assertEqual(salt.utils.profiling.stats(self.opts)['request']['_return'],
+                         {'count': 2, 'total': 4.0, 'mean': 2.0, 'max': 3.0})
+        self.assertTrue(salt.utils.profiling.reset(self.opts))
+        self.assertEqual(salt.utils.profiling.stats(self.opts), {})
+
+    def test_spool(self):
+        '''
+        The timings of an exiting process are merged by the next flush
+        '''
+        salt.utils.profiling.record(self.opts, 'function', 'test.ping', 1)
+        salt.utils.profiling.spool(self.opts)
+        self.assertEqual(salt.utils.profiling._STATS, {})
+        self.assertFalse(os.path.isfile(os.path.join(self.cachedir, 'profiling.p')))
+        spool_dir = os.path.join(self.cachedir, 'profiling.d')
+        self.assertEqual(len(os.listdir(spool_dir)), 1)
+        self.assertEqual(salt.utils.profiling.stats(self.opts)['function']['test.ping']['count'], 1)
+        salt.utils.profiling.record(self.opts, 'function', 'test.ping', 2)
+        salt.utils.profiling.flush(self.opts)
+        self.assertEqual(os.listdir(spool_dir), [])
+        self.assertEqual(salt.utils.profiling.stats(self.opts)['function']['test.ping'],
+                         {'count': 2, 'total': 3.0, 'mean': 1.5, 'max': 2.0})
+
+    def test_forked(self):
+        '''
+        A forked process drops the timings its parent has not saved yet
+        '''
+        salt.utils.profiling.record(self.opts, 'request', '_return', 1)
+        salt.utils.profiling._STATS.pid = -1
+        salt.utils.profiling.record(self.opts, 'request', '_pillar', 1)
+        self.assertEqual(list(salt.utils.profiling.stats(self.opts)['request']),
+                         ['_pillar'])
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import absolute_import
+import datetime
+import fnmatch
 import time
 import shutil
 import tempfile
@@ -39,6 +41,71 @@ def _args_sideffect(*args, **kwargs):
     return args, kwargs
 
 
+class ReactorMapTestCase(TestCase):
+    '''
+    Test the compiled reactor map
+    '''
+    react_map = [
+        {'salt/job/*/ret/*': ['/srv/reactor/ret.sls']},
+        {'salt/minion/*': '/srv/reactor/minion.sls'},
+        {'salt/auth': ['/srv/reactor/auth.sls']},
+        {'salt/minion/web?/start': ['/srv/reactor/web.sls']},
+        {'*': ['/srv/reactor/all.sls']},
+        {'salt/auth': ['/srv/reactor/auth2.sls']},
+        {'salt/beacon/[ab]*': ['/srv/reactor/beacon.sls']},
+        {'not/a/list': {'a': 'b'}},
+        'not a dict',
+    ]
+
+    def _fnmatch_reactors(self, tag):
+        reactors = []
+        for ropt in self.react_map:
+            if not isinstance(ropt, dict):
+                continue
+            key, val = next(iter(ropt.items()))
+            if fnmatch.fnmatch(tag, key):
+                if isinstance(val, list):
+                    reactors.extend(val)
+                elif isinstance(val, str):
+                    reactors.append(val)
+        return reactors
+
+    def test_match(self):
+        '''
+        The reactors of a tag are the ones found by matching the tag against
+        every tag of the map, in the same order
+        '''
+        reactor_map = reactor.ReactorMap(self.react_map)
+        for tag in ('salt/job/20171018120000000000/ret/web1',
+                    'salt/minion/web1/start',
+                    'salt/minion/web12/start',
+                    'salt/auth',
+                    'salt/beacon/a/inotify',
+                    'salt/beacon/c/inotify',
+                    'salt/job/20171018120000000000/new',
+                    'not/a/list',
+                    ''):
+            self.assertEqual(reactor_map.match(tag), self._fnmatch_reactors(tag), tag)
+
+    def test_tags(self):
+        '''
+        The tags of the map are kept for the tag filter of the reactor
+        '''
+        self.assertEqual(
+            reactor.ReactorMap(self.react_map).tags,
+            ['salt/job/*/ret/*', 'salt/minion/*', 'salt/auth',
+             'salt/minion/web?/start', '*', 'salt/auth', 'salt/beacon/[ab]*'])
+
+    def test_event_age(self):
+        stamp = datetime.datetime.utcnow() - datetime.timedelta(seconds=3)
+        age = reactor.event_age({'_stamp': stamp.isoformat()})
+        self.assertTrue(3 <= age < 13, age)
+        stamp = stamp.replace(microsecond=0)
+        self.assertIsNotNone(reactor.event_age({'_stamp': stamp.isoformat()}))
+        self.assertIsNone(reactor.event_age({}))
+        self.assertIsNone(reactor.event_age({'_stamp': 'yesterday'}))
+
+
 @skipIf(True, 'Skipping until its clear what and how is this supposed to be testing')
 class TestReactor(TestCase, AdaptedConfigurationTestCaseMixin):
     def setUp(self):
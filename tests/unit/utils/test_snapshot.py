@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.utils.snapshot
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import stat
+import tempfile
+
+# Import Salt testing libs
+from tests.support.unit import skipIf, TestCase
+from tests.support.paths import TMP
+
+# Import Salt libs
+import salt.utils.files
+import salt.utils.platform
+import salt.utils.snapshot
+
+
+class SnapshotTestCase(TestCase):
+    '''
+    Test the snapshots of masterless minions
+    '''
+    def setUp(self):
+        if not os.path.isdir(TMP):
+            os.makedirs(TMP)
+        self.tmpdir = tempfile.mkdtemp(dir=TMP)
+        self.pillar_root = os.path.join(self.tmpdir, 'pillar')
+        os.makedirs(self.pillar_root)
+        self._write('top.sls', "base:\n  '*':\n    - foo\n")
+        self.opts = {'cachedir': os.path.join(self.tmpdir, 'cache'),
+                     'local_snapshot': True,
+                     'file_client': 'local',
+                     'id': 'minion',
+                     'grains': {'os': 'Linux'},
+                     'pillar_roots': {'base': [self.pillar_root]},
+                     'ext_pillar': []}
+        self.compiled = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write(self, name, content):
+        with salt.utils.files.fopen(os.path.join(self.pillar_root, name), 'w') as fp_:
+            fp_.write(content)
+
+    def _compile(self):
+        self.compiled += 1
+        return {'foo': 'bar'}
+
+    def test_pillar_reused(self):
+        '''
+        The pillar is compiled once when nothing changes
+        '''
+        for _ in range(2):
+            self.assertEqual(
+                salt.utils.snapshot.pillar(self.opts, self._compile),
+                {'foo': 'bar'})
+        self.assertEqual(self.compiled, 1)
+
+    def test_pillar_changed(self):
+        '''
+        The pillar is compiled again when the files, the config or the grains
+        change
+        '''
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self._write('foo.sls', 'foo: bar\n')
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 2)
+        self.opts['pillarenv'] = 'dev'
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 3)
+        self.opts['grains'] = {'os': 'Windows'}
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 4)
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 4)
+
+    def test_pillar_unsupported(self):
+        '''
+        The pillar is always compiled with external pillars or without a
+        local file client
+        '''
+        self.opts['ext_pillar'] = [{'cmd_yaml': 'cat /etc/pillar.yml'}]
+        for _ in range(2):
+            salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 2)
+        self.opts['ext_pillar'] = []
+        self.opts['file_client'] = 'remote'
+        for _ in range(2):
+            salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 4)
+
+    def test_pillar_secrets(self):
+        '''
+        The pillar with decrypted secrets is never stored
+        '''
+        self.opts['decrypt_pillar'] = ['secrets']
+        for _ in range(2):
+            salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 2)
+        self.opts['decrypt_pillar'] = []
+        self._write('foo.sls', '#!yaml|gpg\nfoo: bar\n')
+        for _ in range(2):
+            salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 4)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.opts['cachedir'], 'snapshot', 'pillar.p')))
+
+    @skipIf(salt.utils.platform.is_windows(), 'No POSIX file modes on Windows')
+    def test_file_mode(self):
+        '''
+        The snapshots are only readable by their owner
+        '''
+        path = os.path.join(self.opts['cachedir'], 'snapshot', 'pillar.p')
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        os.chmod(path, 0o644)
+        self._write('foo.sls', 'foo: bar\n')
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_clear(self):
+        '''
+        Clearing removes the snapshots
+        '''
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(salt.utils.snapshot.clear(self.opts),
+                         [os.path.join('snapshot', 'pillar.p')])
+        salt.utils.snapshot.pillar(self.opts, self._compile)
+        self.assertEqual(self.compiled, 2)